@@ -5,15 +5,16 @@ from __future__ import annotations
 
 import argparse
 import csv
-import json
 import re
-import unicodedata
 from collections import Counter, defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List, Mapping, MutableMapping, Sequence, Set, Tuple
 
-import openpyxl
+from corpus_scan import CorpusAggregator, CorpusRow, normalize_ascii, scan_corpus, tokenize
+from jsonl_shards import DEFAULT_SHARD_BYTES
+from token_automaton import TokenAutomaton
+from workbook_io import PhaseTimings, SheetRows, iter_sheet_values, open_workbook_read_only, write_workbook
 
 
 ALLERGEN_KEY_BY_WORKBOOK: Mapping[str, str] = {
@@ -46,6 +47,9 @@ DEFAULT_DATASET_FILES: Sequence[str] = (
     "ml/data/processed/usda_only_holdout.jsonl",
     "ml/data/processed/openfoodfacts_targeted_examples.jsonl",
 )
+DEFAULT_CSV_OUTPUT_DIR = "ml/data/analysis"
+DEFAULT_MIN_ADDED_TARGET_ROWS = 10
+DEFAULT_MIN_ADDED_PRECISION = 0.70
 
 MANUAL_EXPANSIONS: Mapping[str, Sequence[str]] = {
     "milk": (
@@ -190,8 +194,6 @@ MANUAL_EXPANSIONS: Mapping[str, Sequence[str]] = {
     ),
 }
 
-TERM_IDS_KEY = "__term_ids__"
-TEXT_TOKEN_RE = re.compile(r"[a-z0-9]+")
 PAREN_RE = re.compile(r"\(([^()]*)\)")
 PAREN_SPLIT_RE = re.compile(r"[,/;]")
 PAREN_STRIP_PREFIX_RE = re.compile(
@@ -247,6 +249,11 @@ class TermStats:
     rows_with_target_allergen: int = 0
     mentions_total: int = 0
 
+    def merge(self, other: "TermStats") -> None:
+        self.rows_matched += other.rows_matched
+        self.rows_with_target_allergen += other.rows_with_target_allergen
+        self.mentions_total += other.mentions_total
+
 
 @dataclass
 class AllergenSummary:
@@ -259,6 +266,12 @@ class AllergenSummary:
         if self.unique_term_ids is None:
             self.unique_term_ids = set()
 
+    def merge(self, other: "AllergenSummary") -> None:
+        self.labeled_rows += other.labeled_rows
+        self.labeled_rows_with_term += other.labeled_rows_with_term
+        self.term_mentions += other.term_mentions
+        self.unique_term_ids.update(other.unique_term_ids or ())
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Expand allergen ingredient names and compute term frequencies.")
@@ -280,19 +293,19 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--csv-output-dir",
-        default="ml/data/analysis",
+        default=DEFAULT_CSV_OUTPUT_DIR,
         help="Directory for CSV analysis outputs.",
     )
     parser.add_argument(
         "--min-added-target-rows",
         type=int,
-        default=10,
+        default=DEFAULT_MIN_ADDED_TARGET_ROWS,
         help="Minimum target-allergen row matches required before adding a new term to workbook map.",
     )
     parser.add_argument(
         "--min-added-precision",
         type=float,
-        default=0.70,
+        default=DEFAULT_MIN_ADDED_PRECISION,
         help="Minimum precision (target matches / matched rows) for added workbook terms.",
     )
     parser.add_argument(
@@ -300,18 +313,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="If set, allow parenthetical auto-expansion terms to be appended to workbook map.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for the dataset scan (0 or 1 = scan in-process).",
+    )
+    parser.add_argument(
+        "--shard-mb",
+        type=float,
+        default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+        help="Dataset bytes per shard handed to each scan worker.",
+    )
     return parser.parse_args()
 
 
-def normalize_ascii(value: str) -> str:
-    return unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
-
-
-def tokenize_text(value: str) -> List[str]:
-    safe = normalize_ascii(value).lower()
-    return TEXT_TOKEN_RE.findall(safe)
-
-
 def normalize_display_term(value: str) -> str:
     safe = normalize_ascii(value or "")
     safe = safe.replace("®", "").replace("™", "")
@@ -328,25 +344,6 @@ def clean_parenthetical_fragment(fragment: str) -> str:
     return safe
 
 
-def allergen_key_from_label(value: str) -> str:
-    safe = (value or "").strip().lower().replace("-", " ")
-    safe = re.sub(r"\s+", " ", safe)
-    mapping = {
-        "milk": "milk",
-        "egg": "egg",
-        "peanut": "peanut",
-        "tree nut": "tree nut",
-        "tree nuts": "tree nut",
-        "wheat": "wheat",
-        "soy": "soy",
-        "fish": "fish",
-        "shellfish": "shellfish",
-        "crustacean shellfish": "shellfish",
-        "sesame": "sesame",
-    }
-    return mapping.get(safe, "")
-
-
 def split_slash_aliases(value: str) -> List[str]:
     parts = [part.strip() for part in re.split(r"\s*/\s*", value or "") if part.strip()]
     return parts
@@ -361,7 +358,7 @@ def base_alias_without_parentheses(alias: str) -> str:
 def parenthetical_expansion_candidates(alias: str) -> Set[str]:
     out: Set[str] = set()
     base = base_alias_without_parentheses(alias)
-    base_tokens = tokenize_text(base)
+    base_tokens = tokenize(base)
     if not base_tokens:
         return out
 
@@ -371,7 +368,7 @@ def parenthetical_expansion_candidates(alias: str) -> Set[str]:
             piece = clean_parenthetical_fragment(raw_piece)
             if not piece:
                 continue
-            piece_tokens = tokenize_text(piece)
+            piece_tokens = tokenize(piece)
             if not piece_tokens or len(piece_tokens) > 5:
                 continue
             lower_piece = piece.lower()
@@ -396,7 +393,7 @@ def add_term_entry(
     source_origin: str,
 ) -> None:
     display = normalize_display_term(term_display)
-    tokens = tuple(tokenize_text(display))
+    tokens = tuple(tokenize(display))
     if not tokens:
         return
 
@@ -419,19 +416,25 @@ def add_term_entry(
     seen_tokens[key] = term_id
 
 
-def build_term_inventory(workbook_path: Path) -> Tuple[openpyxl.Workbook, List[TermEntry], Set[Tuple[str, Tuple[str, ...]]]]:
-    workbook = openpyxl.load_workbook(workbook_path)
-    if "Allergen-Ingredient Map" not in workbook.sheetnames:
-        raise ValueError("Workbook is missing required sheet: Allergen-Ingredient Map")
-    ws_map = workbook["Allergen-Ingredient Map"]
+def build_term_inventory(workbook_path: Path) -> Tuple[List[TermEntry], Set[Tuple[str, Tuple[str, ...]]]]:
+    workbook = open_workbook_read_only(workbook_path)
+    try:
+        if "Allergen-Ingredient Map" not in workbook.sheetnames:
+            raise ValueError("Workbook is missing required sheet: Allergen-Ingredient Map")
+        map_rows = [
+            (tuple(values) + (None, None))[:2]
+            for _row, values in iter_sheet_values(workbook, "Allergen-Ingredient Map", max_col=2)
+        ]
+    finally:
+        workbook.close()
 
     entries: List[TermEntry] = []
     seen_tokens: Dict[Tuple[str, Tuple[str, ...]], int] = {}
     existing_token_keys: Set[Tuple[str, Tuple[str, ...]]] = set()
 
-    for row in range(2, ws_map.max_row + 1):
-        workbook_allergen = normalize_display_term(str(ws_map.cell(row=row, column=1).value or ""))
-        raw_alias = str(ws_map.cell(row=row, column=2).value or "").strip()
+    for allergen_raw, alias_raw in map_rows:
+        workbook_allergen = normalize_display_term(str(allergen_raw or ""))
+        raw_alias = str(alias_raw or "").strip()
         if not workbook_allergen or not raw_alias:
             continue
 
@@ -450,7 +453,7 @@ def build_term_inventory(workbook_path: Path) -> Tuple[openpyxl.Workbook, List[T
                     source_type="existing",
                     source_origin=alias_part,
                 )
-                existing_token_keys.add((allergen_key, tuple(tokenize_text(base_term))))
+                existing_token_keys.add((allergen_key, tuple(tokenize(base_term))))
 
             for expanded_term in parenthetical_expansion_candidates(alias_part):
                 add_term_entry(
@@ -475,112 +478,110 @@ def build_term_inventory(workbook_path: Path) -> Tuple[openpyxl.Workbook, List[T
                 source_origin="manual_expansion_seed",
             )
 
-    return workbook, entries, existing_token_keys
+    return entries, existing_token_keys
 
 
-def build_term_trie(entries: Sequence[TermEntry]) -> Dict[str, object]:
-    root: Dict[str, object] = {}
-    for entry in entries:
-        node: Dict[str, object] = root
-        for token in entry.term_tokens:
-            child = node.get(token)
-            if not isinstance(child, dict):
-                child = {}
-                node[token] = child
-            node = child
-        ids = node.get(TERM_IDS_KEY)
-        if not isinstance(ids, list):
-            ids = []
-            node[TERM_IDS_KEY] = ids
-        ids.append(entry.term_id)
-    return root
-
-
-def match_terms(tokens: Sequence[str], trie: Mapping[str, object]) -> Counter:
-    found: Counter = Counter()
-    token_count = len(tokens)
-    for start_idx in range(token_count):
-        first = tokens[start_idx]
-        node = trie.get(first)
-        if not isinstance(node, dict):
-            continue
+def build_term_automaton(entries: Sequence[TermEntry]) -> TokenAutomaton:
+    return TokenAutomaton.build((entry.term_id, entry.term_tokens) for entry in entries)
+
 
-        ids = node.get(TERM_IDS_KEY)
-        if isinstance(ids, list):
-            for term_id in ids:
-                found[term_id] += 1
-
-        idx = start_idx + 1
-        while idx < token_count:
-            next_node = node.get(tokens[idx])
-            if not isinstance(next_node, dict):
-                break
-            node = next_node
-            ids = node.get(TERM_IDS_KEY)
-            if isinstance(ids, list):
-                for term_id in ids:
-                    found[term_id] += 1
-            idx += 1
-    return found
-
-
-def scan_datasets(dataset_paths: Sequence[Path], entries: Sequence[TermEntry]) -> Tuple[int, Dict[int, TermStats], Dict[str, AllergenSummary]]:
-    trie = build_term_trie(entries)
-    stats_by_term_id: Dict[int, TermStats] = {entry.term_id: TermStats() for entry in entries}
-    allergen_summary: Dict[str, AllergenSummary] = {key: AllergenSummary() for key in ALLERGEN_ORDER}
-
-    total_rows = 0
-
-    for dataset_path in dataset_paths:
-        with dataset_path.open("r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.strip()
-                if not line:
-                    continue
-                payload = json.loads(line)
-                if not isinstance(payload, dict):
-                    continue
-
-                total_rows += 1
-                text = str(payload.get("text") or "")
-                labels = {
-                    allergen_key_from_label(str(item))
-                    for item in (payload.get("allergens") or [])
-                    if allergen_key_from_label(str(item))
-                }
-
-                for allergen_key in labels:
-                    if allergen_key in allergen_summary:
-                        allergen_summary[allergen_key].labeled_rows += 1
-
-                tokens = tokenize_text(text)
-                if not tokens:
-                    continue
-
-                matched_term_counts = match_terms(tokens, trie)
-                if not matched_term_counts:
-                    continue
-
-                matched_by_allergen: Set[str] = set()
-
-                for term_id, mentions in matched_term_counts.items():
-                    entry = entries[term_id]
-                    stat = stats_by_term_id[term_id]
-                    stat.rows_matched += 1
-                    stat.mentions_total += int(mentions)
-                    if entry.allergen_key in labels:
-                        stat.rows_with_target_allergen += 1
-                    matched_by_allergen.add(entry.allergen_key)
-
-                    summary = allergen_summary[entry.allergen_key]
-                    summary.term_mentions += int(mentions)
-                    summary.unique_term_ids.add(term_id)
-
-                for allergen_key in labels:
-                    if allergen_key in matched_by_allergen:
-                        allergen_summary[allergen_key].labeled_rows_with_term += 1
-
-    return total_rows, stats_by_term_id, allergen_summary
+def match_terms(tokens: Sequence[str], automaton: TokenAutomaton) -> Counter:
+    return automaton.count_matches(tokens)
+
+
+@dataclass
+class TermScan:
+    total_rows: int = 0
+    # Only terms matched at least once; term_scan_result fills in the rest.
+    stats_by_term_id: Dict[int, TermStats] | None = None
+    allergen_summary: Dict[str, AllergenSummary] | None = None
+
+    def __post_init__(self) -> None:
+        if self.stats_by_term_id is None:
+            self.stats_by_term_id = {}
+        if self.allergen_summary is None:
+            self.allergen_summary = {key: AllergenSummary() for key in ALLERGEN_ORDER}
+
+
+class TermFrequencyAggregator(CorpusAggregator):
+    """Term match counts and per-allergen coverage, as a :mod:`corpus_scan` aggregator."""
+
+    def __init__(self, entries: Sequence[TermEntry]) -> None:
+        self.entries = entries
+        self.automaton = build_term_automaton(entries)
+
+    def new_state(self) -> TermScan:
+        return TermScan()
+
+    def add_row(self, state: TermScan, row: CorpusRow) -> None:
+        state.total_rows += 1
+        labels = row.labels
+        allergen_summary = state.allergen_summary
+        for allergen_key in labels:
+            if allergen_key in allergen_summary:
+                allergen_summary[allergen_key].labeled_rows += 1
+
+        tokens = row.tokens
+        if not tokens:
+            return
+
+        matched_term_counts = match_terms(tokens, self.automaton)
+        if not matched_term_counts:
+            return
+
+        matched_by_allergen: Set[str] = set()
+        stats_by_term_id = state.stats_by_term_id
+        for term_id, mentions in matched_term_counts.items():
+            entry = self.entries[term_id]
+            stat = stats_by_term_id.get(term_id)
+            if stat is None:
+                stat = stats_by_term_id[term_id] = TermStats()
+            stat.rows_matched += 1
+            stat.mentions_total += int(mentions)
+            if entry.allergen_key in labels:
+                stat.rows_with_target_allergen += 1
+            matched_by_allergen.add(entry.allergen_key)
+
+            summary = allergen_summary[entry.allergen_key]
+            summary.term_mentions += int(mentions)
+            summary.unique_term_ids.add(term_id)
+
+        for allergen_key in labels:
+            if allergen_key in matched_by_allergen:
+                allergen_summary[allergen_key].labeled_rows_with_term += 1
+
+    def merge(self, state: TermScan, partial: TermScan) -> TermScan:
+        state.total_rows += partial.total_rows
+        for term_id, stat in partial.stats_by_term_id.items():
+            state.stats_by_term_id.setdefault(term_id, TermStats()).merge(stat)
+        for allergen_key, summary in partial.allergen_summary.items():
+            state.allergen_summary[allergen_key].merge(summary)
+        return state
+
+
+def term_scan_result(
+    entries: Sequence[TermEntry],
+    scan: TermScan,
+) -> Tuple[int, Dict[int, TermStats], Dict[str, AllergenSummary]]:
+    """``(total_rows, stats for every term, allergen summary)`` from a finished scan."""
+    stats_by_term_id = {entry.term_id: scan.stats_by_term_id.get(entry.term_id) or TermStats() for entry in entries}
+    return scan.total_rows, stats_by_term_id, scan.allergen_summary
+
+
+def scan_datasets(
+    dataset_paths: Sequence[Path],
+    entries: Sequence[TermEntry],
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Tuple[int, Dict[int, TermStats], Dict[str, AllergenSummary]]:
+    """Term and allergen frequencies over the datasets.
+
+    With ``workers`` > 1 the datasets are split into ``shard_bytes`` line-aligned
+    ranges scanned in a process pool; the shard results are merged in input
+    order and match the in-process scan exactly.
+    """
+    (scan,) = scan_corpus(dataset_paths, [TermFrequencyAggregator(entries)], workers, shard_bytes)
+    return term_scan_result(entries, scan)
 
 
 def term_sort_key(entry: TermEntry, stat: TermStats) -> Tuple[int, int, int, str]:
@@ -735,20 +736,12 @@ def write_new_terms_csv(output_path: Path, selected: Sequence[Tuple[TermEntry, T
             )
 
 
-def rebuild_sheet(workbook: openpyxl.Workbook, sheet_name: str) -> openpyxl.worksheet.worksheet.Worksheet:
-    if sheet_name in workbook.sheetnames:
-        old = workbook[sheet_name]
-        workbook.remove(old)
-    return workbook.create_sheet(sheet_name)
-
-
 def populate_frequency_sheet(
-    workbook: openpyxl.Workbook,
     entries: Sequence[TermEntry],
     stats_by_term_id: Mapping[int, TermStats],
     total_rows: int,
-) -> None:
-    ws = rebuild_sheet(workbook, "Ingredient Frequency")
+) -> SheetRows:
+    ws = SheetRows("Ingredient Frequency")
     ws.append(
         [
             "Allergen",
@@ -783,10 +776,11 @@ def populate_frequency_sheet(
             ]
         )
     ws.freeze_panes = "A2"
+    return ws
 
 
-def populate_allergen_summary_sheet(workbook: openpyxl.Workbook, summary: Mapping[str, AllergenSummary]) -> None:
-    ws = rebuild_sheet(workbook, "Allergen Frequency Summary")
+def populate_allergen_summary_sheet(summary: Mapping[str, AllergenSummary]) -> SheetRows:
+    ws = SheetRows("Allergen Frequency Summary")
     ws.append(
         [
             "Allergen",
@@ -812,16 +806,15 @@ def populate_allergen_summary_sheet(workbook: openpyxl.Workbook, summary: Mappin
             ]
         )
     ws.freeze_panes = "A2"
+    return ws
 
 
-def append_new_terms_to_map_sheet(
-    workbook: openpyxl.Workbook,
-    selected_terms: Sequence[Tuple[TermEntry, TermStats]],
-) -> None:
-    ws_map = workbook["Allergen-Ingredient Map"]
+def new_map_sheet_rows(selected_terms: Sequence[Tuple[TermEntry, TermStats]]) -> List[List[object]]:
+    """Rows appended to the Allergen-Ingredient Map sheet for the selected new terms."""
+    rows: List[List[object]] = []
     for entry, stat in selected_terms:
         precision = (100.0 * stat.rows_with_target_allergen / stat.rows_matched) if stat.rows_matched else 0.0
-        ws_map.append(
+        rows.append(
             [
                 entry.allergen_name,
                 entry.term_display,
@@ -830,6 +823,63 @@ def append_new_terms_to_map_sheet(
                 "Auto-generated from existing workbook terms + processed ingredient-label datasets",
             ]
         )
+    return rows
+
+
+def write_term_analysis(
+    workbook_input: Path,
+    workbook_output: Path,
+    csv_output_dir: Path,
+    entries: Sequence[TermEntry],
+    existing_token_keys: Set[Tuple[str, Tuple[str, ...]]],
+    scan_result: Tuple[int, Dict[int, TermStats], Dict[str, AllergenSummary]],
+    min_target_rows: int = DEFAULT_MIN_ADDED_TARGET_ROWS,
+    min_precision: float = DEFAULT_MIN_ADDED_PRECISION,
+    include_parenthetical_additions: bool = False,
+    timings: PhaseTimings | None = None,
+) -> Tuple[List[Tuple[TermEntry, TermStats]], Dict[str, Path]]:
+    """Write the frequency CSVs and the updated workbook from a finished scan.
+
+    Shared with ``build_allergen_lexicon_v2.py``, which can fill
+    ``scan_result`` during its own corpus pass. Returns the selected new
+    workbook terms and the written paths.
+    """
+    total_rows, stats_by_term_id, allergen_summary = scan_result
+    selected_terms = select_new_workbook_terms(
+        entries=entries,
+        stats_by_term_id=stats_by_term_id,
+        existing_token_keys=existing_token_keys,
+        min_target_rows=min_target_rows,
+        min_precision=min_precision,
+        include_parenthetical_additions=include_parenthetical_additions,
+    )
+
+    csv_output_dir.mkdir(parents=True, exist_ok=True)
+    written = {
+        "term_frequency_csv": csv_output_dir / "allergen_ingredient_term_frequency.csv",
+        "allergen_summary_csv": csv_output_dir / "allergen_frequency_summary.csv",
+        "new_terms_csv": csv_output_dir / "allergen_new_terms_added.csv",
+        "workbook": workbook_output,
+    }
+    write_term_frequency_csv(written["term_frequency_csv"], entries, stats_by_term_id, total_rows)
+    write_allergen_summary_csv(written["allergen_summary_csv"], allergen_summary)
+    write_new_terms_csv(written["new_terms_csv"], selected_terms)
+    if timings:
+        timings.lap("csv")
+
+    workbook_output.parent.mkdir(parents=True, exist_ok=True)
+    write_workbook(
+        workbook_input,
+        workbook_output,
+        [
+            populate_frequency_sheet(entries, stats_by_term_id, total_rows),
+            populate_allergen_summary_sheet(allergen_summary),
+        ],
+        appended_rows={"Allergen-Ingredient Map": new_map_sheet_rows(selected_terms)},
+    )
+    if timings:
+        timings.lap("workbook")
+    return selected_terms, written
 
 
 def resolve_dataset_paths(args_dataset: Sequence[str], repo_root: Path) -> List[Path]:
@@ -857,54 +907,49 @@ def main() -> int:
         return 1
 
     dataset_paths = resolve_dataset_paths(args.dataset, repo_root)
-    workbook, entries, existing_token_keys = build_term_inventory(workbook_input)
-
-    total_rows, stats_by_term_id, allergen_summary = scan_datasets(dataset_paths, entries)
-
-    selected_terms = select_new_workbook_terms(
-        entries=entries,
-        stats_by_term_id=stats_by_term_id,
-        existing_token_keys=existing_token_keys,
-        min_target_rows=int(args.min_added_target_rows),
-        min_precision=float(args.min_added_precision),
-        include_parenthetical_additions=bool(args.include_parenthetical_additions),
+    timings = PhaseTimings()
+    entries, existing_token_keys = build_term_inventory(workbook_input)
+    timings.lap("ingest")
+
+    total_rows, stats_by_term_id, allergen_summary = scan_datasets(
+        dataset_paths,
+        entries,
+        workers=max(0, int(args.workers)),
+        shard_bytes=max(1, int(float(args.shard_mb) * 1024 * 1024)),
     )
+    timings.lap("scan")
 
     csv_output_dir = Path(args.csv_output_dir)
     if not csv_output_dir.is_absolute():
         csv_output_dir = repo_root / csv_output_dir
-    csv_output_dir.mkdir(parents=True, exist_ok=True)
-
-    term_csv = csv_output_dir / "allergen_ingredient_term_frequency.csv"
-    summary_csv = csv_output_dir / "allergen_frequency_summary.csv"
-    new_terms_csv = csv_output_dir / "allergen_new_terms_added.csv"
-
-    write_term_frequency_csv(term_csv, entries, stats_by_term_id, total_rows)
-    write_allergen_summary_csv(summary_csv, allergen_summary)
-    write_new_terms_csv(new_terms_csv, selected_terms)
-
-    append_new_terms_to_map_sheet(workbook, selected_terms)
-    populate_frequency_sheet(workbook, entries, stats_by_term_id, total_rows)
-    populate_allergen_summary_sheet(workbook, allergen_summary)
-
-    workbook_output = Path(args.workbook_output)
-    workbook_output.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(workbook_output)
+    selected_terms, written = write_term_analysis(
+        workbook_input,
+        Path(args.workbook_output),
+        csv_output_dir,
+        entries,
+        existing_token_keys,
+        (total_rows, stats_by_term_id, allergen_summary),
+        min_target_rows=int(args.min_added_target_rows),
+        min_precision=float(args.min_added_precision),
+        include_parenthetical_additions=bool(args.include_parenthetical_additions),
+        timings=timings,
+    )
 
     existing_count = sum(1 for entry in entries if entry.source_type == "existing")
     expanded_count = len(entries) - existing_count
     matched_term_count = sum(1 for entry in entries if stats_by_term_id[entry.term_id].rows_matched > 0)
 
     print(f"Workbook input: {workbook_input}")
-    print(f"Workbook output: {workbook_output}")
+    print(f"Workbook output: {written['workbook']}")
     print(f"Dataset rows scanned: {total_rows}")
     print(f"Existing terms: {existing_count}")
     print(f"Expanded candidate terms: {expanded_count}")
     print(f"Terms matched in dataset: {matched_term_count}")
     print(f"New workbook rows added: {len(selected_terms)}")
-    print(f"Term frequency CSV: {term_csv}")
-    print(f"Allergen summary CSV: {summary_csv}")
-    print(f"New terms CSV: {new_terms_csv}")
+    print(f"Term frequency CSV: {written['term_frequency_csv']}")
+    print(f"Allergen summary CSV: {written['allergen_summary_csv']}")
+    print(f"New terms CSV: {written['new_terms_csv']}")
+    print(f"Phase timings: {timings.summary()}")
 
     return 0
 
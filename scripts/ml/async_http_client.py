@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+"""Asyncio HTTP/1.1 client with keep-alive pools and per-host AIMD concurrency control."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import http.client
+import random
+import ssl
+import sys
+import time
+import urllib.parse
+import zlib
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from http_client import REDIRECT_STATUSES, RETRYABLE_STATUSES
+
+
+DEFAULT_TIMEOUT = 20.0
+DEFAULT_MAX_IDLE_PER_HOST = 8
+DEFAULT_INITIAL_PER_HOST = 2
+DEFAULT_MAX_PER_HOST = 6
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 30.0
+MAX_REDIRECTS = 5
+# Statuses that mean "slow down" rather than "this URL is broken".
+CONGESTION_STATUSES = frozenset({429, 502, 503, 504})
+
+# EOFError covers asyncio.IncompleteReadError; OSError covers timeouts, resets and TLS errors.
+TRANSPORT_ERRORS: Tuple[type, ...] = (OSError, EOFError, http.client.HTTPException)
+
+PoolKey = Tuple[str, str, int]
+
+
+class ProtocolError(http.client.HTTPException):
+    """The server sent something that is not a well-formed HTTP/1.x response."""
+
+
+class AsyncHttpResponse:
+    __slots__ = ("status", "reason", "headers", "body", "url")
+
+    def __init__(self, status: int, reason: str, headers: Dict[str, str], body: bytes, url: str) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.url = url
+
+    def charset(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for part in content_type.split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                return value.strip('"')
+        return "utf-8"
+
+    def text(self) -> str:
+        try:
+            return self.body.decode(self.charset(), "ignore")
+        except LookupError:
+            return self.body.decode("utf-8", "ignore")
+
+
+class _Connection:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def decode_body(body: bytes, content_encoding: str) -> bytes:
+    """Undo gzip/deflate content coding; a corrupt body raises :class:`ProtocolError`."""
+    encoding = content_encoding.strip().lower()
+    if not body:
+        return body
+    try:
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+    except (zlib.error, EOFError, gzip.BadGzipFile) as error:
+        raise ProtocolError(f"corrupt {encoding} body: {error}") from error
+    return body
+
+
+class AsyncHttpClient:
+    """Single-attempt HTTP/1.1 requests over pooled keep-alive connections.
+
+    Redirects are followed; every other status is returned to the caller, which
+    decides what to retry. ``connect_overrides`` maps a ``host[:port]`` to an
+    ``http://ip:port`` origin to dial instead (the ``Host`` header is unchanged),
+    which is how tests point hard-coded vendor hosts at local fixture servers.
+    """
+
+    def __init__(
+        self,
+        *,
+        user_agent: str = "",
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        connect_overrides: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self.user_agent = user_agent
+        self.timeout = float(timeout)
+        self.max_idle_per_host = max(0, int(max_idle_per_host))
+        self.connect_overrides = dict(connect_overrides or {})
+        self.ssl_context = ssl.create_default_context()
+        self._idle: Dict[PoolKey, List[_Connection]] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _endpoint(self, parts: urllib.parse.SplitResult) -> Tuple[PoolKey, bool]:
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"unsupported URL: {urllib.parse.urlunsplit(parts)}")
+        override = self.connect_overrides.get(parts.netloc.lower())
+        if override:
+            target = urllib.parse.urlsplit(override)
+            return ("http", target.hostname or "127.0.0.1", target.port or 80), False
+        port = parts.port or (443 if scheme == "https" else 80)
+        return (scheme, parts.hostname, port), scheme == "https"
+
+    async def _connect(self, key: PoolKey, use_tls: bool, server_hostname: str) -> _Connection:
+        self.stats["connections_opened"] += 1
+        _scheme, host, port = key
+        if use_tls:
+            reader, writer = await asyncio.open_connection(
+                host, port, ssl=self.ssl_context, server_hostname=server_hostname
+            )
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return _Connection(reader, writer)
+
+    def _take_idle(self, key: PoolKey) -> Optional[_Connection]:
+        connections = self._idle.get(key)
+        while connections:
+            connection = connections.pop()
+            if connection.usable():
+                self.stats["connections_reused"] += 1
+                return connection
+            connection.close()
+        return None
+
+    def _release(self, key: PoolKey, connection: _Connection) -> None:
+        connections = self._idle.setdefault(key, [])
+        if len(connections) < self.max_idle_per_host and connection.usable():
+            connections.append(connection)
+        else:
+            connection.close()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        data: Optional[bytes] = None,
+    ) -> AsyncHttpResponse:
+        """Send one request, following redirects, within ``timeout`` seconds overall."""
+        return await asyncio.wait_for(self._request(method, url, dict(headers or {}), data), self.timeout)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        data: Optional[bytes],
+    ) -> AsyncHttpResponse:
+        target_url = url
+        for _hop in range(MAX_REDIRECTS + 1):
+            response = await self._send_once(method, target_url, headers, data)
+            location = response.headers.get("location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            target_url = urllib.parse.urljoin(target_url, location)
+            if response.status in (301, 302, 303) and method.upper() != "HEAD":
+                method, data = "GET", None
+        raise ProtocolError(f"too many redirects for {url}")
+
+    async def _send_once(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        data: Optional[bytes],
+    ) -> AsyncHttpResponse:
+        parts = urllib.parse.urlsplit(url)
+        key, use_tls = self._endpoint(parts)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        request_headers = {"Host": parts.netloc, "Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        if self.user_agent:
+            request_headers["User-Agent"] = self.user_agent
+        request_headers.update(headers)
+        if data is not None:
+            request_headers["Content-Length"] = str(len(data))
+        head = f"{method.upper()} {target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()
+        )
+        payload = head.encode("latin-1") + b"\r\n" + (data or b"")
+
+        self.stats["requests"] += 1
+        connection = self._take_idle(key)
+        reused = connection is not None
+        if connection is None:
+            connection = await self._connect(key, use_tls, parts.hostname or "")
+        try:
+            try:
+                status_line = await self._write_and_read_status(connection, payload)
+            except (ConnectionError, EOFError, ProtocolError):
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive socket; retry once on a fresh one.
+                connection.close()
+                connection = await self._connect(key, use_tls, parts.hostname or "")
+                status_line = await self._write_and_read_status(connection, payload)
+            response, keep_alive = await self._read_response(connection, status_line, method, url)
+        except BaseException:
+            connection.close()
+            raise
+
+        if keep_alive:
+            self._release(key, connection)
+        else:
+            connection.close()
+        return response
+
+    async def _write_and_read_status(self, connection: _Connection, payload: bytes) -> bytes:
+        connection.writer.write(payload)
+        await connection.writer.drain()
+        while True:
+            status_line = await connection.reader.readline()
+            if not status_line:
+                raise ProtocolError("connection closed before a status line")
+            if status_line.startswith(b"HTTP/1.1 100") or status_line.startswith(b"HTTP/1.0 100"):
+                await self._read_headers(connection.reader)
+                continue
+            return status_line
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ProtocolError("connection closed inside headers")
+            if line in (b"\r\n", b"\n"):
+                return headers
+            name, separator, value = line.decode("latin-1").partition(":")
+            if not separator:
+                raise ProtocolError(f"malformed header line: {line[:80]!r}")
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+    async def _read_response(
+        self,
+        connection: _Connection,
+        status_line: bytes,
+        method: str,
+        url: str,
+    ) -> Tuple[AsyncHttpResponse, bool]:
+        parts = status_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/1.") or not parts[1].isdigit():
+            raise ProtocolError(f"malformed status line: {status_line[:80]!r}")
+        version, status = parts[0], int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ""
+        headers = await self._read_headers(connection.reader)
+        connection_tokens = {token.strip().lower() for token in headers.get("connection", "").split(",")}
+        keep_alive = "close" not in connection_tokens and (version == "HTTP/1.1" or "keep-alive" in connection_tokens)
+
+        reader = connection.reader
+        if method.upper() == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        body = decode_body(body, headers.get("content-encoding", ""))
+        return AsyncHttpResponse(status, reason, headers, body, url), keep_alive
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks: List[bytes] = []
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                raise ProtocolError("connection closed inside a chunked body")
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers, then the blank line that ends the message.
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+
+class AimdController:
+    """Additive-increase / multiplicative-decrease concurrency limit for one host.
+
+    Each clean response grows the limit by ``1 / limit`` (about one extra slot
+    per window of responses, up to ``maximum``). A congestion signal -- a
+    429/502/503/504, a transport error, or latency above ``latency_tolerance``
+    times the host's baseline -- halves it (down to ``minimum``) at most once per
+    window: only requests that started after the last cut can cut it again.
+    ``Retry-After`` pauses new requests to the host until it passes.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = DEFAULT_INITIAL_PER_HOST,
+        minimum: int = 1,
+        maximum: int = DEFAULT_MAX_PER_HOST,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 4.0,
+        min_latency_signal_seconds: float = 1.0,
+    ) -> None:
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(max(int(initial), self.minimum), self.maximum))
+        self.decrease_factor = float(decrease_factor)
+        self.latency_tolerance = float(latency_tolerance)
+        self.min_latency_signal_seconds = float(min_latency_signal_seconds)
+        self.baseline_latency: Optional[float] = None
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease = float("-inf")
+        self.stats: Dict[str, int] = {"requests": 0, "increases": 0, "decreases": 0}
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """Wait for a slot (and any Retry-After pause); returns the start time to pass to :meth:`release`."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled while paused: hand the slot back, since release() will never run for it.
+                async with self._changed:
+                    self.in_flight -= 1
+                    self._changed.notify_all()
+                raise
+        self.stats["requests"] += 1
+        return time.monotonic()
+
+    def is_congested(self, latency: float, status: int) -> bool:
+        if status == 0 or status in CONGESTION_STATUSES:
+            return True
+        baseline = self.baseline_latency
+        return (
+            baseline is not None
+            and latency > self.min_latency_signal_seconds
+            and latency > baseline * self.latency_tolerance
+        )
+
+    async def release(self, started: float, *, status: int, retry_after: float = 0.0) -> None:
+        """Record one finished request; ``status`` is 0 for a transport error."""
+        now = time.monotonic()
+        latency = now - started
+        async with self._changed:
+            self.in_flight -= 1
+            if self.is_congested(latency, status):
+                if started >= self.last_decrease:
+                    self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+                    self.last_decrease = now
+                    self.stats["decreases"] += 1
+            else:
+                if self.limit < self.maximum:
+                    self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+                    self.stats["increases"] += 1
+                if status and status < 500:
+                    # Baseline drops straight to faster samples and drifts up slowly.
+                    baseline = self.baseline_latency
+                    self.baseline_latency = latency if baseline is None else min(latency, baseline + 0.05 * (latency - baseline))
+            if retry_after > 0:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            self._changed.notify_all()
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "limit": round(self.limit, 2),
+            "baseline_latency_ms": round(self.baseline_latency * 1000.0, 1) if self.baseline_latency is not None else None,
+            **self.stats,
+        }
+
+
+def parse_retry_after(value: str, cap: float) -> float:
+    text = (value or "").strip()
+    if not text:
+        return 0.0
+    try:
+        return min(max(0.0, float(text)), cap)
+    except ValueError:
+        return 0.0
+
+
+class AdaptiveHttpClient:
+    """Retrying wrapper around :class:`AsyncHttpClient` with one :class:`AimdController` per host.
+
+    Every request first takes a slot from its host's controller, then one of the
+    ``max_in_flight`` global slots, so a host that is slow or throttling holds at
+    most its own (shrinking) share of the crawl. Congestion statuses and
+    transport errors are retried with jittered backoff; the final response is
+    returned whatever its status, and the last transport error is raised.
+    """
+
+    def __init__(
+        self,
+        client: AsyncHttpClient,
+        *,
+        initial_per_host: int = DEFAULT_INITIAL_PER_HOST,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        max_in_flight: int = 0,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        label: str = "HTTP",
+    ) -> None:
+        self.client = client
+        self.initial_per_host = int(initial_per_host)
+        self.max_per_host = max(1, int(max_per_host))
+        self.global_slots = asyncio.Semaphore(max_in_flight) if max_in_flight and max_in_flight > 0 else None
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_seconds = max(0.0, float(backoff_seconds))
+        self.max_backoff_seconds = float(max_backoff_seconds)
+        self.label = label
+        self.controllers: Dict[str, AimdController] = {}
+        self.retries = 0
+
+    def controller_for(self, url: str) -> AimdController:
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        controller = self.controllers.get(host)
+        if controller is None:
+            controller = self.controllers[host] = AimdController(
+                initial=self.initial_per_host,
+                maximum=self.max_per_host,
+            )
+        return controller
+
+    def retry_delay(self, attempt: int) -> float:
+        if self.backoff_seconds <= 0:
+            return 0.0
+        return min(
+            self.max_backoff_seconds,
+            self.backoff_seconds * (2 ** (attempt - 1)) + random.random() * self.backoff_seconds,
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        data: Optional[bytes] = None,
+    ) -> AsyncHttpResponse:
+        controller = self.controller_for(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            started = await controller.acquire()
+            response: Optional[AsyncHttpResponse] = None
+            error: Optional[BaseException] = None
+            try:
+                if self.global_slots is not None:
+                    async with self.global_slots:
+                        # Time spent waiting for a global slot is not the host's latency.
+                        started = time.monotonic()
+                        response = await self.client.request(method, url, headers=headers, data=data)
+                else:
+                    response = await self.client.request(method, url, headers=headers, data=data)
+            except TRANSPORT_ERRORS as exc:
+                error = exc
+            except BaseException:
+                await controller.release(started, status=0)
+                raise
+            status = response.status if response is not None else 0
+            retry_after = (
+                parse_retry_after(response.headers.get("retry-after", ""), self.max_backoff_seconds)
+                if response is not None and status in RETRYABLE_STATUSES
+                else 0.0
+            )
+            await controller.release(started, status=status, retry_after=retry_after)
+
+            retryable = error is not None or status in RETRYABLE_STATUSES
+            if not retryable or attempt > self.max_retries:
+                if error is not None:
+                    raise error
+                return response  # type: ignore[return-value]
+            self.retries += 1
+            delay = max(self.retry_delay(attempt), retry_after)
+            print(
+                f"[warn] {self.label} request to {url} failed (attempt {attempt}/{self.max_retries + 1}): "
+                f"{error or status}; retrying in {delay:.1f}s",
+                file=sys.stderr,
+            )
+            if delay:
+                await asyncio.sleep(delay)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "requests": self.client.stats["requests"],
+            "connections_opened": self.client.stats["connections_opened"],
+            "connections_reused": self.client.stats["connections_reused"],
+            "retries": self.retries,
+            "hosts": {host: controller.summary() for host, controller in sorted(self.controllers.items())},
+        }
+
+
+class HostWorkQueue:
+    """Work items grouped by host, each host drained by its own pool of workers.
+
+    A slow or throttled host only ties up its own workers, so the others keep
+    going. Items can be added while workers run (e.g. as discovery finds them);
+    call :meth:`close` once no more will arrive, then await :meth:`join`.
+    """
+
+    def __init__(self, handle: Callable[[str], Awaitable[None]], *, workers_per_host: int) -> None:
+        self.handle = handle
+        self.workers_per_host = max(1, int(workers_per_host))
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.seen: Set[str] = set()
+        self.closed = False
+
+    def put(self, url: str) -> bool:
+        """Queue ``url`` unless it was queued before; returns whether it was added."""
+        if self.closed:
+            raise RuntimeError("HostWorkQueue is closed")
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        queue = self.queues.get(host)
+        if queue is None:
+            queue = self.queues[host] = asyncio.Queue()
+            for _ in range(self.workers_per_host):
+                self.tasks.append(asyncio.ensure_future(self._worker(queue)))
+        queue.put_nowait(url)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            url = await queue.get()
+            if url is None:
+                return
+            await self.handle(url)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for queue in self.queues.values():
+            for _ in range(self.workers_per_host):
+                queue.put_nowait(None)
+
+    async def join(self) -> None:
+        self.close()
+        try:
+            await asyncio.gather(*self.tasks)
+        except BaseException:
+            for task in self.tasks:
+                task.cancel()
+            raise
+
+    async def cancel(self) -> None:
+        """Stop every worker, abandoning queued items, and wait for them to exit."""
+        self.closed = True
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
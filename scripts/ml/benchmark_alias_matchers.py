@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Time the compiled token automaton against the nested-dict trie on real rows.
+
+Aliases come from the lexicon builder's inventory: manual seeds and rule
+variants, plus the workbook terms when ``--workbook-input`` is given. Rows are
+tokenized once up front, so only matching is timed. The report gives
+microseconds per row for each matcher, the speedup, and whether every row
+produced identical alias-id mention counts::
+
+    python3 scripts/ml/benchmark_alias_matchers.py \\
+      --dataset ml/data/processed/usda_only_train.jsonl \\
+      --workbook-input /path/to/allergen_ingredient_database.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import build_allergen_lexicon_v2 as lexicon
+from jsonl_shards import iter_shard_payloads, plan_jsonl_shards
+from token_automaton import TokenAutomaton, build_token_trie, count_trie_matches
+
+DEFAULT_DATASET = "ml/data/processed/usda_only_train.jsonl"
+DEFAULT_LIMIT = 200000
+DEFAULT_REPEAT = 3
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark alias matching: token automaton vs dict trie.")
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help=f"JSONL dataset path (repeatable). Defaults to {DEFAULT_DATASET}.",
+    )
+    parser.add_argument("--workbook-input", default="", help="Optional allergen workbook whose terms join the alias set.")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Max rows to load (0 = all).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed passes per matcher; the best is kept.")
+    parser.add_argument("--output", default="", help="Optional path to write the report JSON.")
+    return parser.parse_args()
+
+
+def load_aliases(workbook_path: Path | None) -> List[lexicon.AliasEntry]:
+    canonical_by_key: Dict[Tuple[str, str], lexicon.CanonicalEntry] = {}
+    canonical_by_id: Dict[str, lexicon.CanonicalEntry] = {}
+    canonical_id_counter: Dict[str, int] = {}
+    aliases: List[lexicon.AliasEntry] = []
+    alias_token_index: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    if workbook_path:
+        lexicon.ingest_workbook_terms(
+            workbook_path=workbook_path,
+            canonical_by_key=canonical_by_key,
+            canonical_by_id=canonical_by_id,
+            canonical_id_counter=canonical_id_counter,
+            aliases=aliases,
+            alias_token_index=alias_token_index,
+        ).close()
+    lexicon.ingest_manual_seeds(
+        canonical_by_key=canonical_by_key,
+        canonical_by_id=canonical_by_id,
+        canonical_id_counter=canonical_id_counter,
+        aliases=aliases,
+        alias_token_index=alias_token_index,
+    )
+    lexicon.ingest_rule_variants(aliases=aliases, alias_token_index=alias_token_index)
+    return aliases
+
+
+def load_token_rows(dataset_paths: Sequence[Path], limit: int) -> List[Tuple[str, ...]]:
+    rows: List[Tuple[str, ...]] = []
+    for shard in plan_jsonl_shards(dataset_paths):
+        for payload in iter_shard_payloads(shard):
+            rows.append(lexicon.tokenize(str(payload.get("text") or "")))
+            if limit and len(rows) >= limit:
+                return rows
+    return rows
+
+
+def best_seconds(run, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(token_rows: Sequence[Tuple[str, ...]], aliases: Sequence[lexicon.AliasEntry], repeat: int) -> Dict[str, Any]:
+    terms = [(alias.alias_id, alias.alias_tokens) for alias in aliases]
+    started = time.perf_counter()
+    trie = build_token_trie(terms)
+    trie_build = time.perf_counter() - started
+    started = time.perf_counter()
+    automaton = TokenAutomaton.build(terms)
+    automaton_build = time.perf_counter() - started
+
+    parity = all(count_trie_matches(tokens, trie) == automaton.count_matches(tokens) for tokens in token_rows)
+    trie_seconds = best_seconds(lambda: [count_trie_matches(tokens, trie) for tokens in token_rows], repeat)
+    automaton_seconds = best_seconds(lambda: [automaton.count_matches(tokens) for tokens in token_rows], repeat)
+    row_count = max(1, len(token_rows))
+    return {
+        "rows": len(token_rows),
+        "tokens": sum(len(tokens) for tokens in token_rows),
+        "aliases": len(aliases),
+        "automaton_states": automaton.state_count,
+        "trie": {"build_ms": round(trie_build * 1000, 2), "us_per_row": round(trie_seconds * 1e6 / row_count, 3)},
+        "automaton": {
+            "build_ms": round(automaton_build * 1000, 2),
+            "us_per_row": round(automaton_seconds * 1e6 / row_count, 3),
+        },
+        "speedup_vs_trie": round(trie_seconds / automaton_seconds, 2) if automaton_seconds else None,
+        "parity": parity,
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    repo_root = Path(__file__).resolve().parents[2]
+    dataset_paths = lexicon.resolve_dataset_paths(args.dataset or [DEFAULT_DATASET], repo_root)
+    workbook_path = Path(args.workbook_input) if args.workbook_input else None
+    if workbook_path and not workbook_path.exists():
+        print(f"Workbook not found: {workbook_path}")
+        return 1
+
+    aliases = load_aliases(workbook_path)
+    token_rows = load_token_rows(dataset_paths, max(0, args.limit))
+    report = run_benchmark(token_rows, aliases, args.repeat)
+
+    print(f"Rows: {report['rows']} ({report['tokens']} tokens), aliases: {report['aliases']}")
+    for name in ("trie", "automaton"):
+        print(f"{name:<10} {report[name]['us_per_row']:>9.3f} us/row  build {report[name]['build_ms']} ms")
+    print(f"Speedup: x{report['speedup_vs_trie']}  parity={'ok' if report['parity'] else 'MISMATCH'}")
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0 if report["parity"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
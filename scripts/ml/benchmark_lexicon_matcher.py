@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Measure load time and throughput of the compiled lexicon matcher.
+
+Loads the artifact written by ``build_allergen_lexicon_v2.py`` and times:
+
+- the first :meth:`LexiconMatcher.load` in this process (cold as far as
+  Python is concerned; the OS page cache may already hold the file), plus
+  the best of ``--repeat`` reloads;
+- ``match_batch`` over raw dataset texts, tokenization included, reported
+  in texts per second.
+
+The run fails when the first load exceeds ``--load-target-ms``::
+
+    python3 scripts/ml/benchmark_lexicon_matcher.py \\
+      --lexicon ml/data/analysis/lexicon_v2/allergen_lexicon.bin \\
+      --dataset ml/data/processed/usda_only_train.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from jsonl_shards import iter_shard_payloads, plan_jsonl_shards
+from lexicon_matcher import LexiconMatcher
+
+DEFAULT_LEXICON = "ml/data/analysis/lexicon_v2/allergen_lexicon.bin"
+DEFAULT_DATASET = "ml/data/processed/usda_only_train.jsonl"
+DEFAULT_LIMIT = 200000
+DEFAULT_REPEAT = 3
+DEFAULT_LOAD_TARGET_MS = 50.0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the compiled allergen lexicon matcher.")
+    parser.add_argument("--lexicon", default=DEFAULT_LEXICON, help="Compiled lexicon artifact path.")
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        help=f"JSONL dataset path (repeatable). Defaults to {DEFAULT_DATASET}.",
+    )
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="Max texts to load (0 = all).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed passes; the best is kept.")
+    parser.add_argument(
+        "--load-target-ms",
+        type=float,
+        default=DEFAULT_LOAD_TARGET_MS,
+        help="Fail if the first load takes longer than this many milliseconds (0 = no target).",
+    )
+    parser.add_argument("--output", default="", help="Optional path to write the report JSON.")
+    return parser.parse_args()
+
+
+def resolve_path(raw: str, repo_root: Path) -> Path:
+    path = Path(raw)
+    return path if path.is_absolute() else repo_root / path
+
+
+def load_texts(dataset_paths: Sequence[Path], limit: int) -> List[str]:
+    texts: List[str] = []
+    for shard in plan_jsonl_shards(dataset_paths):
+        for payload in iter_shard_payloads(shard):
+            texts.append(str(payload.get("text") or ""))
+            if limit and len(texts) >= limit:
+                return texts
+    return texts
+
+
+def timed_load(lexicon_path: Path) -> float:
+    started = time.perf_counter()
+    matcher = LexiconMatcher.load(lexicon_path)
+    elapsed = time.perf_counter() - started
+    matcher.close()
+    return elapsed
+
+
+def run_benchmark(lexicon_path: Path, texts: Sequence[str], repeat: int, load_target_ms: float) -> Dict[str, Any]:
+    first_load = timed_load(lexicon_path)
+    warm_load = min(timed_load(lexicon_path) for _ in range(max(1, repeat)))
+
+    with LexiconMatcher.load(lexicon_path) as matcher:
+        hits = sum(len(row_hits) for row_hits in matcher.match_batch(texts))
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            matcher.match_batch(texts)
+            best = min(best, time.perf_counter() - started)
+        aliases = matcher.alias_count
+
+    first_load_ms = first_load * 1000
+    return {
+        "lexicon": str(lexicon_path),
+        "lexicon_bytes": lexicon_path.stat().st_size,
+        "aliases": aliases,
+        "texts": len(texts),
+        "hits": hits,
+        "first_load_ms": round(first_load_ms, 3),
+        "warm_load_ms": round(warm_load * 1000, 3),
+        "load_target_ms": load_target_ms,
+        "load_within_target": load_target_ms <= 0 or first_load_ms <= load_target_ms,
+        "texts_per_sec": round(len(texts) / best, 1) if best > 0 else None,
+        "us_per_text": round(best * 1e6 / max(1, len(texts)), 3),
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    repo_root = Path(__file__).resolve().parents[2]
+    lexicon_path = resolve_path(args.lexicon, repo_root)
+    if not lexicon_path.exists():
+        print(f"Lexicon artifact not found: {lexicon_path}")
+        return 1
+    dataset_paths = [resolve_path(raw, repo_root) for raw in (args.dataset or [DEFAULT_DATASET])]
+    missing = [path for path in dataset_paths if not path.exists()]
+    if missing:
+        print(f"Dataset not found: {missing[0]}")
+        return 1
+
+    texts = load_texts(dataset_paths, max(0, args.limit))
+    report = run_benchmark(lexicon_path, texts, args.repeat, float(args.load_target_ms))
+
+    print(f"Lexicon: {report['lexicon']} ({report['aliases']} aliases, {report['lexicon_bytes']} bytes)")
+    print(f"Load: first {report['first_load_ms']} ms, warm {report['warm_load_ms']} ms (target {report['load_target_ms']} ms)")
+    print(f"Match: {report['texts_per_sec']} texts/sec ({report['us_per_text']} us/text, {report['hits']} hits)")
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0 if report["load_within_target"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
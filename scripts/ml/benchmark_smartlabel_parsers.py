@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Time the SmartLabel template parsers on saved HTML under each parser backend.
+
+Saved pages live in one subdirectory per template, e.g.::
+
+    saved_html/
+      syndigo/00021000658831.html
+      scanbuy_allergens/9a13951d-allergens.html
+
+Each page is parsed once per run and every parser for its template is applied
+to that tree, the same way the scraper handles a landing page. The report
+gives mean milliseconds per page for each backend, the speedup over
+BeautifulSoup, and whether the backend extracted exactly what BeautifulSoup did.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import scrape_smartlabel_ground_truth as scraper
+from html_select import available_backends, parse_html
+
+DEFAULT_REPEAT = 20
+REFERENCE_BACKEND = "bs4"
+TEMPLATE_PARSERS: dict[str, tuple[Callable[[Any], Any], ...]] = {
+    "scanbuy_ingredients": (scraper.parse_scanbuy_ingredients_html,),
+    "scanbuy_allergens": (scraper.parse_scanbuy_allergens_html,),
+    "syndigo": (
+        scraper.extract_syndigo_upc,
+        scraper.parse_syndigo_ingredients_html,
+        scraper.parse_syndigo_allergens_html,
+    ),
+    "bestchoice": (
+        scraper.extract_bestchoice_upc,
+        scraper.parse_bestchoice_ingredients_html,
+        scraper.parse_bestchoice_allergens_html,
+    ),
+    "generalmills_ingredients": (scraper.parse_generalmills_ingredients_html,),
+    "generalmills_allergens": (scraper.parse_generalmills_allergens_html,),
+    "hormel": (scraper.parse_hormel_ingredients_html, scraper.parse_hormel_allergens_html),
+    "rbnainfo": (scraper.parse_rbnainfo_ingredients_html,),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark SmartLabel HTML parsing per template and backend.")
+    parser.add_argument(
+        "--html-dir",
+        required=True,
+        help=f"Directory with one subdirectory of saved .html pages per template ({', '.join(TEMPLATE_PARSERS)}).",
+    )
+    parser.add_argument(
+        "--backends",
+        default="",
+        help="Comma-separated backends to time (default: every installed backend).",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed passes over each template's pages.")
+    parser.add_argument("--output", default="", help="Optional path to write the report JSON.")
+    return parser.parse_args()
+
+
+def load_saved_pages(html_dir: Path) -> dict[str, list[str]]:
+    pages: dict[str, list[str]] = {}
+    for template in TEMPLATE_PARSERS:
+        template_dir = html_dir / template
+        if template_dir.is_dir():
+            paths = sorted(template_dir.glob("*.html"))
+            if paths:
+                pages[template] = [path.read_text(encoding="utf-8", errors="replace") for path in paths]
+    return pages
+
+
+def extract_page(html: str, template: str, backend: str) -> list[Any]:
+    doc = parse_html(html, backend)
+    return [parse(doc) for parse in TEMPLATE_PARSERS[template]]
+
+
+def benchmark_template(template: str, pages: list[str], backends: list[str], repeat: int) -> dict[str, Any]:
+    report: dict[str, Any] = {"pages": len(pages), "backends": {}}
+    reference = [extract_page(html, template, REFERENCE_BACKEND) for html in pages]
+    for backend in backends:
+        results = [extract_page(html, template, backend) for html in pages]
+        started = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            for html in pages:
+                extract_page(html, template, backend)
+        elapsed = time.perf_counter() - started
+        report["backends"][backend] = {
+            "ms_per_page": round(elapsed * 1000 / (max(1, repeat) * len(pages)), 4),
+            "matches_bs4": results == reference,
+        }
+    baseline = report["backends"].get(REFERENCE_BACKEND, {}).get("ms_per_page")
+    if baseline:
+        for stats in report["backends"].values():
+            stats["speedup_vs_bs4"] = round(baseline / stats["ms_per_page"], 2) if stats["ms_per_page"] else None
+    return report
+
+
+def run_benchmark(html_dir: Path, backends: list[str], repeat: int) -> dict[str, Any]:
+    pages = load_saved_pages(html_dir)
+    if not pages:
+        raise RuntimeError(f"No saved pages under {html_dir}; expected <template>/*.html for {', '.join(TEMPLATE_PARSERS)}.")
+    return {template: benchmark_template(template, template_pages, backends, repeat) for template, template_pages in pages.items()}
+
+
+def main() -> None:
+    args = parse_args()
+    installed = available_backends()
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()] or installed
+    missing = [name for name in backends if name not in installed]
+    if missing:
+        raise RuntimeError(f"Backends not installed: {', '.join(missing)} (installed: {', '.join(installed)}).")
+    if REFERENCE_BACKEND not in installed:
+        raise RuntimeError("BeautifulSoup (bs4) is required as the parity reference.")
+
+    report = run_benchmark(Path(args.html_dir), backends, args.repeat)
+    for template, stats in report.items():
+        for backend, backend_stats in stats["backends"].items():
+            parity = "ok" if backend_stats["matches_bs4"] else "MISMATCH"
+            speedup = backend_stats.get("speedup_vs_bs4")
+            print(
+                f"{template:<26} {backend:<11} {backend_stats['ms_per_page']:>9.3f} ms/page"
+                f"  x{speedup if speedup is not None else '-'}  parity={parity}  ({stats['pages']} pages)"
+            )
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
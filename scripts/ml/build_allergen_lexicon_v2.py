@@ -5,16 +5,39 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
+import operator
+import os
 import re
-import unicodedata
+import sys
+from array import array
 from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, MutableMapping, Sequence, Set, Tuple
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, MutableMapping, Sequence, Set, Tuple
 
+import numpy as np
 import openpyxl
 
+import analyze_allergen_ingredient_database as term_analysis
+from corpus_scan import (
+    TOKEN_RE,
+    CorpusAggregator,
+    CorpusRow,
+    allergen_label_key,
+    fold_text,
+    normalize_ascii,
+    scan_corpus,
+    scan_corpus_files,
+    scan_corpus_shards,
+    tokenize,
+)
+from jsonl_shards import DEFAULT_SHARD_BYTES, JsonlShard
+from lexicon_matcher import CompiledAlias, write_lexicon_artifact
+from token_automaton import TokenAutomaton
+from workbook_io import PhaseTimings, SheetRows, iter_sheet_values, open_workbook_read_only, write_workbook
+
 
 WORKBOOK_SHEET_MAP = "Allergen-Ingredient Map"
 WORKBOOK_SHEET_ALIAS_POLICY = "Lexicon Alias Policy"
@@ -188,7 +211,6 @@ MANUAL_CANONICAL_SEEDS: Mapping[str, Mapping[str, Sequence[str]]] = {
 }
 
 
-TOKEN_RE = re.compile(r"[a-z0-9]+")
 DISPLAY_SPACE_RE = re.compile(r"\s+")
 PAREN_RE = re.compile(r"\(([^()]*)\)")
 PAREN_SPLIT_RE = re.compile(r"[,/;]")
@@ -281,7 +303,24 @@ DEFAULT_AMBIGUOUS_ALIAS_TOKENS: Set[Tuple[str, ...]] = {
 
 VALID_ALIAS_POLICY_ACTIONS = {"allow", "deny", "review"}
 
-TRIE_TERM_IDS_KEY = "__alias_ids__"
+# Reverse of CLASS_ROOT_TOKENS, so a chunk's classes come from its own tokens.
+CLASS_KEYS_BY_ROOT_TOKEN: Mapping[str, Tuple[str, ...]] = {
+    root: tuple(class_key for class_key in CLASS_ORDER if root in CLASS_ROOT_TOKENS.get(class_key, set()))
+    for roots in CLASS_ROOT_TOKENS.values()
+    for root in roots
+}
+CHUNK_SKETCH_DEPTH = 4
+# Bump whenever tokenize(), candidate chunk extraction, chunk classes or label
+# parsing change: cached scan records are only valid for the version that wrote them.
+SCAN_CACHE_VERSION = 1
+SCAN_RECORD_ARRAYS = (
+    "row_label_ids",
+    "match_offsets",
+    "match_alias_ids",
+    "match_mentions",
+    "chunk_offsets",
+    "chunk_ids",
+)
 
 
 @dataclass(frozen=True)
@@ -352,6 +391,18 @@ class CandidateRow:
     reason: str
 
 
+@dataclass
+class CandidateColumns:
+    """One class's candidate statistics as parallel arrays; row ``i`` belongs to ``tokens[i]``."""
+
+    tokens: List[Tuple[str, ...]]
+    support: np.ndarray
+    target: np.ndarray
+    unmatched_target: np.ndarray
+    other_labeled: np.ndarray
+    unlabeled: np.ndarray
+
+
 @dataclass(frozen=True)
 class AliasPolicyRow:
     class_key: str
@@ -467,14 +518,51 @@ def parse_args() -> argparse.Namespace:
         default=0.45,
         help="Auto-demote aliases at or below this exclusivity threshold.",
     )
+    parser.add_argument(
+        "--candidate-memory-mb",
+        type=float,
+        default=0.0,
+        help=(
+            "Bound candidate chunk mining: sketch chunk counts in this many MB first and keep only chunks "
+            "that can reach --min-candidate-support (0 = keep every chunk)."
+        ),
+    )
+    parser.add_argument(
+        "--scan-cache-dir",
+        default="",
+        help=(
+            "Optional directory of per-dataset scan records. Unchanged files are not rescanned, and "
+            "policy or denylist edits only redo the aggregation."
+        ),
+    )
+    parser.add_argument(
+        "--term-analysis-workbook-output",
+        default="",
+        help=(
+            "Also run analyze_allergen_ingredient_database.py's term frequency analysis in the same dataset "
+            "pass and write its enriched workbook here (empty = skip)."
+        ),
+    )
+    parser.add_argument(
+        "--term-analysis-csv-dir",
+        default=term_analysis.DEFAULT_CSV_OUTPUT_DIR,
+        help="Output directory for the term analysis CSVs when --term-analysis-workbook-output is set.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for the dataset scan (0 or 1 = scan in-process).",
+    )
+    parser.add_argument(
+        "--shard-mb",
+        type=float,
+        default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+        help="Dataset bytes per shard handed to each scan worker.",
+    )
     return parser.parse_args()
 
 
-def normalize_ascii(value: str) -> str:
-    safe = unicodedata.normalize("NFKD", value or "")
-    return safe.encode("ascii", "ignore").decode("ascii")
-
-
 def normalize_display(value: str) -> str:
     safe = normalize_ascii(value)
     safe = safe.replace("®", "").replace("™", "")
@@ -484,11 +572,6 @@ def normalize_display(value: str) -> str:
     return safe
 
 
-def tokenize(value: str) -> Tuple[str, ...]:
-    safe = normalize_ascii(value).lower()
-    return tuple(TOKEN_RE.findall(safe))
-
-
 def title_from_tokens(tokens: Sequence[str]) -> str:
     return " ".join(tokens)
 
@@ -501,22 +584,7 @@ def slugify(value: str) -> str:
 
 
 def allergen_key_from_label(value: str) -> str:
-    safe = normalize_display(value).lower().replace("-", " ")
-    safe = re.sub(r"\s+", " ", safe)
-    mapping = {
-        "milk": "milk",
-        "egg": "egg",
-        "peanut": "peanut",
-        "tree nut": "tree_nut",
-        "tree nuts": "tree_nut",
-        "wheat": "wheat",
-        "soy": "soy",
-        "fish": "fish",
-        "shellfish": "shellfish",
-        "crustacean shellfish": "shellfish",
-        "sesame": "sesame",
-    }
-    return mapping.get(safe, "")
+    return allergen_label_key(value).replace(" ", "_")
 
 
 def class_key_from_policy_label(value: str) -> str:
@@ -718,14 +786,16 @@ def ingest_workbook_terms(
     aliases: List[AliasEntry],
     alias_token_index: MutableMapping[Tuple[str, Tuple[str, ...]], int],
 ) -> openpyxl.Workbook:
-    workbook = openpyxl.load_workbook(workbook_path)
+    """Read the map sheet into canonicals and aliases; the returned read-only workbook is left open."""
+    workbook = open_workbook_read_only(workbook_path)
     if WORKBOOK_SHEET_MAP not in workbook.sheetnames:
+        workbook.close()
         raise ValueError(f"Workbook missing required sheet: {WORKBOOK_SHEET_MAP}")
-    ws = workbook[WORKBOOK_SHEET_MAP]
 
-    for row in range(2, ws.max_row + 1):
-        allergen_name = normalize_display(str(ws.cell(row=row, column=1).value or ""))
-        ingredient_cell = str(ws.cell(row=row, column=2).value or "").strip()
+    for row, values in iter_sheet_values(workbook, WORKBOOK_SHEET_MAP, max_col=2):
+        allergen_raw, ingredient_raw = (tuple(values) + (None, None))[:2]
+        allergen_name = normalize_display(str(allergen_raw or ""))
+        ingredient_cell = str(ingredient_raw or "").strip()
         if not allergen_name or not ingredient_cell:
             continue
         class_key = WORKBOOK_ALLERGEN_TO_CLASS.get(allergen_name)
@@ -819,54 +889,21 @@ def ingest_rule_variants(
             )
 
 
-def build_alias_trie(aliases: Sequence[AliasEntry]) -> Dict[str, object]:
-    root: Dict[str, object] = {}
-    for alias in aliases:
-        node = root
-        for token in alias.alias_tokens:
-            child = node.get(token)
-            if not isinstance(child, dict):
-                child = {}
-                node[token] = child
-            node = child
-        ids = node.get(TRIE_TERM_IDS_KEY)
-        if not isinstance(ids, list):
-            ids = []
-            node[TRIE_TERM_IDS_KEY] = ids
-        ids.append(alias.alias_id)
-    return root
-
-
-def match_aliases(tokens: Sequence[str], trie: Mapping[str, object]) -> Counter:
-    out: Counter = Counter()
-    count = len(tokens)
-    for start in range(count):
-        node = trie.get(tokens[start])
-        if not isinstance(node, dict):
-            continue
+def build_alias_automaton(aliases: Sequence[AliasEntry]) -> TokenAutomaton:
+    return TokenAutomaton.build((alias.alias_id, alias.alias_tokens) for alias in aliases)
 
-        ids = node.get(TRIE_TERM_IDS_KEY)
-        if isinstance(ids, list):
-            for alias_id in ids:
-                out[alias_id] += 1
-
-        idx = start + 1
-        while idx < count:
-            nxt = node.get(tokens[idx])
-            if not isinstance(nxt, dict):
-                break
-            node = nxt
-            ids = node.get(TRIE_TERM_IDS_KEY)
-            if isinstance(ids, list):
-                for alias_id in ids:
-                    out[alias_id] += 1
-            idx += 1
-    return out
+
+def match_aliases(tokens: Sequence[str], automaton: TokenAutomaton) -> Counter:
+    return automaton.count_matches(tokens)
 
 
 def extract_candidate_chunks(text: str) -> Set[Tuple[str, ...]]:
-    normalized = normalize_ascii(text).lower()
-    normalized = normalized.replace(":", " ")
+    return folded_candidate_chunks(fold_text(text))
+
+
+def folded_candidate_chunks(folded: str) -> Set[Tuple[str, ...]]:
+    """:func:`extract_candidate_chunks` for text already passed through ``fold_text``."""
+    normalized = folded.replace(":", " ")
     out: Set[Tuple[str, ...]] = set()
     for segment in CANDIDATE_SPLIT_RE.split(normalized):
         for raw_chunk in segment.split(","):
@@ -899,6 +936,16 @@ def class_token_overlap(tokens: Sequence[str], class_key: str) -> bool:
     return any(root in token_set for root in roots)
 
 
+def chunk_class_keys(tokens: Sequence[str]) -> Tuple[str, ...]:
+    """Classes whose root tokens appear in ``tokens``, in ``CLASS_ORDER``."""
+    found: Set[str] = set()
+    for token in tokens:
+        found.update(CLASS_KEYS_BY_ROOT_TOKEN.get(token, ()))
+    if not found:
+        return ()
+    return tuple(class_key for class_key in CLASS_ORDER if class_key in found)
+
+
 def resolve_dataset_paths(args_dataset: Sequence[str], repo_root: Path) -> List[Path]:
     raw_paths = list(args_dataset) if args_dataset else list(DEFAULT_DATASET_FILES)
     out: List[Path] = []
@@ -955,10 +1002,11 @@ def load_alias_policy_rows(
         )
 
     if WORKBOOK_SHEET_ALIAS_POLICY in workbook.sheetnames:
-        ws = workbook[WORKBOOK_SHEET_ALIAS_POLICY]
+        policy_sheet_rows = iter_sheet_values(workbook, WORKBOOK_SHEET_ALIAS_POLICY, min_row=1)
+        _header_row, header_values = next(policy_sheet_rows, (1, ()))
         header_map: Dict[str, int] = {}
-        for col in range(1, ws.max_column + 1):
-            value = normalize_display(str(ws.cell(row=1, column=col).value or "")).lower()
+        for col, header_value in enumerate(header_values, start=1):
+            value = normalize_display(str(header_value or "")).lower()
             if value:
                 header_map[value] = col
 
@@ -968,11 +1016,12 @@ def load_alias_policy_rows(
         reason_col = header_map.get("reason")
 
         if class_col and alias_col and action_col:
-            for row in range(2, ws.max_row + 1):
-                class_raw = str(ws.cell(row=row, column=class_col).value or "")
-                alias_raw = str(ws.cell(row=row, column=alias_col).value or "")
-                action_raw = str(ws.cell(row=row, column=action_col).value or "")
-                reason_raw = str(ws.cell(row=row, column=reason_col).value or "") if reason_col else ""
+            for row, values in policy_sheet_rows:
+                cells = dict(enumerate(values, start=1))
+                class_raw = str(cells.get(class_col) or "")
+                alias_raw = str(cells.get(alias_col) or "")
+                action_raw = str(cells.get(action_col) or "")
+                reason_raw = str(cells.get(reason_col) or "") if reason_col else ""
                 add_policy_row(
                     class_raw=class_raw,
                     alias_raw=alias_raw,
@@ -1194,9 +1243,445 @@ def auto_demote_aliases(
     return actions
 
 
-def scan_datasets(
+@dataclass
+class ScanRecord:
+    """Compact per-row match results from one read of the datasets.
+
+    Row ``i`` has label set ``label_sets[row_label_ids[i]]``, alias matches
+    ``match_alias_ids[match_offsets[i]:match_offsets[i + 1]]`` (mentions in the
+    parallel ``match_mentions``) and candidate chunks
+    ``chunk_ids[chunk_offsets[i]:chunk_offsets[i + 1]]``. Chunks are interned in
+    ``chunks``; ``chunk_classes`` holds the classes each chunk overlaps.
+    """
+
+    label_sets: List[FrozenSet[str]]
+    row_label_ids: array
+    match_offsets: array
+    match_alias_ids: array
+    match_mentions: array
+    chunk_offsets: array
+    chunk_ids: array
+    chunks: List[Tuple[str, ...]]
+    chunk_classes: List[Tuple[str, ...]]
+
+    @property
+    def total_rows(self) -> int:
+        return len(self.row_label_ids)
+
+
+def new_scan_record() -> ScanRecord:
+    return ScanRecord(
+        label_sets=[],
+        row_label_ids=array("I"),
+        match_offsets=array("Q", [0]),
+        match_alias_ids=array("I"),
+        match_mentions=array("I"),
+        chunk_offsets=array("Q", [0]),
+        chunk_ids=array("I"),
+        chunks=[],
+        chunk_classes=[],
+    )
+
+
+class ChunkSketch:
+    """Count-min sketch of candidate chunk row counts.
+
+    Estimates never undercount, so a chunk whose estimate is below the
+    candidate support floor cannot reach the review queue and is safe to skip.
+    Sketches built with the same width add up cell by cell.
+    """
+
+    __slots__ = ("width", "counts")
+
+    def __init__(self, width: int) -> None:
+        self.width = max(1, int(width))
+        self.counts = array("I", [0]) * (self.width * CHUNK_SKETCH_DEPTH)
+
+    @classmethod
+    def for_budget(cls, memory_mb: float) -> "ChunkSketch":
+        cell_bytes = array("I").itemsize * CHUNK_SKETCH_DEPTH
+        return cls(int(memory_mb * 1024 * 1024) // cell_bytes)
+
+    def cells(self, chunk: Tuple[str, ...]) -> List[int]:
+        # blake2b rather than hash(): worker processes must agree on the cells.
+        digest = hashlib.blake2b(" ".join(chunk).encode("utf-8"), digest_size=4 * CHUNK_SKETCH_DEPTH).digest()
+        return [
+            row * self.width + int.from_bytes(digest[4 * row : 4 * row + 4], "little") % self.width
+            for row in range(CHUNK_SKETCH_DEPTH)
+        ]
+
+    def add(self, chunk: Tuple[str, ...]) -> None:
+        counts = self.counts
+        for cell in self.cells(chunk):
+            counts[cell] += 1
+
+    def estimate(self, chunk: Tuple[str, ...]) -> int:
+        counts = self.counts
+        return min(counts[cell] for cell in self.cells(chunk))
+
+    def merge(self, other: "ChunkSketch") -> None:
+        if other.width != self.width:
+            raise RuntimeError("Cannot merge chunk sketches of different widths.")
+        self.counts = array("I", map(operator.add, self.counts, other.counts))
+
+
+def class_chunks(folded: str) -> Iterator[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """Candidate chunks of folded text that overlap at least one class, with those classes."""
+    for chunk in folded_candidate_chunks(folded):
+        classes = chunk_class_keys(chunk)
+        if classes:
+            yield chunk, classes
+
+
+class ChunkSketchAggregator(CorpusAggregator):
+    """First pass of the memory-bounded mode: count class chunks into a sketch only."""
+
+    def __init__(self, width: int) -> None:
+        self.width = width
+
+    def new_state(self) -> ChunkSketch:
+        return ChunkSketch(self.width)
+
+    def add_row(self, state: ChunkSketch, row: CorpusRow) -> None:
+        for chunk, _classes in class_chunks(row.folded):
+            state.add(chunk)
+
+    def merge(self, state: ChunkSketch, partial: ChunkSketch) -> ChunkSketch:
+        state.merge(partial)
+        return state
+
+
+class ScanRecordBuilder:
+    """A :class:`ScanRecord` being filled, with the interning tables for its label sets and chunks.
+
+    Only the record is pickled; the tables are rebuilt from it on arrival.
+    """
+
+    def __init__(self, record: ScanRecord | None = None) -> None:
+        self.record = record or new_scan_record()
+        self.label_set_ids: Dict[FrozenSet[str], int] = {labels: index for index, labels in enumerate(self.record.label_sets)}
+        self.chunk_ids: Dict[Tuple[str, ...], int] = {chunk: index for index, chunk in enumerate(self.record.chunks)}
+
+    def __getstate__(self) -> ScanRecord:
+        return self.record
+
+    def __setstate__(self, record: ScanRecord) -> None:
+        self.__init__(record)
+
+    def label_set_id(self, row_labels: FrozenSet[str]) -> int:
+        label_set_id = self.label_set_ids.get(row_labels)
+        if label_set_id is None:
+            label_set_id = self.label_set_ids[row_labels] = len(self.record.label_sets)
+            self.record.label_sets.append(row_labels)
+        return label_set_id
+
+    def chunk_id(self, chunk: Tuple[str, ...], classes: Tuple[str, ...]) -> int:
+        chunk_id = self.chunk_ids.get(chunk)
+        if chunk_id is None:
+            chunk_id = self.chunk_ids[chunk] = len(self.record.chunks)
+            self.record.chunks.append(chunk)
+            self.record.chunk_classes.append(classes)
+        return chunk_id
+
+    def extend(self, record: ScanRecord) -> None:
+        """Append a later record's rows; label sets and chunks are re-interned in first-seen order."""
+        merged = self.record
+        label_remap = [self.label_set_id(row_labels) for row_labels in record.label_sets]
+        chunk_remap = [self.chunk_id(chunk, classes) for chunk, classes in zip(record.chunks, record.chunk_classes)]
+
+        merged.row_label_ids.extend(label_remap[label_set_id] for label_set_id in record.row_label_ids)
+        match_base = merged.match_offsets[-1]
+        merged.match_offsets.extend(match_base + offset for offset in record.match_offsets[1:])
+        merged.match_alias_ids.extend(record.match_alias_ids)
+        merged.match_mentions.extend(record.match_mentions)
+        chunk_base = merged.chunk_offsets[-1]
+        merged.chunk_offsets.extend(chunk_base + offset for offset in record.chunk_offsets[1:])
+        merged.chunk_ids.extend(chunk_remap[chunk_id] for chunk_id in record.chunk_ids)
+
+
+class ScanRecordAggregator(CorpusAggregator):
+    """Alias matches, label sets and class candidate chunks of every row, as a :class:`ScanRecord`.
+
+    Only chunks that overlap a class are kept, since no other chunk is ever
+    counted. With ``chunk_sketch``, chunks estimated below
+    ``min_chunk_support`` rows are dropped too; the rest are counted exactly.
+    """
+
+    def __init__(
+        self,
+        automaton: TokenAutomaton,
+        chunk_sketch: ChunkSketch | None = None,
+        min_chunk_support: int = 0,
+    ) -> None:
+        self.automaton = automaton
+        self.chunk_sketch = chunk_sketch
+        self.min_chunk_support = min_chunk_support
+        self._class_keys_by_labels: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_class_keys_by_labels"] = {}
+        return state
+
+    def row_class_keys(self, labels: FrozenSet[str]) -> FrozenSet[str]:
+        # corpus_scan keys read "tree nut"; this script's classes read "tree_nut".
+        class_keys = self._class_keys_by_labels.get(labels)
+        if class_keys is None:
+            class_keys = self._class_keys_by_labels[labels] = frozenset(key.replace(" ", "_") for key in labels)
+        return class_keys
+
+    def new_state(self) -> ScanRecordBuilder:
+        return ScanRecordBuilder()
+
+    def add_row(self, state: ScanRecordBuilder, row: CorpusRow) -> None:
+        record = state.record
+        record.row_label_ids.append(state.label_set_id(self.row_class_keys(row.labels)))
+
+        tokens = row.tokens
+        if tokens:
+            for alias_id, mentions in match_aliases(tokens, self.automaton).items():
+                record.match_alias_ids.append(alias_id)
+                record.match_mentions.append(int(mentions))
+        record.match_offsets.append(len(record.match_alias_ids))
+
+        chunk_sketch = self.chunk_sketch
+        for chunk in folded_candidate_chunks(row.folded):
+            chunk_id = state.chunk_ids.get(chunk)
+            if chunk_id is None:
+                classes = chunk_class_keys(chunk)
+                if not classes:
+                    continue
+                if chunk_sketch is not None and chunk_sketch.estimate(chunk) < self.min_chunk_support:
+                    continue
+                chunk_id = state.chunk_id(chunk, classes)
+            record.chunk_ids.append(chunk_id)
+        record.chunk_offsets.append(len(record.chunk_ids))
+
+    def merge(self, state: ScanRecordBuilder, partial: ScanRecordBuilder) -> ScanRecordBuilder:
+        state.extend(partial.record)
+        return state
+
+
+def record_shard_matches(
+    shards: Sequence[JsonlShard],
+    automaton: TokenAutomaton,
+    chunk_sketch: ChunkSketch | None = None,
+    min_chunk_support: int = 0,
+) -> ScanRecord:
+    """Tokenize, match and mine candidates for every row of ``shards`` into one record."""
+    (builder,) = scan_corpus_shards(shards, [ScanRecordAggregator(automaton, chunk_sketch, min_chunk_support)])
+    return builder.record
+
+
+def merge_scan_records(records: Iterable[ScanRecord]) -> ScanRecord:
+    """Concatenate shard records, which must come in input order.
+
+    Label sets and chunks are re-interned in first-seen order, so the merged
+    record is identical to one recorded serially over the same rows.
+    """
+    builder = ScanRecordBuilder()
+    for record in records:
+        builder.extend(record)
+    return builder.record
+
+
+def sketch_dataset_chunks(dataset_paths: Sequence[Path], width: int, workers: int) -> ChunkSketch:
+    # One shard per file: every partial sketch costs a full-width merge.
+    (sketch,) = scan_corpus(dataset_paths, [ChunkSketchAggregator(width)], workers, shard_bytes=0)
+    return sketch
+
+
+def alias_set_fingerprint(aliases: Sequence[AliasEntry]) -> str:
+    """Digest of the alias ids and tokens a record was matched against, plus the scan version."""
+    material = json.dumps(
+        [SCAN_CACHE_VERSION, [[alias.alias_id, list(alias.alias_tokens)] for alias in aliases]],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def dataset_fingerprint(path: Path) -> Dict[str, object]:
+    stat = Path(path).stat()
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class ScanCache:
+    """Per-dataset-file scan records on disk, reused while file and alias set are unchanged.
+
+    Each dataset path owns one slot holding a JSON header (file fingerprint,
+    alias-set fingerprint, interned label sets and chunks) followed by the raw
+    record arrays. A slot whose fingerprints no longer match is a miss and is
+    overwritten by the next :meth:`store`. Writes are atomic.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, dataset_path: Path) -> Path:
+        digest = hashlib.sha256(str(Path(dataset_path).resolve()).encode("utf-8")).hexdigest()
+        return self.directory / f"{Path(dataset_path).stem}-{digest[:16]}.scan"
+
+    def load(self, dataset_path: Path, alias_fingerprint: str) -> ScanRecord | None:
+        record = self._read(dataset_path, alias_fingerprint)
+        if record is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return record
+
+    def _read(self, dataset_path: Path, alias_fingerprint: str) -> ScanRecord | None:
+        try:
+            with self.path_for(dataset_path).open("rb") as handle:
+                header = json.loads(handle.readline())
+                if (
+                    header.get("version") != SCAN_CACHE_VERSION
+                    or header.get("byteorder") != sys.byteorder
+                    or header.get("aliases") != alias_fingerprint
+                    or header.get("dataset") != dataset_fingerprint(dataset_path)
+                ):
+                    return None
+                arrays: Dict[str, array] = {}
+                for name, typecode, itemsize, length in header["arrays"]:
+                    values = array(typecode)
+                    if values.itemsize != itemsize:
+                        return None
+                    values.fromfile(handle, length)
+                    arrays[name] = values
+        except (OSError, ValueError, KeyError, EOFError):
+            return None
+        return ScanRecord(
+            label_sets=[frozenset(labels) for labels in header["label_sets"]],
+            chunks=[tuple(chunk) for chunk in header["chunks"]],
+            chunk_classes=[tuple(classes) for classes in header["chunk_classes"]],
+            **arrays,
+        )
+
+    def store(self, dataset_path: Path, alias_fingerprint: str, record: ScanRecord) -> None:
+        arrays = [(name, getattr(record, name)) for name in SCAN_RECORD_ARRAYS]
+        header = {
+            "version": SCAN_CACHE_VERSION,
+            "byteorder": sys.byteorder,
+            "aliases": alias_fingerprint,
+            "dataset": dataset_fingerprint(dataset_path),
+            "label_sets": [sorted(labels) for labels in record.label_sets],
+            "chunks": [list(chunk) for chunk in record.chunks],
+            "chunk_classes": [list(classes) for classes in record.chunk_classes],
+            "arrays": [[name, values.typecode, values.itemsize, len(values)] for name, values in arrays],
+        }
+        path = self.path_for(dataset_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with temp_path.open("wb") as handle:
+            handle.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+            for _name, values in arrays:
+                values.tofile(handle)
+        os.replace(temp_path, path)
+
+
+def record_file_matches(
+    dataset_paths: Sequence[Path],
+    active_aliases: Sequence[AliasEntry],
+    workers: int,
+    shard_bytes: int,
+) -> List[ScanRecord]:
+    """One record per dataset file, in input order; files are sharded across the pool together."""
+    aggregator = ScanRecordAggregator(build_alias_automaton(active_aliases))
+    return [builder.record for (builder,) in scan_corpus_files(dataset_paths, [aggregator], workers, shard_bytes)]
+
+
+def record_dataset_pass(
+    dataset_paths: Sequence[Path],
+    aliases: Sequence[AliasEntry],
+    inactive_alias_ids: Set[int] | None = None,
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    candidate_memory_mb: float = 0.0,
+    min_chunk_support: int = 0,
+    scan_cache: ScanCache | None = None,
+    companions: Sequence[CorpusAggregator] = (),
+) -> Tuple[ScanRecord, List[Any]]:
+    """:func:`record_dataset_matches` plus the states of ``companions`` filled in the same read.
+
+    Companion aggregators (e.g. the ingredient analysis term frequencies) see
+    every row of the recording pass. Cached files are never read, so
+    companions cannot be combined with ``scan_cache``.
+    """
+    inactive_set = inactive_alias_ids or set()
+    active_aliases = [alias for alias in aliases if alias.alias_id not in inactive_set]
+    if scan_cache is not None:
+        if candidate_memory_mb > 0:
+            raise RuntimeError("The scan cache cannot be combined with memory-bounded candidate mining.")
+        if companions:
+            raise RuntimeError("The scan cache cannot be combined with a shared analysis pass.")
+        alias_fingerprint = alias_set_fingerprint(active_aliases)
+        file_records = [scan_cache.load(path, alias_fingerprint) for path in dataset_paths]
+        missing = [path for path, record in zip(dataset_paths, file_records) if record is None]
+        scanned = iter(record_file_matches(missing, active_aliases, workers, shard_bytes))
+        for index, path in enumerate(dataset_paths):
+            if file_records[index] is None:
+                file_records[index] = next(scanned)
+                scan_cache.store(path, alias_fingerprint, file_records[index])
+        return merge_scan_records(file_records), []
+
+    chunk_sketch: ChunkSketch | None = None
+    if candidate_memory_mb > 0:
+        chunk_sketch = sketch_dataset_chunks(dataset_paths, ChunkSketch.for_budget(candidate_memory_mb).width, workers)
+    aggregator = ScanRecordAggregator(build_alias_automaton(active_aliases), chunk_sketch, min_chunk_support)
+    builder, *companion_states = scan_corpus(dataset_paths, [aggregator, *companions], workers, shard_bytes)
+    return builder.record, companion_states
+
+
+def record_dataset_matches(
     dataset_paths: Sequence[Path],
     aliases: Sequence[AliasEntry],
+    inactive_alias_ids: Set[int] | None = None,
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    candidate_memory_mb: float = 0.0,
+    min_chunk_support: int = 0,
+    scan_cache: ScanCache | None = None,
+) -> ScanRecord:
+    """Tokenize, match and mine candidates for every dataset row once.
+
+    Aliases inactive here are never matched. Aliases deactivated later (auto
+    demotion) are dropped at aggregation time: every alias is counted
+    independently by :func:`match_aliases`, so filtering the recorded ids
+    gives the same counts as rescanning with fewer aliases.
+
+    With ``workers`` > 1 the datasets are split into ``shard_bytes`` line-aligned
+    ranges, recorded in a process pool and merged in input order; the record
+    is the same as the in-process one.
+
+    ``candidate_memory_mb`` > 0 bounds candidate mining. A first, chunk-only
+    pass fills a :class:`ChunkSketch` of that size, and the recording pass then
+    keeps only chunks whose estimate reaches ``min_chunk_support``, counted
+    exactly. No chunk that could meet the support floor is lost, so the
+    candidate queue is unchanged.
+
+    With ``scan_cache``, each file's record is loaded from the cache when the
+    file and the active alias set are unchanged; only the other files are
+    recorded (and stored). Per-file records are merged in input order, so the
+    result is the same as an uncached scan. The sketch in the memory-bounded
+    mode spans every file, so the two cannot be combined.
+    """
+    record, _states = record_dataset_pass(
+        dataset_paths,
+        aliases,
+        inactive_alias_ids,
+        workers,
+        shard_bytes,
+        candidate_memory_mb,
+        min_chunk_support,
+        scan_cache,
+    )
+    return record
+
+
+def aggregate_scan_record(
+    record: ScanRecord,
+    aliases: Sequence[AliasEntry],
     canonical_by_id: Mapping[str, CanonicalEntry],
     inactive_alias_ids: Set[int] | None = None,
 ) -> Tuple[
@@ -1210,124 +1695,263 @@ def scan_datasets(
     Dict[str, Counter],
     Dict[str, Counter],
 ]:
+    """Recompute the :func:`scan_datasets` aggregates from ``record`` with ``inactive_alias_ids`` excluded."""
     inactive_set = inactive_alias_ids or set()
-    active_aliases = [alias for alias in aliases if alias.alias_id not in inactive_set]
-    trie = build_alias_trie(active_aliases)
     alias_stats: Dict[int, AliasStats] = {alias.alias_id: AliasStats() for alias in aliases}
     canonical_stats: Dict[str, CanonicalStats] = {cid: CanonicalStats() for cid in canonical_by_id}
     class_summary: Dict[str, ClassSummary] = {class_key: ClassSummary() for class_key in CLASS_ORDER}
 
-    candidate_total: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
-    candidate_target: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
-    candidate_unmatched_target: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
-    candidate_other_labeled: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
-    candidate_unlabeled: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+    # Counted by chunk id here and keyed by token tuple on the way out.
+    chunk_total: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+    chunk_target: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+    chunk_unmatched_target: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+    chunk_other_labeled: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+    chunk_unlabeled: Dict[str, Counter] = {class_key: Counter() for class_key in CLASS_ORDER}
+
+    # Target/other-label outcomes depend only on the label set, of which there are few.
+    target_by_label_set: List[Dict[str, bool]] = []
+    other_by_label_set: List[Dict[str, bool]] = []
+    for row_labels in record.label_sets:
+        label_set = set(row_labels)
+        wheat_proxy = "wheat" in label_set
+        target_by_label_set.append(
+            {class_key: class_target_hit(class_key, label_set, wheat_proxy) for class_key in CLASS_ORDER}
+        )
+        other_by_label_set.append(
+            {class_key: has_other_non_target_label(class_key, label_set) for class_key in CLASS_ORDER}
+        )
 
-    total_rows = 0
+    alias_class = [alias.class_key for alias in aliases]
+    alias_canonical = [alias.canonical_id for alias in aliases]
+    labeled_rows_by_set = Counter(record.row_label_ids)
+    for label_set_id, row_count in labeled_rows_by_set.items():
+        row_labels = record.label_sets[label_set_id]
+        for class_key in CLASS_ORDER:
+            if CLASS_SCOPE[class_key] == "big9":
+                if class_key in row_labels:
+                    class_summary[class_key].labeled_rows += row_count
+            elif "wheat" in row_labels:
+                class_summary[class_key].proxy_rows += row_count
+
+    match_offsets = record.match_offsets
+    chunk_offsets = record.chunk_offsets
+    for row_index, label_set_id in enumerate(record.row_label_ids):
+        row_labels = record.label_sets[label_set_id]
+        target_hits = target_by_label_set[label_set_id]
+        other_labels = other_by_label_set[label_set_id]
+
+        matched_classes_row: Set[str] = set()
+        matched_canonicals_row: Set[str] = set()
+        matched_canonical_target_row: Set[str] = set()
+
+        for position in range(match_offsets[row_index], match_offsets[row_index + 1]):
+            alias_id = record.match_alias_ids[position]
+            if alias_id in inactive_set:
+                continue
+            mentions = record.match_mentions[position]
+            class_key = alias_class[alias_id]
+            canonical_id = alias_canonical[alias_id]
+            stat = alias_stats[alias_id]
+            stat.rows_matched += 1
+            stat.mentions_total += mentions
+
+            target_hit = target_hits[class_key]
+            if target_hit:
+                stat.target_rows += 1
+                matched_canonical_target_row.add(canonical_id)
+            elif other_labels[class_key]:
+                stat.other_labeled_rows += 1
+
+            matched_classes_row.add(class_key)
+            matched_canonicals_row.add(canonical_id)
+            canonical_stats[canonical_id].mentions_total += mentions
 
-    for dataset_path in dataset_paths:
-        with dataset_path.open("r", encoding="utf-8") as handle:
-            for raw_line in handle:
-                line = raw_line.strip()
-                if not line:
-                    continue
-                payload = json.loads(line)
-                if not isinstance(payload, dict):
-                    continue
+            summary = class_summary[class_key]
+            summary.alias_mentions_total += mentions
+            summary.unique_alias_ids.add(alias_id)
 
-                total_rows += 1
-                text = str(payload.get("text") or "")
-                row_labels = {
-                    allergen_key_from_label(str(item))
-                    for item in (payload.get("allergens") or [])
-                    if allergen_key_from_label(str(item))
-                }
-                wheat_proxy = "wheat" in row_labels
-
-                for class_key in CLASS_ORDER:
-                    if CLASS_SCOPE[class_key] == "big9":
-                        if class_key in row_labels:
-                            class_summary[class_key].labeled_rows += 1
-                    else:
-                        if wheat_proxy:
-                            class_summary[class_key].proxy_rows += 1
-
-                tokens = tokenize(text)
-                matched_alias_counts = match_aliases(tokens, trie) if tokens else Counter()
-
-                matched_classes_row: Set[str] = set()
-                matched_canonicals_row: Set[str] = set()
-                matched_canonical_target_row: Set[str] = set()
-
-                for alias_id, mentions in matched_alias_counts.items():
-                    alias = aliases[alias_id]
-                    stat = alias_stats[alias_id]
-                    stat.rows_matched += 1
-                    stat.mentions_total += int(mentions)
-
-                    target_hit = class_target_hit(alias.class_key, row_labels, wheat_proxy)
-                    if target_hit:
-                        stat.target_rows += 1
-                    elif has_other_non_target_label(alias.class_key, row_labels):
-                        stat.other_labeled_rows += 1
-
-                    matched_classes_row.add(alias.class_key)
-                    matched_canonicals_row.add(alias.canonical_id)
-                    if target_hit:
-                        matched_canonical_target_row.add(alias.canonical_id)
-
-                    summary = class_summary[alias.class_key]
-                    summary.alias_mentions_total += int(mentions)
-                    summary.unique_alias_ids.add(alias_id)
-
-                for class_key in matched_classes_row:
-                    class_summary[class_key].rows_with_alias_any += 1
-                    if CLASS_SCOPE[class_key] == "big9":
-                        if class_key in row_labels:
-                            class_summary[class_key].labeled_rows_with_alias += 1
-                    else:
-                        if wheat_proxy:
-                            class_summary[class_key].proxy_rows_with_alias += 1
-
-                for canonical_id in matched_canonicals_row:
-                    canonical_stats[canonical_id].rows_matched += 1
-                for canonical_id in matched_canonical_target_row:
-                    canonical_stats[canonical_id].target_rows += 1
-                for alias_id, mentions in matched_alias_counts.items():
-                    canonical_id = aliases[alias_id].canonical_id
-                    canonical_stats[canonical_id].mentions_total += int(mentions)
-
-                chunks = extract_candidate_chunks(text)
-                if chunks:
-                    for class_key in CLASS_ORDER:
-                        class_chunks = {chunk for chunk in chunks if class_token_overlap(chunk, class_key)}
-                        if not class_chunks:
-                            continue
-                        candidate_total[class_key].update(class_chunks)
-
-                        target_hit = class_target_hit(class_key, row_labels, wheat_proxy)
-                        if target_hit:
-                            candidate_target[class_key].update(class_chunks)
-                            if class_key not in matched_classes_row:
-                                candidate_unmatched_target[class_key].update(class_chunks)
-                        elif has_other_non_target_label(class_key, row_labels):
-                            candidate_other_labeled[class_key].update(class_chunks)
-                        elif not row_labels:
-                            candidate_unlabeled[class_key].update(class_chunks)
+        for class_key in matched_classes_row:
+            class_summary[class_key].rows_with_alias_any += 1
+            if CLASS_SCOPE[class_key] == "big9":
+                if class_key in row_labels:
+                    class_summary[class_key].labeled_rows_with_alias += 1
+            elif "wheat" in row_labels:
+                class_summary[class_key].proxy_rows_with_alias += 1
+
+        for canonical_id in matched_canonicals_row:
+            canonical_stats[canonical_id].rows_matched += 1
+        for canonical_id in matched_canonical_target_row:
+            canonical_stats[canonical_id].target_rows += 1
+
+        for position in range(chunk_offsets[row_index], chunk_offsets[row_index + 1]):
+            chunk_id = record.chunk_ids[position]
+            for class_key in record.chunk_classes[chunk_id]:
+                chunk_total[class_key][chunk_id] += 1
+                if target_hits[class_key]:
+                    chunk_target[class_key][chunk_id] += 1
+                    if class_key not in matched_classes_row:
+                        chunk_unmatched_target[class_key][chunk_id] += 1
+                elif other_labels[class_key]:
+                    chunk_other_labeled[class_key][chunk_id] += 1
+                elif not row_labels:
+                    chunk_unlabeled[class_key][chunk_id] += 1
+
+    def by_tokens(counters: Mapping[str, Counter]) -> Dict[str, Counter]:
+        return {
+            class_key: Counter({record.chunks[chunk_id]: count for chunk_id, count in counter.items()})
+            for class_key, counter in counters.items()
+        }
 
     return (
-        total_rows,
+        record.total_rows,
         alias_stats,
         canonical_stats,
         class_summary,
-        candidate_total,
-        candidate_target,
-        candidate_unmatched_target,
-        candidate_other_labeled,
-        candidate_unlabeled,
+        by_tokens(chunk_total),
+        by_tokens(chunk_target),
+        by_tokens(chunk_unmatched_target),
+        by_tokens(chunk_other_labeled),
+        by_tokens(chunk_unlabeled),
+    )
+
+
+def scan_datasets(
+    dataset_paths: Sequence[Path],
+    aliases: Sequence[AliasEntry],
+    canonical_by_id: Mapping[str, CanonicalEntry],
+    inactive_alias_ids: Set[int] | None = None,
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Tuple[
+    int,
+    Dict[int, AliasStats],
+    Dict[str, CanonicalStats],
+    Dict[str, ClassSummary],
+    Dict[str, Counter],
+    Dict[str, Counter],
+    Dict[str, Counter],
+    Dict[str, Counter],
+    Dict[str, Counter],
+]:
+    record = record_dataset_matches(dataset_paths, aliases, inactive_alias_ids, workers, shard_bytes)
+    return aggregate_scan_record(record, aliases, canonical_by_id, inactive_alias_ids)
+
+
+# (recommendation, reason) per tier; big9 tiers are checked in this order.
+BIG9_CANDIDATE_TIERS: Sequence[Tuple[str, str]] = (
+    ("promote", "High support, precision, and exclusivity from uncovered positives."),
+    ("review_high", "Strong precision/exclusivity; mined from unmatched positives."),
+    ("review_medium", "Moderate precision/exclusivity; verify before promotion."),
+    ("review_low", "Frequent in uncovered positives but likely ambiguous."),
+)
+CEREAL_CANDIDATE_TIERS: Sequence[Tuple[str, str]] = (
+    ("review_cereal_high", "High corpus support in uncovered wheat-proxy positives; verify gluten status."),
+    ("review_cereal", "Candidate cereal term from uncovered proxy positives."),
+)
+
+
+def export_candidate_columns(
+    class_key: str,
+    candidate_total: Mapping[str, Counter],
+    candidate_target: Mapping[str, Counter],
+    candidate_unmatched_target: Mapping[str, Counter],
+    candidate_other_labeled: Mapping[str, Counter],
+    candidate_unlabeled: Mapping[str, Counter],
+    min_unmatched_target_rows: int = 0,
+    min_support: int = 0,
+) -> CandidateColumns:
+    """Columns for ``class_key``'s candidates that meet both row floors.
+
+    Rows keep the iteration order of ``candidate_unmatched_target``, which is
+    the tie order of the review queue. The floors are applied before the
+    remaining counters are looked up.
+    """
+    unmatched_counts = candidate_unmatched_target[class_key]
+    unmatched = np.fromiter(unmatched_counts.values(), dtype=np.int64, count=len(unmatched_counts))
+    all_tokens = list(unmatched_counts)
+    tokens = [all_tokens[index] for index in np.flatnonzero(unmatched >= min_unmatched_target_rows)]
+    unmatched = unmatched[unmatched >= min_unmatched_target_rows]
+
+    def column(counters: Mapping[str, Counter]) -> np.ndarray:
+        counter = counters[class_key]
+        return np.fromiter((counter.get(token_tuple, 0) for token_tuple in tokens), dtype=np.int64, count=len(tokens))
+
+    support = column(candidate_total)
+    kept = np.flatnonzero(support >= min_support)
+    tokens = [tokens[index] for index in kept]
+    return CandidateColumns(
+        tokens=tokens,
+        support=support[kept],
+        target=column(candidate_target),
+        unmatched_target=unmatched[kept],
+        other_labeled=column(candidate_other_labeled),
+        unlabeled=column(candidate_unlabeled),
     )
 
 
+def candidate_allowed(
+    class_key: str,
+    token_tuple: Tuple[str, ...],
+    alias_token_index: Mapping[Tuple[str, Tuple[str, ...]], int],
+    policy_rows: Mapping[Tuple[str, Tuple[str, ...]], AliasPolicyRow],
+) -> bool:
+    """The dictionary-backed candidate filters: not already an alias, class overlap, policy."""
+    if (class_key, token_tuple) in alias_token_index:
+        return False
+    if len(token_tuple) > 8:
+        return False
+    if not class_token_overlap(token_tuple, class_key):
+        return False
+    policy = resolve_policy_for_alias(class_key, token_tuple, policy_rows)
+    if policy and policy.action == "deny":
+        return False
+    if not policy and token_tuple in DEFAULT_AMBIGUOUS_ALIAS_TOKENS:
+        return False
+    return True
+
+
+def top_candidate_order(sort_columns: Sequence[np.ndarray], limit: int) -> np.ndarray:
+    """Row indices of ``sorted(rows, key=sort_columns, reverse=True)[:limit]``, for ``limit`` > 0.
+
+    Ties keep input order, as in Python's stable sort. When ``limit`` cuts the
+    rows, ``np.argpartition`` on the first column picks every row that can
+    still make the cut, and only those are fully sorted.
+    """
+    primary = sort_columns[0]
+    pool = np.arange(len(primary))
+    if limit < len(primary):
+        cutoff = primary[np.argpartition(-primary, limit - 1)[limit - 1]]
+        pool = np.flatnonzero(primary >= cutoff)
+    order = np.lexsort([pool] + [-column[pool] for column in reversed(sort_columns)])
+    return pool[order][:limit]
+
+
+def select_top_candidates(
+    sort_columns: Sequence[np.ndarray],
+    limit: int,
+    allowed: Callable[[int], bool],
+) -> List[int]:
+    """The first ``limit`` rows, by :func:`top_candidate_order`, that pass ``allowed``.
+
+    ``allowed`` runs in rank order over cuts that double until enough rows
+    pass, so it sees roughly ``limit`` rows instead of every candidate.
+    """
+    if limit <= 0:
+        return []
+    checked: Dict[int, bool] = {}
+    cut = limit
+    while True:
+        picked = []
+        for index in top_candidate_order(sort_columns, cut):
+            if index not in checked:
+                checked[index] = allowed(int(index))
+            if checked[index]:
+                picked.append(int(index))
+        if len(picked) >= limit or cut >= len(sort_columns[0]):
+            return picked[:limit]
+        cut *= 2
+
+
 def build_candidate_queue(
     candidate_total: Mapping[str, Counter],
     candidate_target: Mapping[str, Counter],
@@ -1342,6 +1966,123 @@ def build_candidate_queue(
     min_unmatched_target_rows: int,
     max_review_per_class: int,
 ) -> List[CandidateRow]:
+    """Score and tier each class's mined candidates and keep the top ``max_review_per_class``.
+
+    Statistics are exported per class with :func:`export_candidate_columns`.
+    Thresholds, precision/exclusivity/score and tiers are computed as array
+    masks. Tiered rows are ranked with :func:`select_top_candidates`, and the
+    alias-index/policy filters and ``CandidateRow`` construction run only on
+    rows near the top. The queue is identical to
+    :func:`build_candidate_queue_reference` (a ``max_review_per_class`` of 0
+    or less keeps no rows).
+    """
+    queue: List[CandidateRow] = []
+
+    for class_key in CLASS_ORDER:
+        columns = export_candidate_columns(
+            class_key,
+            candidate_total,
+            candidate_target,
+            candidate_unmatched_target,
+            candidate_other_labeled,
+            candidate_unlabeled,
+            min_unmatched_target_rows,
+            min_support,
+        )
+        big9 = CLASS_SCOPE[class_key] == "big9"
+        rows = np.arange(len(columns.tokens))
+        if big9:
+            rows = np.flatnonzero(columns.target >= max(8, int(min_support * 0.5)))
+        if not len(rows):
+            continue
+
+        support = columns.support[rows]
+        target = columns.target[rows]
+        unmatched = columns.unmatched_target[rows]
+        other_labeled = columns.other_labeled[rows]
+        target_f = target.astype(np.float64)
+        precision = np.divide(target_f, support, out=np.zeros(len(rows)), where=support > 0)
+        labeled = target + other_labeled
+        exclusivity = np.divide(target_f, labeled, out=np.zeros(len(rows)), where=labeled > 0)
+        score = support * precision * exclusivity
+
+        if big9:
+            tiers = BIG9_CANDIDATE_TIERS
+            tier = np.select(
+                [
+                    (precision >= 0.9)
+                    & (exclusivity >= max(min_exclusivity, 0.75))
+                    & (target >= max(20, min_support)),
+                    (precision >= min_precision) & (exclusivity >= min_exclusivity),
+                    (precision >= 0.6) & (exclusivity >= 0.45) & (unmatched >= min_unmatched_target_rows),
+                    (precision >= 0.45) & (unmatched >= 2 * min_unmatched_target_rows),
+                ],
+                [0, 1, 2, 3],
+                default=-1,
+            )
+            sort_columns = [score, unmatched, target, support, precision]
+        else:
+            # Cereals-with-gluten precision is proxy-only (wheat labels).
+            tiers = CEREAL_CANDIDATE_TIERS
+            tier = np.where((support >= max(40, min_support * 2)) & (unmatched >= min_unmatched_target_rows), 0, 1)
+            sort_columns = [unmatched, support, exclusivity]
+
+        tiered = np.flatnonzero(tier >= 0)
+        selected = select_top_candidates(
+            [values[tiered] for values in sort_columns],
+            max_review_per_class,
+            lambda rank: candidate_allowed(class_key, columns.tokens[rows[tiered[rank]]], alias_token_index, policy_rows),
+        )
+        for position in tiered[selected]:
+            row = rows[position]
+            token_tuple = columns.tokens[row]
+            recommendation, reason = tiers[tier[position]]
+            queue.append(
+                CandidateRow(
+                    class_key=class_key,
+                    candidate_display=title_from_tokens(token_tuple),
+                    candidate_tokens=token_tuple,
+                    support_rows=int(support[position]),
+                    target_rows=int(target[position]),
+                    unmatched_target_rows=int(unmatched[position]),
+                    other_labeled_rows=int(other_labeled[position]),
+                    unlabeled_rows=int(columns.unlabeled[row]),
+                    precision=float(precision[position]),
+                    exclusivity=float(exclusivity[position]),
+                    score=float(score[position]),
+                    recommendation=recommendation,
+                    reason=reason,
+                )
+            )
+
+    queue.sort(
+        key=lambda item: (
+            CLASS_ORDER.index(item.class_key),
+            -item.score,
+            -item.unmatched_target_rows,
+            -item.support_rows,
+            -item.precision,
+            item.candidate_display.lower(),
+        )
+    )
+    return queue
+
+
+def build_candidate_queue_reference(
+    candidate_total: Mapping[str, Counter],
+    candidate_target: Mapping[str, Counter],
+    candidate_unmatched_target: Mapping[str, Counter],
+    candidate_other_labeled: Mapping[str, Counter],
+    candidate_unlabeled: Mapping[str, Counter],
+    alias_token_index: Mapping[Tuple[str, Tuple[str, ...]], int],
+    policy_rows: Mapping[Tuple[str, Tuple[str, ...]], AliasPolicyRow],
+    min_support: int,
+    min_precision: float,
+    min_exclusivity: float,
+    min_unmatched_target_rows: int,
+    max_review_per_class: int,
+) -> List[CandidateRow]:
+    """Row-at-a-time :func:`build_candidate_queue`, kept as the reference for parity tests."""
     queue: List[CandidateRow] = []
 
     for class_key in CLASS_ORDER:
@@ -1769,15 +2510,31 @@ def write_coverage_gap_csv(output_path: Path, gaps: Sequence[CoverageGapRow]) ->
             )
 
 
-def rebuild_sheet(workbook: openpyxl.Workbook, name: str) -> openpyxl.worksheet.worksheet.Worksheet:
-    if name in workbook.sheetnames:
-        old = workbook[name]
-        workbook.remove(old)
-    return workbook.create_sheet(name)
+def compile_lexicon(
+    output_path: Path,
+    aliases: Sequence[AliasEntry],
+    canonical_by_id: Mapping[str, CanonicalEntry],
+    inactive_alias_ids: Set[int],
+    status_override: Mapping[int, str],
+) -> Dict[str, int]:
+    """Write the runtime artifact read by ``lexicon_matcher.LexiconMatcher``; inactive aliases stay in, flagged."""
+    compiled = [
+        CompiledAlias(
+            alias_id=alias.alias_id,
+            alias_tokens=alias.alias_tokens,
+            alias_display=alias.alias_display,
+            canonical_id=alias.canonical_id,
+            canonical_name=canonical_by_id[alias.canonical_id].canonical_name,
+            class_key=alias.class_key,
+            status=status_override.get(alias.alias_id, alias.status),
+            active=alias.alias_id not in inactive_alias_ids,
+        )
+        for alias in aliases
+    ]
+    return write_lexicon_artifact(output_path, compiled, CLASS_DISPLAY)
 
 
 def populate_workbook_sheets(
-    workbook: openpyxl.Workbook,
     canonical_by_id: Mapping[str, CanonicalEntry],
     canonical_stats: Mapping[str, CanonicalStats],
     aliases: Sequence[AliasEntry],
@@ -1791,14 +2548,15 @@ def populate_workbook_sheets(
     coverage_gaps: Sequence[CoverageGapRow],
     policy_rows: Mapping[Tuple[str, Tuple[str, ...]], AliasPolicyRow],
     total_rows: int,
-) -> None:
-    ws_canonical = rebuild_sheet(workbook, "Lexicon Canonical")
-    ws_aliases = rebuild_sheet(workbook, "Lexicon Aliases")
-    ws_summary = rebuild_sheet(workbook, "Lexicon Class Summary")
-    ws_queue = rebuild_sheet(workbook, "Lexicon Candidate Queue")
-    ws_actions = rebuild_sheet(workbook, "Lexicon Alias Actions")
-    ws_gaps = rebuild_sheet(workbook, "Lexicon Coverage Gaps")
-    ws_policy = rebuild_sheet(workbook, WORKBOOK_SHEET_ALIAS_POLICY)
+) -> List[SheetRows]:
+    """Generated sheets, in output order; :func:`write_workbook` replaces them in the workbook."""
+    ws_canonical = SheetRows("Lexicon Canonical")
+    ws_aliases = SheetRows("Lexicon Aliases")
+    ws_summary = SheetRows("Lexicon Class Summary")
+    ws_queue = SheetRows("Lexicon Candidate Queue")
+    ws_actions = SheetRows("Lexicon Alias Actions")
+    ws_gaps = SheetRows("Lexicon Coverage Gaps")
+    ws_policy = SheetRows(WORKBOOK_SHEET_ALIAS_POLICY)
 
     ws_canonical.append(
         [
@@ -2072,6 +2830,7 @@ def populate_workbook_sheets(
             ]
         )
     ws_policy.freeze_panes = "A2"
+    return [ws_canonical, ws_aliases, ws_summary, ws_queue, ws_actions, ws_gaps, ws_policy]
 
 
 def main() -> int:
@@ -2087,6 +2846,16 @@ def main() -> int:
     if args.denylist_csv and denylist_csv and not denylist_csv.exists():
         print(f"Denylist CSV not found: {denylist_csv}")
         return 1
+    scan_cache_dir = resolve_optional_path(str(args.scan_cache_dir or ""), repo_root)
+    if scan_cache_dir and float(args.candidate_memory_mb) > 0:
+        print("--scan-cache-dir cannot be combined with --candidate-memory-mb.")
+        return 1
+    scan_cache = ScanCache(scan_cache_dir) if scan_cache_dir else None
+    term_analysis_output = resolve_optional_path(str(args.term_analysis_workbook_output or ""), repo_root)
+    if scan_cache and term_analysis_output:
+        print("--scan-cache-dir cannot be combined with --term-analysis-workbook-output.")
+        return 1
+    timings = PhaseTimings()
 
     canonical_by_key: Dict[Tuple[str, str], CanonicalEntry] = {}
     canonical_by_id: Dict[str, CanonicalEntry] = {}
@@ -2112,27 +2881,37 @@ def main() -> int:
     ingest_rule_variants(aliases=aliases, alias_token_index=alias_token_index)
 
     policy_rows = load_alias_policy_rows(workbook=workbook, denylist_csv=denylist_csv)
+    workbook.close()
+    companions: List[CorpusAggregator] = []
+    if term_analysis_output:
+        term_entries, existing_term_keys = term_analysis.build_term_inventory(workbook_input)
+        companions.append(term_analysis.TermFrequencyAggregator(term_entries))
+    timings.lap("ingest")
     inactive_alias_ids, allow_alias_ids, status_override, decision_reason, alias_actions = apply_policy_decisions(
         aliases=aliases,
         policy_rows=policy_rows,
     )
 
-    (
-        _total_rows_pass1,
-        alias_stats_pass1,
-        _canonical_stats_pass1,
-        _class_summary_pass1,
-        _candidate_total_pass1,
-        _candidate_target_pass1,
-        _candidate_unmatched_pass1,
-        _candidate_other_labeled_pass1,
-        _candidate_unlabeled_pass1,
-    ) = scan_datasets(
+    # One read of the datasets; the post-demotion aggregates are recomputed from the record.
+    # Cached records match every alias, so policy changes never invalidate them.
+    scan_record, companion_states = record_dataset_pass(
         dataset_paths=dataset_paths,
         aliases=aliases,
+        inactive_alias_ids=set() if scan_cache else inactive_alias_ids,
+        workers=max(0, int(args.workers)),
+        shard_bytes=max(1, int(float(args.shard_mb) * 1024 * 1024)),
+        candidate_memory_mb=max(0.0, float(args.candidate_memory_mb)),
+        min_chunk_support=int(args.min_candidate_support),
+        scan_cache=scan_cache,
+        companions=companions,
+    )
+    timings.lap("scan")
+    alias_stats_pass1 = aggregate_scan_record(
+        scan_record,
+        aliases=aliases,
         canonical_by_id=canonical_by_id,
         inactive_alias_ids=inactive_alias_ids,
-    )
+    )[1]
 
     alias_actions.extend(
         auto_demote_aliases(
@@ -2158,8 +2937,8 @@ def main() -> int:
         candidate_unmatched_target,
         candidate_other_labeled,
         candidate_unlabeled,
-    ) = scan_datasets(
-        dataset_paths=dataset_paths,
+    ) = aggregate_scan_record(
+        scan_record,
         aliases=aliases,
         canonical_by_id=canonical_by_id,
         inactive_alias_ids=inactive_alias_ids,
@@ -2180,6 +2959,7 @@ def main() -> int:
         max_review_per_class=int(args.max_review_per_class),
     )
     coverage_gaps = build_coverage_gaps(class_summary)
+    timings.lap("aggregate")
 
     output_dir = Path(args.output_dir)
     if not output_dir.is_absolute():
@@ -2192,6 +2972,7 @@ def main() -> int:
     candidate_csv = output_dir / "allergen_lexicon_candidate_queue.csv"
     alias_actions_csv = output_dir / "allergen_lexicon_alias_actions.csv"
     coverage_gaps_csv = output_dir / "allergen_lexicon_coverage_gaps.csv"
+    lexicon_artifact = output_dir / "allergen_lexicon.bin"
 
     write_canonical_csv(canonical_csv, canonical_by_id, canonical_stats, aliases)
     write_alias_csv(
@@ -2206,9 +2987,11 @@ def main() -> int:
     write_candidate_queue_csv(candidate_csv, candidate_queue)
     write_alias_actions_csv(alias_actions_csv, alias_actions)
     write_coverage_gap_csv(coverage_gaps_csv, coverage_gaps)
+    timings.lap("csv")
+    artifact_summary = compile_lexicon(lexicon_artifact, aliases, canonical_by_id, inactive_alias_ids, status_override)
+    timings.lap("artifact")
 
-    populate_workbook_sheets(
-        workbook=workbook,
+    generated_sheets = populate_workbook_sheets(
         canonical_by_id=canonical_by_id,
         canonical_stats=canonical_stats,
         aliases=aliases,
@@ -2226,7 +3009,23 @@ def main() -> int:
 
     workbook_output = Path(args.workbook_output)
     workbook_output.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(workbook_output)
+    write_workbook(workbook_input, workbook_output, generated_sheets)
+    timings.lap("workbook")
+
+    term_analysis_written: Dict[str, Path] = {}
+    if term_analysis_output:
+        term_csv_dir = Path(args.term_analysis_csv_dir)
+        if not term_csv_dir.is_absolute():
+            term_csv_dir = repo_root / term_csv_dir
+        _selected_terms, term_analysis_written = term_analysis.write_term_analysis(
+            workbook_input,
+            term_analysis_output,
+            term_csv_dir,
+            term_entries,
+            existing_term_keys,
+            term_analysis.term_scan_result(term_entries, companion_states[0]),
+        )
+        timings.lap("term_analysis")
 
     active_alias_count = len(aliases) - len(inactive_alias_ids)
     auto_demoted_count = sum(1 for item in alias_actions if item.action == "demote_auto")
@@ -2234,12 +3033,15 @@ def main() -> int:
     print(f"Workbook input: {workbook_input}")
     print(f"Workbook output: {workbook_output}")
     print(f"Datasets scanned: {len(dataset_paths)}")
+    if scan_cache:
+        print(f"Scan cache: {scan_cache.hits} reused, {scan_cache.misses} rescanned ({scan_cache.directory})")
     print(f"Total rows scanned: {total_rows}")
     print(f"Canonical terms: {len(canonical_by_id)}")
     print(f"Alias terms: {len(aliases)}")
     print(f"Active aliases after policy+demotion: {active_alias_count}")
     print(f"Auto-demoted aliases: {auto_demoted_count}")
     print(f"Policy rows loaded: {len(policy_rows)}")
+    print(f"Candidate chunks kept: {len(scan_record.chunks)}")
     print(f"Candidate review rows: {len(candidate_queue)}")
     print(f"Canonical CSV: {canonical_csv}")
     print(f"Alias CSV: {alias_csv}")
@@ -2247,6 +3049,14 @@ def main() -> int:
     print(f"Candidate queue CSV: {candidate_csv}")
     print(f"Alias actions CSV: {alias_actions_csv}")
     print(f"Coverage gaps CSV: {coverage_gaps_csv}")
+    print(
+        f"Compiled lexicon: {lexicon_artifact} ({artifact_summary['active_aliases']}/{artifact_summary['aliases']} "
+        f"aliases active, {artifact_summary['bytes']} bytes)"
+    )
+    if term_analysis_written:
+        print(f"Term analysis workbook: {term_analysis_written['workbook']}")
+        print(f"Term frequency CSV: {term_analysis_written['term_frequency_csv']}")
+    print(f"Phase timings: {timings.summary()}")
     return 0
 
 
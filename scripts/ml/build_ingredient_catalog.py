@@ -7,15 +7,16 @@ import argparse
 import csv
 import gzip
 import json
-import os
 import re
 import sys
 import unicodedata
-import urllib.error
-import urllib.request
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import DefaultDict, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+from typing import Callable, DefaultDict, Deque, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+from snapshot_download import download_snapshot
 
 
 DEFAULT_DOWNLOAD_URL = "https://static.openfoodfacts.org/data/en.openfoodfacts.org.products.csv.gz"
@@ -28,6 +29,10 @@ DEFAULT_MIN_SUPPORT = 2
 DEFAULT_COUNTRY_TAG = "en:united-states"
 DEFAULT_USER_AGENT = "Clarivore/1.0 (ingredient catalog rebuild; matt@clarivore.app)"
 DEFAULT_TIMEOUT = 120.0
+DEFAULT_DOWNLOAD_ATTEMPTS = 5
+DEFAULT_WORKERS = 0
+DEFAULT_CHUNK_ROWS = 20000
+DEFAULT_MEMO_SIZE = 200000
 
 SEED_SOURCE = "openfoodfacts_safe_only_v1"
 EXTRACTION_VERSION = "off_safe_only_v1"
@@ -593,6 +598,24 @@ BLOCKED_ANALYSIS_TAGS: Tuple[str, ...] = (
     "en:non-pescatarian",
 )
 
+# The only OFF export columns build_catalog_rows reads.
+OFF_SCAN_COLUMNS: Tuple[str, ...] = (
+    "code",
+    "_id",
+    "countries_tags",
+    "allergens_tags",
+    "allergens",
+    "traces_tags",
+    "traces",
+    "ingredients_analysis_tags",
+    "ingredients_text_en",
+    "ingredients_text",
+    "product_name_en",
+    "product_name",
+    "brands",
+)
+OFF_SCAN_INDEX: Dict[str, int] = {name: index for index, name in enumerate(OFF_SCAN_COLUMNS)}
+
 NOISY_SUBSTRINGS: Tuple[str, ...] = (
     " agr",
     " ajr ",
@@ -615,12 +638,46 @@ def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--sample-limit", type=int, default=5)
     parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
     parser.add_argument("--force-download", action="store_true")
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Send a conditional request (ETag/Last-Modified) and redownload only if the OFF export changed.",
+    )
+    parser.add_argument(
+        "--sha256",
+        default="",
+        help="Expected SHA-256 of the downloaded export. The download is rejected on mismatch.",
+    )
+    parser.add_argument(
+        "--download-attempts",
+        type=int,
+        default=DEFAULT_DOWNLOAD_ATTEMPTS,
+        help="Attempts per download; interrupted transfers resume from the partial .tmp file.",
+    )
     parser.add_argument(
         "--no-download",
         action="store_true",
         help="Fail if --input is missing instead of downloading the official OFF export.",
     )
     parser.add_argument("--user-agent", default=DEFAULT_USER_AGENT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Worker processes for the product scan (0 or 1 = scan in-process).",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="Products per chunk handed to each scan worker.",
+    )
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=DEFAULT_MEMO_SIZE,
+        help="Max distinct candidate strings whose canonical form and verdict are memoized (0 disables).",
+    )
     return parser.parse_args(argv)
 
 
@@ -678,48 +735,62 @@ def maybe_download_file(
     force_download: bool,
     skip_download: bool,
     user_agent: str,
+    revalidate: bool = False,
+    expected_sha256: str = "",
+    max_attempts: int = DEFAULT_DOWNLOAD_ATTEMPTS,
 ) -> Dict[str, object]:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    if output_path.exists() and not force_download:
-        return {"downloaded": False, "bytes_written": int(output_path.stat().st_size)}
+    try:
+        return download_snapshot(
+            url=url,
+            output_path=output_path,
+            timeout=timeout,
+            force_download=force_download,
+            revalidate=revalidate,
+            skip_download=skip_download,
+            user_agent=user_agent,
+            expected_sha256=expected_sha256,
+            max_attempts=max_attempts,
+        )
+    except RuntimeError as error:
+        raise RuntimeError(f"OFF {error}") from error
 
-    if skip_download:
-        raise RuntimeError(f"OFF snapshot missing: {output_path}")
 
-    temp_path = output_path.with_suffix(output_path.suffix + ".tmp")
-    if temp_path.exists():
-        temp_path.unlink()
+class OffRecord:
+    """Column-projected OFF product exposing the ``dict.get`` subset the filters use."""
 
-    request = urllib.request.Request(
-        url,
-        method="GET",
-        headers={"User-Agent": user_agent},
-    )
+    __slots__ = ("values",)
 
-    bytes_written = 0
-    try:
-        with urllib.request.urlopen(request, timeout=timeout) as response, temp_path.open("wb") as out:
-            while True:
-                chunk = response.read(1024 * 1024)
-                if not chunk:
-                    break
-                out.write(chunk)
-                bytes_written += len(chunk)
-    except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError) as error:
-        if temp_path.exists():
-            temp_path.unlink()
-        raise RuntimeError(f"OFF download failed: {error}") from error
-
-    os.replace(temp_path, output_path)
-    return {"downloaded": True, "bytes_written": bytes_written}
+    def __init__(self, values: Tuple[object, ...]) -> None:
+        self.values = values
+
+    def get(self, field_name: str, default: object = None) -> object:
+        index = OFF_SCAN_INDEX.get(field_name)
+        if index is None:
+            return default
+        value = self.values[index]
+        return default if value is None else value
+
+
+def open_off_snapshot(path: Path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    return opener(path, "rt", encoding="utf-8", newline="")
+
+
+def raise_csv_field_limit() -> None:
+    field_limit = sys.maxsize
+    while True:
+        try:
+            csv.field_size_limit(field_limit)
+            return
+        except OverflowError:
+            field_limit //= 10
 
 
 def iter_off_rows(path: Path) -> Iterator[Dict[str, object]]:
     path_name = path.name.lower()
-    opener = gzip.open if path.suffix == ".gz" else open
 
     if path_name.endswith(".jsonl") or path_name.endswith(".jsonl.gz"):
-        with opener(path, "rt", encoding="utf-8") as handle:
+        with open_off_snapshot(path) as handle:
             for raw_line in handle:
                 line = raw_line.strip()
                 if not line:
@@ -730,14 +801,8 @@ def iter_off_rows(path: Path) -> Iterator[Dict[str, object]]:
         return
 
     if path_name.endswith(".csv") or path_name.endswith(".csv.gz"):
-        field_limit = sys.maxsize
-        while True:
-            try:
-                csv.field_size_limit(field_limit)
-                break
-            except OverflowError:
-                field_limit //= 10
-        with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        raise_csv_field_limit()
+        with open_off_snapshot(path) as handle:
             reader = csv.DictReader(handle, delimiter="\t")
             for row in reader:
                 if isinstance(row, dict):
@@ -747,6 +812,39 @@ def iter_off_rows(path: Path) -> Iterator[Dict[str, object]]:
     raise RuntimeError(f"Unsupported OFF input format: {path}")
 
 
+def iter_off_records(path: Path) -> Iterator[OffRecord]:
+    """Yield only the ``OFF_SCAN_COLUMNS`` of each product.
+
+    The CSV header is resolved to column indices once, so the ~200-column OFF
+    export never materializes a per-row dict.
+    """
+    path_name = path.name.lower()
+
+    if path_name.endswith(".jsonl") or path_name.endswith(".jsonl.gz"):
+        for payload in iter_off_rows(path):
+            yield OffRecord(tuple(payload.get(name) for name in OFF_SCAN_COLUMNS))
+        return
+
+    if path_name.endswith(".csv") or path_name.endswith(".csv.gz"):
+        raise_csv_field_limit()
+        with open_off_snapshot(path) as handle:
+            reader = csv.reader(handle, delimiter="\t")
+            header = next(reader, None)
+            if header is None:
+                return
+            positions = {name: index for index, name in enumerate(header)}
+            indices = [positions.get(name, -1) for name in OFF_SCAN_COLUMNS]
+            for row in reader:
+                if not row:
+                    # Blank lines come through as [], where DictReader would skip them.
+                    continue
+                width = len(row)
+                yield OffRecord(tuple(row[index] if 0 <= index < width else None for index in indices))
+        return
+
+    raise RuntimeError(f"Unsupported OFF input format: {path}")
+
+
 def split_field_values(value: object) -> List[str]:
     if value is None:
         return []
@@ -910,22 +1008,86 @@ def match_any(text: str, matchers: Sequence[Tuple[str, re.Pattern[str]]]) -> boo
     return any(pattern.search(text) for _, pattern in matchers)
 
 
-def contains_any_compact_term(text: str, terms: Sequence[str]) -> bool:
-    compact = compact_lookup_term(text)
-    return any(compact_lookup_term(term) in compact for term in terms)
+class PhraseAutomaton:
+    """Aho-Corasick automaton that reports the labels of every pattern found in a string.
+
+    Goto and failure links are folded into one transition table at build time,
+    so a scan costs a single dict lookup per character regardless of how many
+    patterns are loaded. Characters outside every pattern fall back to the root.
+    """
+
+    __slots__ = ("transitions", "outputs")
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]) -> None:
+        trie: List[Dict[str, int]] = [{}]
+        labels: List[Set[str]] = [set()]
+        for pattern, label in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = trie[state].get(char)
+                if next_state is None:
+                    next_state = len(trie)
+                    trie[state][char] = next_state
+                    trie.append({})
+                    labels.append(set())
+                state = next_state
+            labels[state].add(label)
+
+        fail = [0] * len(trie)
+        transitions: List[Dict[str, int]] = [{} for _ in trie]
+        transitions[0] = dict(trie[0])
+        queue: Deque[int] = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            fallback = fail[state]
+            # BFS order guarantees the (shallower) failure state is already complete.
+            labels[state] |= labels[fallback]
+            transitions[state] = {**transitions[fallback], **trie[state]}
+            for char, child in trie[state].items():
+                fail[child] = transitions[fallback].get(char, 0) if state else 0
+                queue.append(child)
+
+        self.transitions: Tuple[Dict[str, int], ...] = tuple(transitions)
+        self.outputs: Tuple[frozenset, ...] = tuple(frozenset(value) for value in labels)
+
+    def find_labels(self, text: str) -> Set[str]:
+        transitions = self.transitions
+        outputs = self.outputs
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+def compile_compact_terms(terms: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(term for term in (compact_lookup_term(value) for value in terms) if term)
+
+
+def contains_any_compiled_term(compact: str, compiled_terms: Sequence[str]) -> bool:
+    return any(term in compact for term in compiled_terms)
+
+
+PLANT_DAIRY_SUFFIXES: Tuple[str, ...] = ("milk", "cream", "cheese", "yogurt", "yoghurt", "butter")
+# Precomputed once: (" <base> <suffix> ", "<base><suffix>") probes for every plant base.
+PLANT_DAIRY_PHRASES: Tuple[str, ...] = tuple(
+    f" {normalize_lookup_term(base)} {suffix} " for base in PLANT_BASES for suffix in PLANT_DAIRY_SUFFIXES
+)
+PLANT_DAIRY_COMPACT_PHRASES: Tuple[str, ...] = tuple(
+    f"{compact_lookup_term(base)}{suffix}" for base in PLANT_BASES for suffix in PLANT_DAIRY_SUFFIXES
+)
 
 
 def plant_dairy_exception(text: str) -> bool:
     compact = compact_lookup_term(text)
-    for base in PLANT_BASES:
-        safe_base = normalize_lookup_term(base)
-        for suffix in (" milk ", " cream ", " cheese ", " yogurt ", " yoghurt ", " butter "):
-            if f" {safe_base}{suffix}" in text:
-                return True
-        compact_base = compact_lookup_term(base)
-        for suffix in ("milk", "cream", "cheese", "yogurt", "yoghurt", "butter"):
-            if f"{compact_base}{suffix}" in compact:
-                return True
+    if any(phrase in text for phrase in PLANT_DAIRY_PHRASES):
+        return True
+    if any(phrase in compact for phrase in PLANT_DAIRY_COMPACT_PHRASES):
+        return True
     if (
         " non dairy " in text
         or " nondairy " in text
@@ -946,18 +1108,63 @@ def plant_dairy_exception(text: str) -> bool:
     return False
 
 
-MILK_MATCHERS = compile_matchers(MILK_TERMS)
-EGG_MATCHERS = compile_matchers(EGG_TERMS)
-PEANUT_MATCHERS = compile_matchers(PEANUT_TERMS)
-TREE_NUT_MATCHERS = compile_matchers(TREE_NUT_TERMS)
-SOY_MATCHERS = compile_matchers(SOY_TERMS)
-SESAME_MATCHERS = compile_matchers(SESAME_TERMS)
-FISH_MATCHERS = compile_matchers(FISH_TERMS)
-SHELLFISH_MATCHERS = compile_matchers(SHELLFISH_TERMS)
-MEAT_MATCHERS = compile_matchers(MEAT_TERMS)
-VEGAN_ONLY_MATCHERS = compile_matchers(VEGAN_ONLY_BLOCKERS)
-ALL_DIET_BLOCKER_MATCHERS = compile_matchers(ALL_DIET_BLOCKERS)
-GLUTEN_MATCHERS = compile_matchers(GLUTEN_BLOCKERS)
+# Term classes checked on the space-padded normalized name with word boundaries.
+BOUNDARY_CLASS_TERMS: Tuple[Tuple[str, Sequence[str]], ...] = (
+    ("milk", MILK_TERMS),
+    ("egg", EGG_TERMS),
+    ("peanut", PEANUT_TERMS),
+    ("tree_nut", TREE_NUT_TERMS),
+    ("soy", SOY_TERMS),
+    ("sesame", SESAME_TERMS),
+    ("fish", FISH_TERMS),
+    ("shellfish", SHELLFISH_TERMS),
+    ("gluten", GLUTEN_BLOCKERS),
+    ("meat", MEAT_TERMS),
+    ("vegan_only", VEGAN_ONLY_BLOCKERS),
+    ("animal_derivative", ALL_DIET_BLOCKERS),
+)
+# Term classes checked as plain substrings of the compact (alphanumeric-only) name.
+COMPACT_CLASS_TERMS: Tuple[Tuple[str, Sequence[str]], ...] = (
+    ("milk", MILK_COMPACT_TERMS),
+    ("egg", EGG_COMPACT_TERMS),
+    ("peanut", PEANUT_COMPACT_TERMS),
+    ("tree_nut", TREE_NUT_COMPACT_TERMS),
+    ("soy", SOY_COMPACT_TERMS),
+    ("sesame", SESAME_COMPACT_TERMS),
+    ("fish", FISH_COMPACT_TERMS),
+    ("shellfish", SHELLFISH_COMPACT_TERMS),
+    ("gluten", GLUTEN_COMPACT_TERMS),
+)
+
+BOUNDARY_CLASS_MATCHERS = tuple((label, compile_matchers(terms)) for label, terms in BOUNDARY_CLASS_TERMS)
+COMPACT_CLASS_MATCHERS = tuple((label, compile_compact_terms(terms)) for label, terms in COMPACT_CLASS_TERMS)
+
+# Normalized names only contain [a-z0-9] and single spaces, so a word-boundary
+# match of ``term`` is exactly a substring match of `` term `` in the padded name.
+BOUNDARY_AUTOMATON = PhraseAutomaton(
+    (f" {safe} ", label)
+    for label, terms in BOUNDARY_CLASS_TERMS
+    for safe in (normalize_lookup_term(term) for term in terms)
+    if safe
+)
+COMPACT_AUTOMATON = PhraseAutomaton(
+    (term, label) for label, terms in COMPACT_CLASS_MATCHERS for term in terms
+)
+
+
+def candidate_term_hits(normalized: str, compact: str) -> Set[str]:
+    """Return every term class hit by ``normalized`` (boundary-aware) or ``compact`` (substring)."""
+    hits = BOUNDARY_AUTOMATON.find_labels(normalized)
+    hits.update(COMPACT_AUTOMATON.find_labels(compact))
+    return hits
+
+
+def candidate_term_hits_regex(normalized: str, compact: str) -> Set[str]:
+    """Reference implementation of ``candidate_term_hits``: one regex search per term."""
+    hits = {label for label, matchers in BOUNDARY_CLASS_MATCHERS if match_any(normalized, matchers)}
+    hits.update(label for label, terms in COMPACT_CLASS_MATCHERS if contains_any_compiled_term(compact, terms))
+    return hits
+
 
 def is_product_style_name(name: str) -> bool:
     if name in READY_EXACT_EXCEPTIONS:
@@ -967,9 +1174,14 @@ def is_product_style_name(name: str) -> bool:
     return any(name.endswith(suffix) for suffix in PRODUCT_STYLE_SUFFIX_TERMS)
 
 
-def classify_candidate(name: str) -> Dict[str, object]:
+def classify_candidate(
+    name: str,
+    *,
+    term_hits: Callable[[str, str], Set[str]] = candidate_term_hits,
+) -> Dict[str, object]:
     normalized = f" {normalize_lookup_term(name)} "
     compact = compact_lookup_term(name)
+    hits = term_hits(normalized, compact)
     allergens: Set[str] = set()
     blocked_diets: Set[str] = set()
     reason_codes: List[str] = []
@@ -977,10 +1189,7 @@ def classify_candidate(name: str) -> Dict[str, object]:
     has_compact_exception = any(token in compact for token in SAFE_ONLY_COMPACT_EXCEPTIONS)
 
     if (
-        (
-            match_any(normalized, MILK_MATCHERS)
-            or contains_any_compact_term(compact, MILK_COMPACT_TERMS)
-        )
+        "milk" in hits
         and name not in MILK_FALSE_POSITIVE_EXACT_TERMS
         and name not in SAFE_ONLY_EXACT_EXCEPTIONS
         and not plant_dairy_exception(normalized)
@@ -989,61 +1198,36 @@ def classify_candidate(name: str) -> Dict[str, object]:
         blocked_diets.add("Vegan")
         reason_codes.append("allergen:milk")
 
-    if (
-        not compact.startswith("eggplant")
-        and (
-            match_any(normalized, EGG_MATCHERS)
-            or contains_any_compact_term(compact, EGG_COMPACT_TERMS)
-        )
-    ):
+    if "egg" in hits and not compact.startswith("eggplant"):
         allergens.add("egg")
         blocked_diets.add("Vegan")
         reason_codes.append("allergen:egg")
 
-    if match_any(normalized, PEANUT_MATCHERS) or contains_any_compact_term(
-        compact, PEANUT_COMPACT_TERMS
-    ):
+    if "peanut" in hits:
         allergens.add("peanut")
         reason_codes.append("allergen:peanut")
 
-    if match_any(normalized, TREE_NUT_MATCHERS) or contains_any_compact_term(
-        compact, TREE_NUT_COMPACT_TERMS
-    ):
+    if "tree_nut" in hits:
         allergens.add("tree nut")
         reason_codes.append("allergen:tree_nut")
 
-    if match_any(normalized, SOY_MATCHERS) or contains_any_compact_term(
-        compact, SOY_COMPACT_TERMS
-    ):
+    if "soy" in hits:
         allergens.add("soy")
         reason_codes.append("allergen:soy")
 
-    if match_any(normalized, SESAME_MATCHERS) or contains_any_compact_term(
-        compact, SESAME_COMPACT_TERMS
-    ):
+    if "sesame" in hits:
         allergens.add("sesame")
         reason_codes.append("allergen:sesame")
 
-    if match_any(normalized, FISH_MATCHERS) or contains_any_compact_term(
-        compact, FISH_COMPACT_TERMS
-    ):
+    if "fish" in hits:
         allergens.add("fish")
         reason_codes.append("allergen:fish")
 
-    if match_any(normalized, SHELLFISH_MATCHERS) or contains_any_compact_term(
-        compact, SHELLFISH_COMPACT_TERMS
-    ):
+    if "shellfish" in hits:
         allergens.add("shellfish")
         reason_codes.append("allergen:shellfish")
 
-    if (
-        not has_compact_exception
-        and (
-            match_any(normalized, GLUTEN_MATCHERS)
-            or contains_any_compact_term(compact, GLUTEN_COMPACT_TERMS)
-        )
-        and not has_gluten_free_claim
-    ):
+    if "gluten" in hits and not has_compact_exception and not has_gluten_free_claim:
         allergens.add("wheat")
         blocked_diets.add("Gluten-free")
         reason_codes.append("diet_block:gluten_free")
@@ -1054,15 +1238,15 @@ def classify_candidate(name: str) -> Dict[str, object]:
     if allergens.intersection({"fish", "shellfish"}):
         blocked_diets.add("Vegetarian")
 
-    if match_any(normalized, MEAT_MATCHERS):
+    if "meat" in hits:
         blocked_diets.update({"Vegan", "Vegetarian", "Pescatarian"})
         reason_codes.append("diet_block:meat")
 
-    if match_any(normalized, VEGAN_ONLY_MATCHERS):
+    if "vegan_only" in hits:
         blocked_diets.add("Vegan")
         reason_codes.append("diet_block:vegan_only")
 
-    if match_any(normalized, ALL_DIET_BLOCKER_MATCHERS):
+    if "animal_derivative" in hits:
         blocked_diets.update({"Vegan", "Vegetarian", "Pescatarian"})
         reason_codes.append("diet_block:animal_derivative")
 
@@ -1205,27 +1389,66 @@ def safe_product_name(product: Dict[str, object]) -> str:
     return as_text(product.get("product_name_en")) or as_text(product.get("product_name"))
 
 
-def build_catalog_rows(
+def evaluate_candidate(candidate: str) -> Tuple[str, str]:
+    """Return ``(canonical_name, rejected_reason)`` for one cleaned candidate string."""
+    canonical_name = canonicalize_name(candidate)
+    if not should_keep_catalog_name(canonical_name):
+        return canonical_name, "invalid_candidate_shape"
+    if canonical_name in NOISE_TERMS or len(normalize_lookup_term(canonical_name)) < 2:
+        return canonical_name, "invalid_candidate_shape"
+
+    classification = classify_candidate(canonical_name)
+    if not classification["is_safe"]:
+        return canonical_name, classification["reason_codes"][0] if classification["reason_codes"] else "unsafe_candidate"
+    return canonical_name, ""
+
+
+# Candidate strings repeat heavily across OFF products, so verdicts are memoized per process.
+candidate_memo: Callable[[str], Tuple[str, str]] = lru_cache(maxsize=DEFAULT_MEMO_SIZE)(evaluate_candidate)
+candidate_memo_size = DEFAULT_MEMO_SIZE
+
+
+def configure_candidate_memo(max_entries: int) -> None:
+    global candidate_memo, candidate_memo_size
+    max_entries = max(0, int(max_entries))
+    if max_entries == candidate_memo_size:
+        return
+    candidate_memo = lru_cache(maxsize=max_entries)(evaluate_candidate)
+    candidate_memo_size = max_entries
+
+
+def new_scan_partial() -> Dict[str, object]:
+    return {
+        "processed_rows": 0,
+        "safe_products": 0,
+        "memo_hits": 0,
+        "memo_misses": 0,
+        "rejection_counts": Counter(),
+        "product_support": defaultdict(set),
+        "alias_support": defaultdict(lambda: defaultdict(set)),
+        "product_samples": defaultdict(dict),
+    }
+
+
+def scan_off_products(
+    products: Iterable[object],
     *,
-    input_path: Path,
-    alias_limit: int,
-    limit: int,
-    min_support: int,
     country_tag: str,
     min_text_len: int,
     sample_limit: int,
-) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
-    product_support: DefaultDict[str, Set[str]] = defaultdict(set)
-    alias_support: DefaultDict[str, DefaultDict[str, Set[str]]] = defaultdict(
-        lambda: defaultdict(set)
-    )
-    product_samples: DefaultDict[str, Dict[str, Dict[str, str]]] = defaultdict(dict)
-
+    report_progress: bool = False,
+) -> Dict[str, object]:
+    partial = new_scan_partial()
+    product_support: DefaultDict[str, Set[str]] = partial["product_support"]
+    alias_support: DefaultDict[str, DefaultDict[str, Set[str]]] = partial["alias_support"]
+    product_samples: DefaultDict[str, Dict[str, Dict[str, str]]] = partial["product_samples"]
+    rejection_counts: Counter[str] = partial["rejection_counts"]
     processed_rows = 0
     safe_products = 0
-    rejection_counts: Counter[str] = Counter()
+    evaluate = candidate_memo
+    memo_before = evaluate.cache_info()
 
-    for product in iter_off_rows(input_path):
+    for product in products:
         processed_rows += 1
 
         code = as_text(product.get("code")) or as_text(product.get("_id"))
@@ -1268,19 +1491,9 @@ def build_catalog_rows(
         rejected_reason = ""
 
         for candidate in candidates:
-            canonical_name = canonicalize_name(candidate)
-            if not should_keep_catalog_name(canonical_name):
-                rejected_reason = "invalid_candidate_shape"
-                break
-            if canonical_name in NOISE_TERMS or len(normalize_lookup_term(canonical_name)) < 2:
-                rejected_reason = "invalid_candidate_shape"
-                break
-
-            classification = classify_candidate(canonical_name)
-            if not classification["is_safe"]:
-                rejected_reason = classification["reason_codes"][0] if classification["reason_codes"] else "unsafe_candidate"
+            canonical_name, rejected_reason = evaluate(candidate)
+            if rejected_reason:
                 break
-
             accepted_terms[canonical_name].add(candidate)
 
         if rejected_reason:
@@ -1306,9 +1519,159 @@ def build_catalog_rows(
             if len(product_samples[canonical_name]) < sample_limit or code in product_samples[canonical_name]:
                 product_samples[canonical_name][code] = sample
 
-        if processed_rows % 100000 == 0:
+        if report_progress and processed_rows % 100000 == 0:
             print(f"[progress] processed={processed_rows} safe_products={safe_products}", file=sys.stderr)
 
+    memo_after = evaluate.cache_info()
+    partial["processed_rows"] = processed_rows
+    partial["safe_products"] = safe_products
+    partial["memo_hits"] = memo_after.hits - memo_before.hits
+    partial["memo_misses"] = memo_after.misses - memo_before.misses
+    return partial
+
+
+def scan_off_chunk(
+    chunk: Sequence[Tuple[object, ...]],
+    country_tag: str,
+    min_text_len: int,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> Dict[str, object]:
+    """Process-pool entry point: scan one chunk of projected ``OffRecord`` values.
+
+    Samples are kept for every admitted code so ``merge_scan_partial`` can apply
+    the sample limit in global input order, exactly as the serial scan does.
+    """
+    configure_candidate_memo(memo_size)
+    partial = scan_off_products(
+        (OffRecord(values) for values in chunk),
+        country_tag=country_tag,
+        min_text_len=min_text_len,
+        sample_limit=sys.maxsize,
+    )
+    # defaultdict factories built from lambdas do not pickle.
+    partial["product_support"] = dict(partial["product_support"])
+    partial["alias_support"] = {name: dict(aliases) for name, aliases in partial["alias_support"].items()}
+    partial["product_samples"] = dict(partial["product_samples"])
+    return partial
+
+
+def merge_scan_partial(total: Dict[str, object], partial: Dict[str, object], *, sample_limit: int) -> None:
+    """Fold a chunk result into ``total``; chunks must be merged in input order."""
+    total["processed_rows"] += int(partial["processed_rows"])
+    total["safe_products"] += int(partial["safe_products"])
+    total["memo_hits"] += int(partial["memo_hits"])
+    total["memo_misses"] += int(partial["memo_misses"])
+    total["rejection_counts"].update(partial["rejection_counts"])
+    for canonical_name, codes in partial["product_support"].items():
+        total["product_support"][canonical_name].update(codes)
+    for canonical_name, aliases in partial["alias_support"].items():
+        merged_aliases = total["alias_support"][canonical_name]
+        for alias, codes in aliases.items():
+            merged_aliases[alias].update(codes)
+    for canonical_name, samples in partial["product_samples"].items():
+        merged_samples = total["product_samples"][canonical_name]
+        for code, sample in samples.items():
+            if len(merged_samples) < sample_limit or code in merged_samples:
+                merged_samples[code] = sample
+
+
+def iter_record_chunks(records: Iterable[OffRecord], chunk_rows: int) -> Iterator[List[Tuple[object, ...]]]:
+    chunk: List[Tuple[object, ...]] = []
+    for record in records:
+        chunk.append(record.values)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def scan_off_snapshot(
+    input_path: Path,
+    *,
+    country_tag: str,
+    min_text_len: int,
+    sample_limit: int,
+    workers: int,
+    chunk_rows: int,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> Dict[str, object]:
+    configure_candidate_memo(memo_size)
+    records = iter_off_records(input_path)
+    if workers <= 1:
+        return scan_off_products(
+            records,
+            country_tag=country_tag,
+            min_text_len=min_text_len,
+            sample_limit=sample_limit,
+            report_progress=True,
+        )
+
+    total = new_scan_partial()
+    next_progress = 100000
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+
+        def drain_one() -> None:
+            nonlocal next_progress
+            merge_scan_partial(total, pending.popleft().result(), sample_limit=sample_limit)
+            if total["processed_rows"] >= next_progress:
+                print(
+                    f"[progress] processed={total['processed_rows']} safe_products={total['safe_products']}",
+                    file=sys.stderr,
+                )
+                next_progress = (total["processed_rows"] // 100000 + 1) * 100000
+
+        for chunk in iter_record_chunks(records, chunk_rows):
+            pending.append(executor.submit(scan_off_chunk, chunk, country_tag, min_text_len, memo_size))
+            if len(pending) >= max_in_flight:
+                drain_one()
+        while pending:
+            drain_one()
+    return total
+
+
+def candidate_memo_summary(*, memo_size: int, hits: int, misses: int) -> Dict[str, object]:
+    lookups = hits + misses
+    return {
+        "max_entries": max(0, int(memo_size)),
+        "lookups": lookups,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def build_catalog_rows(
+    *,
+    input_path: Path,
+    alias_limit: int,
+    limit: int,
+    min_support: int,
+    country_tag: str,
+    min_text_len: int,
+    sample_limit: int,
+    workers: int = 0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    memo_size: int = DEFAULT_MEMO_SIZE,
+) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
+    scan = scan_off_snapshot(
+        input_path,
+        country_tag=country_tag,
+        min_text_len=min_text_len,
+        sample_limit=sample_limit,
+        workers=workers,
+        chunk_rows=max(1, chunk_rows),
+        memo_size=memo_size,
+    )
+    product_support: DefaultDict[str, Set[str]] = scan["product_support"]
+    alias_support: DefaultDict[str, DefaultDict[str, Set[str]]] = scan["alias_support"]
+    product_samples: DefaultDict[str, Dict[str, Dict[str, str]]] = scan["product_samples"]
+    processed_rows = int(scan["processed_rows"])
+    safe_products = int(scan["safe_products"])
+    rejection_counts: Counter[str] = scan["rejection_counts"]
+
     grouped_names: DefaultDict[str, List[str]] = defaultdict(list)
     for canonical_name in product_support.keys():
         normalized_name = normalize_lookup_term(canonical_name)
@@ -1418,6 +1781,11 @@ def build_catalog_rows(
         "rows_below_support_threshold": skipped_low_support,
         "seeded_entries": len(catalog_rows),
         "rejection_counts": dict(sorted(rejection_counts.items())),
+        "candidate_memo": candidate_memo_summary(
+            memo_size=memo_size,
+            hits=int(scan["memo_hits"]),
+            misses=int(scan["memo_misses"]),
+        ),
         "top_examples": [
             {
                 "canonical_name": row["canonical_name"],
@@ -1449,6 +1817,9 @@ def main(argv: Sequence[str] | None = None) -> int:
         force_download=bool(args.force_download),
         skip_download=bool(args.no_download),
         user_agent=as_text(args.user_agent) or DEFAULT_USER_AGENT,
+        revalidate=bool(args.revalidate),
+        expected_sha256=as_text(args.sha256),
+        max_attempts=max(1, int(args.download_attempts)),
     )
 
     catalog_rows, summary = build_catalog_rows(
@@ -1459,6 +1830,9 @@ def main(argv: Sequence[str] | None = None) -> int:
         country_tag=as_text(args.country_tag),
         min_text_len=min_text_len,
         sample_limit=sample_limit,
+        workers=max(0, int(args.workers)),
+        chunk_rows=max(1, int(args.chunk_rows)),
+        memo_size=max(0, int(args.memo_size)),
     )
 
     write_jsonl(output_path, catalog_rows)
@@ -1467,6 +1841,8 @@ def main(argv: Sequence[str] | None = None) -> int:
             "download_bytes": int(download_meta.get("bytes_written", 0)),
             "download_url": as_text(args.download_url),
             "downloaded": bool(download_meta.get("downloaded")),
+            "download_resumed_from": int(download_meta.get("resumed_from", 0)),
+            "download_sha256": as_text(download_meta.get("sha256")),
             "input_path": str(input_path),
             "output_path": str(output_path),
             "seed_source": SEED_SOURCE,
@@ -17,8 +17,11 @@ import json
 import re
 import unicodedata
 from collections import Counter, defaultdict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from smartlabel_store import count_column, is_store_path, iter_store_rows
 
 DEFAULT_INPUT = Path("full_smartlabel_ground_truth copy.csv")
 DEFAULT_OUTPUT = Path("ml/seeds/ingredient_catalog_seed.jsonl")
@@ -28,6 +31,21 @@ SEED_SOURCE = "smartlabel_ground_truth_safe_v1"
 EXTRACTION_VERSION = "smartlabel_safe_v1"
 MAX_SURFACE_FORMS = 12
 MAX_SUPPORTING_PRODUCTS = 12
+ALLERGEN_LIST_COLUMNS = ("allergens_declared_json", "allergens_present_json", "allergens_may_contain_json")
+# Read from a SQLite store: allergen lists only matter through their lengths.
+STORE_COLUMNS = (
+    "smartlabel_id",
+    "smartlabel_upc",
+    "smartlabel_url",
+    "smartlabel_url_ingredients",
+    "smartlabel_url_allergens",
+    "rev",
+    "ingredients_http_status",
+    "allergens_http_status",
+    "smartlabel_error",
+    "ingredients_items_json",
+    *(count_column(name) for name in ALLERGEN_LIST_COLUMNS),
+)
 
 HEADER_PATTERNS = [
     re.compile(r"^contains\b", re.IGNORECASE),
@@ -43,7 +61,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--input",
         default=str(DEFAULT_INPUT),
-        help="Path to the SmartLabel ground truth CSV.",
+        help="Path to the SmartLabel ground truth CSV, or its .sqlite store from smartlabel_store.py.",
     )
     parser.add_argument(
         "--output",
@@ -119,76 +137,132 @@ def normalize_surface_name(value: Any) -> str:
     return base
 
 
-def best_row_score(row: dict[str, Any]) -> tuple[int, ...]:
-    items = parse_json_field(row.get("ingredients_items_json"), [])
-    declared = parse_json_field(row.get("allergens_declared_json"), [])
-    present = parse_json_field(row.get("allergens_present_json"), [])
-    may = parse_json_field(row.get("allergens_may_contain_json"), [])
-
-    return (
-        1 if items else 0,
-        len(items),
-        1 if (declared or present or may) else 0,
-        len(declared) + len(present) + len(may),
-        1 if as_text(row.get("ingredients_http_status")) == "200" else 0,
-        1 if as_text(row.get("allergens_http_status")) == "200" else 0,
-        int(as_text(row.get("rev")) or 0),
-        -len(as_text(row.get("smartlabel_error"))),
-        int(as_text(row.get("smartlabel_id")) or 0),
-    )
+@dataclass(frozen=True, slots=True)
+class SmartLabelRow:
+    """One scraped SmartLabel row with its JSON columns decoded once.
+
+    ``score`` is the dedup ranking (higher wins per UPC), computed when the row
+    is read so comparisons never touch the JSON again.
+    """
+
+    upc: str
+    smartlabel_id: str
+    url: str
+    ingredients_url: str
+    allergens_url: str
+    items: tuple[Any, ...]
+    has_allergens: bool
+    allergens_ok: bool
+    score: tuple[int, ...]
+
+    @classmethod
+    def from_csv(cls, row: dict[str, Any]) -> "SmartLabelRow":
+        allergen_counts = [len(json_list(row.get(name))) for name in ALLERGEN_LIST_COLUMNS]
+        return cls.from_fields(row, json_list(row.get("ingredients_items_json")), allergen_counts)
+
+    @classmethod
+    def from_store(cls, row: dict[str, Any]) -> "SmartLabelRow":
+        """Build from a :data:`STORE_COLUMNS` projection, which carries allergen counts, not lists."""
+        allergen_counts = [row[count_column(name)] for name in ALLERGEN_LIST_COLUMNS]
+        return cls.from_fields(row, row["ingredients_items_json"], allergen_counts)
+
+    @classmethod
+    def from_fields(cls, row: dict[str, Any], items: list[Any], allergen_counts: list[int]) -> "SmartLabelRow":
+        allergens_ok = as_text(row.get("allergens_http_status")) == "200"
+        has_allergens = any(allergen_counts)
+        return cls(
+            upc=as_text(row.get("smartlabel_upc")),
+            smartlabel_id=as_text(row.get("smartlabel_id")),
+            url=as_text(row.get("smartlabel_url")),
+            ingredients_url=as_text(row.get("smartlabel_url_ingredients")),
+            allergens_url=as_text(row.get("smartlabel_url_allergens")),
+            items=tuple(items),
+            has_allergens=has_allergens,
+            allergens_ok=allergens_ok,
+            score=(
+                1 if items else 0,
+                len(items),
+                1 if has_allergens else 0,
+                sum(allergen_counts),
+                1 if as_text(row.get("ingredients_http_status")) == "200" else 0,
+                1 if allergens_ok else 0,
+                int(as_text(row.get("rev")) or 0),
+                -len(as_text(row.get("smartlabel_error"))),
+                int(as_text(row.get("smartlabel_id")) or 0),
+            ),
+        )
+
+    @property
+    def source_id(self) -> str:
+        return self.upc or self.url or self.smartlabel_id
+
 
+def json_list(value: Any) -> list[Any]:
+    parsed = parse_json_field(value, [])
+    return parsed if isinstance(parsed, list) else []
 
-def select_best_rows(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
-    best_by_upc: dict[str, dict[str, Any]] = {}
+
+def select_best_rows(rows: Iterable[SmartLabelRow]) -> dict[str, SmartLabelRow]:
+    best_by_upc: dict[str, SmartLabelRow] = {}
     for row in rows:
-        upc = as_text(row.get("smartlabel_upc"))
-        if not upc:
+        if not row.upc:
             continue
-        current = best_by_upc.get(upc)
-        if current is None or best_row_score(row) > best_row_score(current):
-            best_by_upc[upc] = row
+        current = best_by_upc.get(row.upc)
+        if current is None or row.score > current.score:
+            best_by_upc[row.upc] = row
     return best_by_upc
 
 
-def is_safe_product(row: dict[str, Any]) -> bool:
-    if as_text(row.get("allergens_http_status")) != "200":
-        return False
+def is_safe_product(row: SmartLabelRow) -> bool:
+    return row.allergens_ok and bool(row.items) and not row.has_allergens
 
-    ingredients = parse_json_field(row.get("ingredients_items_json"), [])
-    if not ingredients:
-        return False
 
-    declared = parse_json_field(row.get("allergens_declared_json"), [])
-    present = parse_json_field(row.get("allergens_present_json"), [])
-    may_contain = parse_json_field(row.get("allergens_may_contain_json"), [])
-    return not declared and not present and not may_contain
+def iter_rows(input_path: Path) -> Iterator[SmartLabelRow]:
+    """Stream the CSV or SQLite store, decoding each row once; nothing is held beyond the current row."""
+    if is_store_path(input_path):
+        for row in iter_store_rows(input_path, columns=STORE_COLUMNS):
+            yield SmartLabelRow.from_store(row)
+        return
+    with input_path.open("r", encoding="utf-8-sig", newline="") as handle:
+        for row in csv.DictReader(handle):
+            yield SmartLabelRow.from_csv(row)
 
 
-def load_rows(input_path: Path) -> list[dict[str, Any]]:
-    with input_path.open("r", encoding="utf-8-sig", newline="") as handle:
-        reader = csv.DictReader(handle)
-        return list(reader)
+def load_rows(input_path: Path) -> list[SmartLabelRow]:
+    return list(iter_rows(input_path))
 
 
-def build_seed_rows(rows: list[dict[str, Any]], best_rows: dict[str, dict[str, Any]], min_support: int, input_path: Path) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+def build_seed_rows(rows: Iterable[SmartLabelRow], min_support: int, input_path: Path) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """Dedup and aggregate in one pass over ``rows``, which may be a stream.
+
+    Every row contributes to the seed (duplicates included, as before); per UPC
+    only the best score tuple is kept, for the unique product count.
+    """
     product_stats = Counter()
+    best_scores: dict[str, tuple[int, ...]] = {}
     ingredient_support: dict[str, set[str]] = defaultdict(set)
     surface_form_counts: dict[str, Counter[str]] = defaultdict(Counter)
     supporting_products: dict[str, list[dict[str, str]]] = defaultdict(list)
+    total_rows = 0
 
     for row in rows:
+        total_rows += 1
+        if row.upc:
+            current = best_scores.get(row.upc)
+            if current is None or row.score > current:
+                best_scores[row.upc] = row.score
+
         if not is_safe_product(row):
-            if parse_json_field(row.get("ingredients_items_json"), []):
+            if row.items:
                 product_stats["unsafe_or_unknown_with_items"] += 1
             else:
                 product_stats["skipped_without_items"] += 1
             continue
 
         product_stats["safe_rows"] += 1
-        source_id = as_text(row.get("smartlabel_upc")) or as_text(row.get("smartlabel_url")) or as_text(row.get("smartlabel_id"))
+        source_id = row.source_id
         seen_in_row: set[str] = set()
-        raw_items = parse_json_field(row.get("ingredients_items_json"), [])
-        for item in raw_items:
+        for item in row.items:
             raw_text = normalize_spaces(item)
             normalized_name = normalize_surface_name(raw_text)
             if not normalized_name:
@@ -200,15 +274,18 @@ def build_seed_rows(rows: list[dict[str, Any]], best_rows: dict[str, dict[str, A
             ingredient_support[normalized_name].add(source_id)
             if raw_text:
                 surface_form_counts[normalized_name][raw_text] += 1
-            supporting_products[normalized_name].append(
-                {
-                    "upc": as_text(row.get("smartlabel_upc")),
-                    "smartlabel_id": as_text(row.get("smartlabel_id")),
-                    "smartlabel_url": as_text(row.get("smartlabel_url")),
-                    "ingredients_url": as_text(row.get("smartlabel_url_ingredients")),
-                    "allergens_url": as_text(row.get("smartlabel_url_allergens")),
-                }
-            )
+            supporting = supporting_products[normalized_name]
+            # Only the first few are written out, so there is no point holding the rest.
+            if len(supporting) < MAX_SUPPORTING_PRODUCTS:
+                supporting.append(
+                    {
+                        "upc": row.upc,
+                        "smartlabel_id": row.smartlabel_id,
+                        "smartlabel_url": row.url,
+                        "ingredients_url": row.ingredients_url,
+                        "allergens_url": row.allergens_url,
+                    }
+                )
 
     seed_rows: list[dict[str, Any]] = []
     support_counter = Counter({name: len(upcs) for name, upcs in ingredient_support.items()})
@@ -257,8 +334,8 @@ def build_seed_rows(rows: list[dict[str, Any]], best_rows: dict[str, dict[str, A
         "seed_source": SEED_SOURCE,
         "extraction_version": f"{EXTRACTION_VERSION}_surface_rows_v2",
         "min_support": min_support,
-        "total_input_rows": len(rows),
-        "unique_products": len(best_rows),
+        "total_input_rows": total_rows,
+        "unique_products": len(best_scores),
         "safe_products_used": product_stats["safe_rows"],
         "products_skipped_without_items": product_stats["skipped_without_items"],
         "products_skipped_unsafe_or_unknown_with_items": product_stats["unsafe_or_unknown_with_items"],
@@ -300,11 +377,9 @@ def main() -> None:
     if args.min_support < 1:
         raise SystemExit("--min-support must be at least 1.")
     if not input_path.exists():
-        raise SystemExit(f"Input CSV not found: {input_path}")
+        raise SystemExit(f"Input not found: {input_path}")
 
-    rows = load_rows(input_path)
-    best_rows = select_best_rows(rows)
-    seed_rows, summary = build_seed_rows(rows, best_rows, args.min_support, input_path)
+    seed_rows, summary = build_seed_rows(iter_rows(input_path), args.min_support, input_path)
 
     write_jsonl(output_path, seed_rows)
     write_json(summary_path, summary)
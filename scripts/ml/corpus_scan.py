@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""One-pass scan engine shared by the allergen analysis and lexicon scripts.
+
+Every dataset row is decoded once into a :class:`CorpusRow`. Its ASCII-folded
+text, tokens and normalized allergen labels are computed on first use and
+shared by every :class:`CorpusAggregator` registered for the pass. Term
+frequencies, alias match records and candidate chunk sketches can therefore
+ride on the same read of the corpus.
+
+Aggregators keep their configuration (automata, thresholds) on the instance
+and their counts in a separate state object. A process pool gets the
+aggregators once per worker and returns only per-shard states, which are
+merged back in input order. A pooled scan therefore equals the in-process one.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, FrozenSet, Iterator, List, Mapping, Sequence, Tuple
+
+from jsonl_shards import DEFAULT_SHARD_BYTES, JsonlShard, iter_shard_payloads, map_shards_in_pool, plan_jsonl_shards
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+LABEL_SPACE_RE = re.compile(r"\s+")
+ALLERGEN_LABEL_KEYS: Mapping[str, str] = {
+    "milk": "milk",
+    "egg": "egg",
+    "peanut": "peanut",
+    "tree nut": "tree nut",
+    "tree nuts": "tree nut",
+    "wheat": "wheat",
+    "soy": "soy",
+    "fish": "fish",
+    "shellfish": "shellfish",
+    "crustacean shellfish": "shellfish",
+    "sesame": "sesame",
+}
+
+
+def normalize_ascii(value: str) -> str:
+    safe = unicodedata.normalize("NFKD", value or "")
+    return safe.encode("ascii", "ignore").decode("ascii")
+
+
+def fold_text(value: str) -> str:
+    """ASCII-folded, lowercased text: the form both tokens and candidate chunks are cut from."""
+    return normalize_ascii(value).lower()
+
+
+def tokenize(value: str) -> Tuple[str, ...]:
+    return tuple(TOKEN_RE.findall(fold_text(value)))
+
+
+def allergen_label_key(value: str) -> str:
+    """Allergen key (``"tree nut"``, ``"milk"``...) for a dataset label, or ``""`` when unknown."""
+    safe = LABEL_SPACE_RE.sub(" ", normalize_ascii(value)).strip().strip(",;:.")
+    safe = LABEL_SPACE_RE.sub(" ", safe.lower().replace("-", " "))
+    return ALLERGEN_LABEL_KEYS.get(safe, "")
+
+
+class CorpusRow:
+    """One dataset row; derived fields are computed on first access and then shared."""
+
+    __slots__ = ("text", "raw_labels", "_folded", "_tokens", "_labels")
+
+    def __init__(self, text: str, raw_labels: Sequence[object] = ()) -> None:
+        self.text = text
+        self.raw_labels = raw_labels
+        self._folded: str | None = None
+        self._tokens: Tuple[str, ...] | None = None
+        self._labels: FrozenSet[str] | None = None
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, object]) -> "CorpusRow":
+        return cls(str(payload.get("text") or ""), payload.get("allergens") or ())
+
+    @property
+    def folded(self) -> str:
+        if self._folded is None:
+            self._folded = fold_text(self.text)
+        return self._folded
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        if self._tokens is None:
+            self._tokens = tuple(TOKEN_RE.findall(self.folded))
+        return self._tokens
+
+    @property
+    def labels(self) -> FrozenSet[str]:
+        if self._labels is None:
+            keys = (allergen_label_key(str(item)) for item in self.raw_labels)
+            self._labels = frozenset(key for key in keys if key)
+        return self._labels
+
+
+class CorpusAggregator:
+    """Folds corpus rows into a state object.
+
+    ``new_state`` returns an empty, picklable state; ``add_row`` updates it
+    for one row; ``merge`` folds a later shard's state into an earlier one
+    and returns the result.
+    """
+
+    def new_state(self) -> Any:
+        raise NotImplementedError
+
+    def add_row(self, state: Any, row: CorpusRow) -> None:
+        raise NotImplementedError
+
+    def merge(self, state: Any, partial: Any) -> Any:
+        raise NotImplementedError
+
+
+def iter_corpus_rows(shards: Sequence[JsonlShard]) -> Iterator[CorpusRow]:
+    for shard in shards:
+        for payload in iter_shard_payloads(shard):
+            yield CorpusRow.from_payload(payload)
+
+
+def scan_corpus_shards(shards: Sequence[JsonlShard], aggregators: Sequence[CorpusAggregator]) -> List[Any]:
+    """One state per aggregator, filled from every row of ``shards`` in a single read."""
+    states = [aggregator.new_state() for aggregator in aggregators]
+    pairs = list(zip(aggregators, states))
+    for row in iter_corpus_rows(shards):
+        for aggregator, state in pairs:
+            aggregator.add_row(state, row)
+    return states
+
+
+_worker_aggregators: Sequence[CorpusAggregator] = ()
+
+
+def init_corpus_worker(aggregators: Sequence[CorpusAggregator]) -> None:
+    """Process-pool initializer: aggregators (and their automata) are shipped once per worker."""
+    global _worker_aggregators
+    _worker_aggregators = aggregators
+
+
+def scan_shard_in_worker(shard: JsonlShard) -> List[Any]:
+    """Process-pool entry point: per-aggregator states for one shard."""
+    return scan_corpus_shards([shard], _worker_aggregators)
+
+
+def merge_states(aggregators: Sequence[CorpusAggregator], states: List[Any], partials: Sequence[Any]) -> List[Any]:
+    return [aggregator.merge(state, partial) for aggregator, state, partial in zip(aggregators, states, partials)]
+
+
+def scan_corpus(
+    dataset_paths: Sequence[Path],
+    aggregators: Sequence[CorpusAggregator],
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> List[Any]:
+    """Run ``aggregators`` over every row of ``dataset_paths`` in one pass.
+
+    With ``workers`` > 1 the datasets are split into ``shard_bytes``
+    line-aligned ranges (0 = one per file) and scanned in a process pool.
+    """
+    if workers <= 1:
+        return scan_corpus_shards(plan_jsonl_shards(dataset_paths), aggregators)
+    states = [aggregator.new_state() for aggregator in aggregators]
+    shards = plan_jsonl_shards(dataset_paths, shard_bytes)
+    for partials in map_shards_in_pool(scan_shard_in_worker, shards, workers, init_corpus_worker, (aggregators,)):
+        states = merge_states(aggregators, states, partials)
+    return states
+
+
+def scan_corpus_files(
+    dataset_paths: Sequence[Path],
+    aggregators: Sequence[CorpusAggregator],
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> List[List[Any]]:
+    """Like :func:`scan_corpus`, but one state list per dataset file, for per-file caching."""
+    if workers <= 1:
+        return [scan_corpus_shards(plan_jsonl_shards([path]), aggregators) for path in dataset_paths]
+    file_shards = [plan_jsonl_shards([path], shard_bytes) for path in dataset_paths]
+    partials = map_shards_in_pool(
+        scan_shard_in_worker,
+        [shard for shards in file_shards for shard in shards],
+        workers,
+        init_corpus_worker,
+        (aggregators,),
+    )
+    results: List[List[Any]] = []
+    for shards in file_shards:
+        states = [aggregator.new_state() for aggregator in aggregators]
+        for _shard in shards:
+            states = merge_states(aggregators, states, next(partials))
+        results.append(states)
+    return results
+
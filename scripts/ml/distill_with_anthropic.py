@@ -61,6 +61,14 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--max-retries", type=int, default=5)
     parser.add_argument("--seed", type=int, default=7)
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing output file.")
+    parser.add_argument(
+        "--disagreements-only",
+        action="store_true",
+        help=(
+            "Send the teacher only rows where weak labels, student predictions and (for rows written by "
+            "prelabel_with_lexicon.py) lexicon labels disagree."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -295,6 +303,9 @@ def build_student_candidates(
             if float(row_probs[label_index].item()) >= threshold:
                 predicted.add(label)
 
+        lexicon = row.get("lexicon")
+        lexicon_allergens = sorted(lexicon.get("allergens") or []) if isinstance(lexicon, dict) else None
+
         mismatch = len(predicted.symmetric_difference(weak))
         mismatch_rate = _safe_div(float(mismatch), float(max(1, allergen_dim)))
         score = (0.65 * uncertainty) + (0.35 * mismatch_rate)
@@ -305,6 +316,7 @@ def build_student_candidates(
                 "text": as_text(row.get("text")),
                 "weak_allergens": sorted(weak),
                 "student_predicted": sorted(predicted),
+                "lexicon_allergens": lexicon_allergens,
                 "student_uncertainty": float(uncertainty),
                 "student_mismatch_rate": float(mismatch_rate),
                 "distill_score": float(score),
@@ -313,6 +325,14 @@ def build_student_candidates(
     return out
 
 
+def labels_disagree(candidate: Dict[str, object]) -> bool:
+    """Whether weak labels, student prediction and lexicon labels (when present) are not all the same set."""
+    label_sets = [set(candidate.get("weak_allergens") or []), set(candidate.get("student_predicted") or [])]
+    if candidate.get("lexicon_allergens") is not None:
+        label_sets.append(set(candidate["lexicon_allergens"]))
+    return any(labels != label_sets[0] for labels in label_sets[1:])
+
+
 def load_existing_distilled_ids(path: Path) -> Dict[str, Dict[str, object]]:
     if not path.exists():
         return {}
@@ -362,6 +382,13 @@ def main() -> int:
         print("No candidates generated.")
         return 1
 
+    agreeing_rows = 0
+    if args.disagreements_only:
+        disagreeing = [row for row in candidates if labels_disagree(row)]
+        agreeing_rows = len(candidates) - len(disagreeing)
+        candidates = disagreeing
+        print(f"[info] skipping {agreeing_rows} rows where weak, student and lexicon labels agree")
+
     candidates.sort(key=lambda row: row["distill_score"], reverse=True)
     pool_size = min(len(candidates), max(1, int(args.candidate_pool)))
     top_pool = candidates[:pool_size]
@@ -377,6 +404,7 @@ def main() -> int:
             {
                 "input_rows": len(rows),
                 "candidate_rows": len(candidates),
+                "agreeing_rows_skipped": agreeing_rows,
                 "selected_rows": 0,
                 "new_rows_written": 0,
                 "total_output_rows": len(existing),
@@ -468,6 +496,7 @@ def main() -> int:
                         "student_mismatch_rate": float(row.get("student_mismatch_rate", 0.0)),
                         "weak_allergens": row.get("weak_allergens", []),
                         "student_predicted": row.get("student_predicted", []),
+                        "lexicon_allergens": row.get("lexicon_allergens"),
                     },
                 }
             )
@@ -498,6 +527,7 @@ def main() -> int:
     summary = {
         "input_rows": len(rows),
         "candidate_rows": len(candidates),
+        "agreeing_rows_skipped": agreeing_rows,
         "selected_rows": len(selected),
         "api_calls": total_calls,
         "api_failures": api_failures,
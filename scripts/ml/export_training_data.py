@@ -5,13 +5,13 @@ import os
 import random
 import re
 import sys
-import urllib.error
-import urllib.request
 from collections import Counter, defaultdict
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence, Tuple
 
+from http_client import add_http_client_args, client_from_args
 from model_utils import as_text, flatten_rows, write_json, write_jsonl
+from supabase_export import TableSpec, export_tables, write_export_state
 
 
 CANONICAL_RE = re.compile(r"[^a-z0-9]+")
@@ -51,6 +51,17 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Exclude rows that have no allergen and no diet labels.",
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Only pull rows whose updated_at is at or past the watermark stored in the raw output dir and "
+            "merge them into the previous snapshots. Deletions are only picked up by a full pull."
+        ),
+    )
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per keyset page.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Tables pulled in parallel.")
+    add_http_client_args(parser)
     return parser.parse_args()
 
 
@@ -83,48 +94,6 @@ def canonical_token(value: str) -> str:
     return CANONICAL_RE.sub("", as_text(value).lower())
 
 
-def supabase_fetch_all(base_url: str, api_key: str, path_with_query: str, page_size: int = 1000) -> List[Dict[str, object]]:
-    out: List[Dict[str, object]] = []
-    start = 0
-
-    while True:
-        end = start + page_size - 1
-        url = f"{base_url.rstrip('/')}/rest/v1/{path_with_query}"
-        request = urllib.request.Request(
-            url,
-            method="GET",
-            headers={
-                "apikey": api_key,
-                "Authorization": f"Bearer {api_key}",
-                "Accept": "application/json",
-                "Range": f"{start}-{end}",
-            },
-        )
-
-        try:
-            with urllib.request.urlopen(request, timeout=30) as response:
-                payload_text = response.read().decode("utf-8")
-                payload = json.loads(payload_text) if payload_text else []
-        except urllib.error.HTTPError as error:
-            message = error.read().decode("utf-8")
-            raise RuntimeError(
-                f"Supabase request failed for {path_with_query} ({error.code}): {message[:240]}"
-            ) from error
-
-        if not isinstance(payload, list):
-            raise RuntimeError(f"Unexpected response shape for {path_with_query}: expected list")
-
-        if not payload:
-            break
-
-        out.extend(payload)
-        if len(payload) < page_size:
-            break
-        start += page_size
-
-    return out
-
-
 def stable_unique(values: Iterable[str]) -> List[str]:
     out: List[str] = []
     seen = set()
@@ -218,40 +187,73 @@ def main() -> int:
     output_dir.mkdir(parents=True, exist_ok=True)
     raw_output_dir.mkdir(parents=True, exist_ok=True)
 
-    allergens_rows = supabase_fetch_all(
-        base_url,
-        service_key,
-        "allergens?select=id,key,label,is_active,sort_order&is_active=eq.true&order=sort_order.asc",
-    )
-    diets_rows = supabase_fetch_all(
-        base_url,
-        service_key,
-        "diets?select=id,key,label,is_active,is_supported,is_ai_enabled,sort_order&is_active=eq.true&order=sort_order.asc",
-    )
-
-    ingredient_rows = supabase_fetch_all(
-        base_url,
-        service_key,
-        "dish_ingredient_rows?select=id,restaurant_id,dish_name,row_index,row_text,created_at&row_text=not.is.null&order=created_at.asc",
-    )
-    ingredient_allergens = supabase_fetch_all(
-        base_url,
-        service_key,
-        "dish_ingredient_allergens?select=ingredient_row_id,allergen_id,is_violation,is_cross_contamination,source",
-    )
-    ingredient_diets = supabase_fetch_all(
-        base_url,
-        service_key,
-        "dish_ingredient_diets?select=ingredient_row_id,diet_id,is_violation,is_cross_contamination,source",
-    )
-
-    brand_rows: List[Dict[str, object]] = []
+    specs = [
+        TableSpec(
+            "allergens",
+            "allergens",
+            "id,key,label,is_active,sort_order",
+            filters=(("is_active", "eq.true"),),
+            sort_by=("sort_order",),
+        ),
+        TableSpec(
+            "diets",
+            "diets",
+            "id,key,label,is_active,is_supported,is_ai_enabled,sort_order",
+            filters=(("is_active", "eq.true"),),
+            sort_by=("sort_order",),
+        ),
+        TableSpec(
+            "dish_ingredient_rows",
+            "dish_ingredient_rows",
+            "id,restaurant_id,dish_name,row_index,row_text,created_at",
+            filters=(("row_text", "not.is.null"),),
+            sort_by=("created_at",),
+            updated_column="updated_at",
+        ),
+        TableSpec(
+            "dish_ingredient_allergens",
+            "dish_ingredient_allergens",
+            "id,ingredient_row_id,allergen_id,is_violation,is_cross_contamination,source",
+            updated_column="updated_at",
+        ),
+        TableSpec(
+            "dish_ingredient_diets",
+            "dish_ingredient_diets",
+            "id,ingredient_row_id,diet_id,is_violation,is_cross_contamination,source",
+            updated_column="updated_at",
+        ),
+    ]
     if not args.no_brand_items:
-        brand_rows = supabase_fetch_all(
+        specs.append(
+            TableSpec(
+                "brand_items",
+                "restaurant_menu_ingredient_brand_items",
+                "id,ingredient_row_id,restaurant_id,dish_name,row_index,ingredient_list,ingredients_list,allergens,cross_contamination_allergens,diets,cross_contamination_diets,created_at",
+                updated_column="updated_at",
+            )
+        )
+
+    client = client_from_args(args, timeout=30.0, max_retries=4, label="Supabase")
+    try:
+        tables, table_stats = export_tables(
+            client,
             base_url,
             service_key,
-            "restaurant_menu_ingredient_brand_items?select=id,ingredient_row_id,restaurant_id,dish_name,row_index,ingredient_list,ingredients_list,allergens,cross_contamination_allergens,diets,cross_contamination_diets,created_at",
+            specs,
+            raw_output_dir=raw_output_dir,
+            page_size=args.page_size,
+            workers=args.concurrency,
+            incremental=args.incremental,
         )
+    finally:
+        client.close()
+
+    allergens_rows = tables["allergens"]
+    diets_rows = tables["diets"]
+    ingredient_rows = tables["dish_ingredient_rows"]
+    ingredient_allergens = tables["dish_ingredient_allergens"]
+    ingredient_diets = tables["dish_ingredient_diets"]
+    brand_rows: List[Dict[str, object]] = tables.get("brand_items", [])
 
     # Persist raw snapshots for traceability and audit.
     write_json(raw_output_dir / "allergens.json", {"rows": allergens_rows})
@@ -260,6 +262,9 @@ def main() -> int:
     write_json(raw_output_dir / "dish_ingredient_allergens.json", {"rows": ingredient_allergens})
     write_json(raw_output_dir / "dish_ingredient_diets.json", {"rows": ingredient_diets})
     write_json(raw_output_dir / "brand_items.json", {"rows": brand_rows})
+    write_export_state(raw_output_dir, table_stats)
+    for name, stats in table_stats.items():
+        print(f"[supabase] {name}: {stats['mode']} pull, {stats['fetched_rows']} fetched over {stats['pages']} pages, {stats['rows']} rows")
 
     allergen_id_to_key: Dict[str, str] = {}
     known_allergen_order: List[str] = []
@@ -449,7 +454,9 @@ def main() -> int:
             "excluded_unlabeled": bool(args.exclude_unlabeled),
             "brand_items_enabled": not bool(args.no_brand_items),
             "manual_files": [str(path) for path in args.manual_labels],
+            "incremental": bool(args.incremental),
         },
+        "supabase_tables": table_stats,
     }
 
     write_json(output_dir / "dataset_summary.json", summary)
@@ -3,16 +3,21 @@
 
 import argparse
 import json
-import random
-import socket
-import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from collections import Counter
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence, Set
 
+from http_client import (
+    HttpClient,
+    PageJob,
+    add_http_client_args,
+    client_from_args,
+    iter_pages_in_order,
+    resolve_requests_per_second,
+)
+from jsonl_checkpoint import AppendOnlyJsonlWriter
+
 
 def as_text(value: object) -> str:
     return str(value or "").strip()
@@ -88,7 +93,22 @@ def parse_args() -> argparse.Namespace:
         "--throttle-seconds",
         type=float,
         default=6.2,
-        help="Delay between search requests. Open Food Facts search API limit is 10 requests/minute.",
+        help=(
+            "Minimum spacing between search requests when --max-rps is unset. "
+            "Open Food Facts search API limit is 10 requests/minute."
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Search pages in flight at once against the OFF host (requests still respect the rate cap).",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=0.0,
+        help="Global cap on search requests per second (default: 1 / --throttle-seconds).",
     )
     parser.add_argument(
         "--country-tag",
@@ -112,53 +132,39 @@ def parse_args() -> argparse.Namespace:
         "--checkpoint-every",
         type=int,
         default=1,
-        help="Write output checkpoints every N pages.",
+        help="Append new rows to the output (and record the last completed page) every N pages.",
     )
     parser.add_argument(
         "--append",
         action="store_true",
-        help="Append to existing output file (resume mode).",
+        help=(
+            "Resume into the existing output: dedup against its id index and continue after the "
+            "last completed page recorded in <output>.state.json."
+        ),
     )
     parser.add_argument(
         "--user-agent",
         default="ClarivoreML/0.1 (matt@clarivore.app)",
         help="User-Agent for Open Food Facts API requests.",
     )
+    add_http_client_args(parser)
     return parser.parse_args()
 
 
-def fetch_json(url: str, user_agent: str, timeout: float, max_retries: int) -> Dict[str, object]:
-    last_error: Exception = RuntimeError("Unknown fetch error")
-    for attempt in range(1, max_retries + 1):
-        request = urllib.request.Request(
-            url,
-            method="GET",
-            headers={
-                "Accept": "application/json",
-                "User-Agent": user_agent,
-            },
-        )
-        try:
-            with urllib.request.urlopen(request, timeout=timeout) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-                if isinstance(payload, dict):
-                    return payload
-                raise RuntimeError("Unexpected payload type (expected object)")
-        except (
-            urllib.error.HTTPError,
-            urllib.error.URLError,
-            TimeoutError,
-            socket.timeout,
-            json.JSONDecodeError,
-        ) as error:
-            last_error = error
-            if attempt >= max_retries:
-                break
-            sleep_seconds = min(20.0, (2 ** (attempt - 1)) + random.random())
-            print(f"[warn] request failed (attempt {attempt}/{max_retries}): {error}; retrying in {sleep_seconds:.1f}s")
-            time.sleep(sleep_seconds)
-
-    raise RuntimeError(f"Open Food Facts request failed after {max_retries} attempts: {last_error}")
+def fetch_json(client: HttpClient, url: str) -> Dict[str, object]:
+    payload = client.get_json(url)
+    if isinstance(payload, dict):
+        return payload
+    raise RuntimeError("Unexpected payload type (expected object)")
+
+
+def page_products(payload: Dict[str, object]) -> List[object]:
+    products = payload.get("products", [])
+    return products if isinstance(products, list) else []
+
+
+def is_final_page(payload: Dict[str, object], page_size: int) -> bool:
+    return len(page_products(payload)) < page_size
 
 
 def choose_ingredient_text(product: Dict[str, object]) -> str:
@@ -193,14 +199,6 @@ def map_diet_violations(analysis_tags: Sequence[object], mapped_allergens: Seque
     return stable_unique(out)
 
 
-def write_jsonl(path: Path, rows: Sequence[Dict[str, object]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        for row in rows:
-            handle.write(json.dumps(row, ensure_ascii=False))
-            handle.write("\n")
-
-
 def write_json(path: Path, payload: Dict[str, object]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as handle:
@@ -208,21 +206,6 @@ def write_json(path: Path, payload: Dict[str, object]) -> None:
         handle.write("\n")
 
 
-def read_jsonl(path: Path) -> List[Dict[str, object]]:
-    rows: List[Dict[str, object]] = []
-    if not path.exists():
-        return rows
-    with path.open("r", encoding="utf-8") as handle:
-        for raw_line in handle:
-            line = raw_line.strip()
-            if not line:
-                continue
-            payload = json.loads(line)
-            if isinstance(payload, dict):
-                rows.append(payload)
-    return rows
-
-
 def main() -> int:
     args = parse_args()
 
@@ -248,12 +231,19 @@ def main() -> int:
         ]
     )
 
-    collected: List[Dict[str, object]] = []
-    seen_ids: Set[str] = set()
-    if args.append and output_path.exists():
-        collected = read_jsonl(output_path)
-        seen_ids = {as_text(row.get("id")) for row in collected if as_text(row.get("id"))}
-        print(f"[resume] loaded {len(collected)} existing rows from {output_path}")
+    writer = AppendOnlyJsonlWriter(output_path, resume=bool(args.append))
+    end_page = start_page + max_pages
+    first_page = start_page
+    if args.append:
+        print(f"[resume] indexed {len(writer)} existing rows from {output_path}")
+        last_completed_page = int(writer.state.get("last_completed_page") or 0)
+        if writer.state.get("page_size") == page_size and last_completed_page >= start_page:
+            first_page = last_completed_page + 1
+            print(f"[resume] continuing after completed page {last_completed_page}")
+    # Only pages up to the first failure count as completed, so a resume re-fetches
+    # every failed page (rows already written are skipped through the id index).
+    failed_page_numbers: List[int] = []
+    completed_through = first_page - 1
 
     pages_fetched = 0
     failed_pages = 0
@@ -264,8 +254,17 @@ def main() -> int:
 
     allergen_counter = Counter()
     diet_counter = Counter()
+    client = client_from_args(
+        args,
+        user_agent=args.user_agent,
+        timeout=float(args.timeout),
+        max_retries=max(1, int(args.max_retries)),
+        label="Open Food Facts",
+        max_in_flight_per_host=max(1, int(args.concurrency)),
+        requests_per_second=resolve_requests_per_second(float(args.max_rps), float(args.throttle_seconds)),
+    )
 
-    for page in range(start_page, start_page + max_pages):
+    def page_job(page: int) -> PageJob:
         query = urllib.parse.urlencode(
             {
                 "fields": fields,
@@ -273,23 +272,29 @@ def main() -> int:
                 "page_size": page_size,
             }
         )
-        url = f"https://world.openfoodfacts.org/api/v2/search?{query}"
-        try:
-            payload = fetch_json(
-                url=url,
-                user_agent=args.user_agent,
-                timeout=float(args.timeout),
-                max_retries=max(1, int(args.max_retries)),
-            )
-        except RuntimeError as error:
+        return PageJob("search", page, f"https://world.openfoodfacts.org/api/v2/search?{query}")
+
+    page_results = iter_pages_in_order(
+        (page_job(page) for page in range(first_page, end_page)),
+        lambda job: fetch_json(client, job.url),
+        workers=max(1, int(args.concurrency)),
+        is_final=lambda payload: is_final_page(payload, page_size),
+    )
+
+    for job, payload, error in page_results:
+        page = job.page
+        if error is not None:
+            if not isinstance(error, RuntimeError):
+                raise error
             failed_pages += 1
+            failed_page_numbers.append(page)
             print(f"[warn] failed page {page}: {error}")
-            if page < (start_page + max_pages - 1) and args.throttle_seconds > 0:
-                time.sleep(float(args.throttle_seconds))
             continue
+        if not failed_page_numbers:
+            completed_through = page
 
-        products = payload.get("products", [])
-        if not isinstance(products, list) or not products:
+        products = page_products(payload)
+        if not products:
             print(f"[info] no products on page {page}; stopping")
             break
 
@@ -313,8 +318,8 @@ def main() -> int:
                 continue
 
             product_code = as_text(product.get("code"))
-            row_id = f"off::{product_code}" if product_code else f"off::page{page}::{len(collected)}"
-            if row_id in seen_ids:
+            row_id = f"off::{product_code}" if product_code else f"off::page{page}::{len(writer)}"
+            if row_id in writer:
                 continue
 
             allergen_tags = list(product.get("allergens_tags") or [])
@@ -331,7 +336,6 @@ def main() -> int:
                 skipped_unlabeled += 1
                 continue
 
-            seen_ids.add(row_id)
             row = {
                 "id": row_id,
                 "text": text,
@@ -352,13 +356,13 @@ def main() -> int:
                     "used_traces": bool(args.include_traces),
                 },
             }
-            collected.append(row)
+            writer.add(row)
             added_this_page += 1
             allergen_counter.update(mapped_allergens)
             diet_counter.update(mapped_diets)
 
         print(
-            f"[page {page}] products={len(products)} kept={added_this_page} total_kept={len(collected)}"
+            f"[page {page}] products={len(products)} kept={added_this_page} total_kept={len(writer)}"
         )
 
         if len(products) < page_size:
@@ -366,22 +370,25 @@ def main() -> int:
             break
 
         if pages_fetched % checkpoint_every == 0:
-            write_jsonl(output_path, collected)
-
-        if page < (start_page + max_pages - 1) and args.throttle_seconds > 0:
-            time.sleep(float(args.throttle_seconds))
+            writer.flush(
+                last_completed_page=completed_through, page_size=page_size, failed_pages=failed_page_numbers
+            )
 
-    write_jsonl(output_path, collected)
+    page_results.close()
+    client.close()
+    writer.flush(last_completed_page=completed_through, page_size=page_size, failed_pages=failed_page_numbers)
 
     summary = {
         "source": "openfoodfacts",
         "pages_requested": max_pages,
         "start_page": start_page,
+        "resumed_from_page": first_page,
         "pages_fetched": pages_fetched,
         "failed_pages": failed_pages,
         "page_size": page_size,
+        "concurrency": max(1, int(args.concurrency)),
         "products_seen": products_seen,
-        "rows_written": len(collected),
+        "rows_written": len(writer),
         "country_tag": country_tag,
         "include_traces": bool(args.include_traces),
         "include_unlabeled": bool(args.include_unlabeled),
@@ -391,10 +398,11 @@ def main() -> int:
         "skipped_unlabeled": skipped_unlabeled,
         "allergen_counts": dict(allergen_counter),
         "diet_counts": dict(diet_counter),
+        "http": dict(client.stats),
     }
     write_json(summary_path, summary)
 
-    print(f"Wrote {len(collected)} rows -> {output_path}")
+    print(f"Wrote {len(writer)} rows -> {output_path}")
     print(f"Summary -> {summary_path}")
 
     return 0
@@ -3,15 +3,19 @@
 
 import argparse
 import json
-import random
-import socket
-import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from collections import Counter
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Set
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from http_client import (
+    HttpClient,
+    PageJob,
+    add_http_client_args,
+    client_from_args,
+    iter_pages_in_order,
+    resolve_requests_per_second,
+)
 
 
 def as_text(value: object) -> str:
@@ -100,7 +104,24 @@ def parse_args() -> argparse.Namespace:
         default="united-states",
         help="Country tag slug for OFF search filter (e.g. united-states). Empty disables country filter.",
     )
-    parser.add_argument("--throttle-seconds", type=float, default=3.5, help="Delay between requests.")
+    parser.add_argument(
+        "--throttle-seconds",
+        type=float,
+        default=3.5,
+        help="Minimum spacing between requests when --max-rps is unset.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Search pages in flight at once against the OFF host (requests still respect the rate cap).",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=0.0,
+        help="Global cap on search requests per second (default: 1 / --throttle-seconds).",
+    )
     parser.add_argument("--timeout", type=float, default=45.0, help="HTTP timeout seconds.")
     parser.add_argument("--max-retries", type=int, default=4, help="Retries per request.")
     parser.add_argument("--min-text-len", type=int, default=12, help="Minimum ingredient text length.")
@@ -119,38 +140,24 @@ def parse_args() -> argparse.Namespace:
         default="ClarivoreML/0.1 (matt@clarivore.app)",
         help="User-Agent for OFF requests.",
     )
+    add_http_client_args(parser)
     return parser.parse_args()
 
 
-def fetch_json(url: str, user_agent: str, timeout: float, max_retries: int) -> Dict[str, object]:
-    last_error: Exception = RuntimeError("Unknown fetch error")
-    for attempt in range(1, max_retries + 1):
-        request = urllib.request.Request(
-            url,
-            method="GET",
-            headers={"Accept": "application/json", "User-Agent": user_agent},
-        )
-        try:
-            with urllib.request.urlopen(request, timeout=timeout) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-                if isinstance(payload, dict):
-                    return payload
-                raise RuntimeError("Unexpected payload type")
-        except (
-            urllib.error.HTTPError,
-            urllib.error.URLError,
-            TimeoutError,
-            socket.timeout,
-            json.JSONDecodeError,
-        ) as error:
-            last_error = error
-            if attempt >= max_retries:
-                break
-            sleep_seconds = min(20.0, (2 ** (attempt - 1)) + random.random())
-            print(f"[warn] request failed {attempt}/{max_retries}: {error}; sleeping {sleep_seconds:.1f}s")
-            time.sleep(sleep_seconds)
-
-    raise RuntimeError(f"OFF request failed after {max_retries} retries: {last_error}")
+def fetch_json(client: HttpClient, url: str) -> Dict[str, object]:
+    payload = client.get_json(url)
+    if isinstance(payload, dict):
+        return payload
+    raise RuntimeError("Unexpected payload type")
+
+
+def page_products(payload: Dict[str, object]) -> List[object]:
+    products = payload.get("products", [])
+    return products if isinstance(products, list) else []
+
+
+def is_final_page(payload: Dict[str, object], page_size: int) -> bool:
+    return len(page_products(payload)) < page_size
 
 
 def choose_ingredient_text(product: Dict[str, object]) -> str:
@@ -222,6 +229,7 @@ def main() -> int:
     page_size = max(1, min(200, int(args.page_size)))
     min_text_len = max(1, int(args.min_text_len))
     country_tag = as_text(args.country_tag).lower()
+    concurrency = max(1, int(args.concurrency))
 
     output_path = Path(args.output)
     summary_path = Path(args.summary_output)
@@ -238,109 +246,126 @@ def main() -> int:
     query_counter = Counter()
     allergen_counter = Counter()
     diet_counter = Counter()
+    client = client_from_args(
+        args,
+        user_agent=args.user_agent,
+        timeout=float(args.timeout),
+        max_retries=max(1, int(args.max_retries)),
+        label="OFF",
+        max_in_flight_per_host=concurrency,
+        requests_per_second=resolve_requests_per_second(float(args.max_rps), float(args.throttle_seconds)),
+    )
+
+    stream_queries: Dict[str, Tuple[str, str]] = {
+        f"{class_name}:{tag}": (class_name, tag) for class_name, tags in TARGET_TAGS.items() for tag in tags
+    }
+    jobs = (
+        PageJob(
+            stream,
+            page,
+            build_query_url(tag=tag, page=page, page_size=page_size, country_tag=country_tag),
+        )
+        for stream, (_class_name, tag) in stream_queries.items()
+        for page in range(1, pages_per_tag + 1)
+    )
+
+    # Pages of every tag are fetched concurrently but handled in (class, tag, page)
+    # order, so ids, dedup and counters match a sequential crawl.
+    for job, payload, error in iter_pages_in_order(
+        jobs,
+        lambda job: fetch_json(client, job.url),
+        workers=concurrency,
+        is_final=lambda payload: is_final_page(payload, page_size),
+    ):
+        class_name, tag = stream_queries[job.stream]
+        page = job.page
+        if error is not None:
+            if not isinstance(error, RuntimeError):
+                raise error
+            failed_requests += 1
+            print(f"[warn] query failed class={class_name} tag={tag} page={page}: {error}")
+            continue
+
+        requests_made += 1
+        products = page_products(payload)
+        if not products:
+            continue
+
+        products_seen += len(products)
+        added = 0
+
+        for product in products:
+            if not isinstance(product, dict):
+                continue
+            text = choose_ingredient_text(product)
+            if len(text) < min_text_len:
+                skipped_short_text += 1
+                continue
+
+            code = as_text(product.get("code"))
+            row_id = f"off-target::{code}" if code else f"off-target::{class_name}:{tag}:{page}:{len(rows)}"
+            if row_id in seen_ids:
+                continue
+
+            allergen_tags = list(product.get("allergens_tags") or [])
+            if args.include_traces:
+                allergen_tags.extend(list(product.get("traces_tags") or []))
+
+            mapped_allergens = map_allergens(allergen_tags)
+            mapped_diets = map_diet_violations(
+                analysis_tags=list(product.get("ingredients_analysis_tags") or []),
+                mapped_allergens=mapped_allergens,
+            )
+
+            if not args.include_unlabeled and not mapped_allergens and not mapped_diets:
+                skipped_unlabeled += 1
+                continue
+
+            seen_ids.add(row_id)
+            query_counter[f"{class_name}:{tag}"] += 1
+            allergen_counter.update(mapped_allergens)
+            diet_counter.update(mapped_diets)
+
+            rows.append(
+                {
+                    "id": row_id,
+                    "text": text,
+                    "allergens": mapped_allergens,
+                    "diets": mapped_diets,
+                    "source": "openfoodfacts_targeted",
+                    "meta": {
+                        "code": code,
+                        "product_name": as_text(product.get("product_name")),
+                        "query_class": class_name,
+                        "query_tag": tag,
+                        "query_page": page,
+                        "countries_tags": [as_text(v) for v in (product.get("countries_tags") or []) if as_text(v)],
+                        "allergens_tags": [as_text(v) for v in (product.get("allergens_tags") or []) if as_text(v)],
+                        "traces_tags": [as_text(v) for v in (product.get("traces_tags") or []) if as_text(v)],
+                        "ingredients_analysis_tags": [
+                            as_text(v)
+                            for v in (product.get("ingredients_analysis_tags") or [])
+                            if as_text(v)
+                        ],
+                        "used_traces": bool(args.include_traces),
+                    },
+                }
+            )
+            added += 1
+
+        print(
+            f"[query class={class_name} tag={tag} page={page}] products={len(products)} added={added} total={len(rows)}"
+        )
 
-    for class_name, tags in TARGET_TAGS.items():
-        for tag in tags:
-            for page in range(1, pages_per_tag + 1):
-                url = build_query_url(tag=tag, page=page, page_size=page_size, country_tag=country_tag)
-
-                try:
-                    payload = fetch_json(
-                        url=url,
-                        user_agent=args.user_agent,
-                        timeout=float(args.timeout),
-                        max_retries=max(1, int(args.max_retries)),
-                    )
-                except RuntimeError as error:
-                    failed_requests += 1
-                    print(f"[warn] query failed class={class_name} tag={tag} page={page}: {error}")
-                    if args.throttle_seconds > 0:
-                        time.sleep(float(args.throttle_seconds))
-                    continue
-
-                requests_made += 1
-                products = payload.get("products", [])
-                if not isinstance(products, list) or not products:
-                    break
-
-                products_seen += len(products)
-                added = 0
-
-                for product in products:
-                    if not isinstance(product, dict):
-                        continue
-                    text = choose_ingredient_text(product)
-                    if len(text) < min_text_len:
-                        skipped_short_text += 1
-                        continue
-
-                    code = as_text(product.get("code"))
-                    row_id = f"off-target::{code}" if code else f"off-target::{class_name}:{tag}:{page}:{len(rows)}"
-                    if row_id in seen_ids:
-                        continue
-
-                    allergen_tags = list(product.get("allergens_tags") or [])
-                    if args.include_traces:
-                        allergen_tags.extend(list(product.get("traces_tags") or []))
-
-                    mapped_allergens = map_allergens(allergen_tags)
-                    mapped_diets = map_diet_violations(
-                        analysis_tags=list(product.get("ingredients_analysis_tags") or []),
-                        mapped_allergens=mapped_allergens,
-                    )
-
-                    if not args.include_unlabeled and not mapped_allergens and not mapped_diets:
-                        skipped_unlabeled += 1
-                        continue
-
-                    seen_ids.add(row_id)
-                    query_counter[f"{class_name}:{tag}"] += 1
-                    allergen_counter.update(mapped_allergens)
-                    diet_counter.update(mapped_diets)
-
-                    rows.append(
-                        {
-                            "id": row_id,
-                            "text": text,
-                            "allergens": mapped_allergens,
-                            "diets": mapped_diets,
-                            "source": "openfoodfacts_targeted",
-                            "meta": {
-                                "code": code,
-                                "product_name": as_text(product.get("product_name")),
-                                "query_class": class_name,
-                                "query_tag": tag,
-                                "query_page": page,
-                                "countries_tags": [as_text(v) for v in (product.get("countries_tags") or []) if as_text(v)],
-                                "allergens_tags": [as_text(v) for v in (product.get("allergens_tags") or []) if as_text(v)],
-                                "traces_tags": [as_text(v) for v in (product.get("traces_tags") or []) if as_text(v)],
-                                "ingredients_analysis_tags": [
-                                    as_text(v)
-                                    for v in (product.get("ingredients_analysis_tags") or [])
-                                    if as_text(v)
-                                ],
-                                "used_traces": bool(args.include_traces),
-                            },
-                        }
-                    )
-                    added += 1
-
-                print(
-                    f"[query class={class_name} tag={tag} page={page}] products={len(products)} added={added} total={len(rows)}"
-                )
-
-                if len(products) < page_size:
-                    break
-
-                if args.throttle_seconds > 0:
-                    time.sleep(float(args.throttle_seconds))
 
+    client.close()
     write_jsonl(output_path, rows)
 
     summary = {
         "source": "openfoodfacts_targeted",
         "pages_per_tag": pages_per_tag,
         "page_size": page_size,
+        "concurrency": concurrency,
         "country_tag": country_tag,
         "requests_made": requests_made,
         "failed_requests": failed_requests,
@@ -354,6 +379,7 @@ def main() -> int:
         "query_counts": dict(query_counter),
         "allergen_counts": dict(allergen_counter),
         "diet_counts": dict(diet_counter),
+        "http": dict(client.stats),
     }
     write_json(summary_path, summary)
 
@@ -6,16 +6,15 @@ import csv
 import hashlib
 import io
 import json
-import os
 import re
 import sys
-import urllib.error
-import urllib.request
 import zipfile
 from collections import Counter
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence, Set, Tuple
 
+from snapshot_download import download_snapshot
+
 
 DEFAULT_DOWNLOAD_URL = "https://fdc.nal.usda.gov/fdc-datasets/FoodData_Central_branded_food_csv_2025-04-24.zip"
 
@@ -163,6 +162,18 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--min-text-len", type=int, default=20)
     parser.add_argument("--timeout", type=float, default=120.0)
     parser.add_argument("--force-download", action="store_true", help="Redownload even if --download-path exists.")
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Send a conditional request (ETag/Last-Modified) and redownload only if the ZIP changed.",
+    )
+    parser.add_argument("--sha256", default="", help="Expected SHA-256 of the USDA ZIP (rejects mismatches).")
+    parser.add_argument(
+        "--download-attempts",
+        type=int,
+        default=5,
+        help="Attempts per download; interrupted transfers resume from the partial .tmp file.",
+    )
     parser.add_argument(
         "--include-unlabeled",
         action="store_true",
@@ -277,32 +288,24 @@ def hash_to_unit(value: str) -> float:
     return float(integer) / float(2**64)
 
 
-def maybe_download_file(url: str, output_path: Path, timeout: float, force_download: bool) -> Dict[str, object]:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    if output_path.exists() and not force_download:
-        return {"downloaded": False, "bytes_written": int(output_path.stat().st_size)}
-
-    temp_path = output_path.with_suffix(output_path.suffix + ".tmp")
-    if temp_path.exists():
-        temp_path.unlink()
-
-    request = urllib.request.Request(url, method="GET")
-    bytes_written = 0
-    try:
-        with urllib.request.urlopen(request, timeout=timeout) as response, temp_path.open("wb") as out:
-            while True:
-                chunk = response.read(1024 * 1024)
-                if not chunk:
-                    break
-                out.write(chunk)
-                bytes_written += len(chunk)
-    except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError) as error:
-        if temp_path.exists():
-            temp_path.unlink()
-        raise RuntimeError(f"download failed: {error}") from error
-
-    os.replace(temp_path, output_path)
-    return {"downloaded": True, "bytes_written": bytes_written}
+def maybe_download_file(
+    url: str,
+    output_path: Path,
+    timeout: float,
+    force_download: bool,
+    revalidate: bool = False,
+    expected_sha256: str = "",
+    max_attempts: int = 5,
+) -> Dict[str, object]:
+    return download_snapshot(
+        url=url,
+        output_path=output_path,
+        timeout=timeout,
+        force_download=force_download,
+        revalidate=revalidate,
+        expected_sha256=expected_sha256,
+        max_attempts=max_attempts,
+    )
 
 
 def find_branded_food_member(zip_handle: zipfile.ZipFile) -> str:
@@ -341,9 +344,14 @@ def main() -> int:
         output_path=download_path,
         timeout=float(args.timeout),
         force_download=bool(args.force_download),
+        revalidate=bool(args.revalidate),
+        expected_sha256=as_text(args.sha256),
+        max_attempts=max(1, int(args.download_attempts)),
     )
     if download_meta.get("downloaded"):
         print(f"Downloaded USDA ZIP -> {download_path} ({download_meta.get('bytes_written', 0)} bytes)")
+    elif download_meta.get("not_modified"):
+        print(f"USDA ZIP unchanged upstream -> {download_path}")
     else:
         print(f"Using existing USDA ZIP -> {download_path}")
 
@@ -430,6 +438,8 @@ def main() -> int:
         "download_path": str(download_path),
         "downloaded": bool(download_meta.get("downloaded")),
         "download_bytes": int(download_meta.get("bytes_written", 0)),
+        "download_resumed_from": int(download_meta.get("resumed_from", 0)),
+        "download_sha256": as_text(download_meta.get("sha256")),
         "rows_processed": processed_rows if not max_rows else min(processed_rows, max_rows),
         "rows_kept": len(rows),
         "train_rows": len(train_rows),
@@ -4,16 +4,14 @@
 import argparse
 import json
 import os
-import random
 import re
-import socket
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 from collections import Counter
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Set
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from http_client import HttpClient, add_http_client_args, client_from_args
 
 
 def as_text(value: object) -> str:
@@ -167,34 +165,17 @@ def parse_args() -> argparse.Namespace:
         default="",
         help="USDA FDC API key. Defaults to USDA_API_KEY env var then DEMO_KEY.",
     )
+    add_http_client_args(parser)
     return parser.parse_args()
 
 
-def fetch_json(url: str, timeout: float, max_retries: int) -> Dict[str, object]:
-    last_error: Exception = RuntimeError("Unknown fetch error")
-    for attempt in range(1, max_retries + 1):
-        req = urllib.request.Request(url, method="GET", headers={"Accept": "application/json"})
-        try:
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                payload = json.loads(response.read().decode("utf-8"))
-                if isinstance(payload, dict):
-                    return payload
-                raise RuntimeError("Unexpected payload type")
-        except (
-            urllib.error.HTTPError,
-            urllib.error.URLError,
-            TimeoutError,
-            socket.timeout,
-            json.JSONDecodeError,
-        ) as error:
-            last_error = error
-            if attempt >= max_retries:
-                break
-            sleep_seconds = min(20.0, (2 ** (attempt - 1)) + random.random())
-            print(f"[warn] request failed {attempt}/{max_retries}: {error}; retrying in {sleep_seconds:.1f}s")
-            time.sleep(sleep_seconds)
-
-    raise RuntimeError(f"USDA request failed after {max_retries} retries: {last_error}")
+def fetch_json(client: HttpClient, url: str) -> Tuple[Dict[str, object], bool]:
+    """Return ``(payload, from_cache)`` for one search page."""
+    cache_hits = client.stats["cache_hits"]
+    payload = client.get_json(url)
+    if isinstance(payload, dict):
+        return payload, client.stats["cache_hits"] > cache_hits
+    raise RuntimeError("Unexpected payload type")
 
 
 def normalize_token(value: str) -> str:
@@ -271,6 +252,12 @@ def main() -> int:
     skipped_unlabeled = 0
 
     allergen_counter = Counter()
+    client = client_from_args(
+        args,
+        timeout=float(args.timeout),
+        max_retries=max(1, int(args.max_retries)),
+        label="USDA",
+    )
 
     for page in range(start_page, start_page + max_pages):
         query = urllib.parse.urlencode(
@@ -285,7 +272,7 @@ def main() -> int:
         url = f"https://api.nal.usda.gov/fdc/v1/foods/search?{query}"
 
         try:
-            payload = fetch_json(url=url, timeout=float(args.timeout), max_retries=max(1, int(args.max_retries)))
+            payload, from_cache = fetch_json(client, url)
         except RuntimeError as error:
             failed_requests += 1
             print(f"[warn] page {page} failed: {error}")
@@ -352,9 +339,10 @@ def main() -> int:
             print(f"[info] final partial page reached at {page}; stopping")
             break
 
-        if args.throttle_seconds > 0:
+        if args.throttle_seconds > 0 and not from_cache:
             time.sleep(float(args.throttle_seconds))
 
+    client.close()
     output_path = Path(args.output)
     summary_path = Path(args.summary_output)
     write_jsonl(output_path, rows)
@@ -375,6 +363,7 @@ def main() -> int:
         "skipped_short": skipped_short,
         "skipped_unlabeled": skipped_unlabeled,
         "allergen_counts": dict(allergen_counter),
+        "http": dict(client.stats),
     }
     write_json(summary_path, summary)
 
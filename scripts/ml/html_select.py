@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""A small CSS-selector interface over interchangeable HTML parser backends.
+
+The SmartLabel template parsers only need ``select``/``select_one``,
+attribute lookup, flattened text and one sibling lookup, so they are written
+against :class:`HtmlNode` and can run on whichever parser is installed:
+
+- ``selectolax`` (lexbor): the fastest, C-level parsing and CSS matching.
+- ``lxml``: libxml2 parsing with ``cssselect`` for selectors.
+- ``bs4``: BeautifulSoup with the stdlib ``html.parser``; always available and
+  the reference the other backends are checked against.
+
+``bs4`` is the default. ``auto`` is opt-in and picks the first of those that
+imports; run the backend parity tests (``test_scrape_smartlabel_ground_truth``
+with selectolax/lxml installed) before relying on it. :meth:`HtmlNode.text` matches
+BeautifulSoup's ``get_text(" ", strip=True)``: every text node stripped and
+joined by one space, skipping comments and ``<script>``/``<style>`` bodies.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+BACKEND_NAMES = ("selectolax", "lxml", "bs4")
+# The reference parser; the faster backends are opt-in until their parity tests run in CI.
+DEFAULT_BACKEND = "bs4"
+# Elements whose text BeautifulSoup's get_text leaves out.
+NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+
+class HtmlNode(ABC):
+    """An element (or the document) from one backend's tree."""
+
+    __slots__ = ("node",)
+
+    backend = ""
+
+    def __init__(self, node: Any) -> None:
+        self.node = node
+
+    @abstractmethod
+    def select(self, selector: str) -> List["HtmlNode"]:
+        ...
+
+    def select_one(self, selector: str) -> Optional["HtmlNode"]:
+        matches = self.select(selector)
+        return matches[0] if matches else None
+
+    @abstractmethod
+    def get(self, attribute: str) -> str:
+        """The attribute value, or ``""`` when it is missing."""
+
+    @abstractmethod
+    def strings(self) -> Iterator[str]:
+        ...
+
+    def text(self) -> str:
+        return " ".join(piece for piece in (string.strip() for string in self.strings()) if piece)
+
+    @abstractmethod
+    def previous_sibling(self, tag: str, class_name: str) -> Optional["HtmlNode"]:
+        """The nearest earlier sibling element ``<tag class="... class_name ...">``."""
+
+
+def _has_class(value: Optional[str], class_name: str) -> bool:
+    return class_name in (value or "").split()
+
+
+class SoupNode(HtmlNode):
+    __slots__ = ()
+
+    backend = "bs4"
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [SoupNode(match) for match in self.node.select(selector)]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        match = self.node.select_one(selector)
+        return SoupNode(match) if match is not None else None
+
+    def get(self, attribute: str) -> str:
+        value = self.node.get(attribute)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value or ""
+
+    def strings(self) -> Iterator[str]:
+        return iter(self.node.stripped_strings)
+
+    def text(self) -> str:
+        return self.node.get_text(" ", strip=True)
+
+    def previous_sibling(self, tag: str, class_name: str) -> Optional[HtmlNode]:
+        match = self.node.find_previous_sibling(tag, class_=class_name)
+        return SoupNode(match) if match is not None else None
+
+
+class LxmlNode(HtmlNode):
+    __slots__ = ()
+
+    backend = "lxml"
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [LxmlNode(match) for match in self.node.cssselect(selector)]
+
+    def get(self, attribute: str) -> str:
+        return self.node.get(attribute) or ""
+
+    def strings(self) -> Iterator[str]:
+        def walk(element: Any) -> Iterator[str]:
+            if element.text:
+                yield element.text
+            for child in element:
+                # Comments and processing instructions have a non-string tag.
+                if isinstance(child.tag, str) and child.tag.lower() not in NON_TEXT_TAGS:
+                    yield from walk(child)
+                if child.tail:
+                    yield child.tail
+
+        return walk(self.node)
+
+    def previous_sibling(self, tag: str, class_name: str) -> Optional[HtmlNode]:
+        for sibling in self.node.itersiblings(preceding=True):
+            if sibling.tag == tag and _has_class(sibling.get("class"), class_name):
+                return LxmlNode(sibling)
+        return None
+
+
+class SelectolaxNode(HtmlNode):
+    __slots__ = ()
+
+    backend = "selectolax"
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [SelectolaxNode(match) for match in self.node.css(selector)]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        match = self.node.css_first(selector)
+        return SelectolaxNode(match) if match is not None else None
+
+    def get(self, attribute: str) -> str:
+        return self.node.attributes.get(attribute) or ""
+
+    def strings(self) -> Iterator[str]:
+        def walk(node: Any) -> Iterator[str]:
+            for child in node.iter(include_text=True):
+                tag = child.tag or ""
+                if tag == "-text":
+                    yield child.text(deep=False)
+                # Comments, doctypes and other non-element nodes are named "!..." or "-...".
+                elif tag[:1].isalpha() and tag.lower() not in NON_TEXT_TAGS:
+                    yield from walk(child)
+
+        return walk(self.node)
+
+    def previous_sibling(self, tag: str, class_name: str) -> Optional[HtmlNode]:
+        sibling = self.node.prev
+        while sibling is not None:
+            if sibling.tag == tag and _has_class(sibling.attributes.get("class"), class_name):
+                return SelectolaxNode(sibling)
+            sibling = sibling.prev
+        return None
+
+
+def _parse_bs4(html: str) -> HtmlNode:
+    from bs4 import BeautifulSoup
+
+    return SoupNode(BeautifulSoup(html, "html.parser"))
+
+
+def _parse_lxml(html: str) -> HtmlNode:
+    import lxml.html
+
+    if not html.strip():
+        html = "<html></html>"
+    # Bytes plus an explicit encoding, since lxml rejects str input that carries
+    # an XML encoding declaration.
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    return LxmlNode(lxml.html.document_fromstring(html.encode("utf-8"), parser=parser))
+
+
+def _parse_selectolax(html: str) -> HtmlNode:
+    from selectolax.lexbor import LexborHTMLParser
+
+    return SelectolaxNode(LexborHTMLParser(html).root)
+
+
+PARSERS: Dict[str, Callable[[str], HtmlNode]] = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "bs4": _parse_bs4,
+}
+REQUIRED_MODULES = {
+    "selectolax": ("selectolax.lexbor",),
+    "lxml": ("lxml.html", "cssselect"),
+    "bs4": ("bs4",),
+}
+
+_backend = ""
+
+
+def backend_available(name: str) -> bool:
+    try:
+        return all(importlib.util.find_spec(module) is not None for module in REQUIRED_MODULES[name])
+    except ModuleNotFoundError:
+        return False
+
+
+def available_backends() -> List[str]:
+    return [name for name in BACKEND_NAMES if backend_available(name)]
+
+
+def set_backend(name: str = DEFAULT_BACKEND) -> str:
+    """Select the parser used by :func:`parse_html`; returns the backend chosen."""
+    global _backend
+    if name == "auto":
+        available = available_backends()
+        if not available:
+            raise RuntimeError("No HTML parser backend is installed (need selectolax, lxml+cssselect or bs4).")
+        name = available[0]
+    elif name not in PARSERS:
+        raise RuntimeError(f"Unknown HTML parser backend {name!r}; choose from auto, {', '.join(BACKEND_NAMES)}.")
+    elif not backend_available(name):
+        modules = " and ".join(REQUIRED_MODULES[name])
+        raise RuntimeError(f"HTML parser backend {name!r} needs {modules} installed.")
+    _backend = name
+    return name
+
+
+def current_backend() -> str:
+    if not _backend:
+        set_backend(DEFAULT_BACKEND)
+    return _backend
+
+
+def parse_html(html: str, backend: str = "") -> HtmlNode:
+    """Parse ``html`` with ``backend`` (default: the selected backend) into its document node."""
+    return PARSERS[backend or current_backend()](html or "")
+
+
+def as_document(markup: Any) -> HtmlNode:
+    """Accept markup, an already parsed :class:`HtmlNode`, or a BeautifulSoup tree."""
+    if isinstance(markup, HtmlNode):
+        return markup
+    if isinstance(markup, str):
+        return parse_html(markup)
+    if hasattr(markup, "select_one") and hasattr(markup, "get_text"):
+        return SoupNode(markup)
+    raise TypeError(f"Expected HTML markup or a parsed document, got {type(markup).__name__}")
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""Pooled keep-alive HTTP client with retries and an optional on-disk response cache."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import http.client
+import json
+import os
+import random
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple, TypeVar, Union
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 20.0
+DEFAULT_MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# Headers that never change what the server returns; left out of cache keys.
+CACHE_KEY_IGNORED_HEADERS = frozenset({"user-agent", "accept-encoding", "connection"})
+
+# OSError covers ConnectionError, TimeoutError, socket.timeout and DNS failures.
+TRANSPORT_ERRORS: Tuple[type, ...] = (http.client.HTTPException, OSError)
+# Errors that mean a pooled keep-alive socket was closed by the server while idle.
+STALE_CONNECTION_ERRORS: Tuple[type, ...] = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+PoolKey = Tuple[str, str, int]
+T = TypeVar("T")
+
+
+class HttpStatusError(RuntimeError):
+    """Non-retryable HTTP status (or a retryable one that exhausted its attempts)."""
+
+    def __init__(self, status: int, url: str, body: bytes = b"") -> None:
+        self.status = int(status)
+        self.url = url
+        self.body = body
+        message = body[:240].decode("utf-8", errors="replace")
+        super().__init__(f"HTTP {self.status} for {url}: {message}" if message else f"HTTP {self.status} for {url}")
+
+
+class InvalidJsonError(RuntimeError):
+    """A 2xx response whose body stayed invalid JSON for every attempt; its cache entry has been dropped."""
+
+
+class HttpResponse:
+    __slots__ = ("status", "headers", "body", "from_cache")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, from_cache: bool = False) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def json(self) -> object:
+        return json.loads(self.text()) if self.body else None
+
+
+# A mapping, or a sequence of pairs when a name repeats (PostgREST filters on one column).
+QueryParams = Union[Mapping[str, object], Sequence[Tuple[str, object]]]
+
+
+def build_url(url: str, params: Optional[QueryParams] = None) -> str:
+    if not params:
+        return url
+    pairs = list(params.items()) if isinstance(params, Mapping) else list(params)
+    separator = "&" if urllib.parse.urlsplit(url).query else "?"
+    return f"{url}{separator}{urllib.parse.urlencode(pairs)}"
+
+
+def cache_key_for(method: str, url: str, headers: Mapping[str, str]) -> str:
+    keyed_headers = sorted(
+        (name.lower(), value) for name, value in headers.items() if name.lower() not in CACHE_KEY_IGNORED_HEADERS
+    )
+    material = json.dumps([method.upper(), url, keyed_headers], separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed response bodies on disk: ``sha256(method, url, headers) -> body``.
+
+    Entries older than ``ttl_seconds`` are treated as missing (``ttl_seconds <= 0``
+    keeps them forever). Writes are atomic so concurrent fetchers can share a cache.
+    """
+
+    def __init__(self, directory: Path, ttl_seconds: float = 0.0) -> None:
+        self.directory = Path(directory)
+        self.ttl_seconds = float(ttl_seconds)
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.body"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        try:
+            if self.ttl_seconds > 0 and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def put(self, key: str, body: bytes) -> None:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(body)
+        os.replace(temp_path, path)
+
+    def discard(self, key: str) -> None:
+        try:
+            self.path_for(key).unlink()
+        except OSError:
+            pass
+
+
+class RateLimiter:
+    """Global requests-per-second cap shared by every thread using a client.
+
+    Each caller reserves the next free start slot under a lock and sleeps until
+    it arrives, so request starts are spaced at least ``1 / requests_per_second`` apart.
+    """
+
+    def __init__(self, requests_per_second: float) -> None:
+        self.interval = 1.0 / float(requests_per_second)
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HttpClient:
+    """Thread-safe HTTP client that reuses keep-alive connections per host.
+
+    Requests advertise gzip and are decoded transparently. Transport errors and
+    408/429/5xx responses are retried with jittered exponential backoff
+    (``Retry-After`` is honoured). When ``cache_dir`` is set, successful GET
+    bodies are stored in a :class:`ResponseCache` and replayed without a request.
+    ``max_in_flight_per_host`` and ``requests_per_second`` bound network traffic
+    (retries included); cache hits are never throttled.
+    """
+
+    def __init__(
+        self,
+        *,
+        user_agent: str = "",
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        cache_dir: Optional[Path] = None,
+        cache_ttl_seconds: float = 0.0,
+        max_in_flight_per_host: int = 0,
+        requests_per_second: float = 0.0,
+        label: str = "HTTP",
+    ) -> None:
+        self.user_agent = user_agent
+        self.timeout = float(timeout)
+        self.max_retries = max(1, int(max_retries))
+        self.backoff_seconds = max(0.0, float(backoff_seconds))
+        self.max_backoff_seconds = float(max_backoff_seconds)
+        self.max_idle_per_host = max(0, int(max_idle_per_host))
+        self.cache = ResponseCache(Path(cache_dir), cache_ttl_seconds) if cache_dir else None
+        self.label = label
+        self.max_in_flight_per_host = max(0, int(max_in_flight_per_host))
+        self.rate_limiter = RateLimiter(requests_per_second) if requests_per_second > 0 else None
+        self.ssl_context = ssl.create_default_context()
+        self._idle: Dict[PoolKey, List[http.client.HTTPConnection]] = {}
+        self._host_slots: Dict[PoolKey, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "cache_hits": 0,
+            "retries": 0,
+        }
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _connect(self, key: PoolKey) -> http.client.HTTPConnection:
+        self._count("connections_opened")
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: PoolKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                self.stats["connections_reused"] += 1
+                return connections.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key: PoolKey, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _host_slot(self, key: PoolKey) -> Optional[threading.BoundedSemaphore]:
+        if not self.max_in_flight_per_host:
+            return None
+        with self._lock:
+            slot = self._host_slots.get(key)
+            if slot is None:
+                slot = self._host_slots[key] = threading.BoundedSemaphore(self.max_in_flight_per_host)
+            return slot
+
+    def _send_once(self, method: str, url: str, headers: Mapping[str, str]) -> HttpResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise RuntimeError(f"unsupported URL: {url}")
+        key: PoolKey = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        request_headers = {"Accept-Encoding": "gzip", **headers}
+        if self.user_agent and "User-Agent" not in request_headers:
+            request_headers["User-Agent"] = self.user_agent
+
+        slot = self._host_slot(key)
+        if slot is not None:
+            slot.acquire()
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            connection, reused = self._acquire(key)
+            try:
+                try:
+                    connection.request(method, target, headers=request_headers)
+                    response = connection.getresponse()
+                except STALE_CONNECTION_ERRORS:
+                    if not reused:
+                        raise
+                    # The server closed an idle keep-alive socket; retry once on a fresh one.
+                    connection.close()
+                    connection = self._connect(key)
+                    connection.request(method, target, headers=request_headers)
+                    response = connection.getresponse()
+                body = response.read()
+                response_headers = {name.lower(): value for name, value in response.getheaders()}
+            except BaseException:
+                connection.close()
+                raise
+        finally:
+            if slot is not None:
+                slot.release()
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        if response_headers.get("content-encoding", "").lower() == "gzip" and body:
+            try:
+                body = gzip.decompress(body)
+            except (EOFError, zlib.error) as error:
+                # Truncated or corrupt gzip: a transport failure, so request() retries it.
+                raise http.client.HTTPException(f"corrupt gzip body from {url}: {error}") from error
+        return HttpResponse(int(response.status), response_headers, body)
+
+    def retry_delay(self, attempt: int, retry_after: str = "") -> float:
+        if self.backoff_seconds <= 0:
+            return 0.0
+        delay = min(
+            self.max_backoff_seconds,
+            self.backoff_seconds * (2 ** (attempt - 1)) + random.random() * self.backoff_seconds,
+        )
+        if retry_after.strip().isdigit():
+            delay = max(delay, min(float(retry_after), self.max_backoff_seconds * 3))
+        return delay
+
+    def request(
+        self,
+        url: str,
+        *,
+        params: Optional[QueryParams] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        use_cache: bool = True,
+    ) -> HttpResponse:
+        """GET ``url`` (plus ``params``), following redirects; returns 2xx responses only."""
+        full_url = build_url(url, params)
+        headers = dict(headers or {})
+        cache_key = cache_key_for("GET", full_url, headers) if self.cache and use_cache else ""
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._count("cache_hits")
+                return HttpResponse(200, {}, cached, from_cache=True)
+
+        last_error: Exception = RuntimeError("unknown request error")
+        for attempt in range(1, self.max_retries + 1):
+            retry_after = ""
+            try:
+                target_url = full_url
+                for _hop in range(MAX_REDIRECTS + 1):
+                    self._count("requests")
+                    response = self._send_once("GET", target_url, headers)
+                    if response.status not in REDIRECT_STATUSES or not response.headers.get("location"):
+                        break
+                    target_url = urllib.parse.urljoin(target_url, response.headers["location"])
+                else:
+                    raise RuntimeError(f"too many redirects for {full_url}")
+            except TRANSPORT_ERRORS as error:
+                last_error = error
+            else:
+                if 200 <= response.status < 300:
+                    if cache_key:
+                        self.cache.put(cache_key, response.body)
+                    return response
+                error = HttpStatusError(response.status, full_url, response.body)
+                if response.status not in RETRYABLE_STATUSES:
+                    raise error
+                last_error = error
+                retry_after = response.headers.get("retry-after", "")
+
+            if attempt >= self.max_retries:
+                break
+            self._count("retries")
+            sleep_seconds = self.retry_delay(attempt, retry_after)
+            print(
+                f"[warn] {self.label} request failed (attempt {attempt}/{self.max_retries}): {last_error}; "
+                f"retrying in {sleep_seconds:.1f}s",
+                file=sys.stderr,
+            )
+            if sleep_seconds:
+                time.sleep(sleep_seconds)
+
+        if isinstance(last_error, HttpStatusError):
+            raise last_error
+        raise RuntimeError(f"{self.label} request failed after {self.max_retries} attempts: {last_error}") from last_error
+
+    def get_json(
+        self,
+        url: str,
+        *,
+        params: Optional[QueryParams] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        use_cache: bool = True,
+    ) -> object:
+        """GET ``url`` and decode its JSON body; invalid JSON is dropped from the cache and refetched."""
+        request_headers = {"Accept": "application/json", **(headers or {})}
+        for attempt in range(1, self.max_retries + 1):
+            response = self.request(url, params=params, headers=request_headers, use_cache=use_cache)
+            try:
+                return response.json()
+            except (UnicodeDecodeError, json.JSONDecodeError) as error:
+                if self.cache and use_cache:
+                    self.cache.discard(cache_key_for("GET", build_url(url, params), request_headers))
+                invalid = InvalidJsonError(f"{self.label} returned invalid JSON for {url}: {error}")
+                invalid.__cause__ = error
+            if attempt >= self.max_retries:
+                break
+            self._count("retries")
+            sleep_seconds = self.retry_delay(attempt)
+            print(
+                f"[warn] {invalid} (attempt {attempt}/{self.max_retries}); retrying in {sleep_seconds:.1f}s",
+                file=sys.stderr,
+            )
+            if sleep_seconds:
+                time.sleep(sleep_seconds)
+        raise invalid
+
+
+class PageJob(NamedTuple):
+    stream: str
+    page: int
+    url: str
+
+
+def iter_pages_in_order(
+    jobs: Iterable[PageJob],
+    fetch: Callable[[PageJob], T],
+    *,
+    workers: int,
+    is_final: Callable[[T], bool],
+) -> Iterator[Tuple[PageJob, Optional[T], Optional[Exception]]]:
+    """Fetch ``jobs`` on a thread pool and yield ``(job, result, error)`` in job order.
+
+    Jobs are grouped into streams (one per paginated query). Once a page is final
+    for its stream -- ``is_final(result)``, e.g. an empty or short page -- the
+    stream's later pages are cancelled and never yielded. At most ``workers`` jobs
+    are outstanding, which also bounds how many pages past a stream's end are
+    fetched speculatively; per-host concurrency and the request rate are enforced
+    by the client that ``fetch`` uses.
+    """
+    window = max(1, int(workers))
+    job_iter = iter(jobs)
+    stopped: Set[str] = set()
+    pending: Deque[Tuple[PageJob, Future]] = deque()
+    executor = ThreadPoolExecutor(max_workers=window)
+
+    def fill() -> None:
+        while len(pending) < window:
+            for job in job_iter:
+                if job.stream not in stopped:
+                    pending.append((job, executor.submit(fetch, job)))
+                    break
+            else:
+                return
+
+    try:
+        fill()
+        while pending:
+            job, future = pending.popleft()
+            if job.stream in stopped:
+                future.cancel()
+                fill()
+                continue
+            try:
+                result, error = future.result(), None
+            except Exception as exc:  # noqa: BLE001 - surfaced to the caller per page
+                result, error = None, exc
+            if error is None and is_final(result):
+                stopped.add(job.stream)
+                for other, other_future in pending:
+                    if other.stream == job.stream:
+                        other_future.cancel()
+            yield job, result, error
+            fill()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def resolve_requests_per_second(max_rps: float, throttle_seconds: float) -> float:
+    """``--max-rps`` wins; otherwise the legacy ``--throttle-seconds`` spacing becomes the cap."""
+    if max_rps and max_rps > 0:
+        return float(max_rps)
+    if throttle_seconds and throttle_seconds > 0:
+        return 1.0 / float(throttle_seconds)
+    return 0.0
+
+
+def add_http_client_args(parser, *, default_cache_ttl_hours: float = 24.0) -> None:
+    """Register the shared ``--http-cache-dir``/``--http-cache-ttl-hours`` flags."""
+    parser.add_argument(
+        "--http-cache-dir",
+        default="",
+        help="Cache successful responses on disk here so reruns and resumes skip pages already fetched.",
+    )
+    parser.add_argument(
+        "--http-cache-ttl-hours",
+        type=float,
+        default=default_cache_ttl_hours,
+        help="Ignore cached responses older than this many hours (0 = never expire).",
+    )
+
+
+def client_from_args(
+    args,
+    *,
+    user_agent: str = "",
+    timeout: float,
+    max_retries: int,
+    label: str,
+    max_in_flight_per_host: int = 0,
+    requests_per_second: float = 0.0,
+) -> HttpClient:
+    """Build an :class:`HttpClient` honouring the flags added by :func:`add_http_client_args`."""
+    cache_dir = str(getattr(args, "http_cache_dir", "") or "").strip()
+    return HttpClient(
+        user_agent=user_agent,
+        timeout=timeout,
+        max_retries=max_retries,
+        cache_dir=Path(cache_dir) if cache_dir else None,
+        cache_ttl_seconds=float(getattr(args, "http_cache_ttl_hours", 0.0) or 0.0) * 3600.0,
+        max_in_flight_per_host=max_in_flight_per_host,
+        requests_per_second=requests_per_second,
+        label=label,
+    )
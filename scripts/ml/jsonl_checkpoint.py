@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Append-only JSONL output with a sidecar id index and a resumable crawl state."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+
+IDS_SUFFIX = ".ids"
+STATE_SUFFIX = ".state.json"
+
+
+def ids_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + IDS_SUFFIX)
+
+
+def state_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + STATE_SUFFIX)
+
+
+def read_state(path: Path) -> Dict[str, object]:
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def write_state(path: Path, payload: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def truncate_to(path: Path, size: int) -> None:
+    if path.exists() and path.stat().st_size > size:
+        with path.open("r+b") as handle:
+            handle.truncate(size)
+
+
+def scan_row_ids(path: Path) -> List[str]:
+    """Rebuild the id index from an existing JSONL file, one row at a time."""
+    ids: List[str] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            payload = json.loads(line)
+            if isinstance(payload, dict):
+                ids.append(str(payload.get("id") or "").strip())
+    return ids
+
+
+class AppendOnlyJsonlWriter:
+    """Buffer rows and append them to ``output_path`` on :meth:`flush`.
+
+    Alongside the output live ``<output>.ids`` (one row id per line, enough to
+    dedup on resume without reading row bodies) and ``<output>.state.json``
+    (byte sizes of both files at the last flush plus caller metadata such as the
+    last completed page). On resume both files are truncated back to the sizes
+    recorded in the state, dropping rows from a flush that never committed.
+    """
+
+    def __init__(self, output_path: Path, *, resume: bool = False) -> None:
+        self.output_path = Path(output_path)
+        self.ids_path = ids_path_for(self.output_path)
+        self.state_path = state_path_for(self.output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ids: Set[str] = set()
+        self.row_count = 0
+        self.state: Dict[str, object] = {}
+        self._pending_rows: List[str] = []
+        self._pending_ids: List[str] = []
+
+        if resume and self.output_path.exists():
+            self._load_existing()
+        else:
+            for path in (self.output_path, self.ids_path, self.state_path):
+                if path.exists():
+                    path.unlink()
+            self.output_path.touch()
+            self.ids_path.touch()
+
+    def _load_existing(self) -> None:
+        state = read_state(self.state_path)
+        if state and self.ids_path.exists():
+            truncate_to(self.output_path, int(state.get("output_bytes", 0)))
+            truncate_to(self.ids_path, int(state.get("ids_bytes", 0)))
+            row_ids = self.ids_path.read_text(encoding="utf-8").splitlines()
+            self.state = {key: value for key, value in state.items() if key not in ("output_bytes", "ids_bytes", "rows")}
+        else:
+            # Output written before checkpoint sidecars existed: index it once.
+            print(f"[resume] rebuilding id index for {self.output_path}", file=sys.stderr)
+            row_ids = scan_row_ids(self.output_path)
+            with self.output_path.open("rb+") as handle:
+                handle.seek(0, os.SEEK_END)
+                if handle.tell():
+                    handle.seek(-1, os.SEEK_END)
+                    if handle.read(1) != b"\n":
+                        handle.write(b"\n")
+            with self.ids_path.open("w", encoding="utf-8") as handle:
+                for row_id in row_ids:
+                    handle.write(row_id + "\n")
+            self._write_state()
+        self.row_count = len(row_ids)
+        self.ids = {row_id for row_id in row_ids if row_id}
+
+    def __len__(self) -> int:
+        return self.row_count + len(self._pending_rows)
+
+    def __contains__(self, row_id: object) -> bool:
+        return row_id in self.ids
+
+    def add(self, row: Dict[str, object]) -> None:
+        row_id = str(row.get("id") or "").strip()
+        self._pending_rows.append(json.dumps(row, ensure_ascii=False))
+        self._pending_ids.append(row_id)
+        if row_id:
+            self.ids.add(row_id)
+
+    def flush(self, **state: object) -> None:
+        """Append pending rows, then their ids, then commit the state (with ``state`` merged in)."""
+        if self._pending_rows:
+            with self.output_path.open("a", encoding="utf-8") as handle:
+                for line in self._pending_rows:
+                    handle.write(line)
+                    handle.write("\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            with self.ids_path.open("a", encoding="utf-8") as handle:
+                for row_id in self._pending_ids:
+                    handle.write(row_id + "\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self.row_count += len(self._pending_rows)
+            self._pending_rows = []
+            self._pending_ids = []
+        self.state.update(state)
+        self._write_state()
+
+    def _write_state(self) -> None:
+        write_state(
+            self.state_path,
+            {
+                **self.state,
+                "rows": self.row_count,
+                "output_bytes": self.output_path.stat().st_size,
+                "ids_bytes": self.ids_path.stat().st_size,
+            },
+        )
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Split JSONL datasets into line-aligned byte ranges for parallel scans.
+
+A shard is ``(path, start, end)``. It owns every line whose first byte falls in
+``[start, end)``, so adjacent shards never share or drop a line and no index of
+line offsets is needed. The serial path reads one whole-file shard per dataset
+through the same reader, so serial and sharded scans see exactly the same rows.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_SHARD_BYTES = 16 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class JsonlShard:
+    path: Path
+    start: int
+    end: int
+
+
+def plan_jsonl_shards(paths: Sequence[Path], shard_bytes: int = 0) -> List[JsonlShard]:
+    """Shards in input order; ``shard_bytes`` of 0 gives one shard per file."""
+    shards: List[JsonlShard] = []
+    for path in paths:
+        size = Path(path).stat().st_size
+        step = shard_bytes if shard_bytes > 0 else max(size, 1)
+        start = 0
+        while True:
+            end = min(start + step, size)
+            shards.append(JsonlShard(path=Path(path), start=start, end=end))
+            if end >= size:
+                break
+            start = end
+    return shards
+
+
+def iter_shard_lines(shard: JsonlShard) -> Iterator[str]:
+    """Stripped, non-empty lines of ``shard``."""
+    with shard.path.open("rb") as handle:
+        if shard.start:
+            # Finish the line that straddles the boundary; it belongs to the previous shard.
+            handle.seek(shard.start - 1)
+            handle.readline()
+        while handle.tell() < shard.end:
+            raw_line = handle.readline()
+            if not raw_line:
+                break
+            line = raw_line.decode("utf-8").strip()
+            if line:
+                yield line
+
+
+def iter_shard_payloads(shard: JsonlShard) -> Iterator[Dict[str, object]]:
+    """JSON objects of ``shard``; lines holding other JSON values are skipped."""
+    for line in iter_shard_lines(shard):
+        payload = json.loads(line)
+        if isinstance(payload, dict):
+            yield payload
+
+
+def map_shards_in_pool(
+    worker: Callable[[JsonlShard], Any],
+    shards: Sequence[JsonlShard],
+    workers: int,
+    initializer: Callable[..., None] | None = None,
+    initargs: Tuple[Any, ...] = (),
+) -> Iterator[Any]:
+    """Run ``worker`` on each shard in a process pool, yielding results in shard order.
+
+    At most ``2 * workers`` shards are in flight, so results can be folded as
+    they arrive without holding every partial at once.
+    """
+    max_in_flight = max(1, workers) * 2
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=initializer, initargs=initargs) as executor:
+        pending: Deque[Future] = deque()
+        for shard in shards:
+            pending.append(executor.submit(worker, shard))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Compiled allergen lexicon artifact and the runtime matcher that loads it.
+
+``build_allergen_lexicon_v2.py`` writes the artifact with
+:func:`write_lexicon_artifact`; consumers only need this module:
+
+    matcher = LexiconMatcher.load("ml/data/analysis/lexicon_v2/allergen_lexicon.bin")
+    hits = matcher.match("Whey Protein Concentrate (Milk), Wheat Flour")
+
+Layout::
+
+    magic (8 bytes) | format version (u32 LE) | metadata length (u32 LE) | metadata JSON
+    | arrays, each 8-byte aligned at the offset recorded in the metadata
+
+The metadata holds the interned token table, alias/canonical/class names, the
+tokenizer version and the byte order of the arrays. The arrays hold the token
+automaton (sorted transition keys and targets, failure links, per-state output
+ranges) and the alias -> canonical -> class maps with each alias's status and
+active flag. :meth:`LexiconMatcher.load` maps the file and reads the arrays in
+place; only the transition dict is materialized, in one pass over the mapped
+keys.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from corpus_scan import TOKEN_RE, normalize_ascii
+from token_automaton import TokenAutomaton
+
+LEXICON_MAGIC = b"ALGLEX\x00\x01"
+LEXICON_FORMAT_VERSION = 1
+# Recorded in each artifact; bump it whenever corpus_scan.tokenize() changes.
+TOKENIZER_VERSION = 1
+HEADER = struct.Struct("<8sII")
+ARRAY_ALIGNMENT = 8
+
+
+@dataclass(frozen=True)
+class CompiledAlias:
+    alias_id: int
+    alias_tokens: Tuple[str, ...]
+    alias_display: str
+    canonical_id: str
+    canonical_name: str
+    class_key: str
+    status: str
+    active: bool
+
+
+@dataclass(frozen=True)
+class LexiconHit:
+    class_key: str
+    canonical_id: str
+    alias_id: int
+    alias_display: str
+    start: int
+    end: int
+    active: bool
+
+
+def tokenize_with_spans(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """``corpus_scan.tokenize(text)`` with each token's character span in ``text``."""
+    if text.isascii():
+        tokens: List[str] = []
+        spans: List[Tuple[int, int]] = []
+        for found in TOKEN_RE.finditer(text.lower()):
+            tokens.append(found.group())
+            spans.append(found.span())
+        return tokens, spans
+
+    # NFKD + ASCII folding can change lengths, so map each folded character back to its source index.
+    pieces: List[str] = []
+    origins: List[int] = []
+    for index, char in enumerate(text):
+        folded = normalize_ascii(char)
+        pieces.append(folded)
+        origins.extend([index] * len(folded))
+    tokens = []
+    spans = []
+    for found in TOKEN_RE.finditer("".join(pieces).lower()):
+        tokens.append(found.group())
+        spans.append((origins[found.start()], origins[found.end() - 1] + 1))
+    return tokens, spans
+
+
+def aligned(offset: int) -> int:
+    return (offset + ARRAY_ALIGNMENT - 1) // ARRAY_ALIGNMENT * ARRAY_ALIGNMENT
+
+
+def write_lexicon_artifact(
+    path: Path,
+    aliases: Sequence[CompiledAlias],
+    class_display: Mapping[str, str] | None = None,
+) -> Dict[str, int]:
+    """Compile ``aliases`` into the artifact at ``path`` (written atomically); returns its sizes."""
+    automaton = TokenAutomaton.build((index, alias.alias_tokens) for index, alias in enumerate(aliases))
+    tokens = sorted(automaton.token_ids, key=automaton.token_ids.__getitem__)
+    class_keys = sorted({alias.class_key for alias in aliases})
+    class_index = {class_key: index for index, class_key in enumerate(class_keys)}
+    canonical_ids = sorted({alias.canonical_id for alias in aliases})
+    canonical_index = {canonical_id: index for index, canonical_id in enumerate(canonical_ids)}
+    canonical_names = {alias.canonical_id: alias.canonical_name for alias in aliases}
+    canonical_class = {alias.canonical_id: alias.class_key for alias in aliases}
+    statuses = sorted({alias.status for alias in aliases})
+    status_index = {status: index for index, status in enumerate(statuses)}
+
+    transition_keys = array("Q", sorted(automaton.transitions))
+    output_offsets = array("I", [0])
+    output_aliases = array("I")
+    for outputs in automaton.outputs:
+        output_aliases.extend(outputs)
+        output_offsets.append(len(output_aliases))
+    arrays = {
+        "transition_keys": transition_keys,
+        "transition_targets": array("I", (automaton.transitions[key] for key in transition_keys)),
+        "fail": array("I", automaton.fail),
+        "output_offsets": output_offsets,
+        "output_aliases": output_aliases,
+        "alias_ids": array("I", (alias.alias_id for alias in aliases)),
+        "alias_lengths": array("I", (len(alias.alias_tokens) for alias in aliases)),
+        "alias_canonical": array("I", (canonical_index[alias.canonical_id] for alias in aliases)),
+        "alias_status": array("I", (status_index[alias.status] for alias in aliases)),
+        "alias_active": array("B", (1 if alias.active else 0 for alias in aliases)),
+        "canonical_class": array("I", (class_index[canonical_class[cid]] for cid in canonical_ids)),
+    }
+    metadata = {
+        "format_version": LEXICON_FORMAT_VERSION,
+        "tokenizer_version": TOKENIZER_VERSION,
+        "byteorder": sys.byteorder,
+        "width": automaton.width,
+        "tokens": tokens,
+        "classes": class_keys,
+        "class_display": {key: (class_display or {}).get(key, key) for key in class_keys},
+        "canonical_ids": canonical_ids,
+        "canonical_names": [canonical_names[cid] for cid in canonical_ids],
+        "statuses": statuses,
+        "alias_displays": [alias.alias_display for alias in aliases],
+        "arrays": [],
+    }
+
+    # The array offsets depend on the metadata length, which depends on the offsets: size the
+    # table with placeholder offsets first, then pad the JSON up to the reserved length.
+    metadata["arrays"] = [[name, values.typecode, 0, len(values)] for name, values in arrays.items()]
+    reserved = len(json.dumps(metadata, separators=(",", ":"))) + 24 * len(arrays)
+    offset = aligned(HEADER.size + reserved)
+    table = []
+    for name, values in arrays.items():
+        table.append([name, values.typecode, offset, len(values)])
+        offset = aligned(offset + len(values) * values.itemsize)
+    metadata["arrays"] = table
+    metadata_bytes = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    if len(metadata_bytes) > reserved:
+        raise RuntimeError("Lexicon metadata outgrew its reserved header space.")
+    metadata_bytes = metadata_bytes.ljust(reserved)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(HEADER.pack(LEXICON_MAGIC, LEXICON_FORMAT_VERSION, len(metadata_bytes)))
+        handle.write(metadata_bytes)
+        for (_name, _typecode, array_offset, _length), values in zip(table, arrays.values()):
+            handle.write(b"\x00" * (array_offset - handle.tell()))
+            values.tofile(handle)
+    os.replace(temp_path, path)
+    return {
+        "bytes": path.stat().st_size,
+        "aliases": len(aliases),
+        "active_aliases": sum(1 for alias in aliases if alias.active),
+        "tokens": len(tokens),
+        "states": automaton.state_count,
+    }
+
+
+class LexiconMatcher:
+    """Runtime matcher over a memory-mapped lexicon artifact."""
+
+    def __init__(self, buffer: mmap.mmap, metadata: Dict[str, object]) -> None:
+        self._buffer = buffer
+        self._base_view = memoryview(buffer)
+        self._views: Dict[str, memoryview] = {}
+        for name, typecode, offset, length in metadata["arrays"]:
+            itemsize = array(typecode).itemsize
+            self._views[name] = self._base_view[offset : offset + length * itemsize].cast(typecode)
+        self.metadata = metadata
+        self.token_ids: Dict[str, int] = {token: index for index, token in enumerate(metadata["tokens"])}
+        self.width = int(metadata["width"])
+        self.transitions: Dict[int, int] = dict(zip(self._views["transition_keys"], self._views["transition_targets"]))
+        self.fail = self._views["fail"]
+        self.output_offsets = self._views["output_offsets"]
+        self.output_aliases = self._views["output_aliases"]
+        self.alias_lengths = self._views["alias_lengths"]
+        self.alias_active = self._views["alias_active"]
+        classes = metadata["classes"]
+        canonical_ids = metadata["canonical_ids"]
+        canonical_class = self._views["canonical_class"]
+        alias_canonical = self._views["alias_canonical"]
+        alias_ids = self._views["alias_ids"]
+        displays = metadata["alias_displays"]
+        # Per-alias (class, canonical, id, display) rows, resolved once so a hit is one index.
+        self.alias_rows: List[Tuple[str, str, int, str]] = [
+            (classes[canonical_class[canonical]], canonical_ids[canonical], alias_ids[index], displays[index])
+            for index, canonical in enumerate(alias_canonical)
+        ]
+
+    @classmethod
+    def load(cls, path: Path) -> "LexiconMatcher":
+        with Path(path).open("rb") as handle:
+            # mmap refuses empty files, so reject them before mapping.
+            if os.fstat(handle.fileno()).st_size < HEADER.size:
+                raise RuntimeError(f"{path} is not a compiled allergen lexicon.")
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, format_version, metadata_length = HEADER.unpack_from(buffer, 0)
+            if magic != LEXICON_MAGIC:
+                raise RuntimeError(f"{path} is not a compiled allergen lexicon.")
+            if format_version != LEXICON_FORMAT_VERSION:
+                raise RuntimeError(
+                    f"{path} has lexicon format {format_version}; this reader supports {LEXICON_FORMAT_VERSION}."
+                )
+            metadata = json.loads(bytes(buffer[HEADER.size : HEADER.size + metadata_length]))
+            if metadata.get("tokenizer_version") != TOKENIZER_VERSION or metadata.get("byteorder") != sys.byteorder:
+                raise RuntimeError(f"{path} was compiled for a different tokenizer or byte order; rebuild it.")
+            return cls(buffer, metadata)
+        except Exception:
+            buffer.close()
+            raise
+
+    def close(self) -> None:
+        """Unmap the artifact; the matcher cannot be used afterwards."""
+        for view in self._views.values():
+            view.release()
+        self._base_view.release()
+        self._buffer.close()
+
+    def __enter__(self) -> "LexiconMatcher":
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.close()
+
+    @property
+    def alias_count(self) -> int:
+        return len(self.alias_rows)
+
+    def match(self, text: str, include_inactive: bool = False) -> List[LexiconHit]:
+        """Alias hits in ``text`` by end offset, longest first at the same end.
+
+        Demoted or denied aliases are skipped unless ``include_inactive`` is set.
+        """
+        tokens, spans = tokenize_with_spans(text or "")
+        hits: List[LexiconHit] = []
+        token_ids = self.token_ids
+        transitions = self.transitions
+        fail = self.fail
+        output_offsets = self.output_offsets
+        output_aliases = self.output_aliases
+        alias_lengths = self.alias_lengths
+        alias_active = self.alias_active
+        alias_rows = self.alias_rows
+        width = self.width
+        state = 0
+        for position, token in enumerate(tokens):
+            token_id = token_ids.get(token)
+            if token_id is None:
+                state = 0
+                continue
+            while True:
+                child = transitions.get(state * width + token_id)
+                if child is not None:
+                    state = child
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            first, last = output_offsets[state], output_offsets[state + 1]
+            if first == last:
+                continue
+            end = spans[position][1]
+            matched: List[LexiconHit] = []
+            for slot in range(first, last):
+                alias_index = output_aliases[slot]
+                active = alias_active[alias_index] == 1
+                if not active and not include_inactive:
+                    continue
+                class_key, canonical_id, alias_id, display = alias_rows[alias_index]
+                start = spans[position - alias_lengths[alias_index] + 1][0]
+                matched.append(LexiconHit(class_key, canonical_id, alias_id, display, start, end, active))
+            matched.sort(key=lambda hit: -hit.start)
+            hits.extend(matched)
+        return hits
+
+    def match_batch(self, texts: Iterable[str], include_inactive: bool = False) -> List[List[LexiconHit]]:
+        return [self.match(text, include_inactive) for text in texts]
+
+    def classes(self, text: str) -> List[str]:
+        """Distinct class keys with at least one active hit, in first-hit order."""
+        return list(dict.fromkeys(hit.class_key for hit in self.match(text)))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Attach compiled-lexicon weak labels and match spans to training rows.
+
+Runs the ``allergen_lexicon.bin`` artifact written by
+``build_allergen_lexicon_v2.py`` over every row of the input JSONL files and
+writes each row back with a ``lexicon`` object::
+
+    {"allergens": ["milk", "wheat"], "classes": ["milk", "wheat", "cereals_with_gluten"],
+     "hits": [{"class_key": "milk", "canonical_id": "...", "alias_id": 3, "start": 0, "end": 4}],
+     "lexicon_only": ["wheat"], "weak_only": [], "agreement": "lexicon_only"}
+
+``allergens`` are the label-space allergens of the active hits, and ``hits``
+carry character spans into ``text``. ``lexicon_only`` / ``weak_only`` compare
+them with the row's existing weak ``allergens``; ``agreement`` is ``agree``,
+``lexicon_only``, ``weak_only`` or ``conflict``.
+``distill_with_anthropic.py --disagreements-only`` uses these fields to send
+the teacher only rows where lexicon, weak labels and student disagree.
+
+With ``--workers`` > 1 the inputs are split into line-aligned byte ranges
+(``jsonl_shards.py``); each worker maps the artifact once, and shards are
+written back in input order, so the output equals the in-process run::
+
+    python3 scripts/ml/prelabel_with_lexicon.py \\
+      --input ml/data/processed/usda_only_train.jsonl \\
+      --output ml/data/processed/usda_only_train_prelabeled.jsonl \\
+      --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from jsonl_shards import DEFAULT_SHARD_BYTES, JsonlShard, iter_shard_payloads, map_shards_in_pool, plan_jsonl_shards
+from lexicon_matcher import LexiconMatcher
+
+DEFAULT_LEXICON = "ml/data/analysis/lexicon_v2/allergen_lexicon.bin"
+DEFAULT_INPUT = "ml/data/processed/usda_only_train.jsonl"
+DEFAULT_OUTPUT = "ml/data/processed/usda_only_train_prelabeled.jsonl"
+DEFAULT_SUMMARY = "ml/data/processed/usda_only_train_prelabeled_summary.json"
+
+ALLOWED_ALLERGENS = [
+    "milk",
+    "egg",
+    "peanut",
+    "tree nut",
+    "shellfish",
+    "fish",
+    "soy",
+    "sesame",
+    "wheat",
+]
+# Lexicon class keys that are label-space allergens; other classes (cereals with gluten) stay hits only.
+CLASS_ALLERGENS: Dict[str, str] = {
+    "milk": "milk",
+    "egg": "egg",
+    "peanut": "peanut",
+    "tree_nut": "tree nut",
+    "shellfish": "shellfish",
+    "fish": "fish",
+    "soy": "soy",
+    "sesame": "sesame",
+    "wheat": "wheat",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pre-label training rows with the compiled allergen lexicon.")
+    parser.add_argument(
+        "--input",
+        action="append",
+        default=[],
+        help=f"Training JSONL path (repeatable). Defaults to {DEFAULT_INPUT}.",
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Pre-labeled JSONL output path.")
+    parser.add_argument("--summary-output", default=DEFAULT_SUMMARY)
+    parser.add_argument("--lexicon", default=DEFAULT_LEXICON, help="Compiled lexicon artifact path.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes (0 or 1 = label in-process).",
+    )
+    parser.add_argument(
+        "--shard-mb",
+        type=float,
+        default=DEFAULT_SHARD_BYTES / (1024 * 1024),
+        help="Input bytes per shard handed to each worker.",
+    )
+    return parser.parse_args()
+
+
+def resolve_path(raw: str, repo_root: Path) -> Path:
+    path = Path(raw)
+    return path if path.is_absolute() else repo_root / path
+
+
+def agreement_label(lexicon_only: Sequence[str], weak_only: Sequence[str]) -> str:
+    if lexicon_only and weak_only:
+        return "conflict"
+    if lexicon_only:
+        return "lexicon_only"
+    if weak_only:
+        return "weak_only"
+    return "agree"
+
+
+def lexicon_labels(matcher: LexiconMatcher, row: Dict[str, object]) -> Dict[str, object]:
+    """The ``lexicon`` object for one row."""
+    hits = matcher.match(str(row.get("text") or ""))
+    classes = list(dict.fromkeys(hit.class_key for hit in hits))
+    allergens = sorted({CLASS_ALLERGENS[key] for key in classes if key in CLASS_ALLERGENS})
+    weak = {str(label).strip() for label in row.get("allergens") or []} & set(ALLOWED_ALLERGENS)
+    lexicon_only = [label for label in allergens if label not in weak]
+    weak_only = sorted(weak.difference(allergens))
+    return {
+        "allergens": allergens,
+        "classes": classes,
+        "hits": [
+            {
+                "class_key": hit.class_key,
+                "canonical_id": hit.canonical_id,
+                "alias_id": hit.alias_id,
+                "start": hit.start,
+                "end": hit.end,
+            }
+            for hit in hits
+        ],
+        "lexicon_only": lexicon_only,
+        "weak_only": weak_only,
+        "agreement": agreement_label(lexicon_only, weak_only),
+    }
+
+
+def new_summary() -> Dict[str, Counter]:
+    return {
+        "agreement": Counter(),
+        "lexicon_allergens": Counter(),
+        "lexicon_only": Counter(),
+        "weak_only": Counter(),
+        "rows": Counter(),
+    }
+
+
+def merge_summary(total: Dict[str, Counter], partial: Dict[str, Counter]) -> None:
+    for name, counts in partial.items():
+        total[name].update(counts)
+
+
+def prelabel_shards(shards: Sequence[JsonlShard], matcher: LexiconMatcher) -> Tuple[List[str], Dict[str, Counter]]:
+    """Serialized output lines for every row of ``shards``, plus their summary counts."""
+    lines: List[str] = []
+    summary = new_summary()
+    for shard in shards:
+        for row in iter_shard_payloads(shard):
+            labels = lexicon_labels(matcher, row)
+            row["lexicon"] = labels
+            lines.append(json.dumps(row, ensure_ascii=False))
+            summary["rows"]["total"] += 1
+            if labels["hits"]:
+                summary["rows"]["with_hits"] += 1
+            summary["agreement"][labels["agreement"]] += 1
+            summary["lexicon_allergens"].update(labels["allergens"])
+            summary["lexicon_only"].update(labels["lexicon_only"])
+            summary["weak_only"].update(labels["weak_only"])
+    return lines, summary
+
+
+_worker_matcher: LexiconMatcher | None = None
+
+
+def init_prelabel_worker(lexicon_path: Path) -> None:
+    """Process-pool initializer: map the lexicon artifact once per worker."""
+    global _worker_matcher
+    _worker_matcher = LexiconMatcher.load(lexicon_path)
+
+
+def prelabel_shard_in_worker(shard: JsonlShard) -> Tuple[List[str], Dict[str, Counter]]:
+    """Process-pool entry point: pre-label one shard."""
+    assert _worker_matcher is not None
+    return prelabel_shards([shard], _worker_matcher)
+
+
+def prelabel_datasets(
+    input_paths: Sequence[Path],
+    output_path: Path,
+    lexicon_path: Path,
+    workers: int = 0,
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+) -> Dict[str, Counter]:
+    """Write every input row with its ``lexicon`` object to ``output_path``; returns the summary counts.
+
+    Shards are labeled and written one at a time (``shard_bytes`` bounds the
+    rows held in memory), and the output goes to a temporary file that is
+    moved into place at the end.
+    """
+    summary = new_summary()
+    shards = plan_jsonl_shards(input_paths, shard_bytes)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+
+        def write_shard(result: Tuple[List[str], Dict[str, Counter]]) -> None:
+            lines, partial = result
+            for line in lines:
+                handle.write(line)
+                handle.write("\n")
+            merge_summary(summary, partial)
+
+        if workers <= 1:
+            with LexiconMatcher.load(lexicon_path) as matcher:
+                for shard in shards:
+                    write_shard(prelabel_shards([shard], matcher))
+        else:
+            for result in map_shards_in_pool(
+                prelabel_shard_in_worker, shards, workers, init_prelabel_worker, (lexicon_path,)
+            ):
+                write_shard(result)
+    os.replace(temp_path, output_path)
+    return summary
+
+
+def main() -> int:
+    args = parse_args()
+    repo_root = Path(__file__).resolve().parents[2]
+    lexicon_path = resolve_path(args.lexicon, repo_root)
+    if not lexicon_path.exists():
+        print(f"Lexicon artifact not found: {lexicon_path}")
+        return 1
+    input_paths = [resolve_path(raw, repo_root) for raw in (args.input or [DEFAULT_INPUT])]
+    missing = [path for path in input_paths if not path.exists()]
+    if missing:
+        print(f"Input not found: {missing[0]}")
+        return 1
+
+    output_path = resolve_path(args.output, repo_root)
+    summary = prelabel_datasets(
+        input_paths,
+        output_path,
+        lexicon_path,
+        workers=max(0, int(args.workers)),
+        shard_bytes=max(1, int(float(args.shard_mb) * 1024 * 1024)),
+    )
+
+    total_rows = summary["rows"]["total"]
+    disagreements = total_rows - summary["agreement"]["agree"]
+    report = {
+        "inputs": [str(path) for path in input_paths],
+        "output": str(output_path),
+        "lexicon": str(lexicon_path),
+        "rows": total_rows,
+        "rows_with_hits": summary["rows"]["with_hits"],
+        "disagreement_rows": disagreements,
+        "agreement": {name: summary["agreement"][name] for name in ("agree", "lexicon_only", "weak_only", "conflict")},
+        "lexicon_allergen_counts": {label: summary["lexicon_allergens"][label] for label in ALLOWED_ALLERGENS},
+        "lexicon_only_counts": {label: summary["lexicon_only"][label] for label in ALLOWED_ALLERGENS},
+        "weak_only_counts": {label: summary["weak_only"][label] for label in ALLOWED_ALLERGENS},
+    }
+    summary_path = resolve_path(args.summary_output, repo_root)
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    print(f"Pre-labeled rows: {total_rows} ({report['rows_with_hits']} with lexicon hits)")
+    print(f"Lexicon/weak-label disagreements: {disagreements} {report['agreement']}")
+    print(f"Output: {output_path}")
+    print(f"Summary: {summary_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
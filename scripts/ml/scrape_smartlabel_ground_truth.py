@@ -15,25 +15,36 @@ The output CSV keeps the existing schema used by build_smartlabel_safe_catalog.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextvars
 import csv
+import gzip
+import hashlib
+import io
 import json
+import os
 import re
 import zlib
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any
-from urllib.error import HTTPError, URLError
+from typing import Any, AsyncIterator, Awaitable, Callable
 from urllib.parse import urlencode, urljoin, urlparse
-from urllib.request import Request, urlopen
 import xml.etree.ElementTree as ET
 
-from bs4 import BeautifulSoup
+from async_http_client import TRANSPORT_ERRORS, AdaptiveHttpClient, AsyncHttpClient, AsyncHttpResponse, HostWorkQueue
+from html_select import BACKEND_NAMES, DEFAULT_BACKEND, HtmlNode, as_document, set_backend
+from jsonl_checkpoint import AppendOnlyJsonlWriter, ids_path_for, read_state, state_path_for, write_state
+from smartlabel_store import STORE_SUFFIXES, write_store
 
 DEFAULT_INPUT = Path("full_smartlabel_ground_truth copy.csv")
 DEFAULT_OUTPUT = DEFAULT_INPUT
 DEFAULT_SUMMARY = Path("ml/seeds/smartlabel_ground_truth_scrape_summary.json")
 DEFAULT_MAX_WORKERS = 12
+DEFAULT_HOST_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_CHECKPOINT_EVERY = 25
+JOURNAL_SUFFIX = ".journal.jsonl"
+VALIDATORS_SUFFIX = ".validators.json"
 DEFAULT_MAX_PER_HOST = 0
 DEFAULT_MAX_TOTAL = 0
 DEFAULT_TIMEOUT_SECONDS = 20
@@ -48,7 +59,8 @@ DEFAULT_SITEMAP_HOSTS = [
     "smartlabel.hersheys.com",
     "smartlabel.bluediamond.com",
 ]
-SITEMAP_NS = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+SITEMAP_MAX_DEPTH = 3
+SITEMAP_FEED_BYTES = 64 * 1024
 USER_AGENT = "Mozilla/5.0 (compatible; ClarivoreSmartLabelScraper/1.0)"
 SEARCH_API_URL = "https://api.smartlabel.org/api/search"
 PG_PRODUCT_DETAILS_URL = "https://az-na-smartlabel-prod-functionapp-api.pgcloud.com/api/getproductdetails"
@@ -102,7 +114,19 @@ def parse_args() -> argparse.Namespace:
         "--max-workers",
         type=int,
         default=DEFAULT_MAX_WORKERS,
-        help="Number of concurrent fetch workers.",
+        help="Maximum concurrent requests across all hosts.",
+    )
+    parser.add_argument(
+        "--host-concurrency",
+        type=int,
+        default=DEFAULT_HOST_CONCURRENCY,
+        help="Upper bound on concurrent requests per host. Each host's limit adapts between 1 and this value.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries for 408/429/5xx responses and connection errors, with per-host backoff.",
     )
     parser.add_argument(
         "--max-per-host",
@@ -133,6 +157,53 @@ def parse_args() -> argparse.Namespace:
         default="",
         help="Optional comma-separated host filter for SmartLabel search API discovered URLs.",
     )
+    parser.add_argument(
+        "--html-parser",
+        choices=("auto", *BACKEND_NAMES),
+        default=DEFAULT_BACKEND,
+        help=(
+            "HTML parser backend for the template parsers (default: bs4, the parity reference; "
+            "auto: selectolax, then lxml, then bs4)."
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        default="",
+        help=f"Append-only JSONL journal of scraped rows (default: <output>{JOURNAL_SUFFIX}).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted scrape: keep the journal and skip URLs it already holds.",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_EVERY,
+        help="Commit journaled rows to disk every N scraped URLs.",
+    )
+    parser.add_argument(
+        "--validators",
+        default="",
+        help=f"JSON store of per-product ETag/Last-Modified/body hashes (default: <output>{VALIDATORS_SUFFIX}).",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help=(
+            "Also recheck rows that do not need a refresh with conditional requests; "
+            "only products whose pages changed are scraped again. "
+            "Rechecked rows count toward --max-total and --max-per-host."
+        ),
+    )
+    parser.add_argument(
+        "--store",
+        default="",
+        help=(
+            "Also write the merged rows to this SQLite store (native list columns) for "
+            "build_smartlabel_safe_catalog.py; the CSV output is always written."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -191,79 +262,176 @@ def ensure_fieldnames(rows: list[dict[str, str]]) -> list[str]:
 
 def write_csv_rows(path: Path, fieldnames: list[str], rows: list[dict[str, str]]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as handle:
+    # Written beside the target and swapped in, since the output is usually the input CSV.
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8", newline="") as handle:
         writer = csv.DictWriter(handle, fieldnames=fieldnames)
         writer.writeheader()
         for row in rows:
             writer.writerow({field: row.get(field, "") for field in fieldnames})
+    os.replace(temp_path, path)
 
 
-def fetch_url(url: str, timeout_seconds: int) -> tuple[str, str, str]:
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    try:
-        with urlopen(request, timeout=timeout_seconds) as response:
-            charset = response.headers.get_content_charset() or "utf-8"
-            text = response.read().decode(charset, "ignore")
-            return str(response.status), text, ""
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", "ignore") if exc.fp else ""
-        return str(exc.code), body, str(exc)
-    except URLError as exc:
-        return "", "", str(exc)
-    except TimeoutError as exc:
-        return "", "", str(exc)
-
-
-def fetch_json(url: str, timeout_seconds: int) -> tuple[str, Any | None, str]:
-    status, text, error = fetch_url(url, timeout_seconds)
-    if status != "200":
-        return status, None, error
-    try:
-        return status, json.loads(text), ""
-    except json.JSONDecodeError as exc:
-        return status, None, str(exc)
+def journal_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + JOURNAL_SUFFIX)
 
 
-def fetch_json_with_headers(url: str, timeout_seconds: int, headers: dict[str, str]) -> tuple[str, Any | None, str]:
-    request = Request(url, headers={"User-Agent": USER_AGENT, **headers})
-    try:
-        with urlopen(request, timeout=timeout_seconds) as response:
-            charset = response.headers.get_content_charset() or "utf-8"
-            text = response.read().decode(charset, "ignore")
-            return str(response.status), json.loads(text), ""
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", "ignore") if exc.fp else ""
-        return str(exc.code), None, body or str(exc)
-    except json.JSONDecodeError as exc:
-        return "200", None, str(exc)
-    except URLError as exc:
-        return "", None, str(exc)
-    except TimeoutError as exc:
-        return "", None, str(exc)
-
-
-def fetch_form_url(url: str, form_data: dict[str, str], timeout_seconds: int) -> tuple[str, str, str]:
-    request = Request(
-        url,
-        data=urlencode(form_data).encode("utf-8"),
-        headers={
-            "User-Agent": USER_AGENT,
-            "Content-Type": "application/x-www-form-urlencoded",
-        },
-        method="POST",
-    )
-    try:
-        with urlopen(request, timeout=timeout_seconds) as response:
-            charset = response.headers.get_content_charset() or "utf-8"
-            text = response.read().decode(charset, "ignore")
-            return str(response.status), text, ""
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", "ignore") if exc.fp else ""
-        return str(exc.code), body, str(exc)
-    except URLError as exc:
-        return "", "", str(exc)
-    except TimeoutError as exc:
-        return "", "", str(exc)
+def read_journal_rows(path: Path, key: str = "row") -> dict[str, dict[str, Any]]:
+    """Journaled ``key`` objects (scraped rows by default) by URL; a URL journaled twice keeps its last one."""
+    rows: dict[str, dict[str, Any]] = {}
+    if not path.exists():
+        return rows
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            url = as_text(entry.get("id"))
+            if url and isinstance(entry.get(key), dict):
+                rows[url] = entry[key]
+    return rows
+
+
+def remove_journal(path: Path) -> None:
+    for journal_file in (path, ids_path_for(path), state_path_for(path)):
+        if journal_file.exists():
+            journal_file.unlink()
+
+
+# The fetch log of the product being scraped in the current task: every GET
+# that returned 200, with its validators, plus whether any request was a POST.
+current_fetch_log: contextvars.ContextVar[dict[str, Any] | None] = contextvars.ContextVar(
+    "current_fetch_log", default=None
+)
+# Changed pages that revalidation already downloaded for the product being rescraped.
+current_prefetched: contextvars.ContextVar[dict[str, AsyncHttpResponse] | None] = contextvars.ContextVar(
+    "current_prefetched", default=None
+)
+
+
+def new_fetch_log() -> dict[str, Any]:
+    return {"fetches": {}, "uncacheable": False}
+
+
+def response_validators(response: AsyncHttpResponse, headers: dict[str, str] | None) -> dict[str, Any]:
+    validators: dict[str, Any] = {"sha256": hashlib.sha256(response.body).hexdigest()}
+    if response.headers.get("etag"):
+        validators["etag"] = response.headers["etag"]
+    if response.headers.get("last-modified"):
+        validators["last_modified"] = response.headers["last-modified"]
+    if headers:
+        validators["headers"] = dict(headers)
+    return validators
+
+
+class ValidatorStore:
+    """Conditional-request validators per product, keyed by landing URL.
+
+    Each entry is the fetch log of the product's last scrape: for every GET that
+    returned 200 (landing page, ingredient/allergen fragments, vendor APIs) its
+    ETag, Last-Modified and body SHA-256, plus ``uncacheable`` when part of the
+    product came from a POST and so cannot be revalidated.
+
+    New entries are appended to ``<path>.journal.jsonl`` on :meth:`save`, so a
+    checkpoint costs only the products scraped since the last one; the journal
+    is replayed on load and folded into the JSON file by :meth:`compact`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.journal_path = journal_path_for(self.path)
+        products = read_state(self.path).get("products")
+        self.products: dict[str, dict[str, Any]] = products if isinstance(products, dict) else {}
+        self.journal = AppendOnlyJsonlWriter(self.journal_path, resume=True)
+        self.products.update(read_journal_rows(self.journal_path, "fetch_log"))
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        return self.products.get(url)
+
+    def put(self, url: str, fetch_log: dict[str, Any]) -> None:
+        self.products[url] = fetch_log
+        self.journal.add({"id": url, "fetch_log": fetch_log})
+
+    def save(self) -> None:
+        self.journal.flush()
+
+    def compact(self) -> None:
+        """Rewrite the JSON file with every entry and drop the journal."""
+        self.save()
+        write_state(self.path, {"products": self.products})
+        remove_journal(self.journal_path)
+
+
+class SmartLabelFetcher:
+    """Scraper requests on a shared adaptive client.
+
+    Results keep the ``(status, body, error)`` shape the scrapers already use:
+    ``status`` is ``""`` when no response arrived and ``error`` is empty on 200.
+    GETs that return 200 are recorded in :data:`current_fetch_log`; responses in
+    :data:`current_prefetched` are served once without a request.
+    """
+
+    def __init__(self, client: AdaptiveHttpClient) -> None:
+        self.client = client
+
+    async def conditional_get(self, url: str, validators: dict[str, Any]) -> AsyncHttpResponse | None:
+        """Re-request ``url`` with If-None-Match/If-Modified-Since; ``None`` on a transport error."""
+        headers = dict(validators.get("headers") or {})
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        try:
+            return await self.client.request("GET", url, headers=headers)
+        except TRANSPORT_ERRORS:
+            return None
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        data: bytes | None = None,
+    ) -> tuple[str, str, str]:
+        prefetched = current_prefetched.get()
+        response = prefetched.pop(url, None) if prefetched and method == "GET" else None
+        if response is None:
+            try:
+                response = await self.client.request(method, url, headers=headers, data=data)
+            except TRANSPORT_ERRORS as exc:
+                return "", "", str(exc) or type(exc).__name__
+        fetch_log = current_fetch_log.get()
+        if fetch_log is not None:
+            if method != "GET":
+                fetch_log["uncacheable"] = True
+            elif response.status == 200:
+                fetch_log["fetches"][url] = response_validators(response, headers)
+        text = response.text()
+        if response.status != 200:
+            return str(response.status), text, f"HTTP Error {response.status}: {response.reason}"
+        return "200", text, ""
+
+    async def fetch_url(self, url: str) -> tuple[str, str, str]:
+        return await self.request("GET", url)
+
+    async def fetch_json(self, url: str, headers: dict[str, str] | None = None) -> tuple[str, Any | None, str]:
+        status, text, error = await self.request("GET", url, headers=headers)
+        if status != "200":
+            return status, None, error
+        try:
+            return status, json.loads(text), ""
+        except json.JSONDecodeError as exc:
+            return status, None, str(exc)
+
+    async def fetch_form_url(self, url: str, form_data: dict[str, str]) -> tuple[str, str, str]:
+        return await self.request(
+            "POST",
+            url,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data=urlencode(form_data).encode("utf-8"),
+        )
 
 
 def make_numeric_id(seed: str) -> str:
@@ -315,44 +483,46 @@ def labelinsight_product_id(url: str) -> str:
     return as_text(match.group(1)) if match else ""
 
 
-def find_meta_content(soup: BeautifulSoup, name: str, attr: str = "property") -> str:
-    tag = soup.find("meta", attrs={attr: name})
+def find_meta_content(doc: HtmlNode, name: str, attr: str = "property") -> str:
+    tag = doc.select_one(f'meta[{attr}="{name}"]')
     if not tag:
         return ""
     return as_text(tag.get("content"))
 
 
-def extract_scanbuy_product_id(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    node = soup.select_one('#productId') or soup.find("input", attrs={"name": "productId"})
+def extract_scanbuy_product_id(html: str | HtmlNode) -> str:
+    doc = as_document(html)
+    node = doc.select_one("#productId") or doc.select_one('input[name="productId"]')
     if not node:
         return ""
     return as_text(node.get("value"))
 
 
-def extract_syndigo_upc(soup: BeautifulSoup) -> str:
+def extract_syndigo_upc(html: str | HtmlNode) -> str:
+    doc = as_document(html)
     candidates = [
-        soup.select_one(".top__text__upc"),
-        soup.select_one('[data-id="image__front"]'),
+        doc.select_one(".top__text__upc"),
+        doc.select_one('[data-id="image__front"]'),
     ]
     for candidate in candidates:
         if not candidate:
             continue
-        text = normalize_spaces(candidate.get_text(" ", strip=True))
+        text = normalize_spaces(candidate.text())
         digits = re.sub(r"\D+", "", text)
         if digits:
             return digits
     return ""
 
 
-def extract_bestchoice_upc(soup: BeautifulSoup) -> str:
+def extract_bestchoice_upc(html: str | HtmlNode) -> str:
+    doc = as_document(html)
     for candidate in [
-        soup.select_one(".product-upc"),
-        soup.select_one(".image-gtin-container p"),
+        doc.select_one(".product-upc"),
+        doc.select_one(".image-gtin-container p"),
     ]:
         if not candidate:
             continue
-        digits = re.sub(r"\D+", "", normalize_spaces(candidate.get_text(" ", strip=True)))
+        digits = re.sub(r"\D+", "", normalize_spaces(candidate.text()))
         if digits:
             return digits
     return ""
@@ -431,16 +601,16 @@ def assign_allergen_bucket(
         declared.append(normalized_name)
 
 
-def parse_scanbuy_allergens_html(html: str) -> tuple[list[str], list[str], list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_scanbuy_allergens_html(html: str | HtmlNode) -> tuple[list[str], list[str], list[str]]:
+    doc = as_document(html)
     declared: list[str] = []
     present: list[str] = []
     may_contain: list[str] = []
 
-    for row in soup.select("#allergens-list li"):
+    for row in doc.select("#allergens-list li"):
         classification = row.select_one('[data-id="classification"]')
         if classification:
-            text = normalize_spaces(classification.get_text(" ", strip=True))
+            text = normalize_spaces(classification.text())
             if "|" in text:
                 name, status = text.split("|", 1)
             else:
@@ -448,34 +618,34 @@ def parse_scanbuy_allergens_html(html: str) -> tuple[list[str], list[str], list[
         else:
             name_node = row.select_one(".col-xs-8, .col-md-8, .col-lg-8, .blue")
             status_node = row.select_one(".badge, .allergens__warning-label")
-            name = normalize_spaces(name_node.get_text(" ", strip=True)) if name_node else ""
-            status = normalize_spaces(status_node.get_text(" ", strip=True)) if status_node else ""
+            name = normalize_spaces(name_node.text()) if name_node else ""
+            status = normalize_spaces(status_node.text()) if status_node else ""
         assign_allergen_bucket(name, status, declared, present, may_contain)
 
     return dedupe_strings(declared), dedupe_strings(present), dedupe_strings(may_contain)
 
 
-def parse_scanbuy_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
-    container = soup.select_one("#ingredient-list") or soup
+def parse_scanbuy_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
+    container = doc.select_one("#ingredient-list") or doc
     items = [
-        normalize_spaces(node.get_text(" ", strip=True))
+        normalize_spaces(node.text())
         for node in container.select(".list-title")
-        if normalize_spaces(node.get_text(" ", strip=True))
+        if normalize_spaces(node.text())
     ]
     unique_items = dedupe_strings(items)
     return ", ".join(unique_items), unique_items
 
 
-def parse_syndigo_allergens_html(html: str) -> tuple[list[str], list[str], list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_syndigo_allergens_html(html: str | HtmlNode) -> tuple[list[str], list[str], list[str]]:
+    doc = as_document(html)
     declared: list[str] = []
     present: list[str] = []
     may_contain: list[str] = []
     seen_pairs: set[tuple[str, str]] = set()
 
-    for node in soup.select('[data-id="allergens__labels_classifications"] [data-id="classification"]'):
-        text = normalize_spaces(node.get_text(" ", strip=True))
+    for node in doc.select('[data-id="allergens__labels_classifications"] [data-id="classification"]'):
+        text = normalize_spaces(node.text())
         if not text or "|" not in text:
             continue
         name, status = text.split("|", 1)
@@ -486,11 +656,11 @@ def parse_syndigo_allergens_html(html: str) -> tuple[list[str], list[str], list[
         assign_allergen_bucket(name, status, declared, present, may_contain)
 
     if not seen_pairs:
-        for row in soup.select('[data-id="human_allergens_classifications"] li, [data-id="allergens__labels_classifications"] li'):
+        for row in doc.select('[data-id="human_allergens_classifications"] li, [data-id="allergens__labels_classifications"] li'):
             name_node = row.select_one('[data-id="allergens_classification"], .blue')
             status_node = row.select_one(".allergens__warning-label")
-            name = normalize_spaces(name_node.get_text(" ", strip=True)) if name_node else ""
-            status = normalize_spaces(status_node.get_text(" ", strip=True)) if status_node else ""
+            name = normalize_spaces(name_node.text()) if name_node else ""
+            status = normalize_spaces(status_node.text()) if status_node else ""
             pair = (normalize_allergen_name(name), normalize_spaces(status))
             if not pair[0] or pair in seen_pairs:
                 continue
@@ -498,7 +668,7 @@ def parse_syndigo_allergens_html(html: str) -> tuple[list[str], list[str], list[
             assign_allergen_bucket(name, status, declared, present, may_contain)
 
     if not seen_pairs:
-        text = soup.get_text(" ", strip=True)
+        text = doc.text()
         contains_match = re.search(r"Contains[: ]+([^\.]+)", text, re.IGNORECASE)
         if contains_match:
             for name in split_allergen_names(contains_match.group(1)):
@@ -515,30 +685,30 @@ def parse_syndigo_allergens_html(html: str) -> tuple[list[str], list[str], list[
     return dedupe_strings(declared), dedupe_strings(present), dedupe_strings(may_contain)
 
 
-def parse_syndigo_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
-    container = soup.select_one('[data-name="ingredients"]') or soup
+def parse_syndigo_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
+    container = doc.select_one('[data-name="ingredients"]') or doc
     items = [
-        normalize_spaces(node.get_text(" ", strip=True))
+        normalize_spaces(node.text())
         for node in container.select("span.linked-list__text")
-        if normalize_spaces(node.get_text(" ", strip=True))
+        if normalize_spaces(node.text())
     ]
     unique_items = dedupe_strings(items)
     return ", ".join(unique_items), unique_items
 
 
-def parse_bestchoice_allergens_html(html: str) -> tuple[list[str], list[str], list[str], int]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_bestchoice_allergens_html(html: str | HtmlNode) -> tuple[list[str], list[str], list[str], int]:
+    doc = as_document(html)
     declared: list[str] = []
     present: list[str] = []
     may_contain: list[str] = []
     explicit_rows = 0
 
-    for row in soup.select("ul.allergen-list li"):
+    for row in doc.select("ul.allergen-list li"):
         name_node = row.select_one(".atc")
         status_node = row.select_one(".locc")
-        name = normalize_spaces(name_node.get_text(" ", strip=True)) if name_node else ""
-        status = normalize_spaces(status_node.get_text(" ", strip=True)) if status_node else ""
+        name = normalize_spaces(name_node.text()) if name_node else ""
+        status = normalize_spaces(status_node.text()) if status_node else ""
         if not name or not status:
             continue
         explicit_rows += 1
@@ -547,40 +717,40 @@ def parse_bestchoice_allergens_html(html: str) -> tuple[list[str], list[str], li
     return dedupe_strings(declared), dedupe_strings(present), dedupe_strings(may_contain), explicit_rows
 
 
-def parse_bestchoice_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
-    container = soup.select_one("#ingredients") or soup
+def parse_bestchoice_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
+    container = doc.select_one("#ingredients") or doc
     items = [
-        normalize_spaces(node.get_text(" ", strip=True))
+        normalize_spaces(node.text())
         for node in container.select("li")
-        if normalize_spaces(node.get_text(" ", strip=True))
+        if normalize_spaces(node.text())
     ]
     unique_items = dedupe_strings(items)
     return ", ".join(unique_items), unique_items
 
 
-def parse_generalmills_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_generalmills_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
     items = [
-        normalize_spaces(node.get_text(" ", strip=True))
-        for node in soup.select("#ingredients-list .list-title")
-        if normalize_spaces(node.get_text(" ", strip=True))
+        normalize_spaces(node.text())
+        for node in doc.select("#ingredients-list .list-title")
+        if normalize_spaces(node.text())
     ]
     unique_items = dedupe_strings(items)
     return ", ".join(unique_items), unique_items
 
 
-def parse_generalmills_allergens_html(html: str) -> tuple[list[str], list[str], list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_generalmills_allergens_html(html: str | HtmlNode) -> tuple[list[str], list[str], list[str]]:
+    doc = as_document(html)
     declared: list[str] = []
     present: list[str] = []
     may_contain: list[str] = []
 
-    for row in soup.select("#allergens-list li"):
+    for row in doc.select("#allergens-list li"):
         name_node = row.select_one("h3, .list-title")
         status_node = row.select_one(".contain-link span, .contain-link")
-        name = normalize_spaces(name_node.get_text(" ", strip=True)) if name_node else ""
-        status = normalize_spaces(status_node.get_text(" ", strip=True)) if status_node else ""
+        name = normalize_spaces(name_node.text()) if name_node else ""
+        status = normalize_spaces(status_node.text()) if status_node else ""
         if not name:
             continue
         assign_allergen_bucket(name, status, declared, present, may_contain)
@@ -588,35 +758,35 @@ def parse_generalmills_allergens_html(html: str) -> tuple[list[str], list[str],
     return dedupe_strings(declared), dedupe_strings(present), dedupe_strings(may_contain)
 
 
-def parse_hormel_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_hormel_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
     items = [
-        normalize_spaces(node.get_text(" ", strip=True))
-        for node in soup.select("#ingredientsTab li p")
-        if normalize_spaces(node.get_text(" ", strip=True))
+        normalize_spaces(node.text())
+        for node in doc.select("#ingredientsTab li p")
+        if normalize_spaces(node.text())
     ]
     if not items:
-        text = normalize_spaces((soup.select_one("#ingredientsTab") or soup).get_text(" ", strip=True))
+        text = normalize_spaces((doc.select_one("#ingredientsTab") or doc).text())
         items = split_allergen_names(text) if "," in text else [text] if text else []
     unique_items = dedupe_strings(items)
     return ", ".join(unique_items), unique_items
 
 
-def parse_hormel_allergens_html(html: str) -> tuple[list[str], list[str], list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_hormel_allergens_html(html: str | HtmlNode) -> tuple[list[str], list[str], list[str]]:
+    doc = as_document(html)
     declared: list[str] = []
     present: list[str] = []
     may_contain: list[str] = []
 
-    for row in soup.select("#allergensTab ul li"):
+    for row in doc.select("#allergensTab ul li"):
         name_node = row.select_one("p")
         status_node = row.select_one(".contains-pill")
-        name = normalize_spaces(name_node.get_text(" ", strip=True)) if name_node else ""
-        status = normalize_spaces(status_node.get_text(" ", strip=True)) if status_node else ""
+        name = normalize_spaces(name_node.text()) if name_node else ""
+        status = normalize_spaces(status_node.text()) if status_node else ""
         if name and status:
             assign_allergen_bucket(name, status, declared, present, may_contain)
 
-    text = normalize_spaces((soup.select_one("#allergensTab") or soup).get_text(" ", strip=True))
+    text = normalize_spaces((doc.select_one("#allergensTab") or doc).text())
     for prefix, bucket in [("Contains:", present), ("May Contain:", may_contain)]:
         for match in re.finditer(rf"{re.escape(prefix)}\s*([^\.]+)", text, re.IGNORECASE):
             for name in split_allergen_names(match.group(1)):
@@ -625,16 +795,16 @@ def parse_hormel_allergens_html(html: str) -> tuple[list[str], list[str], list[s
     return dedupe_strings(declared), dedupe_strings(present), dedupe_strings(may_contain)
 
 
-def parse_rbnainfo_ingredients_html(html: str) -> tuple[str, list[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_rbnainfo_ingredients_html(html: str | HtmlNode) -> tuple[str, list[str]]:
+    doc = as_document(html)
     items: list[str] = []
 
-    for detail in soup.select("#ingredients .accChild"):
-        header = detail.find_previous_sibling("div", class_="card-header")
+    for detail in doc.select("#ingredients .accChild"):
+        header = detail.previous_sibling("div", "card-header")
         if not header:
             continue
         heading = header.select_one("h3")
-        name = normalize_spaces(heading.get_text(" ", strip=True)) if heading else ""
+        name = normalize_spaces(heading.text()) if heading else ""
         if name:
             items.append(name)
 
@@ -742,7 +912,7 @@ def finalize_row(row: dict[str, str], errors: list[str], parser_name: str) -> di
     return row
 
 
-def scrape_labelinsight_page(landing_url: str, timeout_seconds: int) -> dict[str, str]:
+async def scrape_labelinsight_page(landing_url: str, fetcher: SmartLabelFetcher) -> dict[str, str]:
     row = build_empty_row(landing_url)
     row["http_status"] = "200"
     row["notes"] = SAFE_NOTES
@@ -755,7 +925,7 @@ def scrape_labelinsight_page(landing_url: str, timeout_seconds: int) -> dict[str
         return row
 
     api_url = f"https://external-api.labelinsight.com/smartlabel-api/api/v3/{product_id}"
-    api_status, payload, api_error = fetch_json(api_url, timeout_seconds)
+    api_status, payload, api_error = await fetcher.fetch_json(api_url)
     row["ingredients_http_status"] = api_status
     row["allergens_http_status"] = api_status
     if api_status != "200" or not isinstance(payload, dict):
@@ -794,19 +964,19 @@ def scrape_labelinsight_page(landing_url: str, timeout_seconds: int) -> dict[str
     return finalize_row(row, errors, "labelinsight")
 
 
-def scrape_scanbuy_page(landing_url: str, landing_html: str, timeout_seconds: int) -> dict[str, str]:
+async def scrape_scanbuy_page(landing_url: str, landing_html: str, fetcher: SmartLabelFetcher) -> dict[str, str]:
     row = build_empty_row(landing_url)
     row["http_status"] = "200"
     errors: list[str] = []
-    soup = BeautifulSoup(landing_html, "html.parser")
+    doc = as_document(landing_html)
 
-    row["image_url"] = urljoin(landing_url, find_meta_content(soup, "og:image"))
+    row["image_url"] = urljoin(landing_url, find_meta_content(doc, "og:image"))
     row["image_field"] = "front" if row["image_url"] else ""
     upc, rev = path_upc_and_rev(landing_url)
     row["smartlabel_upc"] = upc
     row["rev"] = rev
 
-    product_id = extract_scanbuy_product_id(landing_html)
+    product_id = extract_scanbuy_product_id(doc)
     if not product_id:
         append_error(errors, "scanbuy:missing_product_id")
         return finalize_row(row, errors, "scanbuy")
@@ -815,7 +985,7 @@ def scrape_scanbuy_page(landing_url: str, landing_html: str, timeout_seconds: in
     row["smartlabel_url_ingredients"] = urljoin(base_url, f"{product_id}-ingredients.html")
     row["smartlabel_url_allergens"] = urljoin(base_url, f"{product_id}-allergens.html")
 
-    allergens_status, allergens_html, allergens_error = fetch_url(row["smartlabel_url_allergens"], timeout_seconds)
+    allergens_status, allergens_html, allergens_error = await fetcher.fetch_url(row["smartlabel_url_allergens"])
     row["allergens_http_status"] = allergens_status
     if allergens_status == "200":
         declared, present, may_contain = parse_scanbuy_allergens_html(allergens_html)
@@ -832,7 +1002,7 @@ def scrape_scanbuy_page(landing_url: str, landing_html: str, timeout_seconds: in
         and row["allergens_may_contain_json"] == "[]"
     )
     if safe_product:
-        ingredients_status, ingredients_html, ingredients_error = fetch_url(row["smartlabel_url_ingredients"], timeout_seconds)
+        ingredients_status, ingredients_html, ingredients_error = await fetcher.fetch_url(row["smartlabel_url_ingredients"])
         row["ingredients_http_status"] = ingredients_status
         if ingredients_status == "200":
             ingredients_text, items = parse_scanbuy_ingredients_html(ingredients_html)
@@ -855,17 +1025,17 @@ def scrape_syndigo_page(landing_url: str, landing_html: str) -> dict[str, str]:
     row["allergens_http_status"] = "200"
     errors: list[str] = []
 
-    soup = BeautifulSoup(landing_html, "html.parser")
-    row["smartlabel_upc"] = extract_syndigo_upc(soup)
-    row["image_url"] = urljoin(landing_url, find_meta_content(soup, "og:image"))
+    doc = as_document(landing_html)
+    row["smartlabel_upc"] = extract_syndigo_upc(doc)
+    row["image_url"] = urljoin(landing_url, find_meta_content(doc, "og:image"))
     if not row["image_url"]:
-        image_tag = soup.select_one('[data-id="image__front"]')
+        image_tag = doc.select_one('[data-id="image__front"]')
         if image_tag and image_tag.get("src"):
             row["image_url"] = urljoin(landing_url, as_text(image_tag.get("src")))
     row["image_field"] = "front" if row["image_url"] else ""
 
-    ingredients_text, items = parse_syndigo_ingredients_html(landing_html)
-    declared, present, may_contain = parse_syndigo_allergens_html(landing_html)
+    ingredients_text, items = parse_syndigo_ingredients_html(doc)
+    declared, present, may_contain = parse_syndigo_allergens_html(doc)
     row["ingredients_text"] = ingredients_text
     row["ingredients_items_json"] = json.dumps(items, ensure_ascii=True)
     row["allergens_declared_json"] = json.dumps(declared, ensure_ascii=True)
@@ -886,17 +1056,17 @@ def scrape_bestchoice_page(landing_url: str, landing_html: str) -> dict[str, str
     row["ingredients_http_status"] = "200"
     errors: list[str] = []
 
-    soup = BeautifulSoup(landing_html, "html.parser")
-    row["smartlabel_upc"] = extract_bestchoice_upc(soup)
-    row["image_url"] = urljoin(landing_url, find_meta_content(soup, "og:image"))
+    doc = as_document(landing_html)
+    row["smartlabel_upc"] = extract_bestchoice_upc(doc)
+    row["image_url"] = urljoin(landing_url, find_meta_content(doc, "og:image"))
     if not row["image_url"]:
-        image_tag = soup.select_one(".productImg")
+        image_tag = doc.select_one(".productImg")
         if image_tag and image_tag.get("src"):
             row["image_url"] = urljoin(landing_url, as_text(image_tag.get("src")))
     row["image_field"] = "front" if row["image_url"] else ""
 
-    ingredients_text, items = parse_bestchoice_ingredients_html(landing_html)
-    declared, present, may_contain, explicit_rows = parse_bestchoice_allergens_html(landing_html)
+    ingredients_text, items = parse_bestchoice_ingredients_html(doc)
+    declared, present, may_contain, explicit_rows = parse_bestchoice_allergens_html(doc)
     row["ingredients_text"] = ingredients_text
     row["ingredients_items_json"] = json.dumps(items, ensure_ascii=True)
     if explicit_rows:
@@ -914,27 +1084,42 @@ def scrape_bestchoice_page(landing_url: str, landing_html: str) -> dict[str, str
     return finalize_row(row, errors, "bestchoice")
 
 
-def scrape_generalmills_page(landing_url: str, landing_html: str, timeout_seconds: int) -> dict[str, str]:
+async def scrape_generalmills_page(landing_url: str, landing_html: str, fetcher: SmartLabelFetcher) -> dict[str, str]:
     row = build_empty_row(landing_url)
     row["http_status"] = "200"
     errors: list[str] = []
-    soup = BeautifulSoup(landing_html, "html.parser")
     base_url = "https://smartlabel.generalmills.com"
 
-    gtin = extract_generalmills_gtin(landing_url) or extract_generalmills_gtin(
-        as_text((soup.select_one("#hdnGTINId") or {}).get("value"))
-    )
+    gtin = extract_generalmills_gtin(landing_url)
+    if not gtin:
+        doc = as_document(landing_html)
+        gtin = extract_generalmills_gtin(as_text((doc.select_one("#hdnGTINId") or {}).get("value")))
     row["smartlabel_upc"] = gtin
     row["smartlabel_url_ingredients"] = f"{base_url}/GTIN/Ingredients"
     row["smartlabel_url_allergens"] = f"{base_url}/GTIN/Allergens"
 
-    product_info_status, product_info_html, product_info_error = fetch_url(
-        f"{base_url}/GTIN/ProductInfo?gtinID={gtin}",
-        timeout_seconds,
+    form_data = {"id": gtin, "isNutri": "true"}
+
+    async def fetch_section(url: str) -> tuple[str, str, str]:
+        status, html, error = await fetcher.fetch_url(url)
+        if status != "200":
+            status, html, error = await fetcher.fetch_form_url(url, form_data)
+        return status, html, error
+
+    # The three sub-requests are independent, so they go out together.
+    (
+        (product_info_status, product_info_html, product_info_error),
+        (ingredients_status, ingredients_html, ingredients_error),
+        (allergens_status, allergens_html, allergens_error),
+    ) = await asyncio.gather(
+        fetcher.fetch_url(f"{base_url}/GTIN/ProductInfo?gtinID={gtin}"),
+        fetch_section(row["smartlabel_url_ingredients"]),
+        fetch_section(row["smartlabel_url_allergens"]),
     )
+
     if product_info_status == "200":
-        product_info_soup = BeautifulSoup(product_info_html, "html.parser")
-        image_tag = product_info_soup.select_one(".product-image")
+        product_info_doc = as_document(product_info_html)
+        image_tag = product_info_doc.select_one(".product-image")
         if image_tag and image_tag.get("src"):
             row["image_url"] = urljoin(landing_url, as_text(image_tag.get("src")))
             row["image_field"] = "front"
@@ -943,14 +1128,6 @@ def scrape_generalmills_page(landing_url: str, landing_html: str, timeout_second
     else:
         append_error(errors, f"product_info:{product_info_error or product_info_status or 'fetch_failed'}")
 
-    form_data = {"id": gtin, "isNutri": "true"}
-    ingredients_status, ingredients_html, ingredients_error = fetch_url(
-        row["smartlabel_url_ingredients"], timeout_seconds
-    )
-    if ingredients_status != "200":
-        ingredients_status, ingredients_html, ingredients_error = fetch_form_url(
-            row["smartlabel_url_ingredients"], form_data, timeout_seconds
-        )
     row["ingredients_http_status"] = ingredients_status
     if ingredients_status == "200":
         ingredients_text, items = parse_generalmills_ingredients_html(ingredients_html)
@@ -961,11 +1138,6 @@ def scrape_generalmills_page(landing_url: str, landing_html: str, timeout_second
     else:
         append_error(errors, f"ingredients:{ingredients_error or ingredients_status or 'fetch_failed'}")
 
-    allergens_status, allergens_html, allergens_error = fetch_url(row["smartlabel_url_allergens"], timeout_seconds)
-    if allergens_status != "200":
-        allergens_status, allergens_html, allergens_error = fetch_form_url(
-            row["smartlabel_url_allergens"], form_data, timeout_seconds
-        )
     row["allergens_http_status"] = allergens_status
     if allergens_status == "200":
         declared, present, may_contain = parse_generalmills_allergens_html(allergens_html)
@@ -987,17 +1159,17 @@ def scrape_hormel_page(landing_url: str, landing_html: str) -> dict[str, str]:
     row["allergens_http_status"] = "200"
     errors: list[str] = []
 
-    soup = BeautifulSoup(landing_html, "html.parser")
+    doc = as_document(landing_html)
     row["smartlabel_upc"] = extract_generalmills_gtin(landing_url) or extract_generalmills_gtin(
-        normalize_spaces((soup.select_one(".image-gtin-container p") or soup).get_text(" ", strip=True))
+        normalize_spaces((doc.select_one(".image-gtin-container p") or doc).text())
     )
-    image_tag = soup.select_one(".product-image")
+    image_tag = doc.select_one(".product-image")
     if image_tag and image_tag.get("src"):
         row["image_url"] = urljoin(landing_url, as_text(image_tag.get("src")))
         row["image_field"] = "front"
 
-    ingredients_text, items = parse_hormel_ingredients_html(landing_html)
-    declared, present, may_contain = parse_hormel_allergens_html(landing_html)
+    ingredients_text, items = parse_hormel_ingredients_html(doc)
+    declared, present, may_contain = parse_hormel_allergens_html(doc)
     row["ingredients_text"] = ingredients_text
     row["ingredients_items_json"] = json.dumps(items, ensure_ascii=True)
     row["allergens_declared_json"] = json.dumps(declared, ensure_ascii=True)
@@ -1010,7 +1182,7 @@ def scrape_hormel_page(landing_url: str, landing_html: str) -> dict[str, str]:
     return finalize_row(row, errors, "hormel")
 
 
-def scrape_pg_page(landing_url: str, timeout_seconds: int) -> dict[str, str]:
+async def scrape_pg_page(landing_url: str, fetcher: SmartLabelFetcher) -> dict[str, str]:
     row = build_empty_row(landing_url)
     row["http_status"] = "200"
     row["smartlabel_url_ingredients"] = landing_url
@@ -1020,11 +1192,7 @@ def scrape_pg_page(landing_url: str, timeout_seconds: int) -> dict[str, str]:
     locale, gtin = extract_pg_locale_and_gtin(landing_url)
     row["smartlabel_upc"] = gtin
     api_url = f"{PG_PRODUCT_DETAILS_URL}?gtin={gtin}&locale={locale or 'en-US'}"
-    status, payload, error = fetch_json_with_headers(
-        api_url,
-        timeout_seconds,
-        headers={"x-functions-key": PG_FUNCTIONS_KEY},
-    )
+    status, payload, error = await fetcher.fetch_json(api_url, headers={"x-functions-key": PG_FUNCTIONS_KEY})
     row["ingredients_http_status"] = status
     row["allergens_http_status"] = status
     if status != "200" or not isinstance(payload, dict):
@@ -1062,15 +1230,15 @@ def scrape_rbnainfo_page(landing_url: str, landing_html: str) -> dict[str, str]:
     row["allergens_http_status"] = "200"
     errors: list[str] = []
 
-    soup = BeautifulSoup(landing_html, "html.parser")
-    upc_node = soup.select_one(".header-upcs td")
-    row["smartlabel_upc"] = extract_generalmills_gtin(upc_node.get_text(" ", strip=True) if upc_node else landing_url)
-    image_tag = soup.select_one(".product-image img")
+    doc = as_document(landing_html)
+    upc_node = doc.select_one(".header-upcs td")
+    row["smartlabel_upc"] = extract_generalmills_gtin(upc_node.text() if upc_node else landing_url)
+    image_tag = doc.select_one(".product-image img")
     if image_tag and image_tag.get("src"):
         row["image_url"] = urljoin(landing_url, as_text(image_tag.get("src")))
         row["image_field"] = "front"
 
-    ingredients_text, items = parse_rbnainfo_ingredients_html(landing_html)
+    ingredients_text, items = parse_rbnainfo_ingredients_html(doc)
     row["ingredients_text"] = ingredients_text
     row["ingredients_items_json"] = json.dumps(items, ensure_ascii=True)
 
@@ -1080,34 +1248,50 @@ def scrape_rbnainfo_page(landing_url: str, landing_html: str) -> dict[str, str]:
     return finalize_row(row, errors, "rbnainfo")
 
 
-def scrape_url(url: str, timeout_seconds: int) -> dict[str, str]:
+def fetch_failed_row(url: str, status: str, error: str) -> dict[str, str]:
+    row = build_empty_row(url)
+    row["http_status"] = status
+    row["notes"] = "fetch_failed"
+    row["smartlabel_error"] = error or status or "fetch_failed"
+    return row
+
+
+async def scrape_url(url: str, fetcher: SmartLabelFetcher) -> dict[str, str]:
     host = urlparse(url).netloc.lower()
     if host == "smartlabel.labelinsight.com":
-        return scrape_labelinsight_page(url, timeout_seconds)
+        return await scrape_labelinsight_page(url, fetcher)
 
-    status, html, error = fetch_url(url, timeout_seconds)
-    row = build_empty_row(url)
-    row["http_status"] = status
+    # Templates whose sub-requests do not depend on the landing HTML start them
+    # alongside the landing fetch instead of after it.
+    if host == "smartlabel.pg.com":
+        (status, _html, error), row = await asyncio.gather(fetcher.fetch_url(url), scrape_pg_page(url, fetcher))
+        return row if status == "200" else fetch_failed_row(url, status, error)
+    if host == "smartlabel.generalmills.com" and extract_generalmills_gtin(url):
+        (status, _html, error), row = await asyncio.gather(
+            fetcher.fetch_url(url),
+            scrape_generalmills_page(url, "", fetcher),
+        )
+        return row if status == "200" else fetch_failed_row(url, status, error)
+
+    status, html, error = await fetcher.fetch_url(url)
     if status != "200":
-        row["notes"] = "fetch_failed"
-        row["smartlabel_error"] = error or status or "fetch_failed"
-        return row
+        return fetch_failed_row(url, status, error)
 
     if host == "smartlabel.generalmills.com":
-        return scrape_generalmills_page(url, html, timeout_seconds)
+        return await scrape_generalmills_page(url, html, fetcher)
     if host == "smartlabel.hormelfoods.com":
         return scrape_hormel_page(url, html)
-    if host == "smartlabel.pg.com":
-        return scrape_pg_page(url, timeout_seconds)
     if host in {"www.rbnainfo.com", "rbnainfo.com"}:
         return scrape_rbnainfo_page(url, html)
     if extract_scanbuy_product_id(html):
-        return scrape_scanbuy_page(url, html, timeout_seconds)
+        return await scrape_scanbuy_page(url, html, fetcher)
     if 'data-name="ingredients"' in html or "data-name='ingredients'" in html:
         return scrape_syndigo_page(url, html)
     if "#ingredients" in html and "allergen-list" in html:
         return scrape_bestchoice_page(url, html)
 
+    row = build_empty_row(url)
+    row["http_status"] = status
     row["notes"] = "unsupported"
     row["smartlabel_error"] = "unsupported_template"
     return row
@@ -1130,106 +1314,225 @@ def row_needs_refresh(row: dict[str, str] | None) -> bool:
     return True
 
 
-def discover_sitemap_urls(host: str, timeout_seconds: int) -> list[str]:
-    sitemap_url = f"https://{host}/sitemap.xml"
-    status, body, _ = fetch_url(sitemap_url, timeout_seconds)
-    if status != "200" or "<urlset" not in body:
-        return []
-    root = ET.fromstring(body)
-    return [as_text(node.text) for node in root.findall("sm:url/sm:loc", SITEMAP_NS) if as_text(node.text)]
+class ScrapeQueue:
+    """Admission rules for URLs as discovery streams them in.
+
+    A URL is queued once, and not at all when its existing row is already
+    complete (see :func:`row_needs_refresh`) unless it is offered for
+    ``--revalidate``. A source with a ``limit`` (a sitemap host under
+    ``--max-per-host``) stops after that many queued URLs, and everything stops
+    at ``max_total``. Revalidated URLs count against their host's limit. ``discovered`` counts the URLs each
+    source produced before it stopped; ``failed_search_api_pages`` lists the
+    search API pages that could not be fetched.
+    """
+
+    def __init__(self, existing_by_url: dict[str, dict[str, str]], *, max_total: int) -> None:
+        self.existing_by_url = existing_by_url
+        self.max_total = max_total
+        self.urls: list[str] = []
+        self.seen: set[str] = set()
+        self.discovered: dict[str, int] = {}
+        self.kept: Counter = Counter()
+        self.failed_search_api_pages: list[int] = []
+
+    def full(self) -> bool:
+        return bool(self.max_total) and len(self.urls) >= self.max_total
+
+    def wants(self, source: str, limit: int = 0) -> bool:
+        return not self.full() and not (limit and self.kept[source] >= limit)
+
+    def offer(self, url: str, source: str = "", limit: int = 0) -> bool:
+        """Returns whether ``url`` was queued."""
+        if source:
+            self.discovered[source] = self.discovered.get(source, 0) + 1
+        if not self.wants(source, limit) or url in self.seen:
+            return False
+        existing_row = self.existing_by_url.get(url)
+        if existing_row and not row_needs_refresh(existing_row):
+            return False
+        self.admit(url, source)
+        return True
 
+    def offer_revalidation(self, url: str, limit: int = 0) -> bool:
+        """Returns whether the complete row at ``url`` was queued for revalidation."""
+        host = urlparse(url).netloc.lower()
+        if not self.wants(host, limit) or url in self.seen:
+            return False
+        self.admit(url, host)
+        return True
 
-def discover_search_api_urls(
-    timeout_seconds: int,
+    def admit(self, url: str, source: str) -> None:
+        self.urls.append(url)
+        self.seen.add(url)
+        self.kept[source] += 1
+
+
+async def iter_sitemap_locs(body: bytes) -> AsyncIterator[tuple[str, str]]:
+    """``(kind, loc)`` pairs from a sitemap or sitemap index, parsed incrementally.
+
+    ``kind`` is ``"url"`` for product pages and ``"sitemap"`` for the children
+    of a ``<sitemapindex>``. The body is fed to the parser in chunks (gunzipped
+    as it goes for ``.xml.gz`` sitemaps) and every entry is cleared once read,
+    so the tree never holds more than one entry. The loop yields between chunks
+    so the scrape keeps running while a large sitemap is parsed.
+    """
+    stream = gzip.GzipFile(fileobj=io.BytesIO(body)) if body[:2] == b"\x1f\x8b" else io.BytesIO(body)
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: ET.Element | None = None
+    while True:
+        chunk = stream.read(SITEMAP_FEED_BYTES)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            tag = element.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if root is None:
+                    if tag not in ("urlset", "sitemapindex"):
+                        return
+                    root = element
+                continue
+            if tag in ("url", "sitemap") and root is not None:
+                loc = next((as_text(child.text) for child in element if child.tag.rsplit("}", 1)[-1] == "loc"), "")
+                if loc:
+                    yield tag, loc
+                root.clear()
+        await asyncio.sleep(0)
+    parser.close()
+
+
+async def discover_sitemap(
+    fetcher: SmartLabelFetcher,
+    sitemap_url: str,
+    emit: Callable[[str], bool],
+    *,
+    visited: set[str],
+    depth: int = 0,
+) -> bool:
+    """Stream the page URLs of ``sitemap_url`` into ``emit``, recursing into sitemap indexes.
+
+    Child sitemaps are fetched concurrently. ``emit`` returns whether it wants
+    more; returns ``False`` once it said no. Unreachable or malformed sitemaps
+    are skipped, keeping whatever was read before the error.
+    """
+    if sitemap_url in visited or depth > SITEMAP_MAX_DEPTH:
+        return True
+    visited.add(sitemap_url)
+    try:
+        response = await fetcher.client.request("GET", sitemap_url)
+    except TRANSPORT_ERRORS:
+        return True
+    if response.status != 200:
+        return True
+
+    children: list[str] = []
+    try:
+        async for kind, loc in iter_sitemap_locs(response.body):
+            if kind == "sitemap":
+                children.append(urljoin(sitemap_url, loc))
+            elif not emit(loc):
+                return False
+    except (ET.ParseError, OSError, EOFError):
+        pass
+    results = await asyncio.gather(
+        *(discover_sitemap(fetcher, child, emit, visited=visited, depth=depth + 1) for child in children)
+    )
+    return all(results)
+
+
+def search_api_page_urls(payload: dict[str, Any], host_filter: set[str]) -> list[str]:
+    urls: list[str] = []
+    data = payload.get("data") or {}
+    for item in data.get("data") or []:
+        if not isinstance(item, dict):
+            continue
+        candidate = as_text(item.get("url"))
+        if not candidate:
+            continue
+        if host_filter and urlparse(candidate).netloc.lower() not in host_filter:
+            continue
+        urls.append(candidate)
+    return urls
+
+
+async def discover_search_api(
+    fetcher: SmartLabelFetcher,
     pages: int,
     host_filter: set[str],
-) -> list[str]:
-    discovered: list[str] = []
-    seen: set[str] = set()
-    for page in range(1, pages + 1):
-        url = f"{SEARCH_API_URL}?perPage={DEFAULT_SEARCH_API_PER_PAGE}&page={page}"
-        status, payload, error = fetch_json(url, timeout_seconds)
-        if status != "200" or not isinstance(payload, dict):
-            raise RuntimeError(f"Search API page {page} failed: {error or status}")
-        data = payload.get("data") or {}
-        for item in data.get("data") or []:
-            if not isinstance(item, dict):
-                continue
-            candidate = as_text(item.get("url"))
-            if not candidate:
-                continue
-            host = urlparse(candidate).netloc.lower()
-            if host_filter and host not in host_filter:
-                continue
-            if candidate in seen:
-                continue
-            seen.add(candidate)
-            discovered.append(candidate)
-    return discovered
+    emit: Callable[[str], bool],
+) -> list[int]:
+    """Fetch search API pages ``1..pages`` concurrently, emitting URLs as each page lands.
 
+    A failed page is logged and skipped, since the scrape is already running on
+    the other pages' URLs; returns the failed page numbers.
+    """
+    failed_pages: list[int] = []
 
-def build_scrape_queue(
-    existing_by_url: dict[str, dict[str, str]],
+    async def fetch_page(page: int) -> None:
+        url = f"{SEARCH_API_URL}?perPage={DEFAULT_SEARCH_API_PER_PAGE}&page={page}"
+        status, payload, error = await fetcher.fetch_json(url)
+        if status != "200" or not isinstance(payload, dict):
+            print(f"[warn] Search API page {page} failed: {error or status}")
+            failed_pages.append(page)
+            return
+        for candidate in search_api_page_urls(payload, host_filter):
+            if not emit(candidate):
+                return
+
+    await asyncio.gather(*(fetch_page(page) for page in range(1, pages + 1)))
+    return sorted(failed_pages)
+
+
+async def discover_urls(
+    fetcher: SmartLabelFetcher,
+    scrape_queue: ScrapeQueue,
+    enqueue: Callable[[str], Any],
+    *,
     hosts: list[str],
-    timeout_seconds: int,
     max_per_host: int,
-    max_total: int,
     search_api_pages: int,
     search_api_hosts: set[str],
-) -> tuple[list[str], dict[str, int]]:
-    queue: list[str] = []
-    per_host_counts: dict[str, int] = {}
-    seen: set[str] = set()
+) -> None:
+    """Discover from every sitemap host and the search API at once.
 
-    for host in hosts:
-        discovered = discover_sitemap_urls(host, timeout_seconds)
-        per_host_counts[host] = len(discovered)
-        kept_for_host = 0
-        for url in discovered:
-            if max_per_host and kept_for_host >= max_per_host:
-                break
-            if max_total and len(queue) >= max_total:
-                break
-            if url in seen:
-                continue
-            existing_row = existing_by_url.get(url)
-            if existing_row and not row_needs_refresh(existing_row):
-                continue
-            queue.append(url)
-            seen.add(url)
-            kept_for_host += 1
-        if max_total and len(queue) >= max_total:
-            break
+    Each URL ``scrape_queue`` admits is handed to ``enqueue`` as soon as it is
+    found, so scraping starts before discovery finishes. Existing rows that
+    still need a refresh are queued last, once discovery is done.
+    """
+
+    def emitter(source: str, limit: int) -> Callable[[str], bool]:
+        def emit(url: str) -> bool:
+            if scrape_queue.offer(url, source, limit):
+                enqueue(url)
+            return scrape_queue.wants(source, limit)
+
+        return emit
 
-    if search_api_pages and (not max_total or len(queue) < max_total):
-        search_urls = discover_search_api_urls(
-            timeout_seconds=timeout_seconds,
-            pages=search_api_pages,
-            host_filter=search_api_hosts,
+    visited: set[str] = set()
+    discoveries: list[Awaitable[Any]] = []
+    for host in hosts:
+        scrape_queue.discovered[host] = 0
+        discoveries.append(
+            discover_sitemap(fetcher, f"https://{host}/sitemap.xml", emitter(host, max_per_host), visited=visited)
         )
-        per_host_counts["search_api"] = len(search_urls)
-        for url in search_urls:
-            if max_total and len(queue) >= max_total:
-                break
-            if url in seen:
-                continue
-            existing_row = existing_by_url.get(url)
-            if existing_row and not row_needs_refresh(existing_row):
-                continue
-            queue.append(url)
-            seen.add(url)
+    if search_api_pages:
+        scrape_queue.discovered["search_api"] = 0
+
+        async def search_api() -> None:
+            scrape_queue.failed_search_api_pages = await discover_search_api(
+                fetcher, search_api_pages, search_api_hosts, emitter("search_api", 0)
+            )
 
-    for url, row in existing_by_url.items():
-        if max_total and len(queue) >= max_total:
+        discoveries.append(search_api())
+    await asyncio.gather(*discoveries)
+
+    for url, row in scrape_queue.existing_by_url.items():
+        if scrape_queue.full():
             break
-        if url in seen or not row_needs_refresh(row):
-            continue
-        if urlparse(url).netloc.lower() == "smartlabel.labelinsight.com":
+        if not row_needs_refresh(row) or urlparse(url).netloc.lower() == "smartlabel.labelinsight.com":
             continue
-        queue.append(url)
-        seen.add(url)
-
-    return queue, per_host_counts
+        if scrape_queue.offer(url):
+            enqueue(url)
 
 
 def merge_rows(
@@ -1256,72 +1559,285 @@ def merge_rows(
     return merged
 
 
+async def changed_pages(
+    fetcher: SmartLabelFetcher,
+    fetch_log: dict[str, Any] | None,
+) -> dict[str, AsyncHttpResponse] | None:
+    """Conditionally re-request every page behind a product.
+
+    A page is unchanged on a 304, or on a 200 whose body hashes the same as last
+    time. Returns ``{}`` when every page is unchanged, ``None`` when the product
+    cannot be revalidated, and otherwise the changed 200 responses for the
+    rescrape to reuse (empty when the only changes were errors).
+    """
+    if not fetch_log or fetch_log.get("uncacheable") or not fetch_log.get("fetches"):
+        return None
+    fetches = list(fetch_log["fetches"].items())
+    responses = await asyncio.gather(*(fetcher.conditional_get(url, validators) for url, validators in fetches))
+    changed: dict[str, AsyncHttpResponse] = {}
+    any_changed = False
+    for (url, validators), response in zip(fetches, responses):
+        if response is not None and response.status == 304:
+            continue
+        if response is not None and response.status == 200:
+            if hashlib.sha256(response.body).hexdigest() == validators.get("sha256"):
+                continue
+            changed[url] = response
+        any_changed = True
+    return changed if any_changed else {}
+
+
+async def scrape_urls(
+    urls: list[str],
+    on_row: Callable[[str, dict[str, str]], None],
+    *,
+    timeout_seconds: float,
+    max_workers: int,
+    host_concurrency: int,
+    max_retries: int,
+    connect_overrides: dict[str, str] | None = None,
+    validators: ValidatorStore | None = None,
+    revalidate_rows: dict[str, dict[str, str]] | None = None,
+    discover: Callable[[SmartLabelFetcher, Callable[[str], Any]], Awaitable[Any]] | None = None,
+) -> dict[str, Any]:
+    """Scrape ``urls`` with per-host workers and adaptive per-host request limits.
+
+    ``discover(fetcher, put)``, when given, runs alongside the workers and
+    queues more URLs through ``put`` as it finds them; the run ends once it
+    returns and the queue drains. ``on_row(url, row)`` is called as each URL
+    finishes. URLs in
+    ``revalidate_rows`` are first checked with conditional requests against
+    ``validators``; when nothing changed their existing row is passed through.
+    Returns the HTTP/AIMD summary for the run.
+    """
+    revalidate_rows = revalidate_rows or {}
+    revalidation = Counter()
+    async with AsyncHttpClient(
+        user_agent=USER_AGENT,
+        timeout=timeout_seconds,
+        connect_overrides=connect_overrides,
+    ) as client:
+        adaptive = AdaptiveHttpClient(
+            client,
+            max_per_host=max(1, host_concurrency),
+            max_in_flight=max(1, max_workers),
+            max_retries=max_retries,
+            label="SmartLabel",
+        )
+        fetcher = SmartLabelFetcher(adaptive)
+
+        async def handle(url: str) -> None:
+            existing_row = revalidate_rows.get(url)
+            prefetched: dict[str, AsyncHttpResponse] = {}
+            if existing_row is not None:
+                try:
+                    changed = await changed_pages(fetcher, validators.get(url) if validators is not None else None)
+                except Exception:  # noqa: BLE001 - a failed revalidation falls back to a full rescrape
+                    revalidation["failed"] += 1
+                    changed = None
+                else:
+                    if changed == {}:
+                        revalidation["unchanged"] += 1
+                        on_row(url, {field: as_text(existing_row.get(field)) for field in CSV_FIELDNAMES})
+                        return
+                    revalidation["unvalidated" if changed is None else "changed"] += 1
+                prefetched = changed or {}
+
+            fetch_log = new_fetch_log()
+            current_fetch_log.set(fetch_log)
+            current_prefetched.set(prefetched)
+            try:
+                row = await scrape_url(url, fetcher)
+            except Exception as exc:  # pragma: no cover - defensive logging path
+                row = build_empty_row(url)
+                row["notes"] = "exception"
+                row["smartlabel_error"] = str(exc)
+            finally:
+                current_fetch_log.set(None)
+                current_prefetched.set(None)
+            if validators is not None and fetch_log["fetches"]:
+                validators.put(url, fetch_log)
+            on_row(url, row)
+
+        work = HostWorkQueue(handle, workers_per_host=max(1, host_concurrency))
+        for url in urls:
+            work.put(url)
+        if discover is not None:
+            try:
+                await discover(fetcher, work.put)
+            except BaseException:
+                await work.cancel()
+                raise
+        await work.join()
+        summary = adaptive.summary()
+        if revalidate_rows:
+            summary["revalidation"] = dict(revalidation)
+        return summary
+
+
+def journal_scrape(
+    urls: list[str],
+    journal: AppendOnlyJsonlWriter,
+    *,
+    checkpoint_every: int,
+    on_row: Callable[[str, dict[str, str]], None] | None = None,
+    **scrape_options: Any,
+) -> dict[str, Any]:
+    """Run :func:`scrape_urls`, appending each finished row to ``journal``.
+
+    Rows (and the ``validators`` store, when one is passed) are committed every
+    ``checkpoint_every`` URLs and once more on the way out, including on Ctrl-C
+    or an error, so an interrupted run loses at most the rows scraped since the
+    last commit.
+    """
+    checkpoint_every = max(1, int(checkpoint_every))
+    uncommitted = 0
+
+    validators = scrape_options.get("validators")
+
+    def commit() -> None:
+        journal.flush()
+        if validators is not None:
+            validators.save()
+
+    def journal_row(url: str, row: dict[str, str]) -> None:
+        nonlocal uncommitted
+        journal.add({"id": url, "row": row})
+        uncommitted += 1
+        if uncommitted >= checkpoint_every:
+            commit()
+            uncommitted = 0
+        if on_row is not None:
+            on_row(url, row)
+
+    try:
+        return asyncio.run(scrape_urls(urls, journal_row, **scrape_options))
+    finally:
+        commit()
+
+
 def main() -> None:
     args = parse_args()
     input_path = Path(args.input)
     output_path = Path(args.output)
     summary_path = Path(args.summary_output)
     hosts = hosts_from_arg(args.hosts)
+    html_parser = set_backend(args.html_parser)
+    store_path = Path(args.store) if args.store else None
+    if store_path and store_path.suffix.lower() not in STORE_SUFFIXES:
+        raise RuntimeError(f"--store must end in one of {', '.join(STORE_SUFFIXES)}: {store_path}")
+
+    journal_path = Path(args.journal) if args.journal else journal_path_for(output_path)
+    if not args.resume and journal_path.exists() and journal_path.stat().st_size:
+        raise RuntimeError(
+            f"{journal_path} holds rows from an unfinished scrape; pass --resume to continue it or delete it to start over."
+        )
 
     existing_rows = load_csv_rows(input_path)
     fieldnames = ensure_fieldnames(existing_rows)
     existing_by_url = {as_text(row.get("smartlabel_url")): dict(row) for row in existing_rows if as_text(row.get("smartlabel_url"))}
 
-    queue, discovered_by_host = build_scrape_queue(
-        existing_by_url=existing_by_url,
-        hosts=hosts,
-        timeout_seconds=args.timeout_seconds,
-        max_per_host=args.max_per_host,
-        max_total=args.max_total,
-        search_api_pages=max(0, args.search_api_pages),
-        search_api_hosts=set(hosts_from_arg(args.search_api_hosts)),
+    validators = ValidatorStore(
+        Path(args.validators) if args.validators else output_path.with_name(output_path.name + VALIDATORS_SUFFIX)
     )
+    journal = AppendOnlyJsonlWriter(journal_path, resume=args.resume)
+    resumed_count = len(journal)
+    if resumed_count:
+        print(f"Resuming from {journal_path}: {resumed_count} URLs already scraped")
+
+    # Complete rows are never admitted by discovery, so revalidation candidates do not overlap it.
+    # They go first and use up --max-total and their host's --max-per-host like discovered URLs.
+    scrape_queue = ScrapeQueue(existing_by_url, max_total=args.max_total)
+    revalidate_rows: dict[str, dict[str, str]] = {}
+    if args.revalidate:
+        revalidate_rows = {
+            url: row
+            for url, row in existing_by_url.items()
+            if not row_needs_refresh(row) and scrape_queue.offer_revalidation(url, args.max_per_host)
+        }
+    queue = [url for url in revalidate_rows if url not in journal]
 
-    scraped_rows: dict[str, dict[str, str]] = {}
     scrape_stats = Counter()
-    total = len(queue)
-    print(f"SmartLabel scrape queue: {total} URLs")
-
-    with ThreadPoolExecutor(max_workers=max(1, args.max_workers)) as executor:
-        future_map = {executor.submit(scrape_url, url, args.timeout_seconds): url for url in queue}
-        completed = 0
-        for future in as_completed(future_map):
-            url = future_map[future]
-            completed += 1
-            try:
-                row = future.result()
-            except Exception as exc:  # pragma: no cover - defensive logging path
-                row = build_empty_row(url)
-                row["notes"] = "exception"
-                row["smartlabel_error"] = str(exc)
-            scraped_rows[url] = row
-
-            host = urlparse(url).netloc.lower()
-            scrape_stats[f"host::{host}"] += 1
-            if row.get("notes") == SAFE_NOTES:
-                scrape_stats["ok"] += 1
-            if parse_json_list(row.get("ingredients_items_json")):
-                scrape_stats["rows_with_ingredients"] += 1
-            if row.get("allergens_http_status") == "200":
-                declared = parse_json_list(row.get("allergens_declared_json"))
-                present = parse_json_list(row.get("allergens_present_json"))
-                may_contain = parse_json_list(row.get("allergens_may_contain_json"))
-                if not declared and not present and not may_contain:
-                    scrape_stats["safe_rows"] += 1
-            if completed % 100 == 0 or completed == total:
-                print(f"Scraped {completed}/{total} SmartLabel URLs...")
+    queued = len(queue)
+    completed = 0
+
+    def enqueue(put: Callable[[str], bool], url: str) -> None:
+        nonlocal queued
+        if url not in journal and put(url):
+            queued += 1
+
+    async def discover(fetcher: SmartLabelFetcher, put: Callable[[str], bool]) -> None:
+        await discover_urls(
+            fetcher,
+            scrape_queue,
+            lambda url: enqueue(put, url),
+            hosts=hosts,
+            max_per_host=args.max_per_host,
+            search_api_pages=max(0, args.search_api_pages),
+            search_api_hosts=set(hosts_from_arg(args.search_api_hosts)),
+        )
+        print(f"SmartLabel discovery finished: {queued} URLs queued")
+
+    print(f"Discovering SmartLabel URLs from {len(hosts)} sitemap hosts while scraping...")
+
+    def record_row(url: str, row: dict[str, str]) -> None:
+        nonlocal completed
+        completed += 1
+
+        host = urlparse(url).netloc.lower()
+        scrape_stats[f"host::{host}"] += 1
+        if row.get("notes") == SAFE_NOTES:
+            scrape_stats["ok"] += 1
+        if parse_json_list(row.get("ingredients_items_json")):
+            scrape_stats["rows_with_ingredients"] += 1
+        if row.get("allergens_http_status") == "200":
+            declared = parse_json_list(row.get("allergens_declared_json"))
+            present = parse_json_list(row.get("allergens_present_json"))
+            may_contain = parse_json_list(row.get("allergens_may_contain_json"))
+            if not declared and not present and not may_contain:
+                scrape_stats["safe_rows"] += 1
+        if completed % 100 == 0:
+            print(f"Scraped {completed}/{queued} SmartLabel URLs...")
+
+    http_summary = journal_scrape(
+        queue,
+        journal,
+        checkpoint_every=args.checkpoint_every,
+        on_row=record_row,
+        timeout_seconds=args.timeout_seconds,
+        max_workers=args.max_workers,
+        host_concurrency=args.host_concurrency,
+        max_retries=args.max_retries,
+        validators=validators,
+        revalidate_rows=revalidate_rows,
+        discover=discover,
+    )
+    print(f"Scraped {completed}/{queued} SmartLabel URLs.")
 
+    # Compaction: fold the whole journal (this run plus any resumed runs) into the CSV.
+    scraped_rows = read_journal_rows(journal_path)
     merged_rows = merge_rows(existing_rows, scraped_rows)
     write_csv_rows(output_path, fieldnames, merged_rows)
+    if store_path:
+        write_store(store_path, fieldnames, merged_rows)
+    remove_journal(journal_path)
+    validators.compact()
 
     summary = {
         "input_file": str(input_path.resolve()),
         "output_file": str(output_path.resolve()),
+        "store_file": str(store_path.resolve()) if store_path else "",
         "existing_row_count": len(existing_rows),
         "output_row_count": len(merged_rows),
-        "scrape_queue_count": total,
-        "sitemap_discovered_by_host": discovered_by_host,
+        "scrape_queue_count": queued,
+        "revalidate_candidate_count": len(revalidate_rows),
+        "resumed_row_count": resumed_count,
+        "journaled_row_count": len(scraped_rows),
+        "sitemap_discovered_by_host": scrape_queue.discovered,
+        "search_api_failed_pages": scrape_queue.failed_search_api_pages,
         "scrape_stats": dict(scrape_stats),
+        "http": http_summary,
+        "html_parser": html_parser,
     }
     summary_path.parent.mkdir(parents=True, exist_ok=True)
     summary_path.write_text(json.dumps(summary, indent=2, sort_keys=True), encoding="utf-8")
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""SQLite store for the SmartLabel ground truth, with native list columns.
+
+The ground-truth CSV keeps its list fields (``ingredients_items_json`` and the
+``allergens_*_json`` columns) as JSON text that every reader parses again. The
+store keeps the scalar fields as columns of ``products``, one row per CSV row
+and in CSV order. Each list lives as ordered rows of ``product_list_items``
+(one JSON-encoded item per row, so non-string items survive), and its length sits beside the scalars as ``<list>_count`` (for example
+``allergens_declared_count``), so filters and rankings never need the items.
+
+Readers project only the columns they ask for and push simple comparisons down
+into SQL. The CSV stays the interchange format; this module converts both ways::
+
+    python3 scripts/ml/smartlabel_store.py --input ground_truth.csv --output ground_truth.sqlite
+    python3 scripts/ml/smartlabel_store.py --input ground_truth.sqlite --output ground_truth.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+LIST_COLUMNS = (
+    "ingredients_items_json",
+    "allergens_declared_json",
+    "allergens_present_json",
+    "allergens_may_contain_json",
+)
+STORE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+SCHEMA_VERSION = 2
+INSERT_BATCH_ROWS = 5000
+FILTER_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN"}
+INDEXED_COLUMNS = ("smartlabel_upc", "allergens_http_status")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert the SmartLabel ground truth between CSV and SQLite.")
+    parser.add_argument("--input", required=True, help="Source .csv or .sqlite file.")
+    parser.add_argument("--output", required=True, help="Destination .sqlite or .csv file.")
+    return parser.parse_args()
+
+
+def is_store_path(path: Path) -> bool:
+    return Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+def count_column(list_column: str) -> str:
+    return list_column.removesuffix("_json") + "_count"
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def decode_list(value: Any) -> list[Any]:
+    """List items of a JSON list cell, decoded as ``build_smartlabel_safe_catalog.json_list`` does.
+
+    Items keep their JSON types; empty, malformed and non-list cells count as
+    empty, so they are stored (and exported) as ``[]``.
+    """
+    if isinstance(value, list):
+        return value
+    text = str(value or "").strip()
+    if not text:
+        return []
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def write_store(path: Path, fieldnames: Sequence[str], rows: Iterable[dict[str, Any]]) -> int:
+    """Write ``rows`` (CSV-shaped dicts) to a fresh store at ``path``; returns the row count.
+
+    The store is built beside ``path`` and swapped in, so readers never see a
+    partial file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    if temp_path.exists():
+        temp_path.unlink()
+
+    fieldnames = list(fieldnames)
+    scalar_columns = [name for name in fieldnames if name not in LIST_COLUMNS]
+    list_columns = [name for name in LIST_COLUMNS if name in fieldnames]
+    column_defs = [f"{quote_identifier(name)} TEXT NOT NULL DEFAULT ''" for name in scalar_columns]
+    column_defs += [f"{quote_identifier(count_column(name))} INTEGER NOT NULL DEFAULT 0" for name in list_columns]
+    insert_columns = ["row_id", *scalar_columns, *(count_column(name) for name in list_columns)]
+    insert_sql = (
+        f"INSERT INTO products ({', '.join(quote_identifier(name) for name in insert_columns)}) "
+        f"VALUES ({', '.join('?' for _ in insert_columns)})"
+    )
+
+    connection = sqlite3.connect(temp_path)
+    count = 0
+    try:
+        # A temp file that is discarded on failure needs no rollback journal.
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        connection.execute(f"CREATE TABLE products (row_id INTEGER PRIMARY KEY, {', '.join(column_defs)})")
+        # Keyed list-first so "every ingredient list, in row order" is one range scan.
+        connection.execute(
+            "CREATE TABLE product_list_items ("
+            "list TEXT NOT NULL, row_id INTEGER NOT NULL, position INTEGER NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (list, row_id, position)) WITHOUT ROWID"
+        )
+        connection.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [("schema_version", str(SCHEMA_VERSION)), ("fieldnames", json.dumps(fieldnames))],
+        )
+
+        product_batch: list[tuple[Any, ...]] = []
+        item_batch: list[tuple[str, int, int, str]] = []
+
+        def flush() -> None:
+            connection.executemany(insert_sql, product_batch)
+            connection.executemany(
+                "INSERT INTO product_list_items (list, row_id, position, value) VALUES (?, ?, ?, ?)", item_batch
+            )
+            product_batch.clear()
+            item_batch.clear()
+
+        for count, row in enumerate(rows, start=1):
+            lists = [decode_list(row.get(name)) for name in list_columns]
+            product_batch.append(
+                (
+                    count,
+                    *(str(row.get(name) or "") for name in scalar_columns),
+                    *(len(items) for items in lists),
+                )
+            )
+            for name, items in zip(list_columns, lists):
+                item_batch.extend(
+                    (name, count, position, json.dumps(item, ensure_ascii=False)) for position, item in enumerate(items)
+                )
+            if len(product_batch) >= INSERT_BATCH_ROWS:
+                flush()
+        flush()
+
+        for name in INDEXED_COLUMNS:
+            if name in scalar_columns:
+                connection.execute(f"CREATE INDEX {quote_identifier('products_' + name)} ON products ({quote_identifier(name)})")
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+    return count
+
+
+def store_fieldnames(connection: sqlite3.Connection) -> list[str]:
+    meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+    if "fieldnames" not in meta:
+        raise RuntimeError("SmartLabel store has no fieldnames; was it written by smartlabel_store.write_store?")
+    if meta.get("schema_version") != str(SCHEMA_VERSION):
+        raise RuntimeError(
+            f"SmartLabel store has schema version {meta.get('schema_version')}, expected {SCHEMA_VERSION}; "
+            "rebuild it from the CSV."
+        )
+    return json.loads(meta["fieldnames"])
+
+
+def build_where(
+    where: Sequence[tuple[str, str, Any]],
+    filterable: set[str],
+) -> tuple[str, list[Any]]:
+    clauses: list[str] = []
+    params: list[Any] = []
+    for column, operator, value in where:
+        if column not in filterable:
+            raise RuntimeError(f"Cannot filter on {column!r}; filters apply to scalar and *_count columns.")
+        sql_operator = FILTER_OPERATORS.get(operator)
+        if sql_operator is None:
+            raise RuntimeError(f"Unsupported filter operator {operator!r}; use one of {', '.join(FILTER_OPERATORS)}.")
+        if sql_operator == "IN":
+            values = list(value)
+            if not values:
+                clauses.append("0")
+                continue
+            clauses.append(f"p.{quote_identifier(column)} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        else:
+            clauses.append(f"p.{quote_identifier(column)} {sql_operator} ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def iter_store_rows(
+    path: Path,
+    *,
+    columns: Sequence[str] | None = None,
+    where: Sequence[tuple[str, str, Any]] = (),
+) -> Iterator[dict[str, Any]]:
+    """Stream rows in CSV order as dicts of the requested ``columns``.
+
+    ``columns`` defaults to every CSV field. Scalar fields come back as text,
+    list fields as Python lists and ``*_count`` columns as ints. ``where``
+    holds ``(column, operator, value)`` comparisons on scalar or count columns.
+    Operators are ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=`` and ``in``, and
+    they are evaluated by SQLite before any row reaches Python; scalars compare
+    as text, so ``("allergens_http_status", "==", "200")``. Unprojected list
+    columns are never read.
+    """
+    connection = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+    try:
+        fieldnames = store_fieldnames(connection)
+        list_columns = [name for name in LIST_COLUMNS if name in fieldnames]
+        count_columns = {count_column(name) for name in list_columns}
+        scalar_columns = [name for name in fieldnames if name not in LIST_COLUMNS]
+        filterable = set(scalar_columns) | count_columns
+
+        requested = list(columns) if columns is not None else list(fieldnames)
+        unknown = [name for name in requested if name not in fieldnames and name not in count_columns]
+        if unknown:
+            raise RuntimeError(f"Unknown SmartLabel store columns: {', '.join(unknown)}")
+        selected_scalars = [name for name in requested if name not in LIST_COLUMNS]
+        selected_lists = [name for name in requested if name in LIST_COLUMNS]
+
+        where_sql, params = build_where(where, filterable)
+        select_sql = ", ".join(["p.row_id", *(f"p.{quote_identifier(name)}" for name in selected_scalars)])
+        products = connection.execute(f"SELECT {select_sql} FROM products p{where_sql} ORDER BY p.row_id", params)
+
+        # One ordered cursor per projected list, merged with the product rows by row_id.
+        list_cursors = {
+            name: connection.execute(
+                "SELECT i.row_id, i.value FROM product_list_items i "
+                f"JOIN products p ON p.row_id = i.row_id{where_sql}{' AND' if where_sql else ' WHERE'} i.list = ? "
+                "ORDER BY i.row_id, i.position",
+                [*params, name],
+            )
+            for name in selected_lists
+        }
+        pending = {name: cursor.fetchone() for name, cursor in list_cursors.items()}
+
+        for product in products:
+            row_id = product[0]
+            row: dict[str, Any] = dict(zip(selected_scalars, product[1:]))
+            for name, cursor in list_cursors.items():
+                items: list[Any] = []
+                entry = pending[name]
+                while entry is not None and entry[0] == row_id:
+                    items.append(json.loads(entry[1]))
+                    entry = cursor.fetchone()
+                pending[name] = entry
+                row[name] = items
+            yield {name: row[name] for name in requested}
+    finally:
+        connection.close()
+
+
+def iter_csv_rows(path: Path) -> Iterator[dict[str, str]]:
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as handle:
+        yield from csv.DictReader(handle)
+
+
+def csv_fieldnames(path: Path) -> list[str]:
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as handle:
+        return list(next(csv.reader(handle), []))
+
+
+def export_csv(store_path: Path, csv_path: Path) -> int:
+    """Write the store back out as a ground-truth CSV (lists as JSON text)."""
+    connection = sqlite3.connect(f"file:{Path(store_path).resolve()}?mode=ro", uri=True)
+    try:
+        fieldnames = store_fieldnames(connection)
+    finally:
+        connection.close()
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = csv_path.with_name(csv_path.name + ".tmp")
+    count = 0
+    with temp_path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in iter_store_rows(store_path):
+            for name in LIST_COLUMNS:
+                if name in row:
+                    row[name] = json.dumps(row[name], ensure_ascii=True)
+            writer.writerow(row)
+            count += 1
+    os.replace(temp_path, csv_path)
+    return count
+
+
+def main() -> None:
+    args = parse_args()
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    if not input_path.exists():
+        raise RuntimeError(f"Input not found: {input_path}")
+    if is_store_path(input_path) == is_store_path(output_path):
+        raise RuntimeError("Convert between a .csv and a .sqlite/.sqlite3/.db file.")
+
+    if is_store_path(output_path):
+        count = write_store(output_path, csv_fieldnames(input_path), iter_csv_rows(input_path))
+    else:
+        count = export_csv(input_path, output_path)
+    print(f"Wrote {count} SmartLabel rows to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
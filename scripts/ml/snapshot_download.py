@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Resumable, verified downloads for large OFF/USDA bulk snapshots."""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 1.0
+MANIFEST_SUFFIX = ".manifest.json"
+CONTENT_RANGE_RE = re.compile(r"^bytes\s+(\d+)-(\d+)/(\d+|\*)$", re.IGNORECASE)
+
+RETRYABLE_ERRORS: Tuple[type, ...] = (
+    urllib.error.URLError,
+    http.client.HTTPException,
+    ConnectionError,
+    TimeoutError,
+    socket.timeout,
+)
+
+
+def as_text(value: object) -> str:
+    return str(value or "").strip()
+
+
+def manifest_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + MANIFEST_SUFFIX)
+
+
+def temp_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".tmp")
+
+
+def partial_state_path_for(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".tmp.json")
+
+
+def read_manifest(path: Path) -> Dict[str, object]:
+    if not path.exists():
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def write_manifest(path: Path, payload: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def remove_if_exists(*paths: Path) -> None:
+    for path in paths:
+        if path.exists():
+            path.unlink()
+
+
+def sha256_file(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_content_range(value: str) -> Tuple[int, int, Optional[int]]:
+    match = CONTENT_RANGE_RE.match(as_text(value))
+    if not match:
+        raise RuntimeError(f"invalid Content-Range header: {value!r}")
+    total = None if match.group(3) == "*" else int(match.group(3))
+    return int(match.group(1)), int(match.group(2)), total
+
+
+def existing_matches_manifest(output_path: Path, manifest: Dict[str, object]) -> bool:
+    expected_size = manifest.get("size")
+    if expected_size is None:
+        return True
+    return int(output_path.stat().st_size) == int(expected_size)
+
+
+def response_validators(response: object) -> Dict[str, str]:
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return {"etag": "", "last_modified": ""}
+    return {
+        "etag": as_text(headers.get("ETag")),
+        "last_modified": as_text(headers.get("Last-Modified")),
+    }
+
+
+def retry_delay(attempt: int, backoff_seconds: float) -> float:
+    if backoff_seconds <= 0:
+        return 0.0
+    return min(20.0, backoff_seconds * (2 ** (attempt - 1)) + random.random() * backoff_seconds)
+
+
+def download_snapshot(
+    *,
+    url: str,
+    output_path: Path,
+    timeout: float,
+    force_download: bool = False,
+    revalidate: bool = False,
+    skip_download: bool = False,
+    user_agent: str = "",
+    expected_sha256: str = "",
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, object]:
+    """Download ``url`` to ``output_path``, resuming a partial ``.tmp`` file when possible.
+
+    A sidecar ``<output>.manifest.json`` records the ETag/Last-Modified validators,
+    size and SHA-256 of the completed snapshot. Existing snapshots are reused as-is
+    unless ``force_download`` is set; ``revalidate`` sends a conditional request
+    and keeps the local copy on ``304 Not Modified``.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path = manifest_path_for(output_path)
+    temp_path = temp_path_for(output_path)
+    state_path = partial_state_path_for(output_path)
+    manifest = read_manifest(manifest_path)
+    expected_sha256 = as_text(expected_sha256).lower()
+
+    conditional = False
+    if output_path.exists() and not force_download:
+        if not existing_matches_manifest(output_path, manifest):
+            print(
+                f"[warn] {output_path} size does not match {manifest_path.name}; redownloading",
+                file=sys.stderr,
+            )
+        elif not revalidate:
+            return {
+                "downloaded": False,
+                "not_modified": False,
+                "bytes_written": int(output_path.stat().st_size),
+                "resumed_from": 0,
+                "sha256": as_text(manifest.get("sha256")),
+            }
+        else:
+            conditional = bool(manifest.get("etag") or manifest.get("last_modified"))
+
+    if skip_download:
+        raise RuntimeError(f"snapshot missing or failed verification: {output_path}")
+
+    partial_state = read_manifest(state_path) if temp_path.exists() else {}
+    if temp_path.exists() and (
+        as_text(partial_state.get("url")) != url
+        or not (partial_state.get("etag") or partial_state.get("last_modified"))
+    ):
+        # Without validators we cannot prove the partial bytes belong to the same snapshot.
+        remove_if_exists(temp_path, state_path)
+        partial_state = {}
+
+    max_attempts = max(1, int(max_attempts))
+    last_error: Exception = RuntimeError("unknown download error")
+    resumed_from = 0
+    bytes_written = 0
+    digest = hashlib.sha256()
+    total_size: Optional[int] = None
+
+    for attempt in range(1, max_attempts + 1):
+        offset = int(temp_path.stat().st_size) if temp_path.exists() else 0
+        headers = {"User-Agent": user_agent} if user_agent else {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            validator = as_text(partial_state.get("etag")) or as_text(partial_state.get("last_modified"))
+            if validator:
+                headers["If-Range"] = validator
+        elif conditional:
+            if manifest.get("etag"):
+                headers["If-None-Match"] = as_text(manifest.get("etag"))
+            if manifest.get("last_modified"):
+                headers["If-Modified-Since"] = as_text(manifest.get("last_modified"))
+
+        request = urllib.request.Request(url, method="GET", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                status = int(getattr(response, "status", 200) or 200)
+                if status == 206 and offset:
+                    start, _end, total_size = parse_content_range(response.headers.get("Content-Range"))
+                    if start != offset:
+                        raise RuntimeError(f"server resumed at byte {start}, expected {offset}")
+                    mode = "ab"
+                else:
+                    # Full body: the server ignored Range or the snapshot changed (If-Range miss).
+                    offset = 0
+                    length = as_text(response.headers.get("Content-Length"))
+                    total_size = int(length) if length.isdigit() else None
+                    mode = "wb"
+
+                partial_state = {"url": url, "total_size": total_size, **response_validators(response)}
+                write_manifest(state_path, partial_state)
+
+                digest = hashlib.sha256()
+                if offset:
+                    with temp_path.open("rb") as existing:
+                        while True:
+                            chunk = existing.read(chunk_size)
+                            if not chunk:
+                                break
+                            digest.update(chunk)
+                    if not resumed_from:
+                        resumed_from = offset
+                    print(f"[download] resuming {output_path.name} at byte {offset}", file=sys.stderr)
+
+                with temp_path.open(mode) as out:
+                    while True:
+                        chunk = response.read(chunk_size)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        digest.update(chunk)
+                        bytes_written += len(chunk)
+        except urllib.error.HTTPError as error:
+            if error.code == 304 and conditional:
+                return {
+                    "downloaded": False,
+                    "not_modified": True,
+                    "bytes_written": int(output_path.stat().st_size),
+                    "resumed_from": 0,
+                    "sha256": as_text(manifest.get("sha256")),
+                }
+            if error.code == 416:
+                # Partial file is stale or already past the end; start over.
+                remove_if_exists(temp_path, state_path)
+                partial_state = {}
+                last_error = error
+                if attempt < max_attempts:
+                    continue
+            elif error.code not in (408, 429) and error.code < 500:
+                raise RuntimeError(f"download failed: {error}") from error
+            else:
+                last_error = error
+        except RETRYABLE_ERRORS as error:
+            last_error = error
+        else:
+            final_size = int(temp_path.stat().st_size)
+            if total_size is None or final_size == total_size:
+                break
+            if final_size > total_size:
+                remove_if_exists(temp_path, state_path)
+                raise RuntimeError(
+                    f"download size mismatch for {output_path.name}: got {final_size} bytes, expected {total_size}"
+                )
+            last_error = RuntimeError(f"connection closed at byte {final_size} of {total_size}")
+
+        if attempt >= max_attempts:
+            raise RuntimeError(
+                f"download failed after {max_attempts} attempts (partial kept at {temp_path}): {last_error}"
+            ) from last_error
+        sleep_seconds = retry_delay(attempt, backoff_seconds)
+        print(
+            f"[warn] download interrupted (attempt {attempt}/{max_attempts}): {last_error}; "
+            f"retrying in {sleep_seconds:.1f}s",
+            file=sys.stderr,
+        )
+        if sleep_seconds:
+            time.sleep(sleep_seconds)
+
+    sha256 = digest.hexdigest()
+    if expected_sha256 and sha256 != expected_sha256:
+        remove_if_exists(temp_path, state_path)
+        raise RuntimeError(f"download checksum mismatch for {output_path.name}: got {sha256}, expected {expected_sha256}")
+
+    size = int(temp_path.stat().st_size)
+    os.replace(temp_path, output_path)
+    write_manifest(
+        manifest_path,
+        {
+            "url": url,
+            "etag": as_text(partial_state.get("etag")),
+            "last_modified": as_text(partial_state.get("last_modified")),
+            "size": size,
+            "sha256": sha256,
+            "downloaded_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+    remove_if_exists(state_path)
+    return {
+        "downloaded": True,
+        "not_modified": False,
+        "bytes_written": bytes_written,
+        "resumed_from": resumed_from,
+        "sha256": sha256,
+    }
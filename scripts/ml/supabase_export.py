@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""Keyset-paginated, concurrent PostgREST table pulls with incremental watermarks."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from http_client import HttpClient, HttpStatusError
+from jsonl_checkpoint import read_state, write_state
+
+
+STATE_FILENAME = "export_state.json"
+
+
+class TableSpec(NamedTuple):
+    """One table pull.
+
+    ``name`` is the snapshot stem written under the raw output dir. Rows are
+    paged on ``key_column`` (the primary key) and re-sorted locally by
+    ``sort_by`` so callers see the same order an ``order=`` query would give.
+    Tables with an ``updated_column`` can be pulled incrementally.
+    """
+
+    name: str
+    table: str
+    columns: str
+    filters: Tuple[Tuple[str, str], ...] = ()
+    sort_by: Tuple[str, ...] = ()
+    updated_column: str = ""
+    key_column: str = "id"
+
+
+def select_columns(spec: TableSpec) -> str:
+    columns = [column.strip() for column in spec.columns.split(",") if column.strip()]
+    for required in (spec.key_column, spec.updated_column):
+        if required and required not in columns:
+            columns.append(required)
+    return ",".join(columns)
+
+
+def fetch_table_keyset(
+    client: HttpClient,
+    base_url: str,
+    api_key: str,
+    spec: TableSpec,
+    *,
+    page_size: int = 1000,
+    since: str = "",
+) -> Tuple[List[Dict[str, object]], int]:
+    """Pull every row of ``spec`` ordered by its key, ``page_size`` rows at a time.
+
+    Each page asks for ``key > last key seen`` instead of an offset, so page
+    cost stays flat however deep the table is. With ``since`` only rows whose
+    ``updated_column`` is at or past it are returned. Returns ``(rows, pages)``.
+    """
+    url = f"{base_url.rstrip('/')}/rest/v1/{spec.table}"
+    headers = {"apikey": api_key, "Authorization": f"Bearer {api_key}"}
+    base_params: List[Tuple[str, str]] = [("select", select_columns(spec))]
+    base_params.extend(spec.filters)
+    if since and spec.updated_column:
+        # gte rather than gt: rows sharing the watermark timestamp but committed
+        # after the previous pull are re-read and deduplicated on merge.
+        base_params.append((spec.updated_column, f"gte.{since}"))
+    base_params.append(("order", f"{spec.key_column}.asc"))
+    base_params.append(("limit", str(page_size)))
+
+    out: List[Dict[str, object]] = []
+    last_key = ""
+    pages = 0
+    while True:
+        params = list(base_params)
+        if last_key:
+            params.append((spec.key_column, f"gt.{last_key}"))
+        try:
+            payload = client.get_json(url, params=params, headers=headers)
+        except HttpStatusError as error:
+            message = error.body.decode("utf-8", errors="replace")
+            raise RuntimeError(f"Supabase request failed for {spec.table} ({error.status}): {message[:240]}") from error
+
+        if payload is None:
+            payload = []
+        if not isinstance(payload, list):
+            raise RuntimeError(f"Unexpected response shape for {spec.table}: expected list")
+        pages += 1
+        if not payload:
+            break
+
+        out.extend(payload)
+        if len(payload) < page_size:
+            break
+        next_key = str(payload[-1].get(spec.key_column) or "")
+        if not next_key or next_key == last_key:
+            raise RuntimeError(f"Keyset pagination on {spec.table}.{spec.key_column} did not advance")
+        last_key = next_key
+    return out, pages
+
+
+def merge_rows_by_key(
+    previous: Iterable[Dict[str, object]],
+    changed: Iterable[Dict[str, object]],
+    key_column: str,
+) -> List[Dict[str, object]]:
+    """Overlay ``changed`` onto ``previous`` by key; new keys are appended."""
+    merged: Dict[str, Dict[str, object]] = {}
+    for row in previous:
+        merged[str(row.get(key_column) or "")] = row
+    for row in changed:
+        merged[str(row.get(key_column) or "")] = row
+    return list(merged.values())
+
+
+def sort_rows(rows: List[Dict[str, object]], spec: TableSpec) -> List[Dict[str, object]]:
+    """Key order first, then a stable sort on ``sort_by`` (nulls last)."""
+    ordered = sorted(rows, key=lambda row: str(row.get(spec.key_column) or ""))
+    if spec.sort_by:
+        ordered.sort(
+            key=lambda row: tuple(
+                (row.get(column) is None, row.get(column) if row.get(column) is not None else "")
+                for column in spec.sort_by
+            )
+        )
+    return ordered
+
+
+def newest_value(rows: Iterable[Dict[str, object]], column: str, default: str = "") -> str:
+    newest = default
+    for row in rows:
+        value = row.get(column)
+        if value and str(value) > newest:
+            newest = str(value)
+    return newest
+
+
+def load_snapshot_rows(path: Path) -> Optional[List[Dict[str, object]]]:
+    """Rows of a raw ``{"rows": [...]}`` snapshot, or ``None`` when there is none."""
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    rows = payload.get("rows") if isinstance(payload, dict) else None
+    return rows if isinstance(rows, list) else None
+
+
+def export_tables(
+    client: HttpClient,
+    base_url: str,
+    api_key: str,
+    specs: Sequence[TableSpec],
+    *,
+    raw_output_dir: Path,
+    page_size: int = 1000,
+    workers: int = 4,
+    incremental: bool = False,
+) -> Tuple[Dict[str, List[Dict[str, object]]], Dict[str, Dict[str, object]]]:
+    """Pull ``specs`` concurrently (one table per worker) through a shared client.
+
+    With ``incremental`` a table that has an ``updated_column``, a stored
+    watermark in ``export_state.json`` and a previous snapshot only fetches
+    rows changed since the watermark and merges them into that snapshot.
+    Anything else is pulled in full. Deleted rows are only dropped by a full
+    pull. The caller writes the snapshots, then :func:`write_export_state`.
+    Returns ``(rows by table name, per-table stats)``.
+    """
+    previous_state = read_state(raw_output_dir / STATE_FILENAME) if incremental else {}
+    previous_tables = previous_state.get("tables") if isinstance(previous_state.get("tables"), dict) else {}
+
+    def pull(spec: TableSpec) -> Tuple[List[Dict[str, object]], Dict[str, object]]:
+        watermark = ""
+        previous_rows = None
+        if incremental and spec.updated_column:
+            watermark = str((previous_tables.get(spec.name) or {}).get("watermark") or "")
+            if watermark:
+                previous_rows = load_snapshot_rows(raw_output_dir / f"{spec.name}.json")
+        if previous_rows is None:
+            watermark = ""
+
+        fetched, pages = fetch_table_keyset(client, base_url, api_key, spec, page_size=page_size, since=watermark)
+        rows = merge_rows_by_key(previous_rows, fetched, spec.key_column) if previous_rows is not None else fetched
+        rows = sort_rows(rows, spec)
+        stats: Dict[str, object] = {
+            "mode": "incremental" if previous_rows is not None else "full",
+            "pages": pages,
+            "fetched_rows": len(fetched),
+            "rows": len(rows),
+        }
+        if spec.updated_column:
+            stats["watermark"] = newest_value(rows, spec.updated_column, watermark)
+        return rows, stats
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(specs) or 1))) as executor:
+        futures = [executor.submit(pull, spec) for spec in specs]
+        results = [future.result() for future in futures]
+
+    rows_by_table = {spec.name: rows for spec, (rows, _stats) in zip(specs, results)}
+    stats_by_table = {spec.name: stats for spec, (_rows, stats) in zip(specs, results)}
+    return rows_by_table, stats_by_table
+
+
+def write_export_state(raw_output_dir: Path, stats_by_table: Mapping[str, Dict[str, object]]) -> None:
+    """Record per-table watermarks once the snapshots they describe are on disk.
+
+    Tables not pulled this run keep their previous entry.
+    """
+    state_path = raw_output_dir / STATE_FILENAME
+    previous_tables = read_state(state_path).get("tables")
+    tables = dict(previous_tables) if isinstance(previous_tables, dict) else {}
+    for name, stats in stats_by_table.items():
+        if stats.get("watermark"):
+            tables[name] = {"watermark": stats["watermark"], "rows": stats["rows"]}
+        else:
+            tables.pop(name, None)
+    write_state(state_path, {"tables": tables})
@@ -0,0 +1,61 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("analyze_allergen_ingredient_database.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("analyze_allergen_ingredient_database", MODULE_PATH)
+analyze = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered because dataclasses resolve field annotations through sys.modules.
+sys.modules[SPEC.name] = analyze
+SPEC.loader.exec_module(analyze)
+
+TERMS = [
+    ("milk", ("milk",)),
+    ("milk", ("whey",)),
+    ("milk", ("whey", "protein")),
+    ("wheat", ("wheat", "flour")),
+    ("wheat", ("flour",)),
+    ("egg", ("egg", "whites")),
+]
+ROWS = [
+    {"text": "Water, Whey Protein, Milk, Salt", "allergens": ["Milk"]},
+    {"text": "Enriched Wheat Flour, Milk Solids", "allergens": ["Wheat", "Milk"]},
+    {"text": "Rice Flour, Sugar", "allergens": []},
+    {"text": "Egg Whites, Whey, Whey", "allergens": ["Egg"]},
+    {"text": "", "allergens": ["Soy"]},
+]
+
+
+class ScanDatasetsTests(unittest.TestCase):
+    def test_sharded_scan_matches_in_process_scan(self):
+        entries = [
+            analyze.TermEntry(term_id, allergen_key, allergen_key.title(), " ".join(tokens), tokens, "existing", "test")
+            for term_id, (allergen_key, tokens) in enumerate(TERMS)
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            dataset = Path(temp_dir) / "rows.jsonl"
+            dataset.write_text("\n".join(json.dumps(row) for row in ROWS * 5) + "\n", encoding="utf-8")
+
+            serial = analyze.scan_datasets([dataset], entries)
+            sharded = analyze.scan_datasets([dataset], entries, workers=2, shard_bytes=50)
+
+        def comparable(scan):
+            total_rows, stats_by_term_id, allergen_summary = scan
+            return total_rows, {key: vars(value) for key, value in stats_by_term_id.items()}, {
+                key: vars(value) for key, value in allergen_summary.items()
+            }
+
+        self.assertEqual(comparable(sharded), comparable(serial))
+        self.assertEqual(serial[0], 25)
+        self.assertEqual(vars(serial[1][1]), {"rows_matched": 10, "rows_with_target_allergen": 5, "mentions_total": 15})
+        self.assertEqual(serial[2]["milk"].labeled_rows_with_term, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+import asyncio
+import gzip
+import http.server
+import importlib.util
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("async_http_client.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("async_http_client", MODULE_PATH)
+async_http_client = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(async_http_client)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay_seconds = 0.0
+    throttled_remaining = 0
+    paths_seen: list = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test server output
+        return
+
+    def do_GET(self):
+        handler = type(self)
+        with handler.lock:
+            handler.paths_seen.append(self.path)
+        if handler.delay_seconds:
+            time.sleep(handler.delay_seconds)
+        if self.path.startswith("/throttled"):
+            with handler.lock:
+                throttle = handler.throttled_remaining > 0
+                handler.throttled_remaining -= 1
+            if throttle:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        if self.path.startswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", "/chunked")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/chunked"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in (b"hello ", b"chunked ", b"world"):
+                self.wfile.write(f"{len(piece):x}\r\n".encode("ascii") + piece + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        if self.path.startswith("/corrupt-deflate"):
+            self.send_response(200)
+            self.send_header("Content-Encoding", "deflate")
+            self.send_header("Content-Length", "12")
+            self.end_headers()
+            self.wfile.write(b"not deflated")
+            return
+        body = f"path={self.path}".encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(test, handler_class):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    test.addCleanup(server.server_close)
+    test.addCleanup(server.shutdown)
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class AsyncHttpClientTests(unittest.TestCase):
+    def setUp(self):
+        StubHandler.delay_seconds = 0.0
+        StubHandler.throttled_remaining = 0
+        StubHandler.paths_seen = []
+        self.base_url = start_server(self, StubHandler)
+
+    def test_reuses_connections_and_decodes_bodies(self):
+        async def run():
+            async with async_http_client.AsyncHttpClient(timeout=5.0) as client:
+                texts = [(await client.request("GET", f"{self.base_url}/page/{index}")).text() for index in range(4)]
+                redirected = await client.request("GET", f"{self.base_url}/redirect")
+                posted = await client.request("POST", f"{self.base_url}/form", data=b"id=1&isNutri=true")
+                return texts, redirected, posted, dict(client.stats)
+
+        texts, redirected, posted, stats = asyncio.run(run())
+
+        self.assertEqual(texts, [f"path=/page/{index}" for index in range(4)])
+        self.assertEqual(redirected.text(), "hello chunked world")
+        self.assertEqual(posted.body, b"id=1&isNutri=true")
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["requests"], 7)
+
+    def test_corrupt_content_coding_is_a_transport_error(self):
+        async def run():
+            async with async_http_client.AsyncHttpClient(timeout=5.0) as client:
+                await client.request("GET", f"{self.base_url}/corrupt-deflate")
+
+        with self.assertRaises(async_http_client.ProtocolError) as context:
+            asyncio.run(run())
+        self.assertIsInstance(context.exception, async_http_client.TRANSPORT_ERRORS)
+
+    def test_adaptive_client_retries_throttled_host_and_cuts_its_limit(self):
+        StubHandler.throttled_remaining = 2
+
+        async def run():
+            async with async_http_client.AsyncHttpClient(timeout=5.0) as client:
+                adaptive = async_http_client.AdaptiveHttpClient(
+                    client, initial_per_host=4, max_per_host=4, max_retries=3, backoff_seconds=0.0
+                )
+                response = await adaptive.request("GET", f"{self.base_url}/throttled")
+                return response, adaptive.summary()
+
+        response, summary = asyncio.run(run())
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(summary["retries"], 2)
+        host_summary = next(iter(summary["hosts"].values()))
+        self.assertEqual(host_summary["decreases"], 2)
+        self.assertLess(host_summary["limit"], 4)
+
+    def test_slow_host_does_not_starve_other_hosts(self):
+        class SlowHandler(StubHandler):
+            delay_seconds = 0.25
+            paths_seen: list = []
+
+        slow_url = start_server(self, SlowHandler)
+        finished = {}
+
+        async def run():
+            async with async_http_client.AsyncHttpClient(timeout=5.0) as client:
+                adaptive = async_http_client.AdaptiveHttpClient(client, initial_per_host=2, max_per_host=2, max_in_flight=4)
+                started = time.monotonic()
+
+                async def handle(url):
+                    await adaptive.request("GET", url)
+                    finished[url] = time.monotonic() - started
+
+                work = async_http_client.HostWorkQueue(handle, workers_per_host=2)
+                for index in range(8):
+                    work.put(f"{slow_url}/slow/{index}")
+                for index in range(20):
+                    work.put(f"{self.base_url}/fast/{index}")
+                self.assertFalse(work.put(f"{self.base_url}/fast/0"))
+                await work.join()
+
+        asyncio.run(run())
+
+        fast_done = max(seconds for url, seconds in finished.items() if "/fast/" in url)
+        slow_done = max(seconds for url, seconds in finished.items() if "/slow/" in url)
+        self.assertEqual(len(finished), 28)
+        self.assertLess(fast_done, 0.5)
+        self.assertGreaterEqual(slow_done, 0.9)
+
+
+class AimdControllerTests(unittest.TestCase):
+    def test_additive_increase_and_one_decrease_per_window(self):
+        async def run():
+            controller = async_http_client.AimdController(initial=2, maximum=4)
+            for _ in range(6):
+                started = await controller.acquire()
+                await controller.release(started, status=200)
+            grown = controller.limit
+
+            first = await controller.acquire()
+            second = await controller.acquire()
+            await controller.release(first, status=429)
+            await controller.release(second, status=503)
+            return grown, controller.limit, controller.stats["decreases"]
+
+        grown, cut, decreases = asyncio.run(run())
+
+        self.assertGreater(grown, 3.0)
+        self.assertLessEqual(grown, 4.0)
+        # Both failures were in flight before the first cut, so only one halving applies.
+        self.assertEqual(decreases, 1)
+        self.assertAlmostEqual(cut, grown / 2)
+
+    def test_retry_after_pauses_new_requests(self):
+        async def run():
+            controller = async_http_client.AimdController(initial=2, maximum=2)
+            started = await controller.acquire()
+            await controller.release(started, status=429, retry_after=0.2)
+            before = time.monotonic()
+            await controller.acquire()
+            return time.monotonic() - before
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.15)
+
+    def test_cancelled_pause_gives_its_slot_back(self):
+        async def run():
+            controller = async_http_client.AimdController(initial=1, maximum=1)
+            started = await controller.acquire()
+            await controller.release(started, status=429, retry_after=30.0)
+            waiter = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            return controller.in_flight
+
+        self.assertEqual(asyncio.run(run()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
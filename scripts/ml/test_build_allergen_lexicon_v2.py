@@ -0,0 +1,219 @@
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("build_allergen_lexicon_v2.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("build_allergen_lexicon_v2", MODULE_PATH)
+lexicon = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered because dataclasses resolve field annotations through sys.modules.
+sys.modules[SPEC.name] = lexicon
+SPEC.loader.exec_module(lexicon)
+
+ROWS = [
+    {"text": "Water, Whey Protein Concentrate, Milk, Salt", "allergens": ["Milk"]},
+    {"text": "Enriched Wheat Flour, Milk Solids, Soy Lecithin", "allergens": ["Wheat", "Milk", "Soy"]},
+    {"text": "Sugar, Cocoa Butter, Whey (Milk), Natural Flavor", "allergens": ["Milk"]},
+    {"text": "Peanuts, Sugar, Peanut Oil, Salt", "allergens": ["Peanut"]},
+    {"text": "Rice, Water, Salt", "allergens": []},
+    {"text": "Barley Malt Extract, Whole Wheat Flour; Whey", "allergens": ["Wheat"]},
+    {"text": "Butter (Cream, Salt), Egg Whites, Sugar", "allergens": ["Milk", "Egg"]},
+]
+
+
+def build_aliases():
+    canonical_by_key, canonical_by_id, canonical_id_counter, aliases, alias_token_index = {}, {}, {}, [], {}
+    lexicon.ingest_manual_seeds(canonical_by_key, canonical_by_id, canonical_id_counter, aliases, alias_token_index)
+    lexicon.ingest_rule_variants(aliases, alias_token_index)
+    return canonical_by_id, aliases
+
+
+def comparable(scan):
+    total_rows, alias_stats, canonical_stats, class_summary, *candidates = scan
+    return (
+        total_rows,
+        {key: vars(value) for key, value in alias_stats.items()},
+        {key: vars(value) for key, value in canonical_stats.items()},
+        {key: vars(value) for key, value in class_summary.items()},
+        [{key: dict(counter) for key, counter in counters.items()} for counters in candidates],
+    )
+
+
+class ScanRecordTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dataset = Path(temp_dir.name) / "rows.jsonl"
+        self.dataset.write_text(
+            "\n".join(json.dumps(row) for row in ROWS) + "\n\n[]\n",
+            encoding="utf-8",
+        )
+        self.canonical_by_id, self.aliases = build_aliases()
+
+    def test_aggregates_after_demotion_match_a_fresh_scan(self):
+        demoted_ids = {alias.alias_id for alias in self.aliases if alias.alias_tokens[:2] == ("milk", "solids")}
+        self.assertTrue(demoted_ids)
+        record = lexicon.record_dataset_matches([self.dataset], self.aliases, set())
+
+        before = lexicon.aggregate_scan_record(record, self.aliases, self.canonical_by_id, set())
+        after = lexicon.aggregate_scan_record(record, self.aliases, self.canonical_by_id, demoted_ids)
+        rescanned = lexicon.scan_datasets([self.dataset], self.aliases, self.canonical_by_id, demoted_ids)
+
+        self.assertEqual(record.total_rows, len(ROWS))
+        self.assertEqual(comparable(after), comparable(rescanned))
+        self.assertTrue(any(before[1][alias_id].rows_matched for alias_id in demoted_ids))
+        self.assertFalse(any(after[1][alias_id].rows_matched for alias_id in demoted_ids))
+
+    def test_sharded_process_pool_record_matches_serial(self):
+        serial = lexicon.record_dataset_matches([self.dataset, self.dataset], self.aliases, set())
+        sharded = lexicon.record_dataset_matches([self.dataset, self.dataset], self.aliases, set(), workers=2, shard_bytes=64)
+
+        self.assertEqual(sharded.total_rows, 2 * len(ROWS))
+        self.assertEqual(vars(sharded), vars(serial))
+
+    def test_record_interns_label_sets_and_chunks(self):
+        record = lexicon.record_dataset_matches([self.dataset], self.aliases, set())
+
+        self.assertEqual(len(record.label_sets), 6)
+        self.assertEqual(len(record.match_offsets), len(ROWS) + 1)
+        self.assertEqual(len(record.chunks), len(set(record.chunks)))
+        whey = record.chunks.index(("whey",))
+        self.assertEqual(record.chunk_classes[whey], ("milk",))
+        self.assertEqual(list(record.chunk_ids).count(whey), 2)
+
+    def test_memory_bounded_mining_keeps_only_supported_chunks(self):
+        exact = lexicon.record_dataset_matches([self.dataset], self.aliases, set())
+        bounded = lexicon.record_dataset_matches(
+            [self.dataset], self.aliases, set(), candidate_memory_mb=0.01, min_chunk_support=2
+        )
+        self.assertEqual(sorted(bounded.chunks), [("milk",), ("whey",)])
+        self.assertEqual(list(bounded.match_alias_ids), list(exact.match_alias_ids))
+
+        def queue(record):
+            scan = lexicon.aggregate_scan_record(record, self.aliases, self.canonical_by_id, set())
+            return lexicon.build_candidate_queue(
+                *scan[4:],
+                alias_token_index={},
+                policy_rows={},
+                min_support=2,
+                min_precision=0.5,
+                min_exclusivity=0.5,
+                min_unmatched_target_rows=1,
+                max_review_per_class=10,
+            )
+
+        self.assertEqual(queue(bounded), queue(exact))
+
+
+class ChunkClassTests(unittest.TestCase):
+    def test_root_token_index_matches_the_class_scan(self):
+        for tokens in [("whey",), ("wheat", "flour"), ("peanut", "butter"), ("tree", "nut"), ("sugar",), ("egg", "milk")]:
+            expected = tuple(key for key in lexicon.CLASS_ORDER if lexicon.class_token_overlap(tokens, key))
+            self.assertEqual(lexicon.chunk_class_keys(tokens), expected)
+
+    def test_sketch_never_undercounts_and_merges(self):
+        chunks = [(f"term{index}",) for index in range(50)]
+        left, right = lexicon.ChunkSketch(16), lexicon.ChunkSketch(16)
+        for index, chunk in enumerate(chunks):
+            for _ in range(index % 5):
+                left.add(chunk)
+                right.add(chunk)
+        left.merge(right)
+        for index, chunk in enumerate(chunks):
+            self.assertGreaterEqual(left.estimate(chunk), 2 * (index % 5))
+        with self.assertRaises(RuntimeError):
+            left.merge(lexicon.ChunkSketch(8))
+
+
+class CandidateQueueTests(unittest.TestCase):
+    def random_candidates(self, seed):
+        rng = random.Random(seed)
+        maps = [{class_key: Counter() for class_key in lexicon.CLASS_ORDER} for _ in range(5)]
+        total, target, unmatched, other_labeled, unlabeled = maps
+        for class_key in lexicon.CLASS_ORDER:
+            roots = sorted(lexicon.CLASS_ROOT_TOKENS.get(class_key, set())) or ["none"]
+            for index in range(300):
+                # Small value ranges so ties (and ties at the per-class cut) are common.
+                tokens = (rng.choice(roots), f"term{index % 40}")[: rng.randint(1, 2)] + ("x",) * rng.choice([0, 0, 7])
+                support = rng.randint(0, 60)
+                hits = rng.randint(0, support)
+                total[class_key][tokens] = support
+                target[class_key][tokens] = hits
+                unmatched[class_key][tokens] = rng.randint(0, hits)
+                other_labeled[class_key][tokens] = rng.randint(0, support - hits)
+                unlabeled[class_key][tokens] = rng.randint(0, 3)
+        return maps
+
+    def test_vectorized_queue_matches_the_reference(self):
+        for seed in range(6):
+            maps = self.random_candidates(seed)
+            # Every fourth candidate is already an alias and every fifth is denied, so the
+            # dictionary filters reject rows on both sides of the per-class cut.
+            candidates = [(key, tokens) for key in lexicon.CLASS_ORDER for tokens in maps[2][key]]
+            options = dict(
+                alias_token_index={candidate: 0 for candidate in candidates[::4]},
+                policy_rows={
+                    ("*", tokens): lexicon.AliasPolicyRow("*", tokens, "deny", "", "") for _key, tokens in candidates[1::5]
+                },
+                min_support=[1, 4, 10][seed % 3],
+                min_precision=0.5,
+                min_exclusivity=0.5,
+                min_unmatched_target_rows=[0, 1, 3][seed % 3],
+            )
+            for limit in (0, 1, 5, 25, 1000):
+                with self.subTest(seed=seed, limit=limit):
+                    expected = lexicon.build_candidate_queue_reference(*maps, max_review_per_class=limit, **options)
+                    actual = lexicon.build_candidate_queue(*maps, max_review_per_class=limit, **options)
+                    self.assertEqual([vars(row) for row in actual], [vars(row) for row in expected])
+
+
+class ScanCacheTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+        self.datasets = [self.root / "first.jsonl", self.root / "second.jsonl"]
+        self.datasets[0].write_text("\n".join(json.dumps(row) for row in ROWS[:4]) + "\n", encoding="utf-8")
+        self.datasets[1].write_text("\n".join(json.dumps(row) for row in ROWS[4:]) + "\n", encoding="utf-8")
+        self.canonical_by_id, self.aliases = build_aliases()
+
+    def test_cached_records_match_an_uncached_scan(self):
+        cache = lexicon.ScanCache(self.root / "cache")
+        uncached = lexicon.record_dataset_matches(self.datasets, self.aliases, set())
+
+        first = lexicon.record_dataset_matches(self.datasets, self.aliases, set(), scan_cache=cache)
+        second = lexicon.record_dataset_matches(self.datasets, self.aliases, set(), scan_cache=cache, workers=2)
+
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(vars(first), vars(uncached))
+        self.assertEqual(vars(second), vars(uncached))
+
+    def test_only_changed_files_and_alias_sets_are_rescanned(self):
+        cache = lexicon.ScanCache(self.root / "cache")
+        lexicon.record_dataset_matches(self.datasets, self.aliases, set(), scan_cache=cache)
+
+        with self.datasets[1].open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(ROWS[0]) + "\n")
+        changed = lexicon.record_dataset_matches(self.datasets, self.aliases, set(), scan_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(vars(changed), vars(lexicon.record_dataset_matches(self.datasets, self.aliases, set())))
+
+        lexicon.record_dataset_matches(self.datasets, self.aliases, {self.aliases[0].alias_id}, scan_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 5))
+
+    def test_memory_bounded_mining_refuses_the_cache(self):
+        with self.assertRaises(RuntimeError):
+            lexicon.record_dataset_matches(
+                self.datasets, self.aliases, set(), candidate_memory_mb=1.0, scan_cache=lexicon.ScanCache(self.root)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,15 +2,20 @@ import csv
 import gzip
 import importlib.util
 import json
+import sys
 import tempfile
 import unittest
 from pathlib import Path
 
 
 MODULE_PATH = Path(__file__).with_name("build_ingredient_catalog.py")
+REVIEW_QUEUE_PATH = MODULE_PATH.parents[2] / "ml" / "review" / "ingredient_catalog_review_queue.csv"
+sys.path.insert(0, str(MODULE_PATH.parent))
 SPEC = importlib.util.spec_from_file_location("build_ingredient_catalog", MODULE_PATH)
 build_ingredient_catalog = importlib.util.module_from_spec(SPEC)
 assert SPEC and SPEC.loader
+# Registered so process-pool workers can pickle the module's scan functions.
+sys.modules[SPEC.name] = build_ingredient_catalog
 SPEC.loader.exec_module(build_ingredient_catalog)
 
 
@@ -279,6 +284,91 @@ class BuildIngredientCatalogTests(unittest.TestCase):
         self.assertEqual(rows_by_name["carrot"]["lookup_count"], 2)
         self.assertEqual(rows_by_name["water"]["lookup_count"], 2)
 
+    def test_csv_records_skip_blank_lines(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        snapshot_path = Path(tmpdir.name) / "en.openfoodfacts.org.products.csv"
+        snapshot_path.write_text("code\tproduct_name\n\n4001\tCarrots\n\n", encoding="utf-8")
+
+        records = list(build_ingredient_catalog.iter_off_records(snapshot_path))
+
+        self.assertEqual(len(records), len(list(build_ingredient_catalog.iter_off_rows(snapshot_path))))
+        self.assertEqual(len(records), 1)
+
+    def test_parallel_csv_scan_matches_serial_scan(self):
+        rows = []
+        for index in range(40):
+            rows.append(
+                {
+                    "code": f"5{index:03d}",
+                    "countries_tags": "en:united-states" if index % 7 else "en:france",
+                    "ingredients_text": ["Organic Carrots, Water", "Fresh Carrot, Sea Salt", "Water, Natural Flavors"][index % 3],
+                    "allergens": "en:milk" if index % 11 == 0 else "",
+                    "traces_tags": "",
+                    "ingredients_analysis_tags": "en:vegan,en:vegetarian",
+                    "product_name": f"Product {index}",
+                    "brands": f"Brand {index % 4}",
+                    "unused_column": "x" * index,
+                }
+            )
+
+        tmpdir, snapshot_path = self.write_csv_snapshot(rows)
+        self.addCleanup(tmpdir.cleanup)
+        options = dict(
+            input_path=snapshot_path,
+            alias_limit=12,
+            limit=0,
+            min_support=2,
+            country_tag="en:united-states",
+            min_text_len=12,
+            sample_limit=5,
+        )
+        serial_rows, serial_summary = build_ingredient_catalog.build_catalog_rows(**options)
+        parallel_rows, parallel_summary = build_ingredient_catalog.build_catalog_rows(
+            workers=2,
+            chunk_rows=3,
+            **options,
+        )
+
+        self.assertTrue(serial_rows)
+        self.assertEqual(parallel_rows, serial_rows)
+        # Memo hit counts depend on how chunks land on worker processes.
+        serial_summary.pop("candidate_memo")
+        parallel_summary.pop("candidate_memo")
+        self.assertEqual(parallel_summary, serial_summary)
+
+    def test_candidate_memo_does_not_change_output(self):
+        rows = [
+            {
+                "code": f"6{index:03d}",
+                "countries_tags": ["en:united-states"],
+                "ingredients_text_en": ["Organic Carrots, Water", "Whole Milk, Water", "Water, Sea Salt"][index % 3],
+                "allergens_tags": [],
+                "traces_tags": [],
+                "ingredients_analysis_tags": [],
+            }
+            for index in range(12)
+        ]
+        tmpdir, snapshot_path = self.write_snapshot(rows)
+        self.addCleanup(tmpdir.cleanup)
+        options = dict(
+            input_path=snapshot_path,
+            alias_limit=12,
+            limit=0,
+            min_support=2,
+            country_tag="en:united-states",
+            min_text_len=12,
+            sample_limit=5,
+        )
+        memo_rows, memo_summary = build_ingredient_catalog.build_catalog_rows(**options)
+        plain_rows, plain_summary = build_ingredient_catalog.build_catalog_rows(memo_size=0, **options)
+
+        self.assertEqual(memo_rows, plain_rows)
+        self.assertEqual(plain_summary["candidate_memo"]["hits"], 0)
+        self.assertEqual(memo_summary["candidate_memo"]["lookups"], plain_summary["candidate_memo"]["lookups"])
+        self.assertGreater(memo_summary["candidate_memo"]["hit_rate"], 0.5)
+        self.assertEqual(memo_summary["rejection_counts"], plain_summary["rejection_counts"])
+
     def test_classify_candidate_rejects_punctuation_tainted_and_compact_allergen_terms(self):
         unsafe_names = [
             "hazelnuts*+",
@@ -317,6 +407,45 @@ class BuildIngredientCatalogTests(unittest.TestCase):
                 )
                 self.assertTrue(classification["is_safe"])
 
+    def assert_classifier_matches_regex_reference(self, names):
+        module = build_ingredient_catalog
+        for name in names:
+            automaton = module.classify_candidate(name)
+            reference = module.classify_candidate(name, term_hits=module.candidate_term_hits_regex)
+            if automaton != reference:
+                self.fail(f"classifier mismatch for {name!r}: {automaton} != {reference}")
+
+    def test_automaton_classifier_matches_regex_reference_on_fixtures(self):
+        module = build_ingredient_catalog
+        names = {
+            "hazelnuts*+", "almonds +", "peanuts +", "eggwhite", "wheatflour", "almondmilk", "catfish",
+            "crabmeat", "cream of tartar", "butternut squash", "eggplant", "buckwheat flour", "oat milk",
+            "sunflower butter", "cocoa butter", "gluten free oats", "milk chocolate chips", "vegetable oil",
+            "natural vanilla extract", "organic carrots", "sea salt", "egg yolks", "fish sauce", "whole milk",
+        }
+        for _label, terms in module.BOUNDARY_CLASS_TERMS + module.COMPACT_CLASS_TERMS:
+            names.update(terms)
+        for name in list(names):
+            names.add(module.canonicalize_name(name))
+            names.add(f"organic {name} powder")
+            names.add(name.replace(" ", ""))
+        self.assert_classifier_matches_regex_reference(sorted(names))
+
+    def test_automaton_classifier_matches_regex_reference_on_off_sample(self):
+        if not REVIEW_QUEUE_PATH.exists():
+            self.skipTest(f"missing OFF review queue sample: {REVIEW_QUEUE_PATH}")
+        module = build_ingredient_catalog
+        names = set()
+        with REVIEW_QUEUE_PATH.open("r", encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                names.add(row["canonical_name"])
+                for surface_form in row["top_surface_forms"].split(" | "):
+                    names.add(surface_form)
+                    names.update(module.extract_top_level_candidates(surface_form))
+        names.discard("")
+        self.assertGreater(len(names), 10000)
+        self.assert_classifier_matches_regex_reference(sorted(names))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+import importlib.util
+import json
+import sys
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("build_smartlabel_safe_catalog.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("build_smartlabel_safe_catalog", MODULE_PATH)
+catalog = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered because dataclasses resolve field annotations through sys.modules.
+sys.modules[SPEC.name] = catalog
+SPEC.loader.exec_module(catalog)
+
+
+def csv_row(smartlabel_id, upc, items, *, declared=(), allergens_status="200", rev="", error=""):
+    return {
+        "smartlabel_id": str(smartlabel_id),
+        "smartlabel_upc": upc,
+        "smartlabel_url": f"https://smartlabel.example.com/{smartlabel_id}",
+        "smartlabel_url_ingredients": f"https://smartlabel.example.com/{smartlabel_id}/ingredients",
+        "smartlabel_url_allergens": f"https://smartlabel.example.com/{smartlabel_id}/allergens",
+        "rev": rev,
+        "ingredients_http_status": "200",
+        "allergens_http_status": allergens_status,
+        "ingredients_items_json": json.dumps(list(items)),
+        "allergens_declared_json": json.dumps(list(declared)),
+        "allergens_present_json": "[]",
+        "allergens_may_contain_json": "",
+        "smartlabel_error": error,
+    }
+
+
+class SmartLabelRowTests(unittest.TestCase):
+    def test_row_decodes_json_once_and_ranks_duplicates(self):
+        sparse = catalog.SmartLabelRow.from_csv(csv_row(1, "0001", ["Water"], error="ingredients:timeout"))
+        fuller = catalog.SmartLabelRow.from_csv(csv_row(2, "0001", ["Water", "Salt"], rev="2"))
+        broken = catalog.SmartLabelRow.from_csv({**csv_row(3, "0002", []), "ingredients_items_json": "not json"})
+
+        self.assertEqual(fuller.items, ("Water", "Salt"))
+        self.assertEqual(broken.items, ())
+        self.assertGreater(fuller.score, sparse.score)
+        self.assertEqual(catalog.select_best_rows([sparse, fuller, broken]), {"0001": fuller, "0002": broken})
+        self.assertTrue(catalog.is_safe_product(fuller))
+        self.assertFalse(catalog.is_safe_product(broken))
+        self.assertFalse(hasattr(fuller, "__dict__"))
+
+    def test_seed_builds_from_a_single_streaming_pass(self):
+        rows = [
+            csv_row(1, "0001", ["Water", "Sugar", "Contains:"]),
+            csv_row(2, "0001", ["Water", "Sugar"], rev="1"),
+            csv_row(3, "0002", ["Water ", "Salt"]),
+            csv_row(4, "0003", ["Water", "Milk"], declared=["Milk"]),
+            csv_row(5, "", []),
+        ]
+        consumed = []
+
+        def stream():
+            for row in rows:
+                consumed.append(row["smartlabel_id"])
+                yield catalog.SmartLabelRow.from_csv(row)
+
+        seed_rows, summary = catalog.build_seed_rows(stream(), 2, Path("ground_truth.csv"))
+
+        self.assertEqual(consumed, ["1", "2", "3", "4", "5"])
+        self.assertEqual([row["normalized_name"] for row in seed_rows], ["Water"])
+        water = seed_rows[0]
+        self.assertEqual(water["lookup_count"], 2)
+        self.assertEqual(water["aliases"], ["Water"])
+        self.assertEqual(len(water["metadata"]["supporting_products"]), 3)
+        self.assertEqual(summary["total_input_rows"], 5)
+        self.assertEqual(summary["unique_products"], 3)
+        self.assertEqual(summary["safe_products_used"], 3)
+        self.assertEqual(summary["products_skipped_unsafe_or_unknown_with_items"], 1)
+        self.assertEqual(summary["products_skipped_without_items"], 1)
+        self.assertEqual(summary["structural_items_filtered"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Imported by name, not re-executed: the lexicon and analysis tests share this
+# module, and pool workers pickle its functions by reference.
+import corpus_scan  # noqa: E402
+
+
+class TokenCountAggregator(corpus_scan.CorpusAggregator):
+    def new_state(self):
+        return Counter()
+
+    def add_row(self, state, row):
+        state.update(row.tokens)
+
+    def merge(self, state, partial):
+        state.update(partial)
+        return state
+
+
+class LabelRowsAggregator(corpus_scan.CorpusAggregator):
+    def new_state(self):
+        return []
+
+    def add_row(self, state, row):
+        state.append(sorted(row.labels))
+
+    def merge(self, state, partial):
+        state.extend(partial)
+        return state
+
+
+ROWS = [
+    {"text": "Whey, Crème Fraîche (Milk)", "allergens": ["Milk", " Tree-Nuts. "]},
+    {"text": "", "allergens": ["Crustacean  Shellfish", "unknown"]},
+    {"text": "Enriched Wheat Flour, Soy Lecithin", "allergens": ["wheat", "SOY"]},
+] * 7
+
+
+class CorpusScanTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dataset = Path(temp_dir.name) / "rows.jsonl"
+        self.dataset.write_text("".join(json.dumps(row) + "\n" for row in ROWS), encoding="utf-8")
+
+    def test_one_pass_feeds_every_aggregator_from_shared_row_fields(self):
+        tokens, labels = corpus_scan.scan_corpus([self.dataset], [TokenCountAggregator(), LabelRowsAggregator()])
+
+        self.assertEqual(tokens["creme"], 7)
+        self.assertEqual(tokens["milk"], 7)
+        self.assertEqual(sum(tokens.values()), 7 * 9)
+        self.assertEqual(labels[:3], [["milk", "tree nut"], ["shellfish"], ["soy", "wheat"]])
+        self.assertEqual(len(labels), len(ROWS))
+
+        row = corpus_scan.CorpusRow("Crème")
+        self.assertIs(row.tokens, row.tokens)
+        self.assertEqual(row.tokens, corpus_scan.tokenize("Crème"))
+
+    def test_pool_scan_matches_in_process_scan(self):
+        aggregators = [TokenCountAggregator(), LabelRowsAggregator()]
+        serial = corpus_scan.scan_corpus([self.dataset, self.dataset], aggregators)
+        pooled = corpus_scan.scan_corpus([self.dataset, self.dataset], aggregators, workers=2, shard_bytes=64)
+        self.assertEqual(pooled, serial)
+
+        per_file = corpus_scan.scan_corpus_files([self.dataset, self.dataset], aggregators, workers=2, shard_bytes=64)
+        self.assertEqual(len(per_file), 2)
+        self.assertEqual(per_file[0][1], serial[1][: len(ROWS)])
+
+
+if __name__ == "__main__":
+    unittest.main()
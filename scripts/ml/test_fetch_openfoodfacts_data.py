@@ -0,0 +1,99 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+import urllib.parse
+from pathlib import Path
+from unittest import mock
+
+
+MODULE_PATH = Path(__file__).with_name("fetch_openfoodfacts_data.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("fetch_openfoodfacts_data", MODULE_PATH)
+fetch_off = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(fetch_off)
+
+from jsonl_checkpoint import state_path_for  # noqa: E402
+
+
+PAGE_SIZE = 2
+
+
+def product(code):
+    return {
+        "code": code,
+        "ingredients_text": "Whole milk, sugar, cocoa",
+        "allergens_tags": ["en:milk"],
+        "countries_tags": ["en:united-states"],
+    }
+
+
+class FakeSearchClient:
+    """Serves pages 1-3 of two products each; ``failing_pages`` raise instead."""
+
+    def __init__(self, failing_pages=()):
+        self.failing_pages = set(failing_pages)
+        self.stats = {}
+
+    def get_json(self, url):
+        page = int(urllib.parse.parse_qs(urllib.parse.urlparse(url).query)["page"][0])
+        if page in self.failing_pages:
+            raise RuntimeError(f"page {page} unavailable")
+        if page > 3:
+            return {"products": []}
+        return {"products": [product(f"{page}{index}") for index in range(PAGE_SIZE)]}
+
+    def close(self):
+        return None
+
+
+class ResumeTests(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.output_path = Path(tmpdir.name) / "off.jsonl"
+        self.summary_path = Path(tmpdir.name) / "summary.json"
+
+    def run_fetch(self, client, *extra):
+        argv = [
+            "fetch_openfoodfacts_data.py",
+            "--output",
+            str(self.output_path),
+            "--summary-output",
+            str(self.summary_path),
+            "--page-size",
+            str(PAGE_SIZE),
+            "--max-pages",
+            "5",
+            "--concurrency",
+            "1",
+            *extra,
+        ]
+        with mock.patch.object(sys, "argv", argv), mock.patch.object(
+            fetch_off, "client_from_args", return_value=client
+        ), mock.patch("builtins.print"):
+            self.assertEqual(fetch_off.main(), 0)
+
+    def row_ids(self):
+        lines = self.output_path.read_text(encoding="utf-8").splitlines()
+        return [json.loads(line)["id"] for line in lines if line.strip()]
+
+    def test_resume_refetches_a_failed_page(self):
+        self.run_fetch(FakeSearchClient(failing_pages={2}))
+        self.assertEqual(self.row_ids(), ["off::10", "off::11", "off::30", "off::31"])
+        state = json.loads(state_path_for(self.output_path).read_text(encoding="utf-8"))
+        self.assertEqual((state["last_completed_page"], state["failed_pages"]), (1, [2]))
+
+        self.run_fetch(FakeSearchClient(), "--append")
+        self.assertEqual(
+            sorted(self.row_ids()),
+            ["off::10", "off::11", "off::20", "off::21", "off::30", "off::31"],
+        )
+        state = json.loads(state_path_for(self.output_path).read_text(encoding="utf-8"))
+        self.assertEqual((state["last_completed_page"], state["failed_pages"]), (4, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
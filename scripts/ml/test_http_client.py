@@ -0,0 +1,239 @@
+import gzip
+import http.server
+import importlib.util
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("http_client.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("http_client", MODULE_PATH)
+http_client = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(http_client)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Shared across requests; reset per test by the server factory.
+    failures_remaining = 0
+    paths_seen: list = []
+    client_ports: set = set()
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test server output
+        return
+
+    def send_body(self, status, body, *, content_type="application/json", extra_headers=None):
+        encoded = body
+        self.send_response(status)
+        if "gzip" in self.headers.get("Accept-Encoding", "") and body:
+            encoded = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        handler = type(self)
+        handler.paths_seen.append(self.path)
+        handler.client_ports.add(self.client_address[1])
+        if self.path.startswith("/flaky") and handler.failures_remaining > 0:
+            handler.failures_remaining -= 1
+            self.send_body(503, b"busy", content_type="text/plain", extra_headers={"Retry-After": "0"})
+            return
+        if self.path.startswith("/garbled") and handler.failures_remaining > 0:
+            handler.failures_remaining -= 1
+            self.send_body(200, b"{truncated")
+            return
+        if self.path.startswith("/truncated-gzip") and handler.failures_remaining > 0:
+            handler.failures_remaining -= 1
+            body = gzip.compress(b'{"path": "/truncated-gzip"}')[:-6]
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path.startswith("/missing"):
+            self.send_body(404, b"not here", content_type="text/plain")
+            return
+        if self.path.startswith("/redirect"):
+            self.send_body(302, b"", extra_headers={"Location": "/json?from=redirect"})
+            return
+        payload = {"path": self.path, "range": self.headers.get("Range", "")}
+        self.send_body(200, json.dumps(payload).encode("utf-8"))
+
+
+class HttpClientTests(unittest.TestCase):
+    def start_server(self, *, failures: int = 0) -> str:
+        StubHandler.failures_remaining = failures
+        StubHandler.paths_seen = []
+        StubHandler.client_ports = set()
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def make_client(self, **overrides):
+        options = {"timeout": 5.0, "max_retries": 3, "backoff_seconds": 0.0}
+        options.update(overrides)
+        client = http_client.HttpClient(**options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_reuses_keep_alive_connection_and_decodes_gzip(self):
+        base_url = self.start_server()
+        client = self.make_client()
+
+        for page in range(1, 6):
+            payload = client.get_json(f"{base_url}/json", params={"page": page})
+            self.assertEqual(payload["path"], f"/json?page={page}")
+
+        self.assertEqual(client.stats["connections_opened"], 1)
+        self.assertEqual(client.stats["connections_reused"], 4)
+        self.assertEqual(len(StubHandler.client_ports), 1)
+
+    def test_retries_retryable_status_then_succeeds(self):
+        base_url = self.start_server(failures=2)
+        client = self.make_client()
+
+        payload = client.get_json(f"{base_url}/flaky")
+
+        self.assertEqual(payload["path"], "/flaky")
+        self.assertEqual(client.stats["retries"], 2)
+        self.assertEqual(StubHandler.paths_seen, ["/flaky"] * 3)
+
+    def test_truncated_gzip_body_is_retried(self):
+        base_url = self.start_server(failures=1)
+        client = self.make_client()
+
+        payload = client.get_json(f"{base_url}/truncated-gzip")
+
+        self.assertEqual(payload["path"], "/truncated-gzip")
+        self.assertEqual(client.stats["retries"], 1)
+
+    def test_non_retryable_status_raises_immediately(self):
+        base_url = self.start_server()
+        client = self.make_client()
+
+        with self.assertRaises(http_client.HttpStatusError) as context:
+            client.get_json(f"{base_url}/missing")
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(len(StubHandler.paths_seen), 1)
+
+    def test_follows_redirects(self):
+        base_url = self.start_server()
+        client = self.make_client()
+
+        payload = client.get_json(f"{base_url}/redirect")
+        self.assertEqual(payload["path"], "/json?from=redirect")
+
+    def test_response_cache_replays_bodies_until_ttl_expires(self):
+        base_url = self.start_server()
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        client = self.make_client(cache_dir=Path(tmpdir.name), cache_ttl_seconds=60)
+
+        first = client.get_json(f"{base_url}/json", params={"page": 1}, headers={"Range": "0-9"})
+        second = client.get_json(f"{base_url}/json", params={"page": 1}, headers={"Range": "0-9"})
+        other_range = client.get_json(f"{base_url}/json", params={"page": 1}, headers={"Range": "10-19"})
+
+        self.assertEqual(first, second)
+        self.assertEqual(other_range["range"], "10-19")
+        self.assertEqual(client.stats["cache_hits"], 1)
+        self.assertEqual(len(StubHandler.paths_seen), 2)
+
+        # A fresh client sharing the directory (a rerun) also skips the request.
+        rerun = self.make_client(cache_dir=Path(tmpdir.name), cache_ttl_seconds=60)
+        self.assertEqual(rerun.get_json(f"{base_url}/json", params={"page": 1}, headers={"Range": "0-9"}), first)
+        self.assertEqual(len(StubHandler.paths_seen), 2)
+
+        expired = self.make_client(cache_dir=Path(tmpdir.name), cache_ttl_seconds=0.01)
+        time.sleep(0.05)
+        expired.get_json(f"{base_url}/json", params={"page": 1}, headers={"Range": "0-9"})
+        self.assertEqual(len(StubHandler.paths_seen), 3)
+
+    def test_invalid_json_is_dropped_from_cache_and_refetched(self):
+        base_url = self.start_server(failures=2)
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        client = self.make_client(cache_dir=Path(tmpdir.name))
+
+        self.assertEqual(client.get_json(f"{base_url}/garbled")["path"], "/garbled")
+        self.assertEqual(client.stats["retries"], 2)
+        self.assertEqual(StubHandler.paths_seen, ["/garbled"] * 3)
+
+        StubHandler.failures_remaining = 3
+        with self.assertRaises(http_client.InvalidJsonError):
+            client.get_json(f"{base_url}/garbled", params={"page": 2})
+        # The last invalid body was not cached, so the next call goes back to the server.
+        self.assertEqual(client.get_json(f"{base_url}/garbled", params={"page": 2})["path"], "/garbled?page=2")
+        self.assertEqual(client.stats["cache_hits"], 0)
+
+    def test_rate_limiter_spaces_request_starts(self):
+        base_url = self.start_server()
+        client = self.make_client(requests_per_second=20.0)
+
+        started = time.monotonic()
+        for page in range(5):
+            client.get_json(f"{base_url}/json", params={"page": page})
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 20.0 - 0.01)
+
+
+class PageSchedulerTests(unittest.TestCase):
+    def test_yields_in_job_order_and_stops_streams_after_final_page(self):
+        in_flight = 0
+        peak_in_flight = 0
+        lock = threading.Lock()
+
+        def fetch(job):
+            nonlocal in_flight, peak_in_flight
+            with lock:
+                in_flight += 1
+                peak_in_flight = max(peak_in_flight, in_flight)
+            # Later pages finish first to prove results are reordered.
+            time.sleep(0.02 * (5 - job.page))
+            with lock:
+                in_flight -= 1
+            if job.stream == "broken" and job.page == 2:
+                raise RuntimeError("boom")
+            last_page = {"short": 2, "long": 4, "broken": 3}[job.stream]
+            return {"page": job.page, "count": 10 if job.page < last_page else 3}
+
+        jobs = [
+            http_client.PageJob(stream, page, f"https://example.test/{stream}/{page}")
+            for stream in ("short", "long", "broken")
+            for page in range(1, 5)
+        ]
+        results = list(
+            http_client.iter_pages_in_order(
+                jobs,
+                fetch,
+                workers=3,
+                is_final=lambda payload: payload["count"] < 10,
+            )
+        )
+
+        self.assertEqual(
+            [(job.stream, job.page) for job, _result, _error in results],
+            [("short", 1), ("short", 2), ("long", 1), ("long", 2), ("long", 3), ("long", 4),
+             ("broken", 1), ("broken", 2), ("broken", 3)],
+        )
+        self.assertIsInstance(results[7][2], RuntimeError)
+        self.assertEqual(results[1][1], {"page": 2, "count": 3})
+        self.assertLessEqual(peak_in_flight, 3)
+        self.assertGreater(peak_in_flight, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("jsonl_checkpoint.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("jsonl_checkpoint", MODULE_PATH)
+jsonl_checkpoint = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(jsonl_checkpoint)
+
+
+def read_rows(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+class AppendOnlyJsonlWriterTests(unittest.TestCase):
+    def output_path(self) -> Path:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        return Path(tmpdir.name) / "rows.jsonl"
+
+    def test_flush_appends_only_new_rows_and_records_state(self):
+        output_path = self.output_path()
+        writer = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path)
+        writer.add({"id": "off::1", "text": "a"})
+        writer.flush(last_completed_page=1)
+        first_size = output_path.stat().st_size
+
+        writer.add({"id": "off::2", "text": "b"})
+        self.assertEqual(len(writer), 2)
+        self.assertIn("off::2", writer)
+        self.assertEqual(output_path.stat().st_size, first_size)
+        writer.flush(last_completed_page=2)
+
+        self.assertEqual([row["id"] for row in read_rows(output_path)], ["off::1", "off::2"])
+        self.assertEqual(jsonl_checkpoint.ids_path_for(output_path).read_text(encoding="utf-8"), "off::1\noff::2\n")
+        state = jsonl_checkpoint.read_state(jsonl_checkpoint.state_path_for(output_path))
+        self.assertEqual(state["last_completed_page"], 2)
+        self.assertEqual(state["rows"], 2)
+        self.assertEqual(state["output_bytes"], output_path.stat().st_size)
+
+    def test_resume_uses_id_index_and_drops_uncommitted_tail(self):
+        output_path = self.output_path()
+        writer = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path)
+        writer.add({"id": "off::1"})
+        writer.flush(last_completed_page=4)
+        # A crash after rows were appended but before the state was committed.
+        with output_path.open("a", encoding="utf-8") as handle:
+            handle.write('{"id": "off::uncommitted"}\n')
+        with jsonl_checkpoint.ids_path_for(output_path).open("a", encoding="utf-8") as handle:
+            handle.write("off::uncommitted\n")
+
+        resumed = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path, resume=True)
+
+        self.assertEqual(resumed.state["last_completed_page"], 4)
+        self.assertEqual(len(resumed), 1)
+        self.assertIn("off::1", resumed)
+        self.assertNotIn("off::uncommitted", resumed)
+        resumed.add({"id": "off::2"})
+        resumed.flush(last_completed_page=5)
+        self.assertEqual([row["id"] for row in read_rows(output_path)], ["off::1", "off::2"])
+
+    def test_resume_indexes_output_written_without_sidecars(self):
+        output_path = self.output_path()
+        output_path.write_text('{"id": "off::legacy-1"}\n{"id": "off::legacy-2"}', encoding="utf-8")
+
+        resumed = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path, resume=True)
+        resumed.add({"id": "off::3"})
+        resumed.flush(last_completed_page=1)
+
+        self.assertEqual(
+            [row["id"] for row in read_rows(output_path)],
+            ["off::legacy-1", "off::legacy-2", "off::3"],
+        )
+        self.assertEqual(len(resumed), 3)
+
+    def test_without_resume_starts_fresh(self):
+        output_path = self.output_path()
+        writer = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path)
+        writer.add({"id": "off::1"})
+        writer.flush(last_completed_page=3)
+
+        fresh = jsonl_checkpoint.AppendOnlyJsonlWriter(output_path)
+        self.assertEqual(len(fresh), 0)
+        self.assertEqual(fresh.state, {})
+        self.assertEqual(output_path.read_text(encoding="utf-8"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
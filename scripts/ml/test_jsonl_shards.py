@@ -0,0 +1,42 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("jsonl_shards.py")
+SPEC = importlib.util.spec_from_file_location("jsonl_shards", MODULE_PATH)
+jsonl_shards = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(jsonl_shards)
+
+
+class JsonlShardTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+
+    def test_byte_shards_cover_every_line_once_in_order(self):
+        rows = [{"id": index, "text": "crème " * (index % 7)} for index in range(40)]
+        lines = [json.dumps(row, ensure_ascii=False) for row in rows]
+        first = self.root / "first.jsonl"
+        first.write_text("\n".join(lines[:25]) + "\n\n", encoding="utf-8")
+        second = self.root / "second.jsonl"
+        second.write_text("\n".join(lines[25:]) + "\n[1, 2]", encoding="utf-8")
+        empty = self.root / "empty.jsonl"
+        empty.write_text("", encoding="utf-8")
+
+        for shard_bytes in (0, 1, 7, 64, 10_000):
+            with self.subTest(shard_bytes=shard_bytes):
+                shards = jsonl_shards.plan_jsonl_shards([first, empty, second], shard_bytes)
+                payloads = [payload for shard in shards for payload in jsonl_shards.iter_shard_payloads(shard)]
+                self.assertEqual(payloads, rows)
+
+        whole_files = jsonl_shards.plan_jsonl_shards([first, empty, second])
+        self.assertEqual([(shard.path.name, shard.start) for shard in whole_files], [("first.jsonl", 0), ("empty.jsonl", 0), ("second.jsonl", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import importlib.util
+import random
+import re
+import sys
+import tempfile
+import unicodedata
+import unittest
+from collections import Counter
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("lexicon_matcher.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("lexicon_matcher", MODULE_PATH)
+lexicon_matcher = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered because dataclasses resolve field annotations through sys.modules.
+sys.modules[SPEC.name] = lexicon_matcher
+SPEC.loader.exec_module(lexicon_matcher)
+
+from corpus_scan import tokenize  # noqa: E402
+from token_automaton import TokenAutomaton  # noqa: E402
+
+
+def alias(alias_id, tokens, canonical_id, class_key, active=True):
+    return lexicon_matcher.CompiledAlias(
+        alias_id=alias_id,
+        alias_tokens=tokens,
+        alias_display=" ".join(tokens).title(),
+        canonical_id=canonical_id,
+        canonical_name=canonical_id,
+        class_key=class_key,
+        status="approved" if active else "demoted_auto",
+        active=active,
+    )
+
+
+ALIASES = [
+    alias(0, ("milk",), "milk_milk", "milk"),
+    alias(1, ("whey",), "milk_whey", "milk"),
+    alias(2, ("whey", "protein"), "milk_whey", "milk"),
+    alias(3, ("wheat", "flour"), "wheat_flour", "wheat"),
+    alias(4, ("flour",), "wheat_flour", "wheat", active=False),
+    alias(5, ("creme", "fraiche"), "milk_cream", "milk"),
+    alias(6, ("soy", "lecithin"), "soy_lecithin", "soy"),
+]
+
+
+def reference_tokens(text):
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return re.findall(r"[a-z0-9]+", folded)
+
+
+class LexiconMatcherTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "lexicon.bin"
+        self.summary = lexicon_matcher.write_lexicon_artifact(self.path, ALIASES)
+        self.matcher = lexicon_matcher.LexiconMatcher.load(self.path)
+        self.addCleanup(self.matcher.close)
+
+    def test_hits_carry_classes_and_spans(self):
+        text = "Whey Protein Concentrate (Milk), Crème Fraîche, Enriched Wheat Flour"
+        hits = self.matcher.match(text)
+
+        self.assertEqual(
+            [(hit.alias_id, text[hit.start : hit.end]) for hit in hits],
+            [(1, "Whey"), (2, "Whey Protein"), (0, "Milk"), (5, "Crème Fraîche"), (3, "Wheat Flour")],
+        )
+        self.assertEqual(hits[3].class_key, "milk")
+        self.assertEqual(hits[3].canonical_id, "milk_cream")
+        self.assertEqual(self.matcher.classes(text), ["milk", "wheat"])
+        self.assertEqual(self.summary["active_aliases"], 6)
+
+    def test_inactive_aliases_are_flagged_and_skipped_by_default(self):
+        self.assertEqual([hit.alias_id for hit in self.matcher.match("flour")], [])
+        hits = self.matcher.match("Flour", include_inactive=True)
+        self.assertEqual([(hit.alias_id, hit.active) for hit in hits], [(4, False)])
+
+    def test_counts_match_the_token_automaton_on_random_text(self):
+        automaton = TokenAutomaton.build((item.alias_id, item.alias_tokens) for item in ALIASES)
+        rng = random.Random(7)
+        words = ["milk", "Whey", "protein", "wheat", "FLOUR", "soy", "lecithin", "crème", "fraîche", "ﬁber", "salt", ","]
+        texts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 12))) for _ in range(200)]
+        for text, hits in zip(texts, self.matcher.match_batch(texts, include_inactive=True)):
+            tokens, spans = lexicon_matcher.tokenize_with_spans(text)
+            self.assertEqual(tokens, reference_tokens(text))
+            self.assertEqual(Counter(hit.alias_id for hit in hits), automaton.count_matches(tokens))
+            for hit in hits:
+                self.assertEqual(tuple(reference_tokens(text[hit.start : hit.end])), ALIASES[hit.alias_id].alias_tokens)
+
+    def test_tokens_equal_corpus_scan_tokenize_on_non_ascii_text(self):
+        for text in ("Crème Fraîche, ﬁg paste, Œufs & Soja", "Jalapeño ½ cup, Straße-Weizen 2%", "ß¼Ǆ"):
+            tokens, spans = lexicon_matcher.tokenize_with_spans(text)
+            self.assertEqual(tuple(tokens), tokenize(text))
+            for token, (start, end) in zip(tokens, spans):
+                self.assertEqual(tokenize(text[start:end]), (token,))
+
+    def test_rejects_foreign_or_newer_files(self):
+        empty = self.path.with_name("empty.bin")
+        empty.write_bytes(b"")
+        with self.assertRaisesRegex(RuntimeError, "not a compiled allergen lexicon"):
+            lexicon_matcher.LexiconMatcher.load(empty)
+
+        foreign = self.path.with_name("foreign.bin")
+        foreign.write_bytes(b"not a lexicon at all")
+        with self.assertRaises(RuntimeError):
+            lexicon_matcher.LexiconMatcher.load(foreign)
+
+        newer = self.path.with_name("newer.bin")
+        payload = bytearray(self.path.read_bytes())
+        payload[8:12] = (lexicon_matcher.LEXICON_FORMAT_VERSION + 1).to_bytes(4, "little")
+        newer.write_bytes(bytes(payload))
+        with self.assertRaises(RuntimeError):
+            lexicon_matcher.LexiconMatcher.load(newer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("prelabel_with_lexicon.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("prelabel_with_lexicon", MODULE_PATH)
+prelabel = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered so pool workers find the worker entry points under the module name.
+sys.modules[SPEC.name] = prelabel
+SPEC.loader.exec_module(prelabel)
+
+from lexicon_matcher import CompiledAlias, write_lexicon_artifact  # noqa: E402
+
+
+def alias(alias_id, tokens, class_key, active=True):
+    return CompiledAlias(
+        alias_id=alias_id,
+        alias_tokens=tokens,
+        alias_display=" ".join(tokens).title(),
+        canonical_id=f"{class_key}_{'_'.join(tokens)}",
+        canonical_name=" ".join(tokens),
+        class_key=class_key,
+        status="approved" if active else "demoted_auto",
+        active=active,
+    )
+
+
+ALIASES = [
+    alias(0, ("whey",), "milk"),
+    alias(1, ("wheat", "flour"), "wheat"),
+    alias(2, ("barley",), "cereals_with_gluten"),
+    alias(3, ("almond",), "tree_nut"),
+    alias(4, ("salt",), "milk", active=False),
+]
+
+ROWS = [
+    {"id": "a", "text": "Whey, Salt", "allergens": ["milk"]},
+    {"id": "b", "text": "Enriched Wheat Flour, Barley Malt", "allergens": []},
+    {"id": "c", "text": "Sugar, Crème", "allergens": ["egg"]},
+    {"id": "d", "text": "Almond Butter", "allergens": ["peanut"]},
+] * 5
+
+
+class PrelabelTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+        self.lexicon = self.root / "lexicon.bin"
+        write_lexicon_artifact(self.lexicon, ALIASES)
+        self.dataset = self.root / "train.jsonl"
+        self.dataset.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in ROWS), encoding="utf-8")
+
+    def read_rows(self, path):
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+    def test_rows_gain_lexicon_labels_spans_and_agreement(self):
+        output = self.root / "out.jsonl"
+        summary = prelabel.prelabel_datasets([self.dataset], output, self.lexicon)
+        rows = self.read_rows(output)
+
+        self.assertEqual([row["id"] for row in rows], [row["id"] for row in ROWS])
+        first, second, third, fourth = (row["lexicon"] for row in rows[:4])
+        self.assertEqual(first["allergens"], ["milk"])
+        self.assertEqual(first["agreement"], "agree")
+        self.assertEqual([(hit["start"], hit["end"]) for hit in first["hits"]], [(0, 4)])
+        self.assertEqual(second["allergens"], ["wheat"])
+        self.assertEqual(second["classes"], ["wheat", "cereals_with_gluten"])
+        self.assertEqual(second["agreement"], "lexicon_only")
+        self.assertEqual(rows[1]["text"][second["hits"][0]["start"] : second["hits"][0]["end"]], "Wheat Flour")
+        self.assertEqual((third["hits"], third["weak_only"], third["agreement"]), ([], ["egg"], "weak_only"))
+        self.assertEqual(fourth["allergens"], ["tree nut"])
+        self.assertEqual(fourth["agreement"], "conflict")
+        self.assertEqual(rows[2]["text"], "Sugar, Crème")
+
+        self.assertEqual(summary["rows"]["total"], len(ROWS))
+        self.assertEqual(summary["agreement"]["agree"], 5)
+        self.assertEqual(summary["lexicon_only"]["wheat"], 5)
+
+    def test_process_pool_output_matches_in_process(self):
+        serial_output = self.root / "serial.jsonl"
+        pooled_output = self.root / "pooled.jsonl"
+        serial = prelabel.prelabel_datasets([self.dataset, self.dataset], serial_output, self.lexicon)
+        pooled = prelabel.prelabel_datasets(
+            [self.dataset, self.dataset], pooled_output, self.lexicon, workers=2, shard_bytes=90
+        )
+        self.assertEqual(pooled_output.read_bytes(), serial_output.read_bytes())
+        self.assertEqual(pooled, serial)
+        self.assertEqual(list(self.root.glob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
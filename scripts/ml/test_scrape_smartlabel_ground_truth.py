@@ -1,6 +1,18 @@
+import asyncio
+import gzip
+import hashlib
+import http.server
+import json
+import sys
+import tempfile
+import threading
 import unittest
+from pathlib import Path
 
-from scripts.ml.scrape_smartlabel_ground_truth import (
+# The scraper imports its sibling HTTP modules by name, as it does when run as a script.
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scripts.ml.scrape_smartlabel_ground_truth import (  # noqa: E402
     extract_bestchoice_upc,
     extract_generalmills_gtin,
     extract_scanbuy_product_id,
@@ -18,7 +30,11 @@ from scripts.ml.scrape_smartlabel_ground_truth import (
     parse_scanbuy_ingredients_html,
     parse_syndigo_allergens_html,
     parse_syndigo_ingredients_html,
+    scrape_urls,
 )
+from scripts.ml import scrape_smartlabel_ground_truth as scraper  # noqa: E402
+import benchmark_smartlabel_parsers as benchmark  # noqa: E402
+import html_select  # noqa: E402
 
 
 SCANBUY_LANDING_HTML = """
@@ -402,5 +418,465 @@ class SmartLabelScrapeTests(unittest.TestCase):
         self.assertIn("Ethanol", ingredients_text)
 
 
+SCANBUY_SAFE_ALLERGENS_HTML = """
+<ul id="allergens-list"></ul>
+"""
+
+GENERALMILLS_PRODUCT_INFO_HTML = """
+<div><img class="product-image" src="/images/cheerios.png" /></div>
+"""
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """Serves one fixture per (Host, path) so every template can be scraped end to end."""
+
+    protocol_version = "HTTP/1.1"
+    routes: dict = {}
+    requests_seen: list = []
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test server output
+        return
+
+    def respond(self, method):
+        handler = type(self)
+        host = self.headers.get("Host", "")
+        if method == "POST":
+            self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        with handler.lock:
+            handler.requests_seen.append((method, host, self.path))
+            route = handler.routes.get((method, host, self.path))
+            if isinstance(route, list):
+                route = route.pop(0) if len(route) > 1 else route[0]
+        if route is None:
+            route = (404, "text/plain", "missing")
+        status, content_type, body = route[:3]
+        required_headers = route[3] if len(route) > 3 else {}
+        if any(self.headers.get(name) != value for name, value in required_headers.items()):
+            status, content_type, body = 401, "text/plain", "unauthorized"
+        encoded = body if isinstance(body, bytes) else body.encode("utf-8")
+        etag = f'"{hashlib.sha1(encoded).hexdigest()}"'
+        if status == 200 and method == "GET" and self.headers.get("If-None-Match") == etag:
+            status, encoded = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        if status != 304:
+            self.send_header("Content-Length", str(len(encoded)))
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+
+class SmartLabelFixtureServerTests(unittest.TestCase):
+    SCANBUY_URL = "https://smartlabel.conagra.com/00012345678905-0001-en-US/index.html"
+    SYNDIGO_URL = "https://smartlabel.kraftheinz.com/00021000658831/index.html"
+    GENERALMILLS_URL = "https://smartlabel.generalmills.com/00016000275287"
+    LABELINSIGHT_URL = "https://smartlabel.labelinsight.com/product/11188035/nutrition"
+    PG_URL = "https://smartlabel.pg.com/en-us/00037000123456.html"
+    HORMEL_URL = "https://smartlabel.hormelfoods.com/00037600106399"
+
+    def setUp(self):
+        json_type = "application/json"
+        html = "text/html"
+        scanbuy_id = "9a13951d-adfe-4c48-bd62-67225a9b3591"
+        FixtureHandler.requests_seen = []
+        FixtureHandler.routes = {
+            ("GET", "smartlabel.conagra.com", "/00012345678905-0001-en-US/index.html"): [
+                (503, "text/plain", "busy"),
+                (200, html, SCANBUY_LANDING_HTML),
+            ],
+            ("GET", "smartlabel.conagra.com", f"/00012345678905-0001-en-US/{scanbuy_id}-allergens.html"): (
+                200, html, SCANBUY_SAFE_ALLERGENS_HTML,
+            ),
+            ("GET", "smartlabel.conagra.com", f"/00012345678905-0001-en-US/{scanbuy_id}-ingredients.html"): (
+                200, html, SCANBUY_INGREDIENTS_HTML,
+            ),
+            ("GET", "smartlabel.kraftheinz.com", "/00021000658831/index.html"): (
+                200, html, SYNDIGO_INGREDIENTS_HTML + SYNDIGO_ALLERGENS_HTML,
+            ),
+            ("GET", "smartlabel.generalmills.com", "/00016000275287"): (200, html, "<html></html>"),
+            ("GET", "smartlabel.generalmills.com", "/GTIN/ProductInfo?gtinID=00016000275287"): (
+                200, html, GENERALMILLS_PRODUCT_INFO_HTML,
+            ),
+            ("GET", "smartlabel.generalmills.com", "/GTIN/Ingredients"): (405, "text/plain", "post only"),
+            ("POST", "smartlabel.generalmills.com", "/GTIN/Ingredients"): (200, html, GENERALMILLS_INGREDIENTS_HTML),
+            ("GET", "smartlabel.generalmills.com", "/GTIN/Allergens"): (200, html, GENERALMILLS_ALLERGENS_HTML),
+            ("GET", "external-api.labelinsight.com", "/smartlabel-api/api/v3/11188035"): (
+                200, json_type, json.dumps(LABELINSIGHT_PAYLOAD),
+            ),
+            ("GET", "smartlabel.pg.com", "/en-us/00037000123456.html"): (200, html, "<html></html>"),
+            (
+                "GET",
+                "az-na-smartlabel-prod-functionapp-api.pgcloud.com",
+                "/api/getproductdetails?gtin=00037000123456&locale=en-us",
+            ): (200, json_type, json.dumps(PG_PAYLOAD), {"x-functions-key": scraper.PG_FUNCTIONS_KEY}),
+            ("GET", "smartlabel.hormelfoods.com", "/00037600106399"): (
+                200, html, HORMEL_INGREDIENTS_HTML + HORMEL_ALLERGENS_HTML,
+            ),
+        }
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.origin = f"http://127.0.0.1:{server.server_address[1]}"
+        self.connect_overrides = {host: self.origin for _method, host, _path in FixtureHandler.routes}
+
+    def scrape(self, urls, **options):
+        rows = {}
+        summary = asyncio.run(
+            scrape_urls(
+                urls,
+                lambda url, row: rows.__setitem__(url, row),
+                timeout_seconds=5,
+                max_workers=4,
+                host_concurrency=2,
+                max_retries=2,
+                connect_overrides=self.connect_overrides,
+                **options,
+            )
+        )
+        return rows, summary
+
+    def test_scrapes_every_template_from_fixture_servers(self):
+        urls = [
+            self.SCANBUY_URL,
+            self.SYNDIGO_URL,
+            self.GENERALMILLS_URL,
+            self.LABELINSIGHT_URL,
+            self.PG_URL,
+            self.HORMEL_URL,
+        ]
+        rows, summary = self.scrape(urls)
+
+        self.assertEqual(set(rows), set(urls))
+        scanbuy = rows[self.SCANBUY_URL]
+        self.assertEqual(scanbuy["notes"], "ok")
+        self.assertEqual(json.loads(scanbuy["ingredients_items_json"]), ["Rice", "Wheat Flour", "Palm Oil"])
+        self.assertEqual(scanbuy["smartlabel_upc"], "00012345678905")
+
+        syndigo = rows[self.SYNDIGO_URL]
+        self.assertEqual(json.loads(syndigo["allergens_present_json"]), ["Milk"])
+
+        generalmills = rows[self.GENERALMILLS_URL]
+        self.assertEqual(generalmills["notes"], "ok", generalmills["smartlabel_error"])
+        self.assertEqual(generalmills["ingredients_http_status"], "200")
+        self.assertEqual(json.loads(generalmills["allergens_may_contain_json"]), ["Sesame"])
+        self.assertEqual(generalmills["image_url"], "https://smartlabel.generalmills.com/images/cheerios.png")
+
+        labelinsight = rows[self.LABELINSIGHT_URL]
+        self.assertEqual(labelinsight["smartlabel_id"], "11188035")
+        self.assertEqual(json.loads(labelinsight["allergens_present_json"]), ["Egg", "Milk"])
+
+        pg = rows[self.PG_URL]
+        self.assertEqual(pg["notes"], "ok", pg["smartlabel_error"])
+        self.assertEqual(json.loads(pg["allergens_declared_json"]), ["Salicylate: 261 mg.;"])
+
+        hormel = rows[self.HORMEL_URL]
+        self.assertEqual(json.loads(hormel["ingredients_items_json"]), ["Cashews", "Peanut Oil", "Sea Salt"])
+
+        # The 503 on the scanbuy landing page was retried and cut that host's limit.
+        self.assertEqual(summary["retries"], 1)
+        self.assertEqual(summary["hosts"]["smartlabel.conagra.com"]["decreases"], 1)
+        self.assertLess(summary["connections_opened"], summary["requests"])
+
+    def test_interrupted_scrape_resumes_from_journal_and_compacts(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        journal_path = Path(tmpdir.name) / "ground_truth.csv.journal.jsonl"
+        urls = [self.SYNDIGO_URL, self.GENERALMILLS_URL, self.LABELINSIGHT_URL, self.PG_URL, self.HORMEL_URL]
+        options = {
+            "timeout_seconds": 5,
+            "max_workers": 4,
+            "host_concurrency": 1,
+            "max_retries": 0,
+            "connect_overrides": self.connect_overrides,
+        }
+
+        class Interrupted(Exception):
+            pass
+
+        seen = []
+
+        def crash_after_two(url, _row):
+            seen.append(url)
+            if len(seen) == 2:
+                raise Interrupted()
+
+        journal = scraper.AppendOnlyJsonlWriter(journal_path)
+        with self.assertRaises(Interrupted):
+            scraper.journal_scrape(urls, journal, checkpoint_every=50, on_row=crash_after_two, **options)
+        self.assertEqual(set(scraper.read_journal_rows(journal_path)), set(seen))
+
+        resumed = scraper.AppendOnlyJsonlWriter(journal_path, resume=True)
+        remaining = [url for url in urls if url not in resumed]
+        self.assertLess(len(remaining), len(urls) - 1)
+        self.assertEqual(set(remaining), set(urls) - set(seen))
+        FixtureHandler.requests_seen = []
+        scraper.journal_scrape(remaining, resumed, checkpoint_every=1, **options)
+        refetched = {f"https://{host}{path}" for _method, host, path in FixtureHandler.requests_seen}
+        self.assertFalse(refetched & set(seen))
+
+        existing = [scraper.build_empty_row("https://smartlabel.example.com/kept")]
+        merged = scraper.merge_rows(existing, scraper.read_journal_rows(journal_path))
+        self.assertEqual([row["smartlabel_url"] for row in merged][0], "https://smartlabel.example.com/kept")
+        self.assertEqual({row["smartlabel_url"] for row in merged[1:]}, set(urls))
+
+    def test_revalidation_rescrapes_only_changed_products(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        validators = scraper.ValidatorStore(Path(tmpdir.name) / "ground_truth.csv.validators.json")
+        urls = [self.SYNDIGO_URL, self.GENERALMILLS_URL, self.PG_URL, self.HORMEL_URL]
+        rows, _summary = self.scrape(urls, validators=validators)
+        validators.save()
+
+        stored = scraper.ValidatorStore(validators.path)
+        self.assertTrue(stored.get(self.GENERALMILLS_URL)["uncacheable"])
+        pg_fetches = stored.get(self.PG_URL)["fetches"]
+        self.assertEqual(len(pg_fetches), 2)
+        self.assertTrue(all(entry["etag"] and entry["sha256"] for entry in pg_fetches.values()))
+
+        hormel_path = "/00037600106399"
+        FixtureHandler.routes[("GET", "smartlabel.hormelfoods.com", hormel_path)] = (
+            200, "text/html", HORMEL_INGREDIENTS_HTML.replace("Sea Salt", "Salt") + HORMEL_ALLERGENS_HTML,
+        )
+        FixtureHandler.requests_seen = []
+        revalidated, summary = self.scrape(urls, validators=stored, revalidate_rows=rows)
+
+        self.assertEqual(summary["revalidation"], {"unchanged": 2, "changed": 1, "unvalidated": 1})
+        self.assertEqual(revalidated[self.SYNDIGO_URL], rows[self.SYNDIGO_URL])
+        self.assertEqual(revalidated[self.PG_URL], rows[self.PG_URL])
+        self.assertEqual(json.loads(revalidated[self.HORMEL_URL]["ingredients_items_json"]), ["Cashews", "Peanut Oil", "Salt"])
+        # The changed landing page was parsed from the revalidation response, not fetched again.
+        hormel_requests = [entry for entry in FixtureHandler.requests_seen if entry[2] == hormel_path]
+        self.assertEqual(len(hormel_requests), 1)
+        self.assertIn(("POST", "smartlabel.generalmills.com", "/GTIN/Ingredients"), FixtureHandler.requests_seen)
+
+    def test_failed_revalidation_falls_back_to_a_full_rescrape(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        validators = scraper.ValidatorStore(Path(tmpdir.name) / "ground_truth.csv.validators.json")
+        urls = [self.PG_URL, self.HORMEL_URL]
+        rows, _summary = self.scrape(urls, validators=validators)
+
+        async def broken_changed_pages(_fetcher, _fetch_log):
+            raise ValueError("corrupt validator entry")
+
+        original = scraper.changed_pages
+        scraper.changed_pages = broken_changed_pages
+        self.addCleanup(setattr, scraper, "changed_pages", original)
+        rescraped, summary = self.scrape(urls, validators=validators, revalidate_rows=rows)
+
+        self.assertEqual(summary["revalidation"], {"failed": 2})
+        self.assertEqual(rescraped, rows)
+
+    def test_validator_store_journals_entries_and_compacts(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = Path(tmpdir.name) / "ground_truth.csv.validators.json"
+        store = scraper.ValidatorStore(path)
+        store.put("https://a.example/1", {"fetches": {"https://a.example/1": {"sha256": "1"}}, "uncacheable": False})
+        store.save()
+        journal_size = store.journal_path.stat().st_size
+        store.put("https://a.example/2", {"fetches": {}, "uncacheable": True})
+        store.save()
+
+        # A checkpoint appends only the new entry and leaves the JSON file alone.
+        self.assertFalse(path.exists())
+        self.assertEqual(len(store.journal_path.read_text(encoding="utf-8").splitlines()), 2)
+        self.assertGreater(store.journal_path.stat().st_size, journal_size)
+        store.put("https://a.example/1", {"fetches": {}, "uncacheable": True})
+        store.save()
+        self.assertTrue(scraper.ValidatorStore(path).get("https://a.example/1")["uncacheable"])
+
+        store.compact()
+        self.assertFalse(store.journal_path.exists())
+        reloaded = scraper.ValidatorStore(path)
+        self.assertEqual(reloaded.products, store.products)
+        self.assertEqual(set(json.loads(path.read_text(encoding="utf-8"))["products"]), {"https://a.example/1", "https://a.example/2"})
+
+    def test_streaming_discovery_feeds_the_scrape(self):
+        complete_url = "https://smartlabel.conagra.com/complete/index.html"
+        missing_url = "https://smartlabel.conagra.com/missing/index.html"
+        complete_row = scraper.build_empty_row(complete_url)
+        complete_row.update({"http_status": "200", "ingredients_items_json": json.dumps(["Water"])})
+        existing_by_url = {complete_url: complete_row, self.PG_URL: scraper.build_empty_row(self.PG_URL)}
+
+        def urlset(*urls):
+            entries = "".join(f"<url><loc>{url}</loc><lastmod>2026-01-01</lastmod></url>" for url in urls)
+            return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+        def search_page(*urls):
+            return json.dumps({"data": {"data": [{"url": url} for url in urls]}})
+
+        xml = "application/xml"
+        FixtureHandler.routes.update(
+            {
+                ("GET", "smartlabel.conagra.com", "/sitemap.xml"): (
+                    200,
+                    xml,
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    "<sitemap><loc>/sitemap-products.xml</loc></sitemap>"
+                    "<sitemap><loc>https://smartlabel.conagra.com/sitemap-more.xml.gz</loc></sitemap>"
+                    "</sitemapindex>",
+                ),
+                ("GET", "smartlabel.conagra.com", "/sitemap-products.xml"): (
+                    200, xml, urlset(self.SCANBUY_URL, complete_url),
+                ),
+                ("GET", "smartlabel.conagra.com", "/sitemap-more.xml.gz"): (
+                    200, "application/octet-stream", gzip.compress(urlset(self.SCANBUY_URL, missing_url).encode("utf-8")),
+                ),
+                ("GET", "smartlabel.hersheys.com", "/sitemap.xml"): (200, "text/html", "<html><body>moved</body></html>"),
+                ("GET", "api.smartlabel.org", "/api/search?perPage=500&page=1"): (
+                    200, "application/json", search_page(self.SYNDIGO_URL, "https://smartlabel.example.com/skip"),
+                ),
+                ("GET", "api.smartlabel.org", "/api/search?perPage=500&page=2"): (
+                    200, "application/json", search_page(self.HORMEL_URL),
+                ),
+            }
+        )
+        self.connect_overrides.update({host: self.origin for _method, host, _path in FixtureHandler.routes})
+
+        def discover_with(scrape_queue, **options):
+            return lambda fetcher, put: scraper.discover_urls(
+                fetcher,
+                scrape_queue,
+                put,
+                hosts=["smartlabel.conagra.com", "smartlabel.hersheys.com"],
+                search_api_pages=2,
+                search_api_hosts={"smartlabel.kraftheinz.com", "smartlabel.hormelfoods.com"},
+                **options,
+            )
+
+        scrape_queue = scraper.ScrapeQueue(existing_by_url, max_total=0)
+        rows, _summary = self.scrape([], discover=discover_with(scrape_queue, max_per_host=0))
+
+        self.assertEqual(
+            set(rows), {self.SCANBUY_URL, missing_url, self.SYNDIGO_URL, self.HORMEL_URL, self.PG_URL}
+        )
+        self.assertEqual(rows[self.SCANBUY_URL]["notes"], "ok")
+        self.assertEqual(rows[missing_url]["notes"], "fetch_failed")
+        self.assertEqual(scrape_queue.urls[-1], self.PG_URL)
+        self.assertEqual(
+            scrape_queue.discovered, {"smartlabel.conagra.com": 4, "smartlabel.hersheys.com": 0, "search_api": 2}
+        )
+
+        capped = scraper.ScrapeQueue(existing_by_url, max_total=3)
+        rows, _summary = self.scrape([], discover=discover_with(capped, max_per_host=1))
+        conagra = [url for url in rows if "conagra" in url]
+        self.assertEqual(len(conagra), 1)
+        self.assertEqual(len(rows), 3)
+
+        # Revalidated rows use up the same per-host and total budgets as discovered ones.
+        revalidating = scraper.ScrapeQueue(existing_by_url, max_total=2)
+        self.assertTrue(revalidating.offer_revalidation("https://smartlabel.conagra.com/a.html", limit=1))
+        self.assertFalse(revalidating.offer_revalidation("https://smartlabel.conagra.com/b.html", limit=1))
+        self.assertTrue(revalidating.offer_revalidation(self.PG_URL, limit=1))
+        rows, _summary = self.scrape([], discover=discover_with(revalidating, max_per_host=1))
+        self.assertEqual(rows, {})
+
+        # A failed search API page is skipped; the other pages and the scrape carry on.
+        del FixtureHandler.routes[("GET", "api.smartlabel.org", "/api/search?perPage=500&page=1")]
+        partial = scraper.ScrapeQueue(existing_by_url, max_total=0)
+        rows, _summary = self.scrape(
+            [],
+            discover=lambda fetcher, put: scraper.discover_urls(
+                fetcher,
+                partial,
+                put,
+                hosts=[],
+                max_per_host=0,
+                search_api_pages=2,
+                search_api_hosts={"smartlabel.hormelfoods.com"},
+            ),
+        )
+        self.assertEqual(partial.failed_search_api_pages, [1])
+        self.assertIn(self.HORMEL_URL, rows)
+
+    def test_landing_failures_become_fetch_failed_rows(self):
+        missing = "https://smartlabel.pg.com/en-us/00037000999999.html"
+        rows, _summary = self.scrape([missing])
+
+        self.assertEqual(rows[missing]["notes"], "fetch_failed")
+        self.assertEqual(rows[missing]["http_status"], "404")
+
+
+
+PARITY_FIXTURES = {
+    "scanbuy_ingredients": [SCANBUY_INGREDIENTS_HTML, SCANBUY_INGREDIENTS_DIV_HTML],
+    "scanbuy_allergens": [SCANBUY_ALLERGENS_HTML, SCANBUY_SAFE_ALLERGENS_HTML],
+    "syndigo": [SYNDIGO_INGREDIENTS_HTML + SYNDIGO_ALLERGENS_HTML],
+    "bestchoice": [BESTCHOICE_HTML, BESTCHOICE_MISSING_ALLERGEN_STATUS_HTML],
+    "generalmills_ingredients": [GENERALMILLS_INGREDIENTS_HTML],
+    "generalmills_allergens": [GENERALMILLS_ALLERGENS_HTML],
+    "hormel": [HORMEL_INGREDIENTS_HTML + HORMEL_ALLERGENS_HTML],
+    "rbnainfo": [RBNINFO_HTML],
+}
+
+
+class HtmlBackendParityTests(unittest.TestCase):
+    def test_every_installed_backend_matches_bs4_on_fixtures(self):
+        self.assertEqual(set(PARITY_FIXTURES), set(benchmark.TEMPLATE_PARSERS))
+        for backend in html_select.available_backends():
+            for template, pages in PARITY_FIXTURES.items():
+                for index, html in enumerate(pages):
+                    with self.subTest(backend=backend, template=template, page=index):
+                        self.assertEqual(
+                            benchmark.extract_page(html, template, backend),
+                            benchmark.extract_page(html, template, "bs4"),
+                        )
+
+    def test_text_skips_scripts_and_comments_on_every_backend(self):
+        html = '<div id="x">a<script>var x = 1;</script> b <!-- c --><p>  d\n</p><style>.e {}</style></div>'
+        for backend in html_select.available_backends():
+            with self.subTest(backend=backend):
+                doc = html_select.parse_html(html, backend)
+                self.assertEqual(doc.select_one("#x").text(), "a b d")
+                self.assertIsNone(doc.select_one("#missing"))
+
+    def test_parsers_accept_a_parsed_document(self):
+        html = SYNDIGO_INGREDIENTS_HTML + SYNDIGO_ALLERGENS_HTML
+        doc = html_select.parse_html(html)
+        self.assertEqual(parse_syndigo_ingredients_html(doc), parse_syndigo_ingredients_html(html))
+        self.assertEqual(parse_syndigo_allergens_html(doc), parse_syndigo_allergens_html(html))
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(RuntimeError):
+            html_select.set_backend("html5lib")
+
+    def test_default_backend_is_the_bs4_reference(self):
+        self.addCleanup(html_select.set_backend)
+        self.assertEqual(html_select.set_backend(), "bs4")
+        with self.assertRaises(TypeError):
+            html_select.HtmlNode(None)
+
+    def test_benchmark_times_saved_pages_per_template(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        html_dir = Path(tmpdir.name)
+        for template, pages in PARITY_FIXTURES.items():
+            (html_dir / template).mkdir()
+            for index, html in enumerate(pages):
+                (html_dir / template / f"page-{index}.html").write_text(html, encoding="utf-8")
+
+        report = benchmark.run_benchmark(html_dir, ["bs4"], repeat=1)
+
+        self.assertEqual(set(report), set(PARITY_FIXTURES))
+        self.assertEqual(report["bestchoice"]["pages"], 2)
+        bs4_stats = report["hormel"]["backends"]["bs4"]
+        self.assertTrue(bs4_stats["matches_bs4"])
+        self.assertGreater(bs4_stats["ms_per_page"], 0)
+        self.assertEqual(bs4_stats["speedup_vs_bs4"], 1.0)
+
+
 if __name__ == "__main__":
     unittest.main()
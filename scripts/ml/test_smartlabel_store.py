@@ -0,0 +1,157 @@
+import csv
+import importlib.util
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("smartlabel_store.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("smartlabel_store", MODULE_PATH)
+store = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(store)
+
+CATALOG_PATH = MODULE_PATH.with_name("build_smartlabel_safe_catalog.py")
+CATALOG_SPEC = importlib.util.spec_from_file_location("build_smartlabel_safe_catalog", CATALOG_PATH)
+catalog = importlib.util.module_from_spec(CATALOG_SPEC)
+assert CATALOG_SPEC and CATALOG_SPEC.loader
+sys.modules[CATALOG_SPEC.name] = catalog
+CATALOG_SPEC.loader.exec_module(catalog)
+
+FIELDNAMES = [
+    "smartlabel_id",
+    "smartlabel_upc",
+    "smartlabel_url",
+    "smartlabel_url_ingredients",
+    "smartlabel_url_allergens",
+    "rev",
+    "ingredients_http_status",
+    "allergens_http_status",
+    "ingredients_items_json",
+    "allergens_declared_json",
+    "allergens_present_json",
+    "allergens_may_contain_json",
+    "smartlabel_error",
+    "notes",
+]
+
+
+def ground_truth_row(smartlabel_id, upc, items, *, declared=(), allergens_status="200", rev=""):
+    return {
+        "smartlabel_id": str(smartlabel_id),
+        "smartlabel_upc": upc,
+        "smartlabel_url": f"https://smartlabel.example.com/{smartlabel_id}",
+        "smartlabel_url_ingredients": f"https://smartlabel.example.com/{smartlabel_id}/ingredients",
+        "smartlabel_url_allergens": f"https://smartlabel.example.com/{smartlabel_id}/allergens",
+        "rev": rev,
+        "ingredients_http_status": "200",
+        "allergens_http_status": allergens_status,
+        "ingredients_items_json": json.dumps(list(items)),
+        "allergens_declared_json": json.dumps(list(declared)),
+        "allergens_present_json": "[]",
+        "allergens_may_contain_json": "[]",
+        "smartlabel_error": "",
+        "notes": "",
+    }
+
+
+ROWS = [
+    ground_truth_row(1, "0001", ["Water", "Sugar", "Contains:"]),
+    ground_truth_row(2, "0001", ["Water", "Sugar"], rev="1"),
+    ground_truth_row(3, "0002", ["Water ", "Salt, Iodized", "Crème"]),
+    ground_truth_row(4, "0003", ["Water", "Milk"], declared=["Milk"]),
+    ground_truth_row(5, "0004", ["Water"], allergens_status="404"),
+    ground_truth_row(6, "", []),
+]
+
+
+def write_csv(path, rows):
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class SmartLabelStoreTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.root = Path(temp_dir.name)
+        self.csv_path = self.root / "ground_truth.csv"
+        self.store_path = self.root / "ground_truth.sqlite"
+        write_csv(self.csv_path, ROWS)
+        self.assertEqual(store.write_store(self.store_path, FIELDNAMES, store.iter_csv_rows(self.csv_path)), len(ROWS))
+
+    def test_round_trips_csv_with_native_lists(self):
+        rows = list(store.iter_store_rows(self.store_path))
+        self.assertEqual(rows[2]["ingredients_items_json"], ["Water ", "Salt, Iodized", "Crème"])
+        self.assertEqual(rows[5]["ingredients_items_json"], [])
+        self.assertEqual([row["smartlabel_id"] for row in rows], ["1", "2", "3", "4", "5", "6"])
+
+        exported = self.root / "exported.csv"
+        self.assertEqual(store.export_csv(self.store_path, exported), len(ROWS))
+        with exported.open("r", encoding="utf-8", newline="") as handle:
+            self.assertEqual(list(csv.DictReader(handle)), ROWS)
+
+    def test_non_string_items_and_malformed_cells_decode_like_the_csv_reader(self):
+        odd = ground_truth_row(7, "0005", [])
+        odd["ingredients_items_json"] = json.dumps(["Water", 1, {"name": "Salt"}, None])
+        odd["allergens_declared_json"] = "[not json"
+        odd_csv = self.root / "odd.csv"
+        odd_store = self.root / "odd.sqlite"
+        write_csv(odd_csv, [odd])
+        store.write_store(odd_store, FIELDNAMES, store.iter_csv_rows(odd_csv))
+
+        [row] = store.iter_store_rows(odd_store)
+        self.assertEqual(row["ingredients_items_json"], ["Water", 1, {"name": "Salt"}, None])
+        self.assertEqual(row["allergens_declared_json"], [])
+        self.assertEqual(
+            list(catalog.iter_rows(odd_store))[0].items, list(catalog.iter_rows(odd_csv))[0].items
+        )
+
+        exported = self.root / "odd_exported.csv"
+        store.export_csv(odd_store, exported)
+        with exported.open("r", encoding="utf-8", newline="") as handle:
+            [exported_row] = list(csv.DictReader(handle))
+        self.assertEqual(json.loads(exported_row["ingredients_items_json"]), ["Water", 1, {"name": "Salt"}, None])
+        self.assertEqual(exported_row["allergens_declared_json"], "[]")
+
+    def test_projects_columns_and_pushes_filters_into_sql(self):
+        safe = list(
+            store.iter_store_rows(
+                self.store_path,
+                columns=["smartlabel_id", "ingredients_items_json", "allergens_declared_count"],
+                where=[
+                    ("allergens_http_status", "==", "200"),
+                    ("allergens_declared_count", "==", 0),
+                    ("ingredients_items_count", ">", 0),
+                ],
+            )
+        )
+        self.assertEqual(
+            safe,
+            [
+                {"smartlabel_id": "1", "ingredients_items_json": ["Water", "Sugar", "Contains:"], "allergens_declared_count": 0},
+                {"smartlabel_id": "2", "ingredients_items_json": ["Water", "Sugar"], "allergens_declared_count": 0},
+                {"smartlabel_id": "3", "ingredients_items_json": ["Water ", "Salt, Iodized", "Crème"], "allergens_declared_count": 0},
+            ],
+        )
+        upcs = store.iter_store_rows(self.store_path, columns=["smartlabel_upc"], where=[("smartlabel_upc", "in", ["0002", "0004"])])
+        self.assertEqual(list(upcs), [{"smartlabel_upc": "0002"}, {"smartlabel_upc": "0004"}])
+        with self.assertRaises(RuntimeError):
+            list(store.iter_store_rows(self.store_path, where=[("ingredients_items_json", "==", "[]")]))
+        with self.assertRaises(RuntimeError):
+            list(store.iter_store_rows(self.store_path, columns=["missing"]))
+
+    def test_catalog_reads_the_store_like_the_csv(self):
+        from_csv = catalog.build_seed_rows(catalog.iter_rows(self.csv_path), 1, Path("ground_truth"))
+        from_store = catalog.build_seed_rows(catalog.iter_rows(self.store_path), 1, Path("ground_truth"))
+        self.assertEqual(from_store, from_csv)
+        self.assertEqual(from_store[1]["safe_products_used"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import hashlib
+import http.server
+import importlib.util
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("snapshot_download.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("snapshot_download", MODULE_PATH)
+snapshot_download = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(snapshot_download)
+
+
+PAYLOAD = bytes(range(256)) * 4096
+ETAG = '"snapshot-v1"'
+
+
+class SnapshotHandler(http.server.BaseHTTPRequestHandler):
+    # Shared across requests; reset per test by the server factory.
+    drop_after_bytes = 0
+    drops_remaining = 0
+    range_not_satisfiable = False
+    send_etag = True
+    requests_seen: list = []
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test server output
+        return
+
+    def do_GET(self):
+        type(self).requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range", "")
+        if range_header and type(self).range_not_satisfiable:
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if range_header.startswith("bytes=") and self.headers.get("If-Range", ETAG) == ETAG:
+            start = int(range_header[len("bytes="):].split("-", 1)[0])
+
+        body = PAYLOAD[start:]
+        if start:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if type(self).send_etag:
+            self.send_header("ETag", ETAG)
+        self.end_headers()
+
+        if type(self).drops_remaining > 0:
+            type(self).drops_remaining -= 1
+            self.wfile.write(body[: type(self).drop_after_bytes])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+class SnapshotDownloadTests(unittest.TestCase):
+    def start_server(
+        self, *, drops: int = 0, drop_after_bytes: int = 0, range_not_satisfiable: bool = False, send_etag: bool = True
+    ) -> str:
+        SnapshotHandler.drops_remaining = drops
+        SnapshotHandler.drop_after_bytes = drop_after_bytes
+        SnapshotHandler.range_not_satisfiable = range_not_satisfiable
+        SnapshotHandler.send_etag = send_etag
+        SnapshotHandler.requests_seen = []
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SnapshotHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/snapshot.csv.gz"
+
+    def output_path(self) -> Path:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        return Path(tmpdir.name) / "snapshot.csv.gz"
+
+    def download(self, url: str, output_path: Path, **overrides):
+        options = {"timeout": 5.0, "backoff_seconds": 0.0, "chunk_size": 64 * 1024}
+        options.update(overrides)
+        return snapshot_download.download_snapshot(url=url, output_path=output_path, **options)
+
+    def test_resumes_after_dropped_connections_and_writes_manifest(self):
+        url = self.start_server(drops=2, drop_after_bytes=300_000)
+        output_path = self.output_path()
+
+        meta = self.download(url, output_path, expected_sha256=hashlib.sha256(PAYLOAD).hexdigest())
+
+        self.assertTrue(meta["downloaded"])
+        self.assertEqual(meta["resumed_from"], 300_000)
+        self.assertEqual(output_path.read_bytes(), PAYLOAD)
+        self.assertEqual(SnapshotHandler.requests_seen[1]["Range"], "bytes=300000-")
+        self.assertEqual(SnapshotHandler.requests_seen[2]["Range"], "bytes=600000-")
+        self.assertEqual(SnapshotHandler.requests_seen[2]["If-Range"], ETAG)
+        manifest = snapshot_download.read_manifest(snapshot_download.manifest_path_for(output_path))
+        self.assertEqual(manifest["size"], len(PAYLOAD))
+        self.assertEqual(manifest["sha256"], hashlib.sha256(PAYLOAD).hexdigest())
+        self.assertEqual(manifest["etag"], ETAG)
+        self.assertFalse(snapshot_download.temp_path_for(output_path).exists())
+
+    def test_keeps_partial_file_between_runs(self):
+        url = self.start_server(drops=1, drop_after_bytes=200_000)
+        output_path = self.output_path()
+
+        with self.assertRaises(RuntimeError):
+            self.download(url, output_path, max_attempts=1)
+        self.assertEqual(snapshot_download.temp_path_for(output_path).stat().st_size, 200_000)
+
+        meta = self.download(url, output_path)
+        self.assertEqual(meta["resumed_from"], 200_000)
+        self.assertEqual(meta["bytes_written"], len(PAYLOAD) - 200_000)
+        self.assertEqual(output_path.read_bytes(), PAYLOAD)
+
+    def test_range_not_satisfiable_on_last_attempt_raises_download_error(self):
+        url = self.start_server(drops=1, drop_after_bytes=200_000, range_not_satisfiable=True)
+        output_path = self.output_path()
+
+        with self.assertRaises(RuntimeError):
+            self.download(url, output_path, max_attempts=1)
+        with self.assertRaisesRegex(RuntimeError, "download failed after 1 attempts.*416"):
+            self.download(url, output_path, max_attempts=1)
+        self.assertFalse(snapshot_download.temp_path_for(output_path).exists())
+
+    def test_resume_without_validators_omits_if_range(self):
+        url = self.start_server(drops=1, drop_after_bytes=200_000, send_etag=False)
+        output_path = self.output_path()
+
+        meta = self.download(url, output_path)
+        self.assertEqual(meta["resumed_from"], 200_000)
+        self.assertEqual(output_path.read_bytes(), PAYLOAD)
+        self.assertEqual(SnapshotHandler.requests_seen[1]["Range"], "bytes=200000-")
+        self.assertNotIn("If-Range", SnapshotHandler.requests_seen[1])
+
+    def test_revalidate_skips_unchanged_snapshot(self):
+        url = self.start_server()
+        output_path = self.output_path()
+        self.download(url, output_path)
+
+        reused = self.download(url, output_path)
+        self.assertFalse(reused["downloaded"])
+        self.assertEqual(len(SnapshotHandler.requests_seen), 1)
+
+        revalidated = self.download(url, output_path, revalidate=True)
+        self.assertFalse(revalidated["downloaded"])
+        self.assertTrue(revalidated["not_modified"])
+        self.assertEqual(SnapshotHandler.requests_seen[-1]["If-None-Match"], ETAG)
+
+    def test_checksum_mismatch_discards_download(self):
+        url = self.start_server()
+        output_path = self.output_path()
+
+        with self.assertRaises(RuntimeError):
+            self.download(url, output_path, expected_sha256="0" * 64)
+        self.assertFalse(output_path.exists())
+        self.assertFalse(snapshot_download.temp_path_for(output_path).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
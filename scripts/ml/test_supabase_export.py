@@ -0,0 +1,226 @@
+import http.server
+import importlib.util
+import json
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.parse
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("supabase_export.py")
+sys.path.insert(0, str(MODULE_PATH.parent))
+SPEC = importlib.util.spec_from_file_location("supabase_export", MODULE_PATH)
+supabase_export = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(supabase_export)
+
+from http_client import HttpClient  # noqa: E402
+
+
+def matches_filter(value, expression):
+    operator, _, operand = expression.partition(".")
+    if operator == "eq":
+        return str(value).lower() == operand.lower()
+    if operator == "gt":
+        return value is not None and str(value) > operand
+    if operator == "gte":
+        return value is not None and str(value) >= operand
+    if operator == "lt":
+        return value is not None and str(value) < operand
+    if expression == "not.is.null":
+        return value is not None
+    raise ValueError(f"unsupported filter {expression}")
+
+
+class PostgrestStub(http.server.BaseHTTPRequestHandler):
+    """Enough of PostgREST for table reads: select, eq/gt/gte/lt/not.is.null, order and limit."""
+
+    protocol_version = "HTTP/1.1"
+    tables: dict = {}
+    requests_seen: list = []
+
+    def log_message(self, format, *args):  # noqa: A002 - silence test server output
+        return
+
+    def do_GET(self):
+        handler = type(self)
+        parsed = urllib.parse.urlsplit(self.path)
+        table = parsed.path.rsplit("/", 1)[-1]
+        query = urllib.parse.parse_qsl(parsed.query)
+        handler.requests_seen.append((table, dict(query)))
+        if "Range" in self.headers or any(name == "offset" for name, _ in query):
+            self.reply(400, {"message": "offset pagination is not expected"})
+            return
+
+        rows = list(handler.tables[table])
+        columns = None
+        limit = None
+        for name, value in query:
+            if name == "select":
+                columns = value.split(",")
+            elif name == "limit":
+                limit = int(value)
+            elif name == "order":
+                column, _, direction = value.partition(".")
+                rows.sort(key=lambda row: str(row.get(column)), reverse=direction == "desc")
+            else:
+                rows = [row for row in rows if matches_filter(row.get(name), value)]
+        if limit is not None:
+            rows = rows[:limit]
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        self.reply(200, rows)
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def ingredient_row(index, *, updated_at="2026-01-01T00:00:00+00:00", text=None):
+    return {
+        "id": f"00000000-0000-0000-0000-{index:012d}",
+        "row_text": text if text is not None else f"row {index}",
+        "created_at": f"2025-12-{(30 - index % 28):02d}T00:00:00+00:00",
+        "updated_at": updated_at,
+        "secret": "not selected",
+    }
+
+
+ROWS_SPEC = supabase_export.TableSpec(
+    "dish_ingredient_rows",
+    "dish_ingredient_rows",
+    "id,row_text,created_at",
+    filters=(("row_text", "not.is.null"),),
+    sort_by=("created_at",),
+    updated_column="updated_at",
+)
+ALLERGENS_SPEC = supabase_export.TableSpec(
+    "allergens",
+    "allergens",
+    "id,key,sort_order",
+    filters=(("is_active", "eq.true"),),
+    sort_by=("sort_order",),
+)
+
+
+class SupabaseExportTests(unittest.TestCase):
+    def setUp(self):
+        PostgrestStub.requests_seen = []
+        PostgrestStub.tables = {
+            "dish_ingredient_rows": [ingredient_row(index) for index in range(1, 12)],
+            "allergens": [
+                {"id": "a2", "key": "egg", "sort_order": 2, "is_active": True},
+                {"id": "a1", "key": "milk", "sort_order": 1, "is_active": True},
+                {"id": "a3", "key": "retired", "sort_order": 0, "is_active": False},
+            ],
+        }
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), PostgrestStub)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.raw_dir = Path(tmpdir.name)
+
+    def make_client(self):
+        client = HttpClient(timeout=5.0, max_retries=0)
+        self.addCleanup(client.close)
+        return client
+
+    def export(self, *, incremental=False, page_size=4):
+        tables, stats = supabase_export.export_tables(
+            self.make_client(),
+            self.base_url,
+            "service-key",
+            [ROWS_SPEC, ALLERGENS_SPEC],
+            raw_output_dir=self.raw_dir,
+            page_size=page_size,
+            workers=2,
+            incremental=incremental,
+        )
+        for name, rows in tables.items():
+            (self.raw_dir / f"{name}.json").write_text(json.dumps({"rows": rows}), encoding="utf-8")
+        supabase_export.write_export_state(self.raw_dir, stats)
+        return tables, stats
+
+    def test_full_pull_pages_by_key_and_restores_requested_order(self):
+        tables, stats = self.export()
+
+        rows = tables["dish_ingredient_rows"]
+        self.assertEqual(len(rows), 11)
+        self.assertEqual([row["created_at"] for row in rows], sorted(row["created_at"] for row in rows))
+        self.assertEqual(set(rows[0]), {"id", "row_text", "created_at", "updated_at"})
+        self.assertEqual([row["key"] for row in tables["allergens"]], ["milk", "egg"])
+        self.assertEqual(stats["dish_ingredient_rows"]["pages"], 3)
+        self.assertEqual(stats["dish_ingredient_rows"]["mode"], "full")
+        self.assertNotIn("watermark", stats["allergens"])
+
+        row_queries = [query for table, query in PostgrestStub.requests_seen if table == "dish_ingredient_rows"]
+        self.assertNotIn("id", row_queries[0])
+        self.assertEqual(row_queries[1]["id"], f"gt.{ingredient_row(4)['id']}")
+        self.assertEqual(row_queries[2]["id"], f"gt.{ingredient_row(8)['id']}")
+
+    def test_repeated_filter_columns_are_all_sent(self):
+        spec = supabase_export.TableSpec(
+            "dish_ingredient_rows",
+            "dish_ingredient_rows",
+            "id,row_text",
+            filters=(("id", f"gte.{ingredient_row(3)['id']}"), ("id", f"lt.{ingredient_row(10)['id']}")),
+        )
+
+        rows, pages = supabase_export.fetch_table_keyset(
+            self.make_client(), self.base_url, "service-key", spec, page_size=4
+        )
+
+        self.assertEqual([row["id"] for row in rows], [ingredient_row(index)["id"] for index in range(3, 10)])
+        self.assertEqual(pages, 2)
+
+    def test_incremental_pull_merges_changed_rows_past_watermark(self):
+        self.export()
+        state = json.loads((self.raw_dir / supabase_export.STATE_FILENAME).read_text(encoding="utf-8"))
+        self.assertEqual(state["tables"]["dish_ingredient_rows"]["watermark"], "2026-01-01T00:00:00+00:00")
+
+        later = "2026-02-01T12:00:00.5+00:00"
+        table = PostgrestStub.tables["dish_ingredient_rows"]
+        table[2] = ingredient_row(3, updated_at=later, text="row 3 edited")
+        table.append(ingredient_row(40, updated_at=later))
+        PostgrestStub.requests_seen = []
+
+        tables, stats = self.export(incremental=True)
+
+        rows = {row["id"]: row for row in tables["dish_ingredient_rows"]}
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[ingredient_row(3)["id"]]["row_text"], "row 3 edited")
+        self.assertIn(ingredient_row(40)["id"], rows)
+        self.assertEqual(stats["dish_ingredient_rows"]["mode"], "incremental")
+        self.assertEqual(stats["dish_ingredient_rows"]["watermark"], later)
+        self.assertEqual(stats["allergens"]["mode"], "full")
+
+        queries = [query for table_name, query in PostgrestStub.requests_seen if table_name == "dish_ingredient_rows"]
+        self.assertEqual(queries[0]["updated_at"], "gte.2026-01-01T00:00:00+00:00")
+
+        # A rerun with nothing new only re-reads the rows sitting on the watermark.
+        _tables, stats = self.export(incremental=True)
+        self.assertEqual(stats["dish_ingredient_rows"]["fetched_rows"], 2)
+        self.assertEqual(stats["dish_ingredient_rows"]["rows"], 12)
+
+    def test_incremental_without_previous_snapshot_falls_back_to_full(self):
+        self.export()
+        (self.raw_dir / "dish_ingredient_rows.json").unlink()
+
+        tables, stats = self.export(incremental=True)
+
+        self.assertEqual(stats["dish_ingredient_rows"]["mode"], "full")
+        self.assertEqual(len(tables["dish_ingredient_rows"]), 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
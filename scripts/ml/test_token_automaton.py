@@ -0,0 +1,58 @@
+import importlib.util
+import random
+import unittest
+from collections import Counter
+from pathlib import Path
+
+
+MODULE_PATH = Path(__file__).with_name("token_automaton.py")
+SPEC = importlib.util.spec_from_file_location("token_automaton", MODULE_PATH)
+token_automaton = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+SPEC.loader.exec_module(token_automaton)
+
+TERMS = [
+    (0, ("milk",)),
+    (1, ("milk", "protein")),
+    (2, ("milk", "protein", "concentrate")),
+    (3, ("protein", "concentrate")),
+    (4, ("whey",)),
+    (5, ("whey", "protein")),
+    (6, ("a", "a")),
+    (7, ("a", "a", "b")),
+    (8, ("a", "b")),
+    (9, ("milk",)),
+    (10, ()),
+]
+
+
+class TokenAutomatonTests(unittest.TestCase):
+    def test_counts_nested_and_overlapping_terms_like_the_trie(self):
+        automaton = token_automaton.TokenAutomaton.build(TERMS)
+        trie = token_automaton.build_token_trie(TERMS)
+        cases = {
+            ("milk", "protein", "concentrate"): {0: 1, 1: 1, 2: 1, 3: 1, 9: 1},
+            ("whey", "protein", "milk", "protein"): {4: 1, 5: 1, 0: 1, 1: 1, 9: 1},
+            ("a", "a", "a", "b"): {6: 2, 7: 1, 8: 1},
+            ("skim", "milk", "salt", "milk"): {0: 2, 9: 2},
+            ("protein", "salt", "concentrate"): {},
+            (): {},
+        }
+        for tokens, expected in cases.items():
+            with self.subTest(tokens=tokens):
+                self.assertEqual(automaton.count_matches(tokens), Counter(expected))
+                self.assertEqual(token_automaton.count_trie_matches(tokens, trie), Counter(expected))
+
+    def test_random_token_streams_match_the_trie(self):
+        rng = random.Random(11)
+        vocabulary = ["a", "b", "c", "d", "milk", "x"]
+        terms = [(term_id, tuple(rng.choice(vocabulary[:4]) for _ in range(rng.randint(1, 4)))) for term_id in range(40)]
+        automaton = token_automaton.TokenAutomaton.build(terms)
+        trie = token_automaton.build_token_trie(terms)
+        for _ in range(300):
+            tokens = tuple(rng.choice(vocabulary) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(automaton.count_matches(tokens), token_automaton.count_trie_matches(tokens, trie))
+
+
+if __name__ == "__main__":
+    unittest.main()
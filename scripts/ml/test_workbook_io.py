@@ -0,0 +1,127 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import openpyxl
+from openpyxl.comments import Comment
+from openpyxl.styles import Font
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+
+MODULE_PATH = Path(__file__).with_name("workbook_io.py")
+SPEC = importlib.util.spec_from_file_location("workbook_io", MODULE_PATH)
+workbook_io = importlib.util.module_from_spec(SPEC)
+assert SPEC and SPEC.loader
+# Registered because dataclasses resolve field annotations through sys.modules.
+sys.modules[SPEC.name] = workbook_io
+SPEC.loader.exec_module(workbook_io)
+
+
+def sheet_values(workbook, title):
+    return [list(row) for row in workbook[title].iter_rows(values_only=True)]
+
+
+class WriteWorkbookTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.input_path = Path(temp_dir.name) / "input.xlsx"
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Map"
+        sheet.append(["Allergen", "Ingredient"])
+        sheet.append(["Milk", "Whey"])
+        sheet.append(["Wheat", "=LOWER(\"Spelt\")"])
+        sheet["A1"].font = Font(bold=True)
+        sheet.column_dimensions["B"].width = 42
+        sheet.freeze_panes = "A2"
+        sheet.merge_cells("A5:B5")
+        stale = workbook.create_sheet("Generated")
+        for index in range(20):
+            stale.append(["stale", index])
+        workbook.create_sheet("Notes").sheet_state = "hidden"
+        workbook.save(self.input_path)
+
+    def test_copies_hand_sheets_and_replaces_generated_ones(self):
+        generated = workbook_io.SheetRows("Generated")
+        generated.append(["Term", "Rows"])
+        generated.append(["whey", 3])
+        generated.freeze_panes = "A2"
+        output_path = self.input_path.with_name("output.xlsx")
+
+        workbook_io.write_workbook(
+            self.input_path, output_path, [generated], appended_rows={"Map": [["Egg", "Albumen"]]}
+        )
+
+        result = openpyxl.load_workbook(output_path)
+        self.assertEqual(result.sheetnames, ["Map", "Notes", "Generated"])
+        self.assertEqual(
+            sheet_values(result, "Map"),
+            [
+                ["Allergen", "Ingredient"],
+                ["Milk", "Whey"],
+                ["Wheat", "=LOWER(\"Spelt\")"],
+                [None, None],
+                [None, None],
+                ["Egg", "Albumen"],
+            ],
+        )
+        self.assertEqual(sheet_values(result, "Generated"), [["Term", "Rows"], ["whey", 3]])
+        copied = result["Map"]
+        self.assertTrue(copied["A1"].font.b)
+        self.assertEqual(copied.column_dimensions["B"].width, 42)
+        self.assertEqual(copied.freeze_panes, "A2")
+        self.assertEqual([str(cell_range) for cell_range in copied.merged_cells.ranges], ["A5:B5"])
+        self.assertEqual(result["Notes"].sheet_state, "hidden")
+        self.assertEqual(result["Generated"].freeze_panes, "A2")
+
+    def test_keeps_validations_hyperlinks_and_comments_on_hand_sheets(self):
+        workbook = openpyxl.load_workbook(self.input_path)
+        sheet = workbook["Map"]
+        validation = DataValidation(type="list", formula1='"Milk,Wheat,Egg"')
+        validation.add("A2:A100")
+        sheet.add_data_validation(validation)
+        sheet["B2"].hyperlink = "https://example.com/whey"
+        sheet["B3"].comment = Comment("Reviewed by hand", "editor")
+        sheet.row_dimensions[2].height = 30
+        workbook.defined_names["AllergenNames"] = DefinedName("AllergenNames", attr_text="Map!$A$2:$A$100")
+        workbook.save(self.input_path)
+
+        generated = workbook_io.SheetRows("Generated")
+        generated.append(["whey", 3])
+        workbook_io.write_workbook(
+            self.input_path, self.input_path, [generated], appended_rows={"Map": [["Egg", "Albumen"]]}
+        )
+
+        result = openpyxl.load_workbook(self.input_path)
+        copied = result["Map"]
+        self.assertEqual([str(item.sqref) for item in copied.data_validations.dataValidation], ["A2:A100"])
+        self.assertEqual(copied["B2"].hyperlink.target, "https://example.com/whey")
+        self.assertEqual(copied["B3"].comment.text, "Reviewed by hand")
+        self.assertEqual(copied.row_dimensions[2].height, 30)
+        self.assertIn("AllergenNames", result.defined_names)
+        self.assertEqual(sheet_values(result, "Map")[-1], ["Egg", "Albumen"])
+        self.assertEqual(sheet_values(result, "Generated"), [["whey", 3]])
+
+    def test_rewrites_in_place_and_rejects_appends_to_generated_sheets(self):
+        with self.assertRaises(RuntimeError):
+            workbook_io.write_workbook(
+                self.input_path,
+                self.input_path,
+                [workbook_io.SheetRows("Generated")],
+                appended_rows={"Generated": [["x"]]},
+            )
+
+        workbook_io.write_workbook(self.input_path, self.input_path, [workbook_io.SheetRows("Generated")])
+        result = openpyxl.load_workbook(self.input_path)
+        self.assertEqual(sheet_values(result, "Generated"), [])
+        self.assertEqual(sheet_values(result, "Map")[1], ["Milk", "Whey"])
+        self.assertEqual(list(self.input_path.parent.glob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Token-level Aho-Corasick matching for multi-token alias and term lists.
+
+The allergen scripts count, for every alias, how many times its token
+sequence occurs in a row's tokens (overlapping and nested occurrences
+included). Walking a nested-dict trie from every start token costs
+``tokens x longest alias`` lookups. :class:`TokenAutomaton` gets the same
+counts in one left-to-right pass:
+
+- tokens are interned to integer ids, and any token outside the alias
+  vocabulary resets the automaton to the root without a lookup;
+- goto edges live in one flat ``dict`` keyed by ``state * width + token_id``;
+- failure links are an ``array`` of state ids;
+- every state's output tuple already includes the outputs reachable through
+  its failure chain, so a match is reported with a single index.
+
+:func:`build_token_trie` and :func:`count_trie_matches` keep the nested-dict
+matcher as the reference for parity tests and ``benchmark_alias_matchers.py``.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import Counter, deque
+from typing import Deque, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+TRIE_TERM_IDS_KEY = "__term_ids__"
+
+
+class TokenAutomaton:
+    """Compiled matcher over ``(term_id, tokens)`` pairs."""
+
+    __slots__ = ("token_ids", "width", "transitions", "fail", "outputs")
+
+    def __init__(
+        self,
+        token_ids: Dict[str, int],
+        transitions: Dict[int, int],
+        fail: array,
+        outputs: List[Tuple[int, ...]],
+    ) -> None:
+        self.token_ids = token_ids
+        self.width = max(1, len(token_ids))
+        self.transitions = transitions
+        self.fail = fail
+        self.outputs = outputs
+
+    @classmethod
+    def build(cls, terms: Iterable[Tuple[int, Sequence[str]]]) -> "TokenAutomaton":
+        token_ids: Dict[str, int] = {}
+        children: List[Dict[int, int]] = [{}]
+        terminal_ids: List[List[int]] = [[]]
+        for term_id, tokens in terms:
+            # An empty sequence never matches; the dict trie ignores it the same way.
+            if not tokens:
+                continue
+            state = 0
+            for token in tokens:
+                token_id = token_ids.setdefault(token, len(token_ids))
+                child = children[state].get(token_id)
+                if child is None:
+                    child = len(children)
+                    children[state][token_id] = child
+                    children.append({})
+                    terminal_ids.append([])
+                state = child
+            terminal_ids[state].append(term_id)
+
+        width = max(1, len(token_ids))
+        transitions: Dict[int, int] = {}
+        fail = array("i", [0]) * len(children)
+        outputs: List[Tuple[int, ...]] = [()] * len(children)
+
+        # Breadth-first, so a state's failure target is final before its children need it.
+        queue: Deque[int] = deque()
+        for token_id, child in children[0].items():
+            transitions[token_id] = child
+            outputs[child] = tuple(terminal_ids[child])
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for token_id, child in children[state].items():
+                transitions[state * width + token_id] = child
+                target = fail[state]
+                while True:
+                    suffix = children[target].get(token_id)
+                    if suffix is not None or target == 0:
+                        break
+                    target = fail[target]
+                fail[child] = suffix if suffix is not None else 0
+                outputs[child] = tuple(terminal_ids[child]) + outputs[fail[child]]
+                queue.append(child)
+
+        return cls(token_ids, transitions, fail, outputs)
+
+    @property
+    def state_count(self) -> int:
+        return len(self.outputs)
+
+    def count_matches(self, tokens: Sequence[str]) -> Counter:
+        """Mentions per term id: one per position where the term's tokens end."""
+        found: Counter = Counter()
+        token_ids = self.token_ids
+        transitions = self.transitions
+        fail = self.fail
+        outputs = self.outputs
+        width = self.width
+        state = 0
+        for token in tokens:
+            token_id = token_ids.get(token)
+            if token_id is None:
+                state = 0
+                continue
+            while True:
+                child = transitions.get(state * width + token_id)
+                if child is not None:
+                    state = child
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            matched = outputs[state]
+            if matched:
+                found.update(matched)
+        return found
+
+
+def build_token_trie(terms: Iterable[Tuple[int, Sequence[str]]]) -> Dict[str, object]:
+    """Reference nested-dict trie; term ids sit under :data:`TRIE_TERM_IDS_KEY`."""
+    root: Dict[str, object] = {}
+    for term_id, tokens in terms:
+        node = root
+        for token in tokens:
+            child = node.get(token)
+            if not isinstance(child, dict):
+                child = {}
+                node[token] = child
+            node = child
+        ids = node.get(TRIE_TERM_IDS_KEY)
+        if not isinstance(ids, list):
+            ids = []
+            node[TRIE_TERM_IDS_KEY] = ids
+        ids.append(term_id)
+    return root
+
+
+def count_trie_matches(tokens: Sequence[str], trie: Mapping[str, object]) -> Counter:
+    """Reference matcher: walk the trie from every start token."""
+    found: Counter = Counter()
+    count = len(tokens)
+    for start in range(count):
+        node = trie.get(tokens[start])
+        if not isinstance(node, dict):
+            continue
+
+        ids = node.get(TRIE_TERM_IDS_KEY)
+        if isinstance(ids, list):
+            for term_id in ids:
+                found[term_id] += 1
+
+        idx = start + 1
+        while idx < count:
+            nxt = node.get(tokens[idx])
+            if not isinstance(nxt, dict):
+                break
+            node = nxt
+            ids = node.get(TRIE_TERM_IDS_KEY)
+            if isinstance(ids, list):
+                for term_id in ids:
+                    found[term_id] += 1
+            idx += 1
+    return found
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""openpyxl I/O for the allergen workbook scripts.
+
+Ingestion opens the workbook in ``read_only`` mode and walks rows as values,
+so generated sheets from earlier runs are never materialized as cells.
+
+Output goes through :func:`write_workbook`, which loads the workbook in normal
+mode, so hand-maintained sheets keep everything openpyxl round-trips (styles,
+data validations, conditional formatting, hyperlinks, comments, row heights,
+defined names). Only the generated :class:`SheetRows` are removed and
+recreated, at the end of the workbook.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import openpyxl
+
+
+class SheetRows:
+    """Rows of a generated sheet, collected as plain values and written out on save."""
+
+    def __init__(self, title: str) -> None:
+        self.title = title
+        self.rows: List[List[object]] = []
+        self.freeze_panes: str | None = None
+
+    def append(self, values: Sequence[object]) -> None:
+        self.rows.append(list(values))
+
+
+def open_workbook_read_only(path: Path) -> openpyxl.Workbook:
+    """Open ``path`` for ingestion; close it once every sheet has been read."""
+    return openpyxl.load_workbook(path, read_only=True)
+
+
+def iter_sheet_values(
+    workbook: openpyxl.Workbook,
+    sheet_name: str,
+    min_row: int = 2,
+    max_col: int | None = None,
+) -> Iterator[Tuple[int, Tuple[object, ...]]]:
+    """``(row_number, values)`` for every row of ``sheet_name`` from ``min_row`` on."""
+    worksheet = workbook[sheet_name]
+    for row_number, values in enumerate(
+        worksheet.iter_rows(min_row=min_row, max_col=max_col, values_only=True),
+        start=min_row,
+    ):
+        yield row_number, values
+
+
+def write_workbook(
+    input_path: Path,
+    output_path: Path,
+    generated: Sequence[SheetRows],
+    appended_rows: Mapping[str, Sequence[Sequence[object]]] | None = None,
+) -> None:
+    """Write ``input_path`` with its ``generated`` sheets replaced to ``output_path``.
+
+    Input sheets named like a generated sheet are removed and the generated
+    sheets are added at the end; every other sheet is left as loaded.
+    ``appended_rows`` adds rows after the content of a kept sheet. The output
+    is written to a temporary file and moved into place, so ``output_path``
+    may equal ``input_path``.
+    """
+    appended_rows = appended_rows or {}
+    generated_titles = {sheet.title for sheet in generated}
+    output_path = Path(output_path)
+    temp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+
+    workbook = openpyxl.load_workbook(input_path)
+    missing = sorted(title for title in appended_rows if title not in workbook.sheetnames or title in generated_titles)
+    if missing:
+        raise RuntimeError(f"Cannot append rows to sheets that are not kept: {', '.join(missing)}")
+    for title, rows in appended_rows.items():
+        worksheet = workbook[title]
+        for values in rows:
+            worksheet.append(list(values))
+    for sheet in generated:
+        if sheet.title in workbook.sheetnames:
+            workbook.remove(workbook[sheet.title])
+        worksheet = workbook.create_sheet(sheet.title)
+        for values in sheet.rows:
+            worksheet.append(values)
+        if sheet.freeze_panes:
+            worksheet.freeze_panes = sheet.freeze_panes
+    workbook.save(temp_path)
+    os.replace(temp_path, output_path)
+
+
+class PhaseTimings:
+    """Wall-clock seconds per named phase; each :meth:`lap` closes the phase running since the previous one."""
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self._lap_started = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        now = time.perf_counter()
+        self.seconds[name] = self.seconds.get(name, 0.0) + now - self._lap_started
+        self._lap_started = now
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.seconds.items())